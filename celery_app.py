@@ -16,7 +16,7 @@
     "voicebridge",
     broker=settings.celery_broker_url,
     backend=settings.celery_result_backend,
-    include=["tasks.transcription_tasks"],
+    include=["src.tasks.transcription_tasks", "src.tasks.modular_tasks"],
 )
 
 # Celery configuration
@@ -29,7 +29,11 @@
     task_track_started=True,
     task_time_limit=300,  # 5 minutes
     task_soft_time_limit=240,  # 4 minutes
+    # Audio tasks are large and slow: acknowledge after completion so each worker process
+    # holds one task at a time instead of prefetching files other workers could start
     worker_prefetch_multiplier=1,
+    task_acks_late=True,
+    task_reject_on_worker_lost=True,
     worker_max_tasks_per_child=1000,
 )
 
@@ -40,6 +40,12 @@ class Settings(BaseSettings):
     # Celery Configuration - Background task processing (using in-memory for testing)
     celery_broker_url: str = "memory://"
     celery_result_backend: str = "cache+memory://"
+    # Job queue for POST /transcribe?background=true: state backend (memory, sqlite or redis),
+    # jobs run at once, and how long finished results stay queryable
+    job_queue_backend: str = os.getenv("JOB_QUEUE_BACKEND", "memory")
+    job_queue_sqlite_path: str = os.getenv("JOB_QUEUE_SQLITE_PATH", "secure_storage/jobs.db")
+    job_queue_concurrency: int = int(os.getenv("JOB_QUEUE_CONCURRENCY", "2"))
+    job_result_ttl_seconds: int = int(os.getenv("JOB_RESULT_TTL_SECONDS", "3600"))
 
     # API Configuration - Server host, port, and debug settings
     api_host: str = "0.0.0.0"
@@ -55,6 +61,45 @@ class Settings(BaseSettings):
     openai_api_key: str = os.getenv("OPENAI_API_KEY", "")  # Set in .env file
     default_language: str = "en"  # Default language for transcription
 
+    # Transcription Backend - "openai" (Whisper API, mock without key) or "stub" (deterministic, for load tests)
+    transcription_backend: str = os.getenv("TRANSCRIPTION_BACKEND", "openai")
+    stub_latency_distribution: str = os.getenv("STUB_LATENCY_DISTRIBUTION", "fixed")  # fixed/uniform/normal/lognormal
+    stub_latency_ms: float = float(os.getenv("STUB_LATENCY_MS", "0"))
+    stub_latency_jitter_ms: float = float(os.getenv("STUB_LATENCY_JITTER_MS", "0"))
+    stub_latency_sigma: float = float(os.getenv("STUB_LATENCY_SIGMA", "0.5"))
+    stub_error_rate: float = float(os.getenv("STUB_ERROR_RATE", "0"))
+    stub_max_concurrency: int = int(os.getenv("STUB_MAX_CONCURRENCY", "0"))  # 0 = unlimited
+    stub_seed: int = int(os.getenv("STUB_SEED", "0"))
+    stub_fixed_text: str = os.getenv("STUB_FIXED_TEXT", "")
+
+    # Voice Activity Detection - drops silence/noise before any transcription backend
+    vad_enabled: bool = os.getenv("VAD_ENABLED", "true").lower() == "true"
+    vad_hangover_ms: int = int(os.getenv("VAD_HANGOVER_MS", "300"))  # pauses longer than this split segments
+    vad_min_speech_ms: int = int(os.getenv("VAD_MIN_SPEECH_MS", "120"))
+    vad_energy_margin_db: float = float(os.getenv("VAD_ENERGY_MARGIN_DB", "10"))  # dB above the noise floor
+    vad_max_segment_seconds: float = float(os.getenv("VAD_MAX_SEGMENT_SECONDS", "15"))
+    vad_session_ttl_seconds: int = int(os.getenv("VAD_SESSION_TTL_SECONDS", "300"))
+
+    # Negotiated raw ingest (PCM/Opus frames) - per-session ring buffer length
+    ingest_ring_seconds: float = float(os.getenv("INGEST_RING_SECONDS", "10"))
+    # With VAD disabled, raw frames are sent for transcription in chunks of at least this length
+    ingest_min_chunk_seconds: float = float(os.getenv("INGEST_MIN_CHUNK_SECONDS", "1.0"))
+
+    # Long-form Transcription - uploads this long are split at silence and transcribed segment-parallel
+    longform_enabled: bool = os.getenv("LONGFORM_ENABLED", "true").lower() == "true"
+    longform_min_duration_seconds: float = float(os.getenv("LONGFORM_MIN_DURATION_SECONDS", "30"))
+    longform_max_segment_seconds: float = float(os.getenv("LONGFORM_MAX_SEGMENT_SECONDS", "30"))
+    longform_overlap_seconds: float = float(os.getenv("LONGFORM_OVERLAP_SECONDS", "1.0"))
+    longform_merge_gap_seconds: float = float(os.getenv("LONGFORM_MERGE_GAP_SECONDS", "0.3"))
+    longform_max_concurrency: int = int(os.getenv("LONGFORM_MAX_CONCURRENCY", "4"))
+
+    # Resampling - filter kernels are cached per (source rate, target rate, quality)
+    resampler_quality: str = os.getenv("RESAMPLER_QUALITY", "medium")  # low, medium or high
+    resampler_cache_size: int = int(os.getenv("RESAMPLER_CACHE_SIZE", "32"))
+
+    # Streaming Features - per-session MFCC/spectral features and summaries for realtime audio
+    streaming_features_enabled: bool = os.getenv("STREAMING_FEATURES_ENABLED", "false").lower() == "true"
+
     # Weights & Biases Configuration
     wandb_api_key: str = os.getenv("WANDB_API_KEY", "")
     wandb_project: str = os.getenv("WANDB_PROJECT", "voicebridge")
@@ -62,6 +107,10 @@ class Settings(BaseSettings):
     # MLFlow Configuration
     mlflow_tracking_uri: str = os.getenv("MLFLOW_TRACKING_URI", "http://localhost:5000")
 
+    # Profiling Configuration - per-stage timing spans and the sampling profiler endpoint
+    profiling_enabled: bool = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+    profiling_endpoint_enabled: bool = os.getenv("PROFILING_ENDPOINT_ENABLED", "false").lower() == "true"
+
     # Security Configuration
     secret_key: str = os.getenv("SECRET_KEY", "your-secret-key-change-in-production")
     algorithm: str = "HS256"
@@ -89,6 +138,43 @@ class Settings(BaseSettings):
     kafka_bootstrap_servers: str = os.getenv("KAFKA_BOOTSTRAP_SERVERS", "localhost:9092")
     kafka_audio_topic: str = os.getenv("KAFKA_AUDIO_TOPIC", "voicebridge-audio")
     kafka_transcription_topic: str = os.getenv("KAFKA_TRANSCRIPTION_TOPIC", "voicebridge-transcription")
+    # Producer batching: wait up to linger_ms to fill batches of up to max_batch_size bytes per partition
+    kafka_linger_ms: int = int(os.getenv("KAFKA_LINGER_MS", "10"))
+    kafka_max_batch_size: int = int(os.getenv("KAFKA_MAX_BATCH_SIZE", "262144"))
+    # Compression per topic: none, gzip, snappy, lz4 or zstd (lz4/zstd need their libraries installed)
+    kafka_audio_compression: str = os.getenv("KAFKA_AUDIO_COMPRESSION", "none")
+    kafka_transcription_compression: str = os.getenv("KAFKA_TRANSCRIPTION_COMPRESSION", "gzip")
+    # Consumer: records handled at once (per-session order is kept), fetched records per partition
+    # before it is paused, and minimum interval between manual offset commits
+    kafka_consumer_concurrency: int = int(os.getenv("KAFKA_CONSUMER_CONCURRENCY", "4"))
+    kafka_consumer_max_buffered: int = int(os.getenv("KAFKA_CONSUMER_MAX_BUFFERED", "100"))
+    kafka_commit_interval_ms: int = int(os.getenv("KAFKA_COMMIT_INTERVAL_MS", "1000"))
+    # Failed records: handler attempts, backoff before the first retry, and the topic records go to
+    # after the last attempt (empty: leave them uncommitted, so they are redelivered on restart)
+    kafka_handler_max_attempts: int = int(os.getenv("KAFKA_HANDLER_MAX_ATTEMPTS", "3"))
+    kafka_handler_retry_backoff_ms: int = int(os.getenv("KAFKA_HANDLER_RETRY_BACKOFF_MS", "200"))
+    kafka_dead_letter_topic: str = os.getenv("KAFKA_DEAD_LETTER_TOPIC", "voicebridge-audio-dlq")
+    # Idempotent producers (no duplicates from broker retries; implies acks=all), and the store of
+    # processed chunk ids that lets consumers skip redelivered chunks (local LRU, optionally Redis)
+    kafka_enable_idempotence: bool = os.getenv("KAFKA_ENABLE_IDEMPOTENCE", "true").lower() == "true"
+    idempotency_cache_size: int = int(os.getenv("IDEMPOTENCY_CACHE_SIZE", "10000"))
+    idempotency_ttl_seconds: int = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "3600"))
+    idempotency_redis_enabled: bool = os.getenv("IDEMPOTENCY_REDIS_ENABLED", "false").lower() == "true"
+    # JSON producer (kafka_producer): broker acknowledgements (0, 1 or all), outbox capacity in
+    # messages, and messages handed to the client per batch
+    kafka_producer_acks: str = os.getenv("KAFKA_PRODUCER_ACKS", "all")
+    kafka_outbox_size: int = int(os.getenv("KAFKA_OUTBOX_SIZE", "1000"))
+    kafka_outbox_batch_size: int = int(os.getenv("KAFKA_OUTBOX_BATCH_SIZE", "100"))
+    # Claim-check: audio payloads above the threshold go to the content-addressed blob store and
+    # only their sha256 reference is sent on Kafka
+    claim_check_enabled: bool = os.getenv("CLAIM_CHECK_ENABLED", "false").lower() == "true"
+    claim_check_threshold_bytes: int = int(os.getenv("CLAIM_CHECK_THRESHOLD_BYTES", "262144"))
+    blob_store_path: str = os.getenv("BLOB_STORE_PATH", "secure_storage/blobs")
+    # Audio staged for Celery task messages; kept apart so the cleanup task never purges claim-check blobs
+    task_blob_store_path: str = os.getenv("TASK_BLOB_STORE_PATH", "secure_storage/task_blobs")
+    # Where streaming inference runs: "local" (in the API process) or "kafka" (separate inference
+    # workers consume the audio topic and the API routes their results back to the WebSockets)
+    inference_mode: str = os.getenv("INFERENCE_MODE", "local")
 
     def model_post_init(self, __context: Any) -> None:
         # If a password is provided via .env, ensure the connection string includes it
@@ -63,6 +63,12 @@ async def send_message(self, message: str, client_id: str):
 preprocessing_service = get_preprocessing_service()
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Finish background feature analytics on shutdown"""
+    await ml_service.stop()
+
+
 @app.get("/")
 async def root():
     """Home page"""
@@ -84,6 +84,12 @@ async def send_message(self, message: str, client_id: str):
     db_connected = False
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Finish background feature analytics on shutdown"""
+    await ml_service.stop()
+
+
 @app.get("/")
 async def root():
     """Home page"""
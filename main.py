@@ -13,13 +13,14 @@
 import json
 import logging
 import time
+import uuid
 from datetime import datetime
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 
 import uvicorn
 from fastapi import FastAPI, File, HTTPException, Request, UploadFile, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
 from fastapi_limiter import FastAPILimiter
 from prometheus_fastapi_instrumentator import Instrumentator
 
@@ -30,21 +31,27 @@
 # from src.routes.auth_routes import router as auth_router  # Temporarily disabled
 # from src.routes.monitoring_routes import router as monitoring_router  # Temporarily disabled
 # from src.routes.realtime_routes import router as realtime_router  # Temporarily disabled
+from src.services.audio_frame import AudioFrame
 from src.services.audio_processor import AudioProcessor
 
 # from src.services.auth_service import get_current_user  # Temporarily disabled
 from src.services.encryption_service import encryption_service
 from src.services.grpc_service import grpc_server
+from src.services.ingest_format import IngestFormat
+from src.services.job_queue import FAILURE, REVOKED, SUCCESS, job_queue
 from src.services.kafka_consumer import KafkaConsumer
 from src.services.kafka_producer import KafkaProducer
 from src.services.kafka_stream_service import kafka_stream_service
+from src.services.longform_transcription_service import get_longform_transcription_service
 from src.services.mlflow_service import mlflow_service
 from src.services.model_monitoring_service import model_monitoring_service
-from src.services.openai_whisper_service import get_openai_whisper_service
+from src.services.profiling_service import ProfilerBusyError, sampling_profiler, span
 from src.services.prometheus_service import prometheus_metrics
 from src.services.rate_limiting_service import rate_limiting_service
+from src.services.transcription_backend import get_transcription_service
+from src.services.vad_service import vad_service
 from src.services.wandb_service import wandb_service
-from src.tasks.transcription_tasks import transcribe_audio_task
+from src.tasks.transcription_jobs import summarize_batch, transcribe_audio_job  # noqa: F401 (registers the job)
 from version import get_build_info, get_version
 
 # Configure logging for application monitoring
@@ -85,7 +92,8 @@
 
 # Initialize services
 audio_processor = AudioProcessor()
-whisper_service = get_openai_whisper_service(settings.openai_api_key)
+whisper_service = get_transcription_service(settings.openai_api_key)
+longform_service = get_longform_transcription_service()
 kafka_producer = KafkaProducer()
 kafka_consumer = KafkaConsumer()
 
@@ -211,6 +219,7 @@ async def shutdown_event():
         # Stop real-time services
         await kafka_stream_service.stop()
         await grpc_server.stop()
+        await job_queue.stop()
 
         # Stop monitoring services
         mlflow_service.end_run()
@@ -252,13 +261,39 @@ async def health_check():
     }
 
 
+@app.get("/metrics/app")
+async def get_app_metrics():
+    """Application Prometheus metrics (transcription, stage timings, system)."""
+    return Response(content=prometheus_metrics.get_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@app.get("/debug/profile")
+async def capture_profile(seconds: float = 10.0, interval_ms: float = 5.0):
+    """
+    Sample all threads for N seconds and return folded stacks.
+
+    Feed the output to flamegraph.pl, inferno or speedscope to get a flamegraph.
+    Disabled unless PROFILING_ENDPOINT_ENABLED=true.
+    """
+    if not settings.profiling_endpoint_enabled:
+        raise HTTPException(status_code=404, detail="Profiling endpoint is disabled")
+
+    try:
+        stacks = await asyncio.to_thread(sampling_profiler.capture, seconds, interval_ms / 1000.0)
+    except ProfilerBusyError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    return PlainTextResponse(sampling_profiler.to_folded(stacks))
+
+
 @app.post("/configure")
 async def configure_api_key(api_key: str):
     """Configure OpenAI API key."""
     global whisper_service
     try:
         # Reinitialize service with new API key
-        whisper_service = get_openai_whisper_service(api_key)
+        whisper_service = get_transcription_service(api_key)
+        longform_service.backend = whisper_service
 
         return {
             "status": "success",
@@ -270,108 +305,201 @@ async def configure_api_key(api_key: str):
 
 
 @app.post("/transcribe")
-async def transcribe_audio(audio_file: UploadFile = File(...), current_user=None, request: Request = None):
+async def transcribe_audio(
+    audio_file: UploadFile = File(...),
+    current_user=None,
+    request: Request = None,
+    background: bool = False,
+    priority: int = 0,
+):
     """
     Transcribe audio file endpoint.
     Accepts audio files and returns transcription results.
+    With background=true the file is queued as a job (higher priority starts first)
+    and the response carries a task_id to poll at GET /transcribe/{task_id}.
     Requires authentication.
     """
     try:
+        user_id = current_user.id if current_user else None
+
         # Apply rate limiting
-        client_id = rate_limiting_service.get_client_identifier(request, current_user.id)
-        await rate_limiting_service.enforce_rate_limit(client_id, "transcription")
+        with span("rate_limit"):
+            client_id = rate_limiting_service.get_client_identifier(request, user_id)
+            await rate_limiting_service.enforce_rate_limit(client_id, "transcription")
+
+        # Validate file size
+        with span("upload_read"):
+            content = await audio_file.read()
+        if len(content) > settings.max_audio_size_mb * 1024 * 1024:
+            raise HTTPException(status_code=400, detail=f"File too large. Maximum size: {settings.max_audio_size_mb}MB")
 
-        # Validate file type
-        if not audio_processor.is_valid_audio_format(audio_file.filename):
+        # Validate file type (magic bytes; the extension only for unrecognized content)
+        if not audio_processor.is_valid_audio_format(audio_file.filename, content):
             raise HTTPException(
                 status_code=400,
                 detail=f"Unsupported audio format. Supported formats: {settings.supported_audio_formats}",
             )
 
-        # Validate file size
-        content = await audio_file.read()
-        if len(content) > settings.max_audio_size_mb * 1024 * 1024:
-            raise HTTPException(status_code=400, detail=f"File too large. Maximum size: {settings.max_audio_size_mb}MB")
-
         # Encrypt audio file for secure storage
-        encrypted_content, metadata = encryption_service.encrypt_audio_file(content, audio_file.filename)
+        with span("encryption"):
+            encrypted_content, metadata = encryption_service.encrypt_audio_file(content, audio_file.filename)
 
         # Process audio and send to Kafka
         audio_data = {
             "filename": audio_file.filename,
             "content": encrypted_content,  # Store encrypted content
             "content_type": audio_file.content_type,
-            "user_id": current_user.id,
+            "user_id": user_id,
             "encryption_metadata": metadata,
         }
 
         # Send to Kafka for processing
-        await kafka_producer.send_audio(audio_data)
+        with span("kafka_send"):
+            await kafka_producer.send_audio(audio_data)
+
+        if background:
+            with span("job_dispatch"):
+                task_id = await job_queue.submit("transcribe_audio", content, audio_file.filename, priority=priority)
+            return JSONResponse(
+                status_code=202,
+                content={
+                    "message": "Audio queued for transcription",
+                    "task_id": task_id,
+                    "status": "queued",
+                    "user_id": user_id,
+                    "encrypted": True,
+                },
+            )
 
-        # Start Celery task for transcription
-        transcribe_audio_task.delay(audio_data)
+        # Decode once; VAD, long-form splitting and local models all share this frame
+        with span("decode"):
+            frame = await asyncio.get_running_loop().run_in_executor(
+                None, AudioFrame.try_from_bytes, content, settings.sample_rate
+            )
+        audio = frame or content
+        audio_duration = frame.duration if frame else len(content) / (16000 * 2)  # Rough estimate if undecodable
 
         # Process with Celery task
         start_time = time.time()
-        result = await whisper_service.transcribe_audio_bytes(content, language=settings.default_language)
+        if vad_service.should_transcribe(audio):
+            # Long uploads are split at silence and transcribed segment-parallel
+            transcriber = longform_service if settings.longform_enabled else whisper_service
+            with span("inference"):
+                result = await transcriber.transcribe_audio_bytes(audio, language=settings.default_language)
+        else:
+            # Silence or noise only - skip the model entirely
+            result = {"text": "", "confidence": 0.0, "language": settings.default_language, "speech_detected": False}
         processing_time = time.time() - start_time
 
-        # Record model performance metrics
-        confidence = result.get("confidence", 0.0)
-        model_monitoring_service.record_model_performance(
-            model_name="whisper",
-            accuracy=confidence,  # Using confidence as accuracy proxy
-            confidence=confidence,
-            processing_time=processing_time,
-            error_occurred="error" in result,
-        )
+        with span("metrics_fanout"):
+            # Record model performance metrics
+            confidence = result.get("confidence", 0.0)
+            model_monitoring_service.record_model_performance(
+                model_name="whisper",
+                accuracy=confidence,  # Using confidence as accuracy proxy
+                confidence=confidence,
+                processing_time=processing_time,
+                error_occurred="error" in result,
+            )
 
-        # Log to MLFlow
-        mlflow_service.log_transcription_metrics(
-            predicted_text=result.get("text", ""),
-            actual_text="",  # No ground truth available
-            confidence=confidence,
-            processing_time=processing_time,
-            audio_duration=len(content) / (16000 * 2),  # Rough estimate
-            model_name="whisper",
-        )
+            # Log to MLFlow
+            mlflow_service.log_transcription_metrics(
+                predicted_text=result.get("text", ""),
+                actual_text="",  # No ground truth available
+                confidence=confidence,
+                processing_time=processing_time,
+                audio_duration=audio_duration,
+                model_name="whisper",
+            )
 
-        # Log to W&B
-        wandb_service.log_transcription_metrics(
-            predicted_text=result.get("text", ""),
-            actual_text="",
-            confidence=confidence,
-            processing_time=processing_time,
-            audio_duration=len(content) / (16000 * 2),
-            model_name="whisper",
-        )
+            # Log to W&B
+            wandb_service.log_transcription_metrics(
+                predicted_text=result.get("text", ""),
+                actual_text="",
+                confidence=confidence,
+                processing_time=processing_time,
+                audio_duration=audio_duration,
+                model_name="whisper",
+            )
 
-        # Record Prometheus metrics
-        prometheus_metrics.record_transcription(
-            model="whisper",
-            status="success" if "error" not in result else "failure",
-            duration=processing_time,
-            confidence=confidence,
-        )
+            # Record Prometheus metrics
+            prometheus_metrics.record_transcription(
+                model="whisper",
+                status="success" if "error" not in result else "failure",
+                duration=processing_time,
+                confidence=confidence,
+            )
+
+        with span("serialization"):
+            return JSONResponse(
+                status_code=200,
+                content={
+                    "message": "Audio transcribed successfully",
+                    "transcription": result.get("text", ""),
+                    "confidence": confidence,
+                    "language": result.get("language", settings.default_language),
+                    "user_id": user_id,
+                    "encrypted": True,
+                    "processing_time": processing_time,
+                    "model": "whisper",
+                    **({"segments": result["segments"]} if result.get("long_form") else {}),
+                },
+            )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error processing audio: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@app.post("/transcribe/batch")
+async def transcribe_audio_batch(
+    audio_files: List[UploadFile] = File(...), current_user=None, request: Request = None, priority: int = 0
+):
+    """
+    Queue several audio files as one batch job.
+    Files are transcribed in parallel by the job queue; GET /transcribe/{task_id} reports
+    progress as files finish and, at the end, per-file results, failures and throughput.
+    Requires authentication.
+    """
+    try:
+        user_id = current_user.id if current_user else None
+
+        with span("rate_limit"):
+            client_id = rate_limiting_service.get_client_identifier(request, user_id)
+            await rate_limiting_service.enforce_rate_limit(client_id, "transcription")
+
+        arguments = []
+        with span("upload_read"):
+            for audio_file in audio_files:
+                content = await audio_file.read()
+                if len(content) > settings.max_audio_size_mb * 1024 * 1024:
+                    raise HTTPException(
+                        status_code=400,
+                        detail=f"{audio_file.filename} is too large. Maximum size: {settings.max_audio_size_mb}MB",
+                    )
+                arguments.append((content, audio_file.filename))
 
+        with span("job_dispatch"):
+            task_id = await job_queue.submit_group(
+                "transcribe_audio", arguments, priority=priority, aggregate=summarize_batch
+            )
         return JSONResponse(
-            status_code=200,
+            status_code=202,
             content={
-                "message": "Audio transcribed successfully",
-                "transcription": result.get("text", ""),
-                "confidence": confidence,
-                "language": result.get("language", settings.default_language),
-                "user_id": current_user.id,
-                "encrypted": True,
-                "processing_time": processing_time,
-                "model": "whisper",
+                "message": "Audio batch queued for transcription",
+                "task_id": task_id,
+                "total_files": len(arguments),
+                "status": "queued",
+                "user_id": user_id,
             },
         )
 
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error processing audio: {e}")
+        logger.error(f"Error queueing audio batch: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
@@ -381,6 +509,20 @@ async def get_transcription_result(task_id: str):
     Get transcription result for a specific task.
     """
     try:
+        job = await job_queue.get(task_id)
+        if job is not None:
+            if job["state"] == SUCCESS:
+                return {"task_id": task_id, "status": "completed", "result": job["result"]}
+            if job["state"] == FAILURE:
+                # Batches keep their per-file outcomes even when every file failed
+                failure = {"task_id": task_id, "status": "failed", "error": job["error"]}
+                return {**failure, "result": job["result"]} if job["result"] is not None else failure
+            if job["state"] == REVOKED:
+                return {"task_id": task_id, "status": "cancelled"}
+            # Progress meta has the Celery update_state shape, e.g. {"progress": 50, "status": "..."}
+            return {"task_id": task_id, "status": "processing", "state": job["state"], "meta": job["meta"]}
+
+        # Tasks dispatched through Celery
         from celery_app import celery_app
 
         result = celery_app.AsyncResult(task_id)
@@ -391,12 +533,29 @@ async def get_transcription_result(task_id: str):
             else:
                 return {"task_id": task_id, "status": "failed", "error": str(result.result)}
         else:
+            from src.tasks.modular_tasks import get_batch_progress
+
+            # Celery batches report per-file progress from their saved group
+            meta = get_batch_progress(task_id)
+            if meta is not None:
+                return {"task_id": task_id, "status": "processing", "state": "PROGRESS", "meta": meta}
             return {"task_id": task_id, "status": "processing"}
     except Exception as e:
         logger.error(f"Error getting task result: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+@app.delete("/transcribe/{task_id}")
+async def cancel_transcription(task_id: str):
+    """
+    Cancel a queued or running transcription job.
+    """
+    cancelled = await job_queue.cancel(task_id)
+    if not cancelled and await job_queue.get(task_id) is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return {"task_id": task_id, "cancelled": cancelled}
+
+
 @app.websocket("/ws/{client_id}")
 async def websocket_endpoint(websocket: WebSocket, client_id: str, token: Optional[str] = None):
     """
@@ -426,14 +585,30 @@ async def websocket_endpoint(websocket: WebSocket, client_id: str, token: Option
             return
 
     await manager.connect(websocket, client_id)
+    ingest_format: Optional[IngestFormat] = None
+    # With INFERENCE_MODE=kafka, chunks go to the inference workers under a session of this connection
+    session_id = str(uuid.uuid4())
+    kafka_user_id = str(user.id) if user else client_id
+    chunk_index = 0
+    if offload_to_workers():
+        kafka_sessions[session_id] = client_id
 
     try:
         while True:
-            # Receive audio data from client
-            data = await websocket.receive_bytes()
+            # Receive audio data (binary) or a format handshake (text) from the client
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+            if message.get("text") is not None:
+                ingest_format = await handle_ingest_handshake(websocket, message["text"], ingest_format)
+                continue
+            data = message.get("bytes")
+            if not data:
+                continue
 
             # Encrypt audio data for secure processing
-            encrypted_data, metadata = encryption_service.encrypt_audio_file(data, f"ws_audio_{client_id}")
+            with span("encryption"):
+                encrypted_data, metadata = encryption_service.encrypt_audio_file(data, f"ws_audio_{client_id}")
 
             # Process audio data
             audio_data = {
@@ -445,21 +620,147 @@ async def websocket_endpoint(websocket: WebSocket, client_id: str, token: Option
                 "timestamp": asyncio.get_event_loop().time(),
             }
 
-            # Send to Kafka for real-time processing
-            # await kafka_producer.send_audio_stream(audio_data)
-
-            # Start real-time transcription task
             # Send acknowledgment
-            await websocket.send_text(json.dumps({"type": "acknowledgment", "status": "processing", "encrypted": True}))
+            with span("ws_ack"):
+                await websocket.send_text(
+                    json.dumps({"type": "acknowledgment", "status": "processing", "encrypted": True})
+                )
+
+            if session_id in kafka_sessions:
+                # The worker owning the session gates and transcribes; results come back via route_kafka_result
+                await kafka_stream_service.send_audio_chunk(
+                    session_id,
+                    kafka_user_id,
+                    data,
+                    **kafka_format_fields(ingest_format),
+                    chunk_index=chunk_index,
+                )
+                chunk_index += 1
+                continue
+
+            # Gate on voice activity in arrival order; only closed speech segments reach the model
+            payloads = vad_service.gate(client_id, data, ingest_format=ingest_format)
+            if not payloads:
+                speaking = vad_service.is_speaking(client_id)
+                await websocket.send_text(
+                    json.dumps(
+                        {
+                            "type": "info",
+                            "message": "Listening" if speaking else "No speech detected in audio",
+                            "vad": "speech" if speaking else "silence",
+                            "timestamp": time.time(),
+                        }
+                    )
+                )
 
             # Process audio directly (without Celery)
-            asyncio.create_task(process_audio_directly(websocket, audio_data, client_id, user))
+            for payload in payloads:
+                segment_data = audio_data if payload is data else {**audio_data, "audio_bytes": payload}
+                asyncio.create_task(process_audio_directly(websocket, segment_data, client_id, user))
 
     except WebSocketDisconnect:
+        vad_service.end_session(client_id)
         manager.disconnect(client_id)
     except Exception as e:
         logger.error(f"WebSocket error for client {client_id}: {e}")
+        vad_service.end_session(client_id)
         manager.disconnect(client_id)
+    finally:
+        if kafka_sessions.pop(session_id, None) is not None:
+            # Let the worker that owns the session close its open segment and VAD state
+            await kafka_stream_service.send_audio_chunk(
+                session_id,
+                kafka_user_id,
+                b"",
+                **kafka_format_fields(ingest_format),
+                chunk_index=chunk_index,
+                is_final=True,
+            )
+            await kafka_stream_service.cleanup_session(session_id)
+
+
+# /ws sessions whose audio goes to the Kafka inference workers, mapped to their client ids
+kafka_sessions: Dict[str, str] = {}
+
+
+def offload_to_workers() -> bool:
+    """Whether inference runs in Kafka inference workers instead of this process"""
+    return settings.inference_mode == "kafka" and kafka_stream_service.producer is not None
+
+
+def kafka_format_fields(ingest_format: Optional[IngestFormat]) -> dict:
+    """AudioChunk format fields for a /ws stream (raw codecs from the handshake, containers otherwise)"""
+    if ingest_format is None or not ingest_format.is_raw:
+        return {}
+    return {
+        "format": ingest_format.codec,
+        "sample_rate": ingest_format.sample_rate,
+        "channels": ingest_format.channels,
+    }
+
+
+async def route_kafka_result(result: dict):
+    """
+    Deliver a result event from an inference worker to its /ws client.
+
+    Every API node sees every result; results for sessions held by other nodes are ignored.
+    """
+    client_id = kafka_sessions.get(result.get("session_id"))
+    if client_id is None:
+        return
+
+    if result.get("status") != "success":
+        message = {
+            "type": "error",
+            "message": f"Transcription failed: {result.get('error_message')}",
+            "timestamp": time.time(),
+        }
+    elif result.get("text", "").strip():
+        message = {
+            "type": "transcription",
+            "text": result["text"].strip(),
+            "confidence": result.get("confidence", 0.0),
+            "language": result.get("language", settings.default_language),
+            "provider": result.get("model_name", "unknown"),
+            "processing_time": result.get("processing_time", 0.0),
+            "timestamp": time.time(),
+        }
+    else:
+        message = {"type": "info", "message": "No speech detected in audio", "timestamp": time.time()}
+    try:
+        await manager.send_message(json.dumps(message), client_id)
+    except Exception as e:
+        logger.warning(f"Could not deliver transcription to client {client_id}: {e}")
+
+
+kafka_stream_service.add_result_handler(route_kafka_result)
+
+
+async def handle_ingest_handshake(
+    websocket: WebSocket, text: str, current: Optional[IngestFormat]
+) -> Optional[IngestFormat]:
+    """
+    Negotiate the stream's wire format from a handshake message.
+
+    Clients that send {"type": "handshake", "codec": "pcm_s16le" | "pcm_f32le" | "opus",
+    "sample_rate": ..., "channels": ..., "frame_ms": ...} may then send bare frames
+    instead of encoded containers. Returns the format in effect afterwards.
+    """
+    try:
+        message = json.loads(text)
+        if not isinstance(message, dict) or message.get("type") != "handshake":
+            return current
+        ingest_format = IngestFormat.from_handshake(message)
+    except (json.JSONDecodeError, ValueError) as e:
+        await websocket.send_text(json.dumps({"type": "error", "message": f"Invalid handshake: {e}"}))
+        return current
+
+    await websocket.send_text(
+        json.dumps(
+            {"type": "handshake_ack", **ingest_format.to_dict(), "server_sample_rate": settings.sample_rate}
+        )
+    )
+    return ingest_format
 
 
 # Background task to process audio directly (without Celery)
@@ -486,7 +787,8 @@ async def process_audio_directly(websocket: WebSocket, audio_data: dict, client_
         try:
             start_time = time.time()
             # Use English as default language as requested
-            result = await whisper_service.transcribe_audio_bytes(audio_bytes, language=settings.default_language)
+            with span("inference"):
+                result = await whisper_service.transcribe_audio_bytes(audio_bytes, language=settings.default_language)
             processing_time = time.time() - start_time
 
             if "error" in result:
@@ -518,55 +820,57 @@ async def process_audio_directly(websocket: WebSocket, audio_data: dict, client_
             language = result.get("language", settings.default_language)
             provider = result.get("provider", "unknown")
 
-            # Record performance metrics
-            if user:
-                model_monitoring_service.record_model_performance(
-                    model_name="whisper",
-                    accuracy=confidence,
-                    confidence=confidence,
-                    processing_time=processing_time,
-                    error_occurred=False,
-                )
+            with span("metrics_fanout"):
+                # Record performance metrics
+                if user:
+                    model_monitoring_service.record_model_performance(
+                        model_name="whisper",
+                        accuracy=confidence,
+                        confidence=confidence,
+                        processing_time=processing_time,
+                        error_occurred=False,
+                    )
 
-                # Log to MLFlow and W&B
-                mlflow_service.log_transcription_metrics(
-                    predicted_text=text,
-                    actual_text="",
-                    confidence=confidence,
-                    processing_time=processing_time,
-                    audio_duration=len(audio_bytes) / (16000 * 2),
-                    model_name="whisper",
-                )
+                    # Log to MLFlow and W&B
+                    mlflow_service.log_transcription_metrics(
+                        predicted_text=text,
+                        actual_text="",
+                        confidence=confidence,
+                        processing_time=processing_time,
+                        audio_duration=len(audio_bytes) / (16000 * 2),
+                        model_name="whisper",
+                    )
 
-                wandb_service.log_transcription_metrics(
-                    predicted_text=text,
-                    actual_text="",
-                    confidence=confidence,
-                    processing_time=processing_time,
-                    audio_duration=len(audio_bytes) / (16000 * 2),
-                    model_name="whisper",
-                )
+                    wandb_service.log_transcription_metrics(
+                        predicted_text=text,
+                        actual_text="",
+                        confidence=confidence,
+                        processing_time=processing_time,
+                        audio_duration=len(audio_bytes) / (16000 * 2),
+                        model_name="whisper",
+                    )
 
-            # Record Prometheus metrics
-            prometheus_metrics.record_transcription(
-                model="whisper", status="success", duration=processing_time, confidence=confidence
-            )
+                # Record Prometheus metrics
+                prometheus_metrics.record_transcription(
+                    model="whisper", status="success", duration=processing_time, confidence=confidence
+                )
 
             if text:
                 # Send successful transcription result
-                await websocket.send_text(
-                    json.dumps(
-                        {
-                            "type": "transcription",
-                            "text": text,
-                            "confidence": confidence,
-                            "language": language,
-                            "provider": provider,
-                            "processing_time": processing_time,
-                            "timestamp": time.time(),
-                        }
+                with span("ws_send"):
+                    await websocket.send_text(
+                        json.dumps(
+                            {
+                                "type": "transcription",
+                                "text": text,
+                                "confidence": confidence,
+                                "language": language,
+                                "provider": provider,
+                                "processing_time": processing_time,
+                                "timestamp": time.time(),
+                            }
+                        )
                     )
-                )
 
                 if provider.startswith("mock"):
                     logger.info(f"Sent mock transcription to client {client_id}: '{text}' (No API key)")
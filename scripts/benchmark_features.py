@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Feature extraction benchmark for VoiceBridge.
+Times the shared-STFT FeatureEngine against the separate librosa calls it
+replaced in AudioPreprocessingService (one STFT per feature, CQT chroma for
+tonnetz), per clip and for a batch of equal-length clips, and checks that the
+features agree.
+
+Usage:
+    python scripts/benchmark_features.py
+    python scripts/benchmark_features.py --clip-seconds 10 --batch-size 64 --output reports/features.json
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+import librosa
+import numpy as np
+
+# Add project root to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.services.feature_engine import ALL_FEATURES, FeatureEngine  # noqa: E402
+
+# Configure logging
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+
+def baseline_features(audio: np.ndarray, sample_rate: int) -> dict:
+    """The previous implementation: one librosa call per feature."""
+    mfccs = librosa.feature.mfcc(y=audio, sr=sample_rate, n_mfcc=13, n_fft=2048, hop_length=512)
+    return {
+        "mfcc": np.vstack([mfccs, librosa.feature.delta(mfccs), librosa.feature.delta(mfccs, order=2)]),
+        "spectral_centroid": librosa.feature.spectral_centroid(y=audio, sr=sample_rate)[0],
+        "spectral_rolloff": librosa.feature.spectral_rolloff(y=audio, sr=sample_rate)[0],
+        "spectral_bandwidth": librosa.feature.spectral_bandwidth(y=audio, sr=sample_rate)[0],
+        "zero_crossing_rate": librosa.feature.zero_crossing_rate(audio)[0],
+        "chroma": librosa.feature.chroma_stft(y=audio, sr=sample_rate),
+        "tonnetz": librosa.feature.tonnetz(y=audio, sr=sample_rate),
+    }
+
+
+def best_of(func, repeat: int) -> float:
+    """Best wall time of repeat runs."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description="Benchmark shared-STFT feature extraction")
+    parser.add_argument("--clip-seconds", type=float, default=5.0, help="Clip length in seconds")
+    parser.add_argument("--batch-size", type=int, default=32, help="Clips in the batch measurement")
+    parser.add_argument("--sample-rate", type=int, default=16000, help="Sample rate")
+    parser.add_argument("--repeat", type=int, default=3, help="Repetitions per measurement")
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    sr = args.sample_rate
+    rng = np.random.default_rng(0)
+    t = np.arange(int(args.clip_seconds * sr)) / sr
+    clips = [
+        (0.3 * np.sin(2 * np.pi * rng.uniform(100, 400) * t) + 0.05 * rng.standard_normal(t.size)).astype(np.float32)
+        for _ in range(args.batch_size)
+    ]
+    engine = FeatureEngine(sample_rate=sr)
+    engine.extract(clips[0])  # warm filter banks and FFT plans
+
+    results = {"clip_seconds": args.clip_seconds, "batch_size": args.batch_size}
+    results["baseline_per_clip_seconds"] = best_of(lambda: baseline_features(clips[0], sr), args.repeat)
+    results["engine_per_clip_seconds"] = best_of(lambda: engine.extract(clips[0]), args.repeat)
+    results["engine_mfcc_only_seconds"] = best_of(lambda: engine.extract(clips[0], ["mfcc"]), args.repeat)
+    results["baseline_batch_seconds"] = best_of(lambda: [baseline_features(c, sr) for c in clips], 1)
+    results["engine_batch_seconds"] = best_of(lambda: engine.extract_batch(clips), args.repeat)
+    results["per_clip_speedup"] = results["baseline_per_clip_seconds"] / results["engine_per_clip_seconds"]
+    results["batch_speedup"] = results["baseline_batch_seconds"] / results["engine_batch_seconds"]
+
+    baseline = baseline_features(clips[0], sr)
+    features = engine.extract(clips[0])
+    results["max_abs_difference"] = {
+        name: float(np.max(np.abs(baseline[name] - features[name]))) for name in ALL_FEATURES
+    }
+    # tonnetz is projected from the STFT chroma rather than a CQT chroma, so it is expected to differ
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        logger.info(f"Benchmark results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
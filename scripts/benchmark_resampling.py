@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Resampling benchmark for VoiceBridge.
+Compares the cached-kernel resampler against per-call resampling, both for
+realtime-sized chunks and for whole recordings:
+
+- librosa.resample per call (soxr, what the services used before)
+- scipy.signal.resample_poly per call (designs its filter on every call)
+- torchaudio.transforms.Resample constructed per call, when torchaudio is installed
+- StreamingResampler and resample_polyphase() with cached kernels
+- resample(), the service default (soxr for whole signals when installed)
+
+Also reports the error at chunk boundaries when chunks are resampled
+independently instead of with a stateful resampler.
+
+Usage:
+    python scripts/benchmark_resampling.py
+    python scripts/benchmark_resampling.py --src-rate 44100 --chunk-ms 20 --output reports/resampling.json
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+import numpy as np
+
+# Add project root to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.services.resampler import (  # noqa: E402
+    StreamingResampler,
+    kernel_cache_info,
+    resample,
+    resample_polyphase,
+)
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def per_call_methods(src_rate: int, dst_rate: int):
+    """Per-call resamplers to compare against, keyed by name."""
+    from math import gcd
+
+    import librosa
+    from scipy.signal import resample_poly
+
+    divisor = gcd(src_rate, dst_rate)
+    methods = {
+        "librosa_per_call": lambda x: librosa.resample(x, orig_sr=src_rate, target_sr=dst_rate),
+        "resample_poly_per_call": lambda x: resample_poly(x, dst_rate // divisor, src_rate // divisor),
+    }
+    try:
+        import torch
+        import torchaudio
+
+        def torchaudio_per_call(x):
+            transform = torchaudio.transforms.Resample(src_rate, dst_rate)
+            return transform(torch.from_numpy(x)).numpy()
+
+        methods["torchaudio_per_call"] = torchaudio_per_call
+    except ImportError:
+        logger.info("torchaudio not installed; skipping its per-call baseline")
+    return methods
+
+
+def best_of(func, repeat: int) -> float:
+    """Best wall time of repeat runs."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description="Benchmark cached-kernel resampling")
+    parser.add_argument("--src-rate", type=int, default=48000, help="Input sample rate")
+    parser.add_argument("--dst-rate", type=int, default=16000, help="Output sample rate")
+    parser.add_argument("--chunk-ms", type=int, default=100, help="Realtime chunk length in milliseconds")
+    parser.add_argument("--stream-seconds", type=float, default=60.0, help="Length of the chunked stream")
+    parser.add_argument("--clip-seconds", type=float, default=600.0, help="Length of the whole-recording test")
+    parser.add_argument("--repeat", type=int, default=3, help="Repetitions per measurement")
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    src, dst = args.src_rate, args.dst_rate
+    rng = np.random.default_rng(0)
+    stream = (rng.standard_normal(int(args.stream_seconds * src)) * 0.1).astype(np.float32)
+    chunk = int(src * args.chunk_ms / 1000)
+    chunks = [stream[i : i + chunk] for i in range(0, len(stream), chunk)]
+    clip = (rng.standard_normal(int(args.clip_seconds * src)) * 0.1).astype(np.float32)
+
+    methods = per_call_methods(src, dst)
+    results = {"src_rate": src, "dst_rate": dst, "chunk_ms": args.chunk_ms, "chunks": len(chunks)}
+
+    # Realtime chunks: total time to resample the whole stream chunk by chunk
+    chunked = {}
+    for name, method in methods.items():
+        chunked[name] = best_of(lambda: [method(c) for c in chunks], args.repeat)
+    chunked["cached_polyphase"] = best_of(lambda: [resample_polyphase(c, src, dst) for c in chunks], args.repeat)
+
+    def run_streaming():
+        resampler = StreamingResampler(src, dst)
+        return [resampler.process(c) for c in chunks] + [resampler.flush()]
+
+    chunked["streaming_resampler"] = best_of(run_streaming, args.repeat)
+    results["chunked_seconds"] = chunked
+    results["chunk_latency_us"] = {name: seconds / len(chunks) * 1e6 for name, seconds in chunked.items()}
+
+    # Whole recordings
+    whole = {name: best_of(lambda: method(clip), args.repeat) for name, method in methods.items()}
+    whole["cached_polyphase"] = best_of(lambda: resample_polyphase(clip, src, dst), args.repeat)
+    whole["resample"] = best_of(lambda: resample(clip, src, dst), args.repeat)
+    results["clip_seconds"] = args.clip_seconds
+    results["whole_clip_seconds"] = whole
+
+    # Chunk boundaries: independent chunks vs the stateful resampler, against one pass over the stream
+    reference = resample_polyphase(stream, src, dst)
+    independent = np.concatenate([resample_polyphase(c, src, dst) for c in chunks])
+    streamed = np.concatenate(run_streaming())
+    results["boundary_max_error"] = {
+        "independent_chunks": float(np.max(np.abs(independent - reference))),
+        "streaming_resampler": float(np.max(np.abs(streamed - reference))),
+    }
+    results["kernel_cache"] = kernel_cache_info()
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        logger.info(f"Benchmark results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
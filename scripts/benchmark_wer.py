@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+WER/CER benchmark for VoiceBridge.
+Compares the shared evaluation metrics against the pure-Python Levenshtein
+loop the tracking services used to run on long transcripts.
+
+Usage:
+    python scripts/benchmark_wer.py --chars 10000 --error-rate 0.1
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import time
+
+# Add project root to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.services.evaluation.metrics import (  # noqa: E402
+    edit_distance,
+    evaluate_batch,
+    word_error_counts,
+)
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+VOCABULARY = (
+    "the a voice bridge speech recognition real time audio stream model whisper text "
+    "transcription latency accuracy hello world test system microphone levels good"
+).split()
+
+
+def levenshtein_loop(s1, s2) -> int:
+    """The O(n*m) pure-Python row loop used as the baseline"""
+    previous_row = list(range(len(s2) + 1))
+    for i, c1 in enumerate(s1):
+        current_row = [i + 1]
+        for j, c2 in enumerate(s2):
+            current_row.append(min(previous_row[j + 1] + 1, current_row[j] + 1, previous_row[j] + (c1 != c2)))
+        previous_row = current_row
+    return previous_row[-1]
+
+
+def make_transcript_pair(num_chars: int, error_rate: float, seed: int):
+    """Generate a reference of roughly num_chars characters and a noisy hypothesis."""
+    rng = random.Random(seed)
+    words = []
+    length = 0
+    while length < num_chars:
+        word = rng.choice(VOCABULARY)
+        words.append(word)
+        length += len(word) + 1
+
+    hypothesis = []
+    for word in words:
+        roll = rng.random()
+        if roll < error_rate / 3:
+            continue  # deletion
+        if roll < 2 * error_rate / 3:
+            hypothesis.append(rng.choice(VOCABULARY))  # substitution
+        elif roll < error_rate:
+            hypothesis.extend([word, rng.choice(VOCABULARY)])  # insertion
+        else:
+            hypothesis.append(word)
+
+    return " ".join(words), " ".join(hypothesis)
+
+
+def timed(func, *args, repeat: int = 1):
+    """Run func repeat times and return (best_seconds, result)."""
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description="Benchmark WER/CER computation on long transcripts")
+    parser.add_argument("--chars", type=int, default=10000, help="Reference length in characters")
+    parser.add_argument("--error-rate", type=float, default=0.1, help="Synthetic word error rate")
+    parser.add_argument("--batch", type=int, default=100, help="Pairs in the batch benchmark")
+    parser.add_argument("--repeat", type=int, default=3, help="Repetitions per measurement")
+    parser.add_argument("--skip-baseline", action="store_true", help="Skip the slow pure-Python baseline")
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    reference, hypothesis = make_transcript_pair(args.chars, args.error_rate, seed=42)
+    results = {
+        "reference_chars": len(reference),
+        "reference_words": len(reference.split()),
+    }
+
+    seconds, distance = timed(edit_distance, reference, hypothesis, repeat=args.repeat)
+    results["char_distance"] = distance
+    results["myers_char_seconds"] = seconds
+
+    seconds, counts = timed(word_error_counts, reference, hypothesis, repeat=args.repeat)
+    results["word_counts"] = counts.to_dict()
+    results["vectorized_wer_seconds"] = seconds
+
+    if not args.skip_baseline:
+        seconds, baseline = timed(levenshtein_loop, reference, hypothesis)
+        if baseline != distance:
+            raise AssertionError(f"Distance mismatch: myers={distance} baseline={baseline}")
+        results["baseline_char_seconds"] = seconds
+        results["char_speedup"] = seconds / max(results["myers_char_seconds"], 1e-9)
+
+    pairs = [make_transcript_pair(args.chars // 10, args.error_rate, seed=i) for i in range(args.batch)]
+    seconds, batch = timed(evaluate_batch, [p[0] for p in pairs], [p[1] for p in pairs], repeat=args.repeat)
+    results["batch_pairs"] = args.batch
+    results["batch_seconds"] = seconds
+    results["batch_corpus"] = batch["corpus"]
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        logger.info(f"Benchmark results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Offline model evaluation for VoiceBridge.
+Scores transcription backends over a JSONL manifest and reports WER, CER,
+real-time factor and latency percentiles for every model / thread / batch
+size combination, so model size and thread counts can be chosen per host.
+
+Usage:
+    python scripts/evaluate_models.py data/eval.jsonl --backend whisper --model tiny base --threads 2 4
+    python scripts/evaluate_models.py data/eval.jsonl --backend stub --output reports/eval.parquet
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+
+# Add project root to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.services.evaluation.harness import (  # noqa: E402
+    BACKENDS,
+    EvaluationConfig,
+    run_evaluation,
+    write_results,
+)
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description="Evaluate transcription models over a manifest")
+    parser.add_argument("manifest", help="JSONL manifest with audio path and reference text per line")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default="stub", help="Transcription backend")
+    parser.add_argument("--model", nargs="+", default=[None], help="Model name(s) or size(s) to compare")
+    parser.add_argument("--threads", nargs="+", type=int, default=[None], help="Inference thread count(s)")
+    parser.add_argument("--batch-size", nargs="+", type=int, default=[1], help="Batch size(s)")
+    parser.add_argument("--decode-workers", type=int, default=os.cpu_count() or 2, help="Audio decode processes")
+    parser.add_argument("--language", default="en", help="Language code passed to the backend")
+    parser.add_argument("--sample-rate", type=int, default=16000, help="Decode sample rate")
+    parser.add_argument("--limit", type=int, help="Evaluate only the first N utterances")
+    parser.add_argument("--model-dir", help="Local directory with model weights")
+    parser.add_argument("--device", help="Device for local models (cpu, cuda)")
+    parser.add_argument("--output", default="reports/evaluation.parquet", help="Per-utterance results file")
+    parser.add_argument("--summary", help="Summary JSON path (default: next to --output)")
+    parser.add_argument(
+        "--backend-option",
+        action="append",
+        default=[],
+        metavar="KEY=VALUE",
+        help="Extra backend option, e.g. latency_ms=50 for the stub backend",
+    )
+    parser.add_argument("--offline", action="store_true", help="Forbid model downloads from the Hugging Face hub")
+    args = parser.parse_args()
+
+    if args.offline:
+        os.environ["HF_HUB_OFFLINE"] = "1"
+        os.environ["TRANSFORMERS_OFFLINE"] = "1"
+
+    backend_options = {k: v for k, v in {"model_dir": args.model_dir, "device": args.device}.items() if v}
+    for option in args.backend_option:
+        key, _, value = option.partition("=")
+        try:
+            backend_options[key] = json.loads(value)
+        except ValueError:
+            backend_options[key] = value
+
+    rows = []
+    summaries = []
+    for model in args.model:
+        for threads in args.threads:
+            for batch_size in args.batch_size:
+                config = EvaluationConfig(
+                    backend=args.backend,
+                    model=model,
+                    batch_size=batch_size,
+                    decode_workers=args.decode_workers,
+                    threads=threads,
+                    language=args.language,
+                    sample_rate=args.sample_rate,
+                    limit=args.limit,
+                    backend_options=backend_options,
+                )
+                result = run_evaluation(args.manifest, config)
+                rows.extend(result["rows"])
+                summaries.append(result["summary"])
+                logger.info(json.dumps(result["summary"]))
+
+    output_path = write_results(rows, args.output)
+    summary_path = args.summary or os.path.splitext(output_path)[0] + "_summary.json"
+    with open(summary_path, "w") as f:
+        json.dump(summaries, f, indent=2)
+
+    print(f"{'model':<28} {'threads':>7} {'batch':>5} {'WER':>7} {'CER':>7} {'RTF':>7} {'p50':>8} {'p95':>8}")
+    for s in summaries:
+        print(
+            f"{str(s['model']):<28} {str(s['threads']):>7} {s['batch_size']:>5} "
+            f"{s['wer']:>7.3f} {s['cer'] or 0:>7.3f} {s['rtf']:>7.3f} "
+            f"{s.get('latency_p50', 0):>8.3f} {s.get('latency_p95', 0):>8.3f}"
+        )
+
+    logger.info(f"Results saved to {output_path}, summary saved to {summary_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,446 @@
+#!/usr/bin/env python3
+"""
+Load-generation and latency benchmark for VoiceBridge ingest paths.
+Drives N concurrent synthetic clients against the WebSocket endpoint, the gRPC
+StreamAudio / ProcessAudioChunk RPCs and POST /transcribe, streaming audio at
+real-time pace, and reports latency percentiles, throughput, dropped messages
+and server CPU/RSS as JSON for regression comparisons.
+
+Run the server with TRANSCRIPTION_BACKEND=stub (see STUB_LATENCY_MS and
+friends in .env.example) to measure the stack rather than the model. With the
+VAD gate on, gRPC streams answer once per utterance rather than once per chunk;
+set VAD_ENABLED=false on the server for per-chunk stream latency.
+
+Usage:
+    python scripts/load_benchmark.py --protocol ws grpc-stream --clients 20 --duration 30 --server-pid 1234
+    python scripts/load_benchmark.py --protocol rest --audio samples/hello.wav --output reports/load.json
+    python scripts/load_benchmark.py --protocol ws --compare reports/load_baseline.json
+"""
+import argparse
+import asyncio
+import io
+import json
+import logging
+import os
+import sys
+import time
+import uuid
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+import numpy as np
+import psutil
+import soundfile as sf
+
+# Add project root to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.services.evaluation.harness import latency_percentiles  # noqa: E402
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+PROTOCOLS = ("ws", "grpc-stream", "grpc-unary", "rest")
+RESULT_TYPES = ("transcription", "info", "error")
+
+
+class ProtocolStats:
+    """Counters and latency samples for one protocol"""
+
+    def __init__(self, protocol: str):
+        self.protocol = protocol
+        self.clients = 0
+        self.sent = 0
+        self.received = 0
+        self.errors = 0
+        self.bytes_sent = 0
+        self.audio_seconds = 0.0
+        self.latencies: List[float] = []
+        self.ack_latencies: List[float] = []
+        self.connect_failures = 0
+        self.status_codes: Dict[int, int] = {}
+        self.started = 0.0
+        self.finished = 0.0
+
+    def summary(self) -> Dict[str, Any]:
+        """Return machine-readable results"""
+        elapsed = max(self.finished - self.started, 1e-9)
+        summary = {
+            "clients": self.clients,
+            "sent": self.sent,
+            "received": self.received,
+            "errors": self.errors,
+            "dropped": max(0, self.sent - self.received - self.errors),
+            "connect_failures": self.connect_failures,
+            "elapsed_seconds": elapsed,
+            "throughput_msgs_per_sec": self.received / elapsed,
+            "audio_seconds_per_sec": self.audio_seconds / elapsed,
+            "bytes_sent": self.bytes_sent,
+            **latency_percentiles(self.latencies),
+        }
+        if self.ack_latencies:
+            summary["ack_latency_p50"] = float(np.percentile(self.ack_latencies, 50))
+            summary["ack_latency_p95"] = float(np.percentile(self.ack_latencies, 95))
+        return summary
+
+
+class ResourceSampler:
+    """Samples CPU and RSS of the server process while the benchmark runs"""
+
+    def __init__(self, pid: Optional[int], interval: float = 0.5):
+        self.process = psutil.Process(pid) if pid else None
+        self.interval = interval
+        self.cpu: List[float] = []
+        self.rss: List[int] = []
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self):
+        self.process.cpu_percent(None)
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                # Include worker children (uvicorn --workers, Celery prefork)
+                processes = [self.process] + self.process.children(recursive=True)
+                self.cpu.append(sum(p.cpu_percent(None) for p in processes))
+                self.rss.append(sum(p.memory_info().rss for p in processes))
+            except psutil.Error:
+                break
+
+    def start(self):
+        if self.process:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> Dict[str, Any]:
+        if not self._task:
+            return {}
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        if not self.cpu:
+            return {}
+        return {
+            "pid": self.process.pid,
+            "cpu_percent_mean": float(np.mean(self.cpu)),
+            "cpu_percent_max": float(np.max(self.cpu)),
+            "rss_mb_mean": float(np.mean(self.rss)) / (1024 * 1024),
+            "rss_mb_max": float(np.max(self.rss)) / (1024 * 1024),
+            "samples": len(self.cpu),
+        }
+
+
+def load_audio(path: Optional[str], duration: float, sample_rate: int) -> np.ndarray:
+    """Load a WAV file (looped to duration) or generate speech-like audio"""
+    total = int(duration * sample_rate)
+    if path:
+        audio, file_rate = sf.read(path, dtype="int16", always_2d=True)
+        audio = audio[:, 0]
+        if file_rate != sample_rate:
+            raise ValueError(f"{path} is {file_rate} Hz; pass --sample-rate {file_rate}")
+        repeats = int(np.ceil(total / max(len(audio), 1)))
+        return np.tile(audio, repeats)[:total]
+
+    # Harmonic tone with a syllable-rate envelope and a little noise
+    rng = np.random.default_rng(0)
+    t = np.arange(total) / sample_rate
+    pitch = 140 + 30 * np.sin(2 * np.pi * 0.5 * t)
+    phase = 2 * np.pi * np.cumsum(pitch) / sample_rate
+    voiced = sum(np.sin(k * phase) / k for k in range(1, 6))
+    envelope = 0.5 * (1 + np.sin(2 * np.pi * 4 * t)) * (np.sin(2 * np.pi * 0.25 * t) > -0.3)
+    signal = 0.3 * voiced * envelope + 0.01 * rng.standard_normal(total)
+    return (np.clip(signal, -1, 1) * 32767).astype(np.int16)
+
+
+def make_chunks(audio: np.ndarray, sample_rate: int, chunk_ms: int) -> List[bytes]:
+    """Split audio into standalone WAV chunks (the server decodes each message on its own)"""
+    step = int(sample_rate * chunk_ms / 1000)
+    chunks = []
+    for start in range(0, len(audio), step):
+        buffer = io.BytesIO()
+        sf.write(buffer, audio[start : start + step], sample_rate, format="WAV", subtype="PCM_16")
+        chunks.append(buffer.getvalue())
+    return chunks
+
+
+async def paced(chunks: List[bytes], chunk_seconds: float, realtime: bool):
+    """Yield chunks at real-time pace (chunk i at start + i * chunk_seconds)"""
+    start = time.perf_counter()
+    for index, chunk in enumerate(chunks):
+        if realtime:
+            delay = start + index * chunk_seconds - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        yield chunk
+
+
+async def ws_client(args, client_id: str, chunks: List[bytes], chunk_seconds: float, stats: ProtocolStats):
+    """Stream chunks over /ws/{client_id}; results are matched to sends in FIFO order"""
+    import websockets
+
+    url = args.url.replace("http://", "ws://").replace("https://", "wss://") + f"/ws/{client_id}"
+    pending: Deque[float] = deque()
+    acks: Deque[float] = deque()
+
+    try:
+        async with websockets.connect(url, max_size=None) as websocket:
+
+            async def receive():
+                async for message in websocket:
+                    payload = json.loads(message)
+                    now = time.perf_counter()
+                    if payload.get("type") == "acknowledgment":
+                        if acks:
+                            stats.ack_latencies.append(now - acks.popleft())
+                    elif payload.get("type") in RESULT_TYPES and pending:
+                        stats.latencies.append(now - pending.popleft())
+                        if payload["type"] == "error":
+                            stats.errors += 1
+                        else:
+                            stats.received += 1
+
+            receiver = asyncio.create_task(receive())
+            async for chunk in paced(chunks, chunk_seconds, args.realtime):
+                now = time.perf_counter()
+                pending.append(now)
+                acks.append(now)
+                await websocket.send(chunk)
+                stats.sent += 1
+                stats.bytes_sent += len(chunk)
+                stats.audio_seconds += chunk_seconds
+
+            # Wait for outstanding results, then count the rest as dropped
+            deadline = time.perf_counter() + args.drain_timeout
+            while pending and time.perf_counter() < deadline:
+                await asyncio.sleep(0.05)
+            receiver.cancel()
+    except Exception as e:
+        logger.warning(f"WebSocket client {client_id} failed: {e}")
+        stats.connect_failures += 1
+
+
+def _grpc_modules():
+    """Import generated protobuf modules"""
+    try:
+        from proto import voicebridge_pb2, voicebridge_pb2_grpc
+
+        return voicebridge_pb2, voicebridge_pb2_grpc
+    except ImportError as e:
+        raise SystemExit(f"gRPC protocols need the generated proto modules (python scripts/generate_proto.py): {e}")
+
+
+def _audio_chunk(pb2, session_id: str, chunk: bytes, args):
+    return pb2.AudioChunk(
+        session_id=session_id,
+        user_id="load-benchmark",
+        audio_data=chunk,
+        sample_rate=args.sample_rate,
+        channels=1,
+        format="wav",
+        timestamp=int(time.time() * 1000),
+        language=args.language,
+    )
+
+
+async def grpc_stream_client(args, client_id: str, chunks: List[bytes], chunk_seconds: float, stats: ProtocolStats):
+    """Bidirectional StreamAudio; each response is matched to the oldest unanswered chunk"""
+    import grpc
+
+    pb2, pb2_grpc = _grpc_modules()
+    pending: Deque[float] = deque()
+    failed = pb2.TranscriptionStatus.FAILED
+
+    async def requests():
+        async for chunk in paced(chunks, chunk_seconds, args.realtime):
+            pending.append(time.perf_counter())
+            stats.sent += 1
+            stats.bytes_sent += len(chunk)
+            stats.audio_seconds += chunk_seconds
+            yield _audio_chunk(pb2, client_id, chunk, args)
+
+    try:
+        async with grpc.aio.insecure_channel(args.grpc_target) as channel:
+            stub = pb2_grpc.AudioStreamingServiceStub(channel)
+            call = stub.StreamAudio(requests(), timeout=len(chunks) * chunk_seconds + args.drain_timeout + 30)
+            async for response in call:
+                if pending:
+                    stats.latencies.append(time.perf_counter() - pending.popleft())
+                if response.status == failed:
+                    stats.errors += 1
+                else:
+                    stats.received += 1
+    except Exception as e:
+        logger.warning(f"gRPC stream client {client_id} failed: {e}")
+        stats.connect_failures += 1
+
+
+async def grpc_unary_client(args, client_id: str, chunks: List[bytes], chunk_seconds: float, stats: ProtocolStats):
+    """One ProcessAudioChunk call per chunk"""
+    import grpc
+
+    pb2, pb2_grpc = _grpc_modules()
+
+    async with grpc.aio.insecure_channel(args.grpc_target) as channel:
+        stub = pb2_grpc.AudioProcessingServiceStub(channel)
+
+        async def call(chunk: bytes):
+            start = time.perf_counter()
+            try:
+                response = await stub.ProcessAudioChunk(_audio_chunk(pb2, client_id, chunk, args), timeout=30)
+                stats.latencies.append(time.perf_counter() - start)
+                if response.success:
+                    stats.received += 1
+                else:
+                    stats.errors += 1
+            except grpc.RpcError as e:
+                logger.debug(f"ProcessAudioChunk failed: {e}")
+                stats.errors += 1
+
+        calls = []
+        async for chunk in paced(chunks, chunk_seconds, args.realtime):
+            stats.sent += 1
+            stats.bytes_sent += len(chunk)
+            stats.audio_seconds += chunk_seconds
+            calls.append(asyncio.create_task(call(chunk)))
+        await asyncio.gather(*calls)
+
+
+async def rest_client(args, client_id: str, chunks: List[bytes], chunk_seconds: float, stats: ProtocolStats):
+    """POST each chunk to /transcribe (requests runs in the default thread pool)"""
+    import requests
+
+    session = requests.Session()
+    loop = asyncio.get_running_loop()
+    url = f"{args.url}/transcribe"
+
+    def post(chunk: bytes):
+        return session.post(url, files={"audio_file": (f"{client_id}.wav", chunk, "audio/wav")}, timeout=60)
+
+    async def call(chunk: bytes):
+        start = time.perf_counter()
+        try:
+            response = await loop.run_in_executor(None, post, chunk)
+            stats.latencies.append(time.perf_counter() - start)
+            if response.status_code == 200:
+                stats.received += 1
+            else:
+                stats.errors += 1
+                stats.status_codes[response.status_code] = stats.status_codes.get(response.status_code, 0) + 1
+        except requests.RequestException as e:
+            logger.debug(f"POST /transcribe failed: {e}")
+            stats.errors += 1
+
+    calls = []
+    async for chunk in paced(chunks, chunk_seconds, args.realtime):
+        stats.sent += 1
+        stats.bytes_sent += len(chunk)
+        stats.audio_seconds += chunk_seconds
+        calls.append(asyncio.create_task(call(chunk)))
+    await asyncio.gather(*calls)
+    session.close()
+
+
+CLIENTS = {
+    "ws": ws_client,
+    "grpc-stream": grpc_stream_client,
+    "grpc-unary": grpc_unary_client,
+    "rest": rest_client,
+}
+
+
+async def run_protocol(args, protocol: str, chunks: List[bytes], chunk_seconds: float) -> Dict[str, Any]:
+    """Run all clients for one protocol and collect results"""
+    stats = ProtocolStats(protocol)
+    stats.clients = args.clients
+    client = CLIENTS[protocol]
+    run_id = uuid.uuid4().hex[:8]
+
+    async def start_client(index: int):
+        # Spread connection setup over the ramp-up window
+        await asyncio.sleep(args.ramp_up * index / max(args.clients, 1))
+        await client(args, f"bench-{run_id}-{index}", chunks, chunk_seconds, stats)
+
+    sampler = ResourceSampler(args.server_pid)
+    sampler.start()
+    stats.started = time.perf_counter()
+    await asyncio.gather(*(start_client(i) for i in range(args.clients)))
+    stats.finished = time.perf_counter()
+
+    result = stats.summary()
+    if stats.status_codes:
+        result["status_codes"] = {str(k): v for k, v in stats.status_codes.items()}
+    result["server"] = await sampler.stop()
+    return result
+
+
+def compare(results: Dict[str, Any], baseline_path: str, max_regression: float) -> bool:
+    """Print deltas against a previous run; return False when p95 latency or throughput regressed"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+
+    ok = True
+    for protocol, current in results["protocols"].items():
+        previous = baseline.get("protocols", {}).get(protocol)
+        if not previous:
+            continue
+        for key, higher_is_worse in (("latency_p95", True), ("latency_p50", True), ("throughput_msgs_per_sec", False)):
+            if key not in current or not previous.get(key):
+                continue
+            change = (current[key] - previous[key]) / previous[key]
+            regressed = change > max_regression if higher_is_worse else change < -max_regression
+            ok = ok and not regressed
+            marker = "REGRESSION" if regressed else "ok"
+            print(f"{protocol:<12} {key:<24} {previous[key]:>10.4f} -> {current[key]:>10.4f} ({change:+.1%}) {marker}")
+    return ok
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description="Benchmark VoiceBridge ingest latency under concurrent load")
+    parser.add_argument("--protocol", nargs="+", choices=PROTOCOLS, default=["ws"], help="Ingest paths to drive")
+    parser.add_argument("--clients", type=int, default=10, help="Concurrent clients per protocol")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds of audio each client streams")
+    parser.add_argument("--chunk-ms", type=int, default=1000, help="Audio per message in milliseconds")
+    parser.add_argument("--audio", help="WAV file to stream (looped); generated audio otherwise")
+    parser.add_argument("--sample-rate", type=int, default=16000, help="Audio sample rate")
+    parser.add_argument("--language", default="en", help="Language code sent with gRPC chunks")
+    parser.add_argument("--no-realtime", dest="realtime", action="store_false", help="Send as fast as possible")
+    parser.add_argument("--ramp-up", type=float, default=1.0, help="Seconds over which clients connect")
+    parser.add_argument("--drain-timeout", type=float, default=10.0, help="Seconds to wait for late results")
+    parser.add_argument("--url", default="http://localhost:8000", help="HTTP/WebSocket base URL")
+    parser.add_argument("--grpc-target", default="localhost:50051", help="gRPC host:port")
+    parser.add_argument("--server-pid", type=int, help="Server PID to sample CPU/RSS from")
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    parser.add_argument("--compare", help="Previous results JSON to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.1, help="Allowed relative regression")
+    args = parser.parse_args()
+
+    audio = load_audio(args.audio, args.duration, args.sample_rate)
+    chunks = make_chunks(audio, args.sample_rate, args.chunk_ms)
+    chunk_seconds = args.chunk_ms / 1000
+
+    results: Dict[str, Any] = {
+        "timestamp": time.time(),
+        "config": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+        "protocols": {},
+    }
+    for protocol in args.protocol:
+        logger.info(f"Running {protocol}: {args.clients} clients x {len(chunks)} chunks")
+        results["protocols"][protocol] = asyncio.run(run_protocol(args, protocol, chunks, chunk_seconds))
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        logger.info(f"Benchmark results saved to {args.output}")
+
+    if args.compare and not compare(results, args.compare, args.max_regression):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
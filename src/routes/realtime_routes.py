@@ -232,6 +232,7 @@ async def test_audio_stream(
         # Send test audio chunk to Kafka
         test_audio_data = b"fake audio data for testing"
 
+        # No chunk_index: each call gets a fresh chunk id, so repeated tests are not deduplicated
         success = await kafka_stream_service.send_audio_chunk(
             session_id=session_id,
             user_id=user_id,
@@ -240,7 +241,6 @@ async def test_audio_stream(
             channels=1,
             format="wav",
             language="en",
-            chunk_index=0,
             is_final=True,
         )
 
@@ -0,0 +1,586 @@
+"""
+Audio Decoder
+Container sniffing and per-format decode paths.
+
+The container is identified from its magic bytes, not from the filename, and
+each format takes the cheapest path that can decode it:
+
+- WAV: the RIFF header is parsed directly and the sample data is read with
+  np.frombuffer. Mono float32 WAV is returned without copying. Integer PCM
+  takes a single conversion pass to float32.
+- Raw PCM (clients that declare their sample format): np.frombuffer only.
+- WebM/Opus, which browsers' MediaRecorder produces: a small EBML demuxer
+  extracts the Opus packets and libopus decodes them, directly at the
+  requested rate when Opus supports it. StreamingWebMDecoder does the same
+  incrementally, for streams that arrive in arbitrary chunks.
+- Bare Opus packets (negotiated ingest, no container): OpusPacketDecoder.
+- Everything else (FLAC, Ogg, MP3, M4A): soundfile, then librosa/audioread.
+
+Decode time is recorded per format, both as a Prometheus histogram and in
+get_decode_stats().
+"""
+import io
+import logging
+import struct
+import time
+import warnings
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import soundfile as sf
+
+from src.services.prometheus_service import prometheus_metrics
+
+try:
+    import opuslib
+
+    OPUS_AVAILABLE = True
+except ImportError:  # libopus bindings are optional
+    OPUS_AVAILABLE = False
+
+try:
+    import av
+
+    PYAV_AVAILABLE = True
+except ImportError:
+    PYAV_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Rates libopus can decode to directly (no resampling afterwards)
+OPUS_RATES = (8000, 12000, 16000, 24000, 48000)
+OPUS_MAX_FRAME_SECONDS = 0.12
+
+PCM_FORMATS = {"s16le": "<i2", "s32le": "<i4", "f32le": "<f4", "u8": "u1"}
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+# Matroska/WebM element IDs (marker bits included)
+EBML_HEADER = 0x1A45DFA3
+SEGMENT = 0x18538067
+CLUSTER = 0x1F43B675
+TRACKS = 0x1654AE6B
+TRACK_ENTRY = 0xAE
+TRACK_AUDIO = 0xE1
+BLOCK_GROUP = 0xA0
+TRACK_NUMBER = 0xD7
+TRACK_TYPE = 0x83
+CODEC_ID = 0x86
+CODEC_PRIVATE = 0x63A2
+SAMPLING_FREQUENCY = 0xB5
+CHANNELS = 0x9F
+SIMPLE_BLOCK = 0xA3
+BLOCK = 0xA1
+# Master elements whose children are parsed in place; all other elements are read or skipped whole
+EBML_MASTERS = {EBML_HEADER, SEGMENT, CLUSTER, TRACKS, TRACK_ENTRY, TRACK_AUDIO, BLOCK_GROUP}
+
+_decode_stats: Dict[str, Dict[str, Any]] = {}
+
+
+@dataclass
+class DecodedAudio:
+    """Decoded mono float32 samples and where they came from"""
+
+    samples: np.ndarray
+    sample_rate: int
+    channels: int
+    format: str
+
+
+@dataclass(frozen=True)
+class WavInfo:
+    """Parsed WAV header"""
+
+    format_tag: int
+    channels: int
+    sample_rate: int
+    bits_per_sample: int
+    data_offset: int
+    data_size: int
+    sample_width: int  # bytes per sample in the container (12-bit PCM is stored in 2)
+
+
+def sniff_format(data: bytes) -> Optional[str]:
+    """
+    Identify the container from its magic bytes.
+
+    Args:
+        data: Start of the encoded audio (the first 64 bytes are enough)
+
+    Returns:
+        "wav", "flac", "ogg", "webm", "mp3" or "m4a", or None when unrecognized
+    """
+    head = bytes(data[:64])
+    if head[:4] in (b"RIFF", b"RF64") and head[8:12] == b"WAVE":
+        return "wav"
+    if head[:4] == b"fLaC":
+        return "flac"
+    if head[:4] == b"OggS":
+        return "ogg"
+    if head[:4] == b"\x1a\x45\xdf\xa3":
+        return "webm"  # Matroska; WebM is its audio/video subset
+    if head[:3] == b"ID3" or (len(head) > 1 and head[0] == 0xFF and head[1] & 0xE0 == 0xE0 and head[1] & 0x06):
+        return "mp3"
+    if head[4:8] == b"ftyp":
+        return "m4a"
+    return None
+
+
+def parse_wav_header(data: bytes) -> WavInfo:
+    """
+    Parse a RIFF/WAVE header.
+
+    Args:
+        data: WAV file bytes
+
+    Returns:
+        WavInfo
+
+    Raises:
+        ValueError: If the header is invalid or the encoding is not PCM/float
+    """
+    if sniff_format(data) != "wav":
+        raise ValueError("Not a WAV file")
+
+    view = memoryview(data)
+    position, fmt = 12, None
+    while position + 8 <= len(data):
+        chunk_id = bytes(view[position : position + 4])
+        (chunk_size,) = struct.unpack_from("<I", data, position + 4)
+        body = position + 8
+        if chunk_id == b"fmt ":
+            if chunk_size < 16 or body + 16 > len(data):
+                raise ValueError("Truncated WAV fmt chunk")
+            fmt = struct.unpack_from("<HHIIHH", data, body)
+            if fmt[0] == WAVE_FORMAT_EXTENSIBLE and chunk_size >= 40 and body + 26 <= len(data):
+                # The actual format tag is the first field of the SubFormat GUID
+                (sub_format,) = struct.unpack_from("<H", data, body + 24)
+                fmt = (sub_format,) + fmt[1:]
+        elif chunk_id == b"data":
+            if fmt is None:
+                raise ValueError("WAV data chunk before fmt chunk")
+            # Streaming writers leave the size at 0 or 0xFFFFFFFF (and RF64 keeps it elsewhere)
+            available = len(data) - body
+            size = available if chunk_size in (0, 0xFFFFFFFF) else min(chunk_size, available)
+            format_tag, channels, sample_rate, _, block_align, bits = fmt
+            if format_tag not in (WAVE_FORMAT_PCM, WAVE_FORMAT_IEEE_FLOAT):
+                raise ValueError(f"Unsupported WAV encoding 0x{format_tag:04x}")
+            if channels < 1 or sample_rate < 1 or bits < 8:
+                raise ValueError("Invalid WAV header")
+            # Samples are padded to whole bytes; block_align says how many, when it is consistent
+            if block_align >= channels and block_align % channels == 0:
+                width = block_align // channels
+            else:
+                width = (bits + 7) // 8
+            if width * 8 < bits:
+                raise ValueError(f"Invalid WAV header: {bits}-bit samples in {width}-byte blocks")
+            return WavInfo(format_tag, channels, sample_rate, bits, body, size, width)
+        position = body + chunk_size + (chunk_size & 1)  # chunks are word aligned
+
+    raise ValueError("WAV file has no data chunk")
+
+
+def decode_wav(data: bytes) -> DecodedAudio:
+    """
+    Decode WAV without going through a file-like object.
+
+    Mono float32 data is returned as a read-only view of data.
+
+    Raises:
+        ValueError: If the header is invalid or the sample format is unsupported
+    """
+    info = parse_wav_header(data)
+    width = info.sample_width
+    frame_bytes = width * info.channels
+    size = info.data_size - info.data_size % frame_bytes
+    raw = np.frombuffer(data, dtype=np.uint8, count=size, offset=info.data_offset)
+
+    if info.format_tag == WAVE_FORMAT_IEEE_FLOAT and width in (4, 8):
+        samples = raw.view("<f4" if width == 4 else "<f8")
+    elif info.format_tag == WAVE_FORMAT_PCM and width in (1, 2, 4):
+        samples = pcm_to_float(raw.view({1: "u1", 2: "<i2", 4: "<i4"}[width]))
+    elif info.format_tag == WAVE_FORMAT_PCM and width == 3:
+        # 24-bit: place each sample in the top three bytes of an int32
+        padded = np.zeros((size // 3, 4), dtype=np.uint8)
+        padded[:, 1:] = raw.reshape(-1, 3)
+        samples = padded.view("<i4")[:, 0].astype(np.float32) * np.float32(1.0 / 2**31)
+    else:
+        raise ValueError(f"Unsupported WAV sample format: {info.bits_per_sample}-bit, tag {info.format_tag}")
+
+    return DecodedAudio(_to_mono(samples, info.channels), info.sample_rate, info.channels, "wav")
+
+
+def decode_pcm(data: bytes, sample_rate: int, channels: int = 1, sample_format: str = "s16le") -> DecodedAudio:
+    """
+    Interpret headerless PCM from a client that declared its format.
+
+    Args:
+        data: Interleaved samples
+        sample_rate: Sample rate
+        channels: Channel count
+        sample_format: One of PCM_FORMATS
+
+    Returns:
+        DecodedAudio (a view of data for mono f32le)
+
+    Raises:
+        ValueError: For unknown sample formats
+    """
+    if sample_format not in PCM_FORMATS:
+        raise ValueError(f"Unsupported PCM format: {sample_format}")
+    dtype = np.dtype(PCM_FORMATS[sample_format])
+    count = len(data) // (dtype.itemsize * channels) * channels
+    samples = np.frombuffer(data, dtype=dtype, count=count)
+    return DecodedAudio(_to_mono(pcm_to_float(samples), channels), sample_rate, channels, "pcm")
+
+
+def pcm_to_float(samples: np.ndarray) -> np.ndarray:
+    """Scale integer PCM to float32 in [-1, 1); float input is returned as is."""
+    if samples.dtype.kind == "f":
+        return samples
+    if samples.dtype.kind == "u":
+        offset = 2 ** (8 * samples.dtype.itemsize - 1)
+        return (samples.astype(np.float32) - offset) * np.float32(1.0 / offset)
+    return samples.astype(np.float32) * np.float32(1.0 / 2 ** (8 * samples.dtype.itemsize - 1))
+
+
+def _to_mono(samples: np.ndarray, channels: int) -> np.ndarray:
+    if channels == 1:
+        return samples if samples.dtype == np.float32 else samples.astype(np.float32)
+    return samples.reshape(-1, channels).mean(axis=1, dtype=np.float32)
+
+
+def _read_vint(buffer, position: int, keep_marker: bool) -> Optional[Tuple[int, int]]:
+    """Read an EBML variable-length integer; None when the buffer ends first."""
+    if position >= len(buffer):
+        return None
+    first = buffer[position]
+    if first == 0:
+        raise ValueError("Invalid EBML variable-length integer")
+    length = 9 - first.bit_length()
+    if position + length > len(buffer):
+        return None
+    value = first if keep_marker else first & (0xFF >> length)
+    for byte in buffer[position + 1 : position + length]:
+        value = (value << 8) | byte
+    return value, length
+
+
+class WebMDemuxer:
+    """Incremental WebM/Matroska demuxer returning the audio track's packets"""
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self.tracks: List[Dict[str, Any]] = []
+        self.audio_track: Optional[Dict[str, Any]] = None
+
+    def feed(self, data: bytes) -> List[bytes]:
+        """
+        Parse the next piece of the stream.
+
+        Args:
+            data: Any number of bytes continuing the stream
+
+        Returns:
+            Audio packets completed by this data
+
+        Raises:
+            ValueError: If the stream is not valid EBML
+        """
+        self._buffer += data
+        buffer, position, packets = self._buffer, 0, []
+        while True:
+            element_id = _read_vint(buffer, position, keep_marker=True)
+            if element_id is None:
+                break
+            size = _read_vint(buffer, position + element_id[1], keep_marker=False)
+            if size is None:
+                break
+            header = element_id[1] + size[1]
+            if element_id[0] in EBML_MASTERS:
+                # Live recorders write Segment and Cluster with unknown size; children follow directly
+                if element_id[0] == TRACK_ENTRY:
+                    self.tracks.append({})
+                position += header
+                continue
+            if size[0] == (1 << (7 * size[1])) - 1:
+                raise ValueError(f"Unknown-size EBML element 0x{element_id[0]:x}")
+            end = position + header + size[0]
+            if end > len(buffer):
+                break
+            packets.extend(self._element(element_id[0], bytes(buffer[position + header : end])))
+            position = end
+        del self._buffer[:position]
+        return packets
+
+    def _element(self, element_id: int, payload: bytes) -> List[bytes]:
+        if element_id in (SIMPLE_BLOCK, BLOCK):
+            return self._block(payload)
+        if not self.tracks:
+            return []
+        track = self.tracks[-1]
+        if element_id in (TRACK_NUMBER, TRACK_TYPE, CHANNELS):
+            track[element_id] = int.from_bytes(payload, "big")
+        elif element_id == CODEC_ID:
+            track[CODEC_ID] = payload.rstrip(b"\x00").decode("ascii", "replace")
+        elif element_id == CODEC_PRIVATE:
+            track[CODEC_PRIVATE] = payload
+        elif element_id == SAMPLING_FREQUENCY:
+            track[SAMPLING_FREQUENCY] = struct.unpack(">f" if len(payload) == 4 else ">d", payload)[0]
+        return []
+
+    @property
+    def codec_id(self) -> Optional[str]:
+        return self.audio_track.get(CODEC_ID) if self.audio_track else None
+
+    @property
+    def codec_private(self) -> bytes:
+        return self.audio_track.get(CODEC_PRIVATE, b"") if self.audio_track else b""
+
+    @property
+    def channels(self) -> int:
+        return self.audio_track.get(CHANNELS, 1) if self.audio_track else 1
+
+    def _block(self, payload: bytes) -> List[bytes]:
+        if self.audio_track is None:
+            self.audio_track = next(
+                (t for t in self.tracks if t.get(TRACK_TYPE) == 2 or str(t.get(CODEC_ID, "")).startswith("A_")), None
+            )
+            if self.audio_track is None:
+                return []
+        track_number, length = _read_vint(payload, 0, keep_marker=False)
+        if track_number != self.audio_track.get(TRACK_NUMBER, 1):
+            return []
+        flags = payload[length + 2]
+        position = length + 3
+        lacing = (flags >> 1) & 0x03
+        if lacing == 0:
+            return [payload[position:]]
+
+        count = payload[position] + 1
+        position += 1
+        sizes: List[int] = []
+        if lacing == 1:  # Xiph lacing
+            for _ in range(count - 1):
+                size = 0
+                while True:
+                    byte = payload[position]
+                    position += 1
+                    size += byte
+                    if byte != 255:
+                        break
+                sizes.append(size)
+        elif lacing == 3:  # EBML lacing: first size, then signed differences
+            size, width = _read_vint(payload, position, keep_marker=False)
+            position += width
+            sizes.append(size)
+            for _ in range(count - 2):
+                delta, width = _read_vint(payload, position, keep_marker=False)
+                position += width
+                size += delta - ((1 << (7 * width - 1)) - 1)
+                sizes.append(size)
+        else:  # fixed-size lacing
+            sizes = [(len(payload) - position) // count] * (count - 1)
+        sizes.append(len(payload) - position - sum(sizes))
+
+        frames = []
+        for size in sizes:
+            frames.append(payload[position : position + size])
+            position += size
+        return frames
+
+
+class OpusPacketDecoder:
+    """Decodes a sequence of bare Opus packets (no container) to mono float32"""
+
+    def __init__(self, sample_rate: int = 16000, channels: int = 1, pre_skip: int = 0):
+        """
+        Initialize decoder.
+
+        Args:
+            sample_rate: Preferred output rate; Opus decodes natively to 8/12/16/24/48 kHz
+            channels: Channels in the packets
+            pre_skip: Encoder delay to drop from the start, in 48 kHz samples (OpusHead pre-skip)
+
+        Raises:
+            ValueError: If no Opus decoder is installed
+        """
+        if not OPUS_AVAILABLE:
+            raise ValueError("Opus decoding needs opuslib (libopus)")
+        self.sample_rate = sample_rate if sample_rate in OPUS_RATES else 48000
+        self.channels = channels
+        self._decoder = opuslib.Decoder(self.sample_rate, channels)
+        self._max_frame = int(self.sample_rate * OPUS_MAX_FRAME_SECONDS)
+        self._skip = pre_skip * self.sample_rate // 48000
+
+    def decode(self, packets: List[bytes]) -> np.ndarray:
+        """
+        Decode packets in stream order.
+
+        Returns:
+            Mono float32 samples at self.sample_rate
+        """
+        if not packets:
+            return np.zeros(0, dtype=np.float32)
+        pcm = b"".join(self._decoder.decode_float(packet, self._max_frame) for packet in packets)
+        samples = _to_mono(np.frombuffer(pcm, dtype=np.float32), self.channels)
+        if self._skip:
+            trimmed = samples[self._skip :]
+            self._skip -= samples.size - trimmed.size
+            samples = trimmed
+        return samples
+
+
+class StreamingWebMDecoder:
+    """Incremental WebM/Opus decoder: bytes in arbitrary chunks in, float32 PCM out"""
+
+    def __init__(self, sample_rate: int = 16000):
+        """
+        Initialize decoder.
+
+        Args:
+            sample_rate: Preferred output rate; Opus decodes natively to 8/12/16/24/48 kHz
+
+        Raises:
+            ValueError: If no Opus decoder is installed
+        """
+        if not OPUS_AVAILABLE:
+            raise ValueError("WebM/Opus streaming needs opuslib (libopus)")
+        self.sample_rate = sample_rate if sample_rate in OPUS_RATES else 48000
+        self.demuxer = WebMDemuxer()
+        self.channels = 1
+        self._decoder: Optional[OpusPacketDecoder] = None
+
+    def feed(self, data: bytes) -> np.ndarray:
+        """
+        Decode the next piece of the stream.
+
+        Returns:
+            Mono float32 samples at self.sample_rate completed by this data
+        """
+        packets = self.demuxer.feed(data)
+        if not packets:
+            return np.zeros(0, dtype=np.float32)
+        if self._decoder is None:
+            if self.demuxer.codec_id != "A_OPUS":
+                raise ValueError(f"Unsupported WebM audio codec: {self.demuxer.codec_id}")
+            self.channels, pre_skip = self.demuxer.channels, 0
+            head = self.demuxer.codec_private
+            if head[:8] == b"OpusHead" and len(head) >= 12:
+                self.channels = head[9]
+                pre_skip = struct.unpack_from("<H", head, 10)[0]
+            self._decoder = OpusPacketDecoder(self.sample_rate, self.channels, pre_skip)
+        return self._decoder.decode(packets)
+
+
+def decode_webm(data: bytes, sample_rate: Optional[int] = None) -> DecodedAudio:
+    """
+    Decode a complete WebM/Opus buffer.
+
+    Args:
+        data: WebM bytes
+        sample_rate: Preferred output rate (Opus decodes natively to it when supported)
+
+    Raises:
+        ValueError: If no decoder is available or the stream cannot be decoded
+    """
+    if OPUS_AVAILABLE:
+        decoder = StreamingWebMDecoder(sample_rate or 48000)
+        samples = decoder.feed(data)
+        return DecodedAudio(samples, decoder.sample_rate, decoder.channels, "webm")
+    if PYAV_AVAILABLE:
+        with av.open(io.BytesIO(data)) as container:
+            stream = container.streams.audio[0]
+            planes = [frame.to_ndarray() for frame in container.decode(stream)]
+        if not planes:
+            raise ValueError("WebM stream has no audio")
+        samples = np.concatenate(planes, axis=-1)
+        channels = stream.codec_context.channels
+        if samples.ndim > 1:  # planar: (channels, samples)
+            samples = samples.mean(axis=0)
+        elif channels > 1:  # packed
+            samples = samples.reshape(-1, channels).mean(axis=1)
+        return DecodedAudio(pcm_to_float(samples).astype(np.float32, copy=False), stream.rate, channels, "webm")
+    raise ValueError("WebM/Opus decoding needs opuslib or PyAV")
+
+
+def _decode_generic(data: bytes) -> Tuple[np.ndarray, int, int]:
+    try:
+        samples, sample_rate = sf.read(io.BytesIO(data), dtype="float32", always_2d=True)
+        return _to_mono(samples.reshape(-1), samples.shape[1]), int(sample_rate), samples.shape[1]
+    except Exception:
+        try:
+            import librosa
+
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                samples, sample_rate = librosa.load(io.BytesIO(data), sr=None, mono=True)
+            return samples, int(sample_rate), 1
+        except Exception as e:
+            raise ValueError(f"Failed to decode audio: {e}") from e
+
+
+def decode_audio(data: bytes, sample_rate: Optional[int] = None) -> DecodedAudio:
+    """
+    Decode encoded audio along the fastest path for its container.
+
+    Args:
+        data: Encoded audio
+        sample_rate: Preferred output rate. Only used where the codec can decode
+            to it directly (Opus); callers still resample when it differs.
+
+    Returns:
+        DecodedAudio with mono float32 samples
+
+    Raises:
+        ValueError: If the audio cannot be decoded
+    """
+    if not data:
+        raise ValueError("No audio data")
+    container = sniff_format(data) or "unknown"
+    start = time.perf_counter()
+    try:
+        if container == "wav":
+            try:
+                decoded = decode_wav(data)
+            except ValueError:
+                # e.g. ADPCM or mu-law WAV; soundfile knows more encodings
+                samples, rate, channels = _decode_generic(data)
+                decoded = DecodedAudio(samples, rate, channels, container)
+        elif container == "webm":
+            decoded = decode_webm(data, sample_rate)
+        else:
+            samples, rate, channels = _decode_generic(data)
+            decoded = DecodedAudio(samples, rate, channels, container)
+    except Exception:
+        record_decode(container, time.perf_counter() - start, len(data), success=False)
+        raise
+    record_decode(container, time.perf_counter() - start, len(data))
+    return decoded
+
+
+def record_decode(container: str, seconds: float, size: int, success: bool = True) -> None:
+    """Record one decode in the per-format statistics and Prometheus."""
+    stats = _decode_stats.setdefault(container, {"decodes": 0, "failures": 0, "seconds": 0.0, "bytes": 0})
+    stats["decodes"] += 1
+    stats["seconds"] += seconds
+    stats["bytes"] += size
+    if not success:
+        stats["failures"] += 1
+    prometheus_metrics.record_audio_decode(container, "success" if success else "error", seconds)
+
+
+def get_decode_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Get decode statistics per container format.
+
+    Returns:
+        Mapping of format to decodes, failures, total seconds, bytes and mean microseconds per decode
+    """
+    return {
+        container: {**stats, "mean_us": stats["seconds"] / stats["decodes"] * 1e6 if stats["decodes"] else 0.0}
+        for container, stats in _decode_stats.items()
+    }
@@ -0,0 +1,215 @@
+"""
+Audio Frame
+Canonical decoded-audio object shared by every service in a request.
+
+An AudioFrame is produced once at ingest: decode, mono mix and resample happen
+a single time. After that, preprocessing, VAD, segmentation and the model
+backends all read the same float32 buffer. Derived values (peak-normalized
+audio, WAV bytes, features) are computed lazily and cached on the frame, so
+each is computed at most once per request.
+"""
+import hashlib
+import io
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional, Union
+
+import numpy as np
+import soundfile as sf
+
+from src.services.audio_decoder import decode_audio
+from src.services.resampler import resample
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(eq=False)
+class AudioFrame:
+    """Decoded mono float32 PCM at a known sample rate, plus its provenance"""
+
+    samples: np.ndarray
+    sample_rate: int
+    source_channels: int = 1
+    source_sample_rate: Optional[int] = None
+    source_bytes: Optional[bytes] = field(default=None, repr=False)
+    _source_hash: Optional[str] = field(default=None, repr=False)
+    _cache: Dict[str, Any] = field(default_factory=dict, repr=False)
+
+    def __post_init__(self):
+        self.samples = np.ascontiguousarray(self.samples, dtype=np.float32)
+        if self.samples.ndim != 1:
+            raise ValueError("AudioFrame samples must be mono (1-D)")
+        if self.source_sample_rate is None:
+            self.source_sample_rate = self.sample_rate
+
+    @classmethod
+    def from_bytes(cls, audio_bytes: bytes, sample_rate: Optional[int] = 16000) -> "AudioFrame":
+        """
+        Decode an encoded audio file once.
+
+        Args:
+            audio_bytes: Encoded audio; the decode path is chosen from its magic bytes (see audio_decoder)
+            sample_rate: Target sample rate, or None to keep the source rate
+
+        Returns:
+            AudioFrame holding mono float32 samples at sample_rate
+
+        Raises:
+            ValueError: If the audio cannot be decoded
+        """
+        decoded = decode_audio(audio_bytes, sample_rate)
+        source_rate, channels = decoded.sample_rate, decoded.channels
+        mono = decoded.samples
+
+        target_rate = sample_rate or int(source_rate)
+        return cls(
+            samples=resample(mono, int(source_rate), target_rate),
+            sample_rate=target_rate,
+            source_channels=channels,
+            source_sample_rate=int(source_rate),
+            source_bytes=audio_bytes,
+        )
+
+    @classmethod
+    def try_from_bytes(cls, audio_bytes: bytes, sample_rate: Optional[int] = 16000) -> Optional["AudioFrame"]:
+        """Like from_bytes, but return None for undecodable audio."""
+        try:
+            return cls.from_bytes(audio_bytes, sample_rate)
+        except ValueError:
+            return None
+
+    @classmethod
+    def from_file(cls, path: str, sample_rate: Optional[int] = 16000) -> "AudioFrame":
+        """Decode an audio file from disk once."""
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read(), sample_rate)
+
+    @classmethod
+    def from_array(cls, samples: np.ndarray, sample_rate: int, target_sample_rate: Optional[int] = None) -> "AudioFrame":
+        """
+        Wrap already-decoded samples (channels last for multi-channel input).
+
+        Args:
+            samples: 1-D mono or (n_samples, n_channels) audio
+            sample_rate: Rate of samples
+            target_sample_rate: Resample to this rate if given
+
+        Returns:
+            AudioFrame
+        """
+        samples = np.asarray(samples, dtype=np.float32)
+        channels = 1 if samples.ndim == 1 else samples.shape[1]
+        if samples.ndim > 1:
+            samples = samples.mean(axis=1)
+        target = target_sample_rate or sample_rate
+        return cls(
+            samples=resample(samples, sample_rate, target),
+            sample_rate=target,
+            source_channels=channels,
+            source_sample_rate=sample_rate,
+        )
+
+    @property
+    def duration(self) -> float:
+        """Duration in seconds."""
+        return len(self.samples) / self.sample_rate
+
+    @property
+    def channel_layout(self) -> str:
+        """Channel layout of the source before the mono mix."""
+        return {1: "mono", 2: "stereo"}.get(self.source_channels, f"{self.source_channels}ch")
+
+    @property
+    def source_hash(self) -> str:
+        """SHA-256 of the source bytes (or of the samples when decoded elsewhere)."""
+        if self._source_hash is None:
+            data = self.source_bytes if self.source_bytes is not None else self.samples.tobytes()
+            self._source_hash = hashlib.sha256(data).hexdigest()
+        return self._source_hash
+
+    def feature(self, name: str, compute: Callable[["AudioFrame"], Any]) -> Any:
+        """
+        Return a derived value, computing it on first use.
+
+        Args:
+            name: Cache key (include parameters, e.g. "mfcc:13")
+            compute: Function of the frame producing the value
+
+        Returns:
+            Cached value
+        """
+        if name not in self._cache:
+            self._cache[name] = compute(self)
+        return self._cache[name]
+
+    @property
+    def normalized(self) -> np.ndarray:
+        """Peak-normalized samples (cached)."""
+
+        def peak_normalize(frame: "AudioFrame") -> np.ndarray:
+            peak = float(np.max(np.abs(frame.samples))) if frame.samples.size else 0.0
+            return frame.samples / peak if peak > 0 else frame.samples
+
+        return self.feature("normalized", peak_normalize)
+
+    def to_wav_bytes(self) -> bytes:
+        """16-bit PCM WAV encoding of the decoded samples (cached)."""
+
+        def encode(frame: "AudioFrame") -> bytes:
+            buffer = io.BytesIO()
+            sf.write(buffer, frame.samples, frame.sample_rate, format="WAV", subtype="PCM_16")
+            return buffer.getvalue()
+
+        return self.feature("wav_bytes", encode)
+
+    def slice(self, start_sample: int, end_sample: int) -> "AudioFrame":
+        """Sub-frame sharing this frame's buffer (no copy)."""
+        return AudioFrame(
+            samples=self.samples[start_sample:end_sample],
+            sample_rate=self.sample_rate,
+            source_channels=self.source_channels,
+            source_sample_rate=self.source_sample_rate,
+        )
+
+    def resampled(self, sample_rate: int) -> "AudioFrame":
+        """Frame at another rate (self when the rate already matches; cached otherwise)."""
+        if sample_rate == self.sample_rate:
+            return self
+        return self.feature(
+            f"resampled:{sample_rate}",
+            lambda frame: AudioFrame(
+                samples=resample(frame.samples, frame.sample_rate, sample_rate),
+                sample_rate=sample_rate,
+                source_channels=frame.source_channels,
+                source_sample_rate=frame.source_sample_rate,
+                source_bytes=frame.source_bytes,
+                _source_hash=frame._source_hash,
+            ),
+        )
+
+
+AudioInput = Union[bytes, AudioFrame]
+
+
+def as_audio_frame(audio: AudioInput, sample_rate: int = 16000) -> Optional[AudioFrame]:
+    """
+    Get a frame at sample_rate, decoding bytes only if needed.
+
+    Returns:
+        AudioFrame, or None when bytes cannot be decoded
+    """
+    if isinstance(audio, AudioFrame):
+        return audio.resampled(sample_rate)
+    return AudioFrame.try_from_bytes(audio, sample_rate)
+
+
+def as_audio_bytes(audio: AudioInput) -> bytes:
+    """
+    Encoded bytes for backends that upload files (original bytes when known).
+
+    Returns:
+        Audio file bytes
+    """
+    if isinstance(audio, AudioFrame):
+        return audio.source_bytes if audio.source_bytes is not None else audio.to_wav_bytes()
+    return audio
@@ -2,16 +2,20 @@
 Audio Preprocessing Service
 Audio data preprocessing service using sklearn and librosa
 """
-import io
 import logging
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterable, List, Optional
 
-import librosa
 import numpy as np
-import soundfile as sf
 from sklearn.decomposition import PCA
 from sklearn.preprocessing import MinMaxScaler, StandardScaler
 
+from src.services.audio_frame import AudioInput, as_audio_frame
+from src.services.feature_engine import (
+    ALL_FEATURES,
+    SPECTRAL_FEATURES,
+    get_feature_engine,
+)
+
 logger = logging.getLogger(__name__)
 
 
@@ -49,21 +53,9 @@ def extract_mfcc_features(
             MFCC feature matrix
         """
         try:
-            # Extract MFCC features
-            mfccs = librosa.feature.mfcc(
-                y=audio_data,
-                sr=sample_rate,
-                n_mfcc=n_mfcc,
-                n_fft=n_fft,
-                hop_length=hop_length,
-            )
-
-            # Add delta and delta-delta features
-            mfcc_delta = librosa.feature.delta(mfccs)
-            mfcc_delta2 = librosa.feature.delta(mfccs, order=2)
-
-            # Combine features
-            features = np.vstack([mfccs, mfcc_delta, mfcc_delta2])
+            # MFCCs with delta and delta-delta features, stacked
+            engine = get_feature_engine(sample_rate, n_fft=n_fft, hop_length=hop_length, n_mfcc=n_mfcc)
+            features = engine.extract(audio_data, ["mfcc"])["mfcc"]
 
             logger.info(f"MFCC features extracted: {features.shape}")
             return features
@@ -84,25 +76,8 @@ def extract_spectral_features(self, audio_data: np.ndarray, sample_rate: int = 1
             Dictionary of spectral features
         """
         try:
-            features = {}
-
-            # Spectral centroid
-            features["spectral_centroid"] = librosa.feature.spectral_centroid(y=audio_data, sr=sample_rate)[0]
-
-            # Spectral rolloff
-            features["spectral_rolloff"] = librosa.feature.spectral_rolloff(y=audio_data, sr=sample_rate)[0]
-
-            # Spectral bandwidth
-            features["spectral_bandwidth"] = librosa.feature.spectral_bandwidth(y=audio_data, sr=sample_rate)[0]
-
-            # Zero crossing rate
-            features["zero_crossing_rate"] = librosa.feature.zero_crossing_rate(audio_data)[0]
-
-            # Chroma features
-            features["chroma"] = librosa.feature.chroma_stft(y=audio_data, sr=sample_rate)
-
-            # Tonnetz features
-            features["tonnetz"] = librosa.feature.tonnetz(y=audio_data, sr=sample_rate)
+            # Centroid, rolloff, bandwidth, ZCR, chroma and tonnetz from one shared STFT
+            features = get_feature_engine(sample_rate).extract(audio_data, SPECTRAL_FEATURES)
 
             logger.info("Spectral features extracted successfully")
             return features
@@ -142,37 +117,35 @@ def normalize_audio(self, audio_data: np.ndarray, method: str = "standard") -> n
             logger.error(f"Audio normalization failed: {e}")
             raise
 
-    def preprocess_audio_bytes(self, audio_bytes: bytes, sample_rate: int = 16000) -> Dict[str, Any]:
+    def preprocess_audio_bytes(
+        self, audio_bytes: AudioInput, sample_rate: int = 16000, features: Optional[Iterable[str]] = None
+    ) -> Dict[str, Any]:
         """
         Preprocess raw audio data
 
         Args:
-            audio_bytes: Raw audio data
+            audio_bytes: Raw audio data, or an AudioFrame decoded at ingest
             sample_rate: Target sample rate
+            features: Features to compute (see feature_engine.required_features);
+                all features when None, waveform and duration only when empty
 
         Returns:
             Preprocessed features
         """
         try:
-            # Convert audio data to numpy array
-            audio_array, original_sr = sf.read(io.BytesIO(audio_bytes))
-
-            # Convert to mono
-            if len(audio_array.shape) > 1:
-                audio_array = np.mean(audio_array, axis=1)
+            # Decode, mono mix and resample once; reuse the frame's cached derived data
+            frame = as_audio_frame(audio_bytes, sample_rate)
+            if frame is None:
+                raise ValueError("Could not decode audio")
 
-            # Adjust sample rate
-            if original_sr != sample_rate:
-                audio_array = librosa.resample(audio_array, orig_sr=original_sr, target_sr=sample_rate)
+            # Normalize (peak)
+            audio_normalized = frame.normalized
 
-            # Normalize
-            audio_normalized = self.normalize_audio(audio_array, method="peak")
-
-            # Extract MFCC features
-            mfcc_features = self.extract_mfcc_features(audio_normalized, sample_rate)
-
-            # Extract spectral features
-            spectral_features = self.extract_spectral_features(audio_normalized, sample_rate)
+            # Requested features share one lazily computed STFT of the normalized audio
+            requested = ALL_FEATURES if features is None else tuple(features)
+            feature_set = frame.feature("features", lambda f: get_feature_engine(f.sample_rate).analyze(f.normalized))
+            mfcc_features = feature_set.get("mfcc") if "mfcc" in requested else None
+            spectral_features = feature_set.extract(name for name in requested if name != "mfcc")
 
             # Calculate feature statistics
             feature_stats = self._calculate_feature_statistics(mfcc_features, spectral_features)
@@ -180,12 +153,14 @@ def preprocess_audio_bytes(self, audio_bytes: bytes, sample_rate: int = 16000) -
             result = {
                 "audio_data": audio_normalized,
                 "sample_rate": sample_rate,
-                "mfcc_features": mfcc_features,
                 "spectral_features": spectral_features,
                 "feature_statistics": feature_stats,
+                "features_computed": list(requested),
                 "duration": len(audio_normalized) / sample_rate,
                 "preprocessing_successful": True,
             }
+            if mfcc_features is not None:
+                result["mfcc_features"] = mfcc_features
 
             logger.info(
                 f"Audio preprocessing completed: {len(audio_normalized)} samples, {result['duration']:.2f}s duration"
@@ -196,18 +171,35 @@ def preprocess_audio_bytes(self, audio_bytes: bytes, sample_rate: int = 16000) -
             logger.error(f"Audio preprocessing failed: {e}")
             return {"error": str(e), "preprocessing_successful": False}
 
+    def extract_features_batch(
+        self, clips: List[np.ndarray], sample_rate: int = 16000, features: Optional[List[str]] = None
+    ) -> List[Dict[str, np.ndarray]]:
+        """
+        Extract features for many clips (equal-length clips are processed as one batch)
+
+        Args:
+            clips: Mono audio clips
+            sample_rate: Sample rate of the clips
+            features: Feature names (MFCC and all spectral features when None)
+
+        Returns:
+            One feature dictionary per clip, in input order
+        """
+        return get_feature_engine(sample_rate).extract_batch(clips, features)
+
     def _calculate_feature_statistics(
-        self, mfcc_features: np.ndarray, spectral_features: Dict[str, np.ndarray]
+        self, mfcc_features: Optional[np.ndarray], spectral_features: Dict[str, np.ndarray]
     ) -> Dict[str, Any]:
         """Calculate feature statistics"""
         try:
             stats = {}
 
             # MFCC statistics
-            stats["mfcc_mean"] = np.mean(mfcc_features, axis=1)
-            stats["mfcc_std"] = np.std(mfcc_features, axis=1)
-            stats["mfcc_min"] = np.min(mfcc_features, axis=1)
-            stats["mfcc_max"] = np.max(mfcc_features, axis=1)
+            if mfcc_features is not None:
+                stats["mfcc_mean"] = np.mean(mfcc_features, axis=1)
+                stats["mfcc_std"] = np.std(mfcc_features, axis=1)
+                stats["mfcc_min"] = np.min(mfcc_features, axis=1)
+                stats["mfcc_max"] = np.max(mfcc_features, axis=1)
 
             # Spectral feature statistics
             for feature_name, feature_data in spectral_features.items():
@@ -265,6 +257,16 @@ def transform_features(self, features: np.ndarray, method: str = "standard") ->
             return features
 
 
+def serialize_feature_statistics(stats: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Convert feature statistics to JSON-ready values.
+
+    Arrays become lists and scalars become floats, the shape
+    VoiceBridgeDataService.save_transcription stores as TranscriptionFeature.
+    """
+    return {name: np.asarray(value).tolist() for name, value in stats.items()}
+
+
 # Global service instance
 _preprocessing_service = None
 
@@ -4,26 +4,70 @@
 This service handles audio file processing, validation, and preprocessing
 for speech recognition. It provides:
 
-- Audio format validation (WAV, MP3, M4A, FLAC, WebM)
+- Audio format validation (WAV, MP3, M4A, FLAC, WebM) from magic bytes
 - File size validation and limits
 - Audio preprocessing (noise reduction, normalization)
 - Sample rate conversion for ML models
 - Audio quality analysis and enhancement
 """
 import logging
+import math
 import os
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 import librosa
 import numpy as np
 
 from config import settings
+from src.services.audio_decoder import sniff_format
+from src.services.audio_frame import AudioFrame
+from src.services.resampler import resample
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+def frame_rms(audio_array: np.ndarray, frame_length: int, hop_length: int) -> np.ndarray:
+    """
+    Frame RMS matching librosa.feature.rms(center=True, pad_mode="constant").
+
+    Squares are summed in blocks of gcd(frame, hop, frame // 2) samples and the
+    window sums are read off a cumulative sum, so memory stays at one value per
+    block instead of one frame matrix (hour-long files stay cheap).
+
+    Args:
+        audio_array: Mono audio
+        frame_length: Window length in samples
+        hop_length: Hop length in samples
+
+    Returns:
+        RMS per frame
+    """
+    y = np.asarray(audio_array, dtype=np.float32)
+    pad = frame_length // 2
+    block = math.gcd(math.gcd(frame_length, hop_length), pad) if pad else math.gcd(frame_length, hop_length)
+    n_frames = 1 + (len(y) + 2 * pad - frame_length) // hop_length
+    if n_frames <= 0:
+        return np.zeros(0, dtype=np.float32)
+
+    full = len(y) // block * block
+    blocks = y[:full].reshape(-1, block)
+    block_energy = np.einsum("ij,ij->i", blocks, blocks, dtype=np.float64)
+    tail = y[full:]
+    if tail.size:
+        block_energy = np.append(block_energy, np.dot(tail, tail))
+
+    # Zero blocks stand in for the centre padding on both sides
+    pad_blocks = pad // block
+    padded = np.concatenate((np.zeros(pad_blocks + 1), block_energy, np.zeros(pad_blocks + frame_length // block)))
+    cumulative = np.cumsum(padded)
+
+    first = np.arange(n_frames) * (hop_length // block)
+    energy = cumulative[first + frame_length // block] - cumulative[first]
+    return np.sqrt(np.maximum(energy, 0.0) / frame_length).astype(np.float32)
+
+
 class AudioProcessor:
     """Service for processing audio files and streams."""
 
@@ -32,16 +76,24 @@ def __init__(self):
         self.max_size_mb = settings.max_audio_size_mb
         self.target_sample_rate = settings.sample_rate
 
-    def is_valid_audio_format(self, filename: str) -> bool:
+    def is_valid_audio_format(self, filename: str, content: Optional[bytes] = None) -> bool:
         """
         Check if the audio file format is supported.
 
+        When content is given its magic bytes decide; the filename extension is
+        only consulted for content without a recognizable signature.
+
         Args:
             filename: Name of the audio file
+            content: Audio file content (only the first bytes are read)
 
         Returns:
             True if format is supported, False otherwise
         """
+        detected = sniff_format(content) if content else None
+        if detected is not None:
+            return detected in self.supported_formats
+
         if not filename:
             return False
 
@@ -51,6 +103,18 @@ def is_valid_audio_format(self, filename: str) -> bool:
 
         return ext in self.supported_formats
 
+    def detect_audio_format(self, content: bytes) -> Optional[str]:
+        """
+        Detect the container format from the file's magic bytes.
+
+        Args:
+            content: Audio file content (only the first bytes are read)
+
+        Returns:
+            Format name such as "wav" or "webm", or None if unrecognized
+        """
+        return sniff_format(content)
+
     def validate_audio_size(self, content: bytes) -> bool:
         """
         Validate audio file size.
@@ -64,31 +128,28 @@ def validate_audio_size(self, content: bytes) -> bool:
         size_mb = len(content) / (1024 * 1024)
         return size_mb <= self.max_size_mb
 
-    def get_audio_info(self, audio_path: str) -> Dict[str, Any]:
+    def get_audio_info(self, audio: Union[str, AudioFrame]) -> Dict[str, Any]:
         """
         Get information about an audio file.
 
         Args:
-            audio_path: Path to the audio file
+            audio: Path to the audio file, or an AudioFrame already decoded at ingest
 
         Returns:
             Dictionary with audio information
         """
         try:
-            # Load audio file
-            y, sr = librosa.load(audio_path, sr=None)
-
-            # Calculate duration
-            duration = len(y) / sr
+            # Load audio file at its native rate (no resample) unless it was decoded already
+            frame = audio if isinstance(audio, AudioFrame) else AudioFrame.from_file(audio, sample_rate=None)
 
             # Get audio properties
             info = {
-                "sample_rate": sr,
-                "duration": duration,
-                "channels": 1 if y.ndim == 1 else y.shape[0],
-                "samples": len(y),
-                "dtype": str(y.dtype),
-                "file_size": os.path.getsize(audio_path),
+                "sample_rate": frame.source_sample_rate,
+                "duration": frame.duration,
+                "channels": frame.source_channels,
+                "samples": round(frame.duration * frame.source_sample_rate),
+                "dtype": str(frame.samples.dtype),
+                "file_size": os.path.getsize(audio) if isinstance(audio, str) else len(frame.source_bytes or b""),
             }
 
             return info
@@ -109,15 +170,15 @@ def preprocess_audio(self, audio_array: np.ndarray, sample_rate: int) -> np.ndar
             Preprocessed audio array
         """
         try:
-            # Resample to target sample rate if needed
-            if sample_rate != self.target_sample_rate:
-                audio_array = librosa.resample(audio_array, orig_sr=sample_rate, target_sr=self.target_sample_rate)
-                sample_rate = self.target_sample_rate
-
-            # Convert to mono if stereo
+            # Convert to mono if stereo (before resampling, so only one channel is filtered)
             if audio_array.ndim > 1:
                 audio_array = librosa.to_mono(audio_array)
 
+            # Resample to target sample rate if needed (cached kernel)
+            if sample_rate != self.target_sample_rate:
+                audio_array = resample(audio_array, sample_rate, self.target_sample_rate)
+                sample_rate = self.target_sample_rate
+
             # Normalize audio
             audio_array = librosa.util.normalize(audio_array)
 
@@ -130,80 +191,111 @@ def preprocess_audio(self, audio_array: np.ndarray, sample_rate: int) -> np.ndar
             logger.error(f"Error preprocessing audio: {e}")
             return audio_array
 
-    def detect_speech_segments(self, audio_array: np.ndarray, sample_rate: int) -> List[Dict[str, Any]]:
+    def detect_speech_segments(
+        self,
+        audio_array: np.ndarray,
+        sample_rate: int,
+        min_duration: float = 0.1,
+        merge_gap: float = 0.0,
+        padding: float = 0.0,
+        threshold_ratio: float = 0.5,
+    ) -> List[Dict[str, Any]]:
         """
         Detect speech segments in audio.
 
+        Energy runs are found with NumPy run-length encoding on the voiced-frame
+        mask, so cost is linear in samples with no per-frame Python loop.
+
         Args:
             audio_array: Audio data
             sample_rate: Sample rate
+            min_duration: Drop segments shorter than this (seconds)
+            merge_gap: Merge segments separated by gaps up to this long (seconds)
+            padding: Extend each segment by this much on both sides (seconds)
+            threshold_ratio: Voiced threshold as a fraction of mean RMS
 
         Returns:
-            List of speech segments with start/end times
+            List of speech segments with start/end times and sample offsets
         """
         try:
-            # Calculate RMS energy
-            frame_length = int(0.025 * sample_rate)  # 25ms frames
-            hop_length = int(0.010 * sample_rate)  # 10ms hop
-
-            rms = librosa.feature.rms(y=audio_array, frame_length=frame_length, hop_length=hop_length)[0]
-
-            # Simple voice activity detection
-            threshold = np.mean(rms) * 0.5
-            voice_frames = rms > threshold
-
-            # Find speech segments
-            segments = []
-            in_speech = False
-            start_frame = 0
-
-            for i, is_voice in enumerate(voice_frames):
-                if is_voice and not in_speech:
-                    # Start of speech
-                    start_frame = i
-                    in_speech = True
-                elif not is_voice and in_speech:
-                    # End of speech
-                    end_frame = i
-                    start_time = start_frame * hop_length / sample_rate
-                    end_time = end_frame * hop_length / sample_rate
-
-                    if end_time - start_time > 0.1:  # Minimum 100ms segment
-                        segments.append(
-                            {
-                                "start_time": start_time,
-                                "end_time": end_time,
-                                "duration": end_time - start_time,
-                            }
-                        )
-
-                    in_speech = False
-
-            # Handle case where speech continues to end
-            if in_speech:
-                end_time = len(voice_frames) * hop_length / sample_rate
-                start_time = start_frame * hop_length / sample_rate
-                if end_time - start_time > 0.1:
-                    segments.append(
-                        {
-                            "start_time": start_time,
-                            "end_time": end_time,
-                            "duration": end_time - start_time,
-                        }
-                    )
-
-            return segments
+            starts, ends = self.speech_segment_bounds(
+                audio_array, sample_rate, min_duration, merge_gap, padding, threshold_ratio
+            )
+            return [
+                {
+                    "start_time": start / sample_rate,
+                    "end_time": end / sample_rate,
+                    "duration": (end - start) / sample_rate,
+                    "start_sample": start,
+                    "end_sample": end,
+                }
+                for start, end in zip(starts.tolist(), ends.tolist())
+            ]
 
         except Exception as e:
             logger.error(f"Error detecting speech segments: {e}")
             return []
 
+    def speech_segment_bounds(
+        self,
+        audio_array: np.ndarray,
+        sample_rate: int,
+        min_duration: float = 0.1,
+        merge_gap: float = 0.0,
+        padding: float = 0.0,
+        threshold_ratio: float = 0.5,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Vectorized core of detect_speech_segments.
+
+        Returns:
+            Tuple of (start_samples, end_samples) integer arrays
+        """
+        frame_length = int(0.025 * sample_rate)  # 25ms frames
+        hop_length = int(0.010 * sample_rate)  # 10ms hop
+
+        rms = frame_rms(audio_array, frame_length, hop_length)
+        if rms.size == 0:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty
+
+        # Simple voice activity detection
+        voice_frames = rms > np.mean(rms) * threshold_ratio
+
+        # Run boundaries: +1 where speech starts, -1 where it ends
+        edges = np.diff(np.concatenate(([0], voice_frames.view(np.int8), [0])))
+        start_frames = np.flatnonzero(edges == 1)
+        end_frames = np.flatnonzero(edges == -1)
+
+        # Merge runs separated by short gaps
+        if start_frames.size > 1:
+            keep = (start_frames[1:] - end_frames[:-1]) * hop_length > merge_gap * sample_rate
+            start_frames = start_frames[np.concatenate(([True], keep))]
+            end_frames = end_frames[np.concatenate((keep, [True]))]
+
+        long_enough = (end_frames - start_frames) * hop_length > min_duration * sample_rate
+        starts = start_frames[long_enough] * hop_length
+        ends = end_frames[long_enough] * hop_length
+
+        # Pad, clip to the signal, and merge segments that now overlap
+        pad = int(padding * sample_rate)
+        starts = np.maximum(starts - pad, 0)
+        ends = np.minimum(ends + pad, len(audio_array))
+        if pad and starts.size > 1:
+            keep = starts[1:] > ends[:-1]
+            starts = starts[np.concatenate(([True], keep))]
+            ends = np.maximum.reduceat(ends, np.flatnonzero(np.concatenate(([True], keep))))
+
+        return starts.astype(np.int64), ends.astype(np.int64)
+
     def split_audio_by_segments(
         self, audio_array: np.ndarray, sample_rate: int, segments: List[Dict[str, Any]]
     ) -> List[np.ndarray]:
         """
         Split audio into segments.
 
+        Segments are basic slices, i.e. views into audio_array; nothing is copied.
+
         Args:
             audio_array: Audio data
             sample_rate: Sample rate
@@ -216,8 +308,8 @@ def split_audio_by_segments(
 
         try:
             for segment in segments:
-                start_sample = int(segment["start_time"] * sample_rate)
-                end_sample = int(segment["end_time"] * sample_rate)
+                start_sample = segment.get("start_sample", int(segment["start_time"] * sample_rate))
+                end_sample = segment.get("end_sample", int(segment["end_time"] * sample_rate))
 
                 segment_audio = audio_array[start_sample:end_sample]
                 audio_segments.append(segment_audio)
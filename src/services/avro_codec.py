@@ -0,0 +1,161 @@
+"""
+Avro Codec
+Schemaless Avro binary encoding for Kafka message values.
+
+The avro library builds nothing ahead of time: every DatumWriter.write walks
+the schema, validates the whole datum against it, and then walks it again to
+write. AvroCodec does that work once per schema instead. With fastavro
+installed it uses fastavro's compiled schema; otherwise record schemas whose
+fields are primitives or ["null", primitive] unions (all VoiceBridge message
+schemas) are compiled into one encode and one decode function per field.
+Other schemas fall back to a cached avro DatumWriter/DatumReader.
+
+Type errors surface as exceptions from the field encoders rather than from a
+separate validation pass.
+"""
+import io
+import json
+import logging
+import struct
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import avro.schema
+from avro.io import BinaryDecoder, BinaryEncoder, DatumReader, DatumWriter
+
+logger = logging.getLogger(__name__)
+
+try:
+    import fastavro  # type: ignore
+
+    FASTAVRO_AVAILABLE = True
+except ImportError:
+    fastavro = None
+    FASTAVRO_AVAILABLE = False
+
+_FLOAT = struct.Struct("<f")
+_DOUBLE = struct.Struct("<d")
+
+
+def _write_long(n: int) -> bytes:
+    n = (n << 1) ^ (n >> 63)  # zigzag
+    out = bytearray()
+    while n > 0x7F:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+    return bytes(out)
+
+
+def _read_long(data: bytes, pos: int) -> Tuple[int, int]:
+    byte = data[pos]
+    n = byte & 0x7F
+    shift = 7
+    pos += 1
+    while byte & 0x80:
+        byte = data[pos]
+        n |= (byte & 0x7F) << shift
+        shift += 7
+        pos += 1
+    return (n >> 1) ^ -(n & 1), pos
+
+
+def _write_bytes(value: bytes) -> bytes:
+    return _write_long(len(value)) + value
+
+
+def _read_bytes(data: bytes, pos: int) -> Tuple[bytes, int]:
+    size, pos = _read_long(data, pos)
+    return bytes(data[pos : pos + size]), pos + size
+
+
+def _read_string(data: bytes, pos: int) -> Tuple[str, int]:
+    size, pos = _read_long(data, pos)
+    return str(data[pos : pos + size], "utf-8"), pos + size
+
+
+# Primitive type -> (encoder, decoder)
+_PRIMITIVES: Dict[str, Tuple[Callable[[Any], bytes], Callable[[bytes, int], Tuple[Any, int]]]] = {
+    "null": (lambda value: b"", lambda data, pos: (None, pos)),
+    "boolean": (lambda value: b"\x01" if value else b"\x00", lambda data, pos: (data[pos] == 1, pos + 1)),
+    "int": (_write_long, _read_long),
+    "long": (_write_long, _read_long),
+    "float": (_FLOAT.pack, lambda data, pos: (_FLOAT.unpack_from(data, pos)[0], pos + 4)),
+    "double": (_DOUBLE.pack, lambda data, pos: (_DOUBLE.unpack_from(data, pos)[0], pos + 8)),
+    "bytes": (_write_bytes, _read_bytes),
+    "string": (lambda value: _write_bytes(value.encode("utf-8")), _read_string),
+}
+
+
+def _compile_field(field_type: Any):
+    """Encoder and decoder for one field type, or None if it is not a primitive or nullable primitive"""
+    if isinstance(field_type, str):
+        return _PRIMITIVES.get(field_type)
+    if isinstance(field_type, list) and len(field_type) == 2 and "null" in field_type:
+        other = field_type[1 - field_type.index("null")]
+        if not isinstance(other, str) or other not in _PRIMITIVES:
+            return None
+        null_index = _write_long(field_type.index("null"))
+        value_index = _write_long(field_type.index(other))
+        encode, decode = _PRIMITIVES[other]
+
+        def encode_union(value):
+            return null_index if value is None else value_index + encode(value)
+
+        def decode_union(data, pos):
+            index, pos = _read_long(data, pos)
+            return (None, pos) if field_type[index] == "null" else decode(data, pos)
+
+        return encode_union, decode_union
+    return None
+
+
+class AvroCodec:
+    """Avro binary encoder/decoder for one schema, built once and reused for every message"""
+
+    def __init__(self, schema: Dict[str, Any]):
+        """
+        Initialize codec.
+
+        Args:
+            schema: Avro record schema as a dict
+        """
+        self.backend = "avro"
+        self._fields: Optional[List[Tuple[str, Callable, Callable]]] = None
+        if FASTAVRO_AVAILABLE:
+            self.backend = "fastavro"
+            self._schema = fastavro.parse_schema(schema)
+            return
+
+        if schema.get("type") == "record":
+            compiled = [(field["name"], _compile_field(field["type"])) for field in schema["fields"]]
+            if all(codec is not None for _, codec in compiled):
+                self.backend = "compiled"
+                self._fields = [(name, codec[0], codec[1]) for name, codec in compiled]
+                return
+
+        parsed = avro.schema.parse(json.dumps(schema))
+        self._writer = DatumWriter(parsed)
+        self._reader = DatumReader(parsed)
+
+    def encode(self, record: Dict[str, Any]) -> bytes:
+        """Encode one record"""
+        if self._fields is not None:
+            return b"".join([encode(record.get(name)) for name, encode, _ in self._fields])
+        buffer = io.BytesIO()
+        if self.backend == "fastavro":
+            fastavro.schemaless_writer(buffer, self._schema, record)
+        else:
+            self._writer.write(record, BinaryEncoder(buffer))
+        return buffer.getvalue()
+
+    def decode(self, data: bytes) -> Dict[str, Any]:
+        """Decode one record"""
+        if self._fields is not None:
+            record = {}
+            pos = 0
+            for name, _, decode in self._fields:
+                record[name], pos = decode(data, pos)
+            return record
+        if self.backend == "fastavro":
+            return fastavro.schemaless_reader(io.BytesIO(data), self._schema)
+        return self._reader.read(BinaryDecoder(io.BytesIO(data)))
@@ -0,0 +1,253 @@
+"""
+Blob Store
+Content-addressed storage for large audio payloads (claim-check pattern).
+
+Instead of putting audio bytes on Kafka, a producer stores them here and sends
+only the reference, "sha256:<hex digest>". Blobs are keyed by their hash, so
+the same payload is stored once however many messages or topics refer to it,
+and a reader can verify what it fetched. Consumers resolve the reference only
+when they actually need the bytes.
+
+Blobs live under BLOB_STORE_PATH (by default inside the secure storage
+directory used by SecureStorageService), fanned out by the first two bytes of
+the digest. Writes go to a temporary file that is renamed into place, so a
+concurrent reader never sees a partial blob.
+
+Celery task messages use a separate store, task_blob_store (under
+TASK_BLOB_STORE_PATH): stage() always moves the audio out of the message, and
+workers map the blob read-only with checked_out() instead of reading a copy
+into memory. purge() removes blobs older than a given age; the Celery cleanup
+task purges only the task store, so claim-check blobs still referenced by
+unconsumed Kafka messages are never removed by it.
+"""
+import contextlib
+import hashlib
+import logging
+import mmap
+import os
+import tempfile
+import time
+from typing import Any, Dict, Iterator, Optional, Union
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+REF_PREFIX = "sha256:"
+
+
+class BlobStore:
+    """Content-addressed blob store on the local filesystem"""
+
+    def __init__(self, root: Optional[str] = None):
+        """
+        Initialize store.
+
+        Args:
+            root: Directory for blobs (defaults to settings.blob_store_path)
+        """
+        self.root = root or settings.blob_store_path
+        self.stats = {"puts": 0, "deduplicated": 0, "gets": 0, "maps": 0, "bytes_written": 0, "purged": 0}
+
+    def path(self, reference: str) -> str:
+        """
+        Filesystem path of a blob.
+
+        Raises:
+            ValueError: If the reference is malformed
+        """
+        digest = reference[len(REF_PREFIX) :] if reference.startswith(REF_PREFIX) else ""
+        if len(digest) != 64 or any(c not in "0123456789abcdef" for c in digest):
+            raise ValueError(f"Invalid blob reference: {reference!r}")
+        return os.path.join(self.root, digest[:2], digest[2:4], digest)
+
+    def put(self, data: bytes) -> str:
+        """
+        Store a payload.
+
+        Returns:
+            Reference ("sha256:<hex>")
+        """
+        reference = REF_PREFIX + hashlib.sha256(data).hexdigest()
+        path = self.path(reference)
+        self.stats["puts"] += 1
+        try:
+            os.utime(path)  # already stored: restart its purge clock
+        except FileNotFoundError:
+            pass
+        else:
+            self.stats["deduplicated"] += 1
+            return reference
+
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, temporary = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(temporary, path)
+        except BaseException:
+            if os.path.exists(temporary):
+                os.unlink(temporary)
+            raise
+        self.stats["bytes_written"] += len(data)
+        return reference
+
+    def get(self, reference: str, verify: bool = True) -> bytes:
+        """
+        Fetch a payload.
+
+        Args:
+            reference: Reference returned by put()
+            verify: Check the content against its hash
+
+        Returns:
+            Payload bytes
+
+        Raises:
+            FileNotFoundError: If the blob does not exist
+            ValueError: If the reference is malformed or the content does not match it
+        """
+        with open(self.path(reference), "rb") as f:
+            data = f.read()
+        if verify and REF_PREFIX + hashlib.sha256(data).hexdigest() != reference:
+            raise ValueError(f"Blob content does not match {reference}")
+        self.stats["gets"] += 1
+        return data
+
+    @contextlib.contextmanager
+    def open(self, reference: str, verify: bool = True) -> Iterator[Union[mmap.mmap, bytes]]:
+        """
+        Map a payload read-only instead of reading it into memory.
+
+        The mapping is only valid inside the with block.
+
+        Args:
+            reference: Reference returned by put()
+            verify: Check the content against its hash
+
+        Raises:
+            FileNotFoundError: If the blob does not exist
+            ValueError: If the reference is malformed or the content does not match it
+        """
+        with open(self.path(reference), "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                view: Union[mmap.mmap, bytes] = b""  # empty files cannot be mapped
+            else:
+                view = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            if verify and REF_PREFIX + hashlib.sha256(view).hexdigest() != reference:
+                raise ValueError(f"Blob content does not match {reference}")
+            self.stats["maps"] += 1
+            yield view
+        finally:
+            if isinstance(view, mmap.mmap):
+                view.close()
+
+    def exists(self, reference: str) -> bool:
+        return os.path.exists(self.path(reference))
+
+    def delete(self, reference: str) -> bool:
+        """Delete a blob; returns False if it did not exist"""
+        try:
+            os.unlink(self.path(reference))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def should_check_in(self, payload: Any, threshold: Optional[int] = None) -> bool:
+        """Whether claim-check is enabled and the payload is larger than the threshold"""
+        limit = settings.claim_check_threshold_bytes if threshold is None else threshold
+        return settings.claim_check_enabled and isinstance(payload, (bytes, bytearray)) and len(payload) > limit
+
+    def check_in(self, message: Dict[str, Any], field: str, threshold: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Move a large payload field into the store.
+
+        Args:
+            message: Message dict holding the payload
+            field: Name of the bytes field
+            threshold: Payloads larger than this many bytes are stored (defaults to the setting)
+
+        Returns:
+            The message itself if the payload stays inline, otherwise a copy with the field
+            emptied and the blob reference in "<field>_ref"
+        """
+        payload = message.get(field)
+        if not self.should_check_in(payload, threshold):
+            return message
+        return {**message, field: b"", f"{field}_ref": self.put(bytes(payload))}
+
+    def check_out(self, message: Dict[str, Any], field: str) -> Optional[bytes]:
+        """
+        Payload of a field, whether it was sent inline or through check_in.
+
+        Raises:
+            FileNotFoundError: If the referenced blob does not exist
+        """
+        reference = message.get(f"{field}_ref")
+        if reference:
+            return self.get(reference)
+        return message.get(field)
+
+    def stage(self, message: Dict[str, Any], field: str) -> Dict[str, Any]:
+        """
+        Move a payload field into the store whatever its size (for task messages).
+
+        Returns:
+            A copy of the message without the field and with the blob reference in
+            "<field>_ref"; the message itself if the field is empty or already staged
+        """
+        payload = message.get(field)
+        if not isinstance(payload, (bytes, bytearray, memoryview)) or not payload:
+            return message
+        staged = {key: value for key, value in message.items() if key != field}
+        staged[f"{field}_ref"] = self.put(bytes(payload))
+        return staged
+
+    @contextlib.contextmanager
+    def checked_out(self, message: Dict[str, Any], field: str) -> Iterator[Any]:
+        """
+        Like check_out, but a referenced blob is memory-mapped rather than copied.
+
+        The payload is only valid inside the with block.
+
+        Raises:
+            FileNotFoundError: If the referenced blob does not exist
+        """
+        reference = message.get(f"{field}_ref")
+        if not reference:
+            yield message.get(field)
+            return
+        with self.open(reference) as view:
+            yield view
+
+    def purge(self, max_age_seconds: float) -> int:
+        """
+        Delete blobs not written for max_age_seconds.
+
+        Returns:
+            Number of blobs deleted
+        """
+        cutoff = time.time() - max_age_seconds
+        deleted = 0
+        for directory, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                path = os.path.join(directory, filename)
+                try:
+                    if os.path.getmtime(path) < cutoff:
+                        os.unlink(path)
+                        deleted += 1
+                except FileNotFoundError:
+                    pass  # removed concurrently
+        self.stats["purged"] += deleted
+        return deleted
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get store statistics"""
+        return {**self.stats, "root": self.root}
+
+
+# Global blob store instances: claim-check payloads, and audio staged for Celery tasks
+blob_store = BlobStore()
+task_blob_store = BlobStore(settings.task_blob_store_path)
@@ -0,0 +1,37 @@
+"""
+Evaluation services module for VoiceBridge API.
+Contains transcription accuracy metrics (WER/CER) and evaluation tooling.
+"""
+from .harness import (
+    EvaluationConfig,
+    EvaluationHarness,
+    create_backend,
+    read_manifest,
+    run_evaluation,
+)
+from .metrics import (
+    ErrorCounts,
+    character_accuracy,
+    character_error_rate,
+    edit_distance,
+    evaluate_batch,
+    evaluate_transcription,
+    word_error_counts,
+    word_error_rate,
+)
+
+__all__ = [
+    "EvaluationConfig",
+    "EvaluationHarness",
+    "create_backend",
+    "read_manifest",
+    "run_evaluation",
+    "ErrorCounts",
+    "character_accuracy",
+    "character_error_rate",
+    "edit_distance",
+    "evaluate_batch",
+    "evaluate_transcription",
+    "word_error_counts",
+    "word_error_rate",
+]
@@ -0,0 +1,533 @@
+"""
+Offline evaluation harness.
+Scores transcription backends over a manifest of (audio, reference text) pairs
+and reports WER, CER, real-time factor and latency percentiles.
+
+Audio is decoded in a process pool while the model runs on the main process,
+so decoding overlaps inference. Everything runs offline against local model
+weights or the stub backend.
+"""
+import abc
+import asyncio
+import csv
+import inspect
+import io
+import json
+import logging
+import os
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from src.services.evaluation.metrics import evaluate_batch, evaluate_transcription
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SAMPLE_RATE = 16000
+AUDIO_KEYS = ("audio_filepath", "audio_path", "audio", "path")
+TEXT_KEYS = ("text", "reference", "transcript")
+
+
+@dataclass
+class ManifestEntry:
+    """One utterance from an evaluation manifest"""
+
+    utterance_id: str
+    audio_path: str
+    reference: str
+    language: Optional[str] = None
+
+
+@dataclass
+class EvaluationConfig:
+    """Settings for a single evaluation run"""
+
+    backend: str = "stub"
+    model: Optional[str] = None
+    batch_size: int = 1
+    decode_workers: int = 2
+    threads: Optional[int] = None
+    language: str = "en"
+    sample_rate: int = DEFAULT_SAMPLE_RATE
+    limit: Optional[int] = None
+    backend_options: Dict[str, Any] = field(default_factory=dict)
+
+
+def read_manifest(path: str, limit: Optional[int] = None) -> List[ManifestEntry]:
+    """
+    Read a JSONL manifest.
+
+    Each line is a JSON object with an audio path (``audio_filepath``,
+    ``audio_path``, ``audio`` or ``path``) and a reference (``text``,
+    ``reference`` or ``transcript``). Relative audio paths are resolved
+    against the manifest's directory.
+
+    Args:
+        path: Manifest file path
+        limit: Maximum number of entries to read
+
+    Returns:
+        List of manifest entries
+    """
+    base_dir = os.path.dirname(os.path.abspath(path))
+    entries: List[ManifestEntry] = []
+
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+
+            audio_path = next((record[k] for k in AUDIO_KEYS if k in record), None)
+            reference = next((record[k] for k in TEXT_KEYS if k in record), None)
+            if audio_path is None or reference is None:
+                raise ValueError(f"{path}:{line_number}: entry needs an audio path and a reference text")
+
+            if not os.path.isabs(audio_path):
+                audio_path = os.path.join(base_dir, audio_path)
+
+            entries.append(
+                ManifestEntry(
+                    utterance_id=str(record.get("id", line_number)),
+                    audio_path=audio_path,
+                    reference=reference,
+                    language=record.get("language"),
+                )
+            )
+            if limit is not None and len(entries) >= limit:
+                break
+
+    return entries
+
+
+def decode_audio(path: str, sample_rate: int = DEFAULT_SAMPLE_RATE) -> Tuple[Optional[np.ndarray], Optional[str]]:
+    """
+    Decode an audio file to mono float32 at the target sample rate.
+
+    Runs inside pool workers, so it only returns picklable values.
+
+    Returns:
+        (samples, error) - samples is None when decoding failed
+    """
+    try:
+        import librosa
+
+        audio, _ = librosa.load(path, sr=sample_rate, mono=True)
+        return audio.astype(np.float32, copy=False), None
+    except Exception as e:
+        return None, str(e)
+
+
+def _decode_task(args: Tuple[str, int]) -> Tuple[Optional[np.ndarray], Optional[str]]:
+    """Pool entry point for decode_audio"""
+    return decode_audio(*args)
+
+
+class EvaluationBackend(abc.ABC):
+    """Base class for backends that transcribe batches of decoded audio"""
+
+    name = "base"
+
+    def __init__(self, model: Optional[str] = None, language: str = "en", **options: Any):
+        self.model = model
+        self.language = language
+        self.options = options
+
+    def load(self) -> None:
+        """Load model weights before timing starts"""
+
+    @abc.abstractmethod
+    def transcribe_batch(self, batch: List[np.ndarray], sample_rate: int) -> List[str]:
+        """
+        Transcribe a batch of mono float32 signals.
+
+        Args:
+            batch: Decoded audio signals
+            sample_rate: Sample rate of every signal
+
+        Returns:
+            One hypothesis text per signal
+        """
+
+    def describe(self) -> Dict[str, Any]:
+        """Return identifying information for the results file"""
+        return {"backend": self.name, "model": self.model}
+
+
+class StubBackend(EvaluationBackend):
+    """Deterministic StubTranscriptionService, for measuring harness and pipeline overhead"""
+
+    name = "stub"
+
+    def __init__(self, model: Optional[str] = None, language: str = "en", **options: Any):
+        super().__init__(model or "stub", language, **options)
+        self._service = None
+
+    def load(self) -> None:
+        from src.services.stub_transcription_service import StubTranscriptionService
+
+        # Ignore options meant for model backends (model_dir, device)
+        accepted = inspect.signature(StubTranscriptionService).parameters
+        self._service = StubTranscriptionService(**{k: v for k, v in self.options.items() if k in accepted})
+
+    def transcribe_batch(self, batch: List[np.ndarray], sample_rate: int) -> List[str]:
+        async def run() -> List[Dict[str, Any]]:
+            return await asyncio.gather(
+                *(self._service.transcribe_audio_bytes(audio.tobytes(), self.language) for audio in batch)
+            )
+
+        return [result.get("text", "") for result in asyncio.run(run())]
+
+
+class WhisperBackend(EvaluationBackend):
+    """Local openai-whisper model"""
+
+    name = "whisper"
+
+    def __init__(self, model: Optional[str] = None, language: str = "en", **options: Any):
+        super().__init__(model or "base", language, **options)
+        self._model = None
+
+    def load(self) -> None:
+        import whisper
+
+        self._model = whisper.load_model(
+            self.model,
+            device=self.options.get("device"),
+            download_root=self.options.get("model_dir"),
+        )
+
+    def transcribe_batch(self, batch: List[np.ndarray], sample_rate: int) -> List[str]:
+        # whisper.transcribe handles one signal at a time (it windows long audio itself)
+        texts = []
+        for audio in batch:
+            result = self._model.transcribe(audio, language=self.language, fp16=False)
+            texts.append(result.get("text", "").strip())
+        return texts
+
+
+class Wav2Vec2Backend(EvaluationBackend):
+    """Hugging Face Wav2Vec2 CTC model, batched with padding"""
+
+    name = "wav2vec2"
+
+    def __init__(self, model: Optional[str] = None, language: str = "en", **options: Any):
+        super().__init__(model or "facebook/wav2vec2-base-960h", language, **options)
+        self._service = None
+
+    def load(self) -> None:
+        from src.services.wav2vec_service import Wav2Vec2Service
+
+        self._service = Wav2Vec2Service(self.model)
+        if not self._service.load_model():
+            raise RuntimeError(f"Could not load Wav2Vec2 model {self.model}")
+
+    def transcribe_batch(self, batch: List[np.ndarray], sample_rate: int) -> List[str]:
+        import torch
+
+        service = self._service
+        inputs = service.processor(batch, sampling_rate=sample_rate, return_tensors="pt", padding=True)
+        with torch.no_grad():
+            logits = service.model(inputs.input_values.to(service.device)).logits
+        predicted_ids = torch.argmax(logits, dim=-1)
+        return [text.strip() for text in service.processor.batch_decode(predicted_ids)]
+
+
+class OpenAIWhisperBackend(EvaluationBackend):
+    """OpenAI Whisper API (mock responses when no API key is configured)"""
+
+    name = "openai"
+
+    def __init__(self, model: Optional[str] = None, language: str = "en", **options: Any):
+        super().__init__(model or "whisper-1", language, **options)
+        self._service = None
+
+    def load(self) -> None:
+        from src.services.openai_whisper_service import OpenAIWhisperService
+
+        self._service = OpenAIWhisperService(api_key=self.options.get("api_key"))
+
+    def transcribe_batch(self, batch: List[np.ndarray], sample_rate: int) -> List[str]:
+        import soundfile as sf
+
+        def to_wav(audio: np.ndarray) -> bytes:
+            buffer = io.BytesIO()
+            sf.write(buffer, audio, sample_rate, format="WAV", subtype="PCM_16")
+            return buffer.getvalue()
+
+        async def run() -> List[Dict[str, Any]]:
+            return await asyncio.gather(
+                *(self._service.transcribe_audio_bytes(to_wav(audio), self.language) for audio in batch)
+            )
+
+        return [result.get("text", "") for result in asyncio.run(run())]
+
+
+BACKENDS: Dict[str, Callable[..., EvaluationBackend]] = {
+    StubBackend.name: StubBackend,
+    WhisperBackend.name: WhisperBackend,
+    Wav2Vec2Backend.name: Wav2Vec2Backend,
+    OpenAIWhisperBackend.name: OpenAIWhisperBackend,
+}
+
+
+def create_backend(name: str, model: Optional[str] = None, language: str = "en", **options: Any) -> EvaluationBackend:
+    """Instantiate a registered backend by name"""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown backend '{name}'. Available: {', '.join(sorted(BACKENDS))}")
+    return BACKENDS[name](model=model, language=language, **options)
+
+
+def set_thread_count(threads: Optional[int]) -> None:
+    """Limit intra-op threads for torch (when installed) in this process"""
+    if not threads:
+        return
+    try:
+        import torch
+
+        torch.set_num_threads(threads)
+    except ImportError:
+        logger.debug("torch not installed; thread count only applies to BLAS via environment")
+
+
+def latency_percentiles(latencies: Iterable[float]) -> Dict[str, float]:
+    """p50/p90/p95/p99 and mean of a latency sample, in seconds"""
+    values = np.asarray(list(latencies), dtype=np.float64)
+    if values.size == 0:
+        return {}
+    p50, p90, p95, p99 = np.percentile(values, [50, 90, 95, 99])
+    return {
+        "latency_mean": float(values.mean()),
+        "latency_p50": float(p50),
+        "latency_p90": float(p90),
+        "latency_p95": float(p95),
+        "latency_p99": float(p99),
+        "latency_max": float(values.max()),
+    }
+
+
+def _batched(items: Iterator[Any], size: int) -> Iterator[List[Any]]:
+    batch: List[Any] = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class EvaluationHarness:
+    """Runs one backend over a manifest and collects per-utterance rows"""
+
+    def __init__(self, config: EvaluationConfig, backend: Optional[EvaluationBackend] = None):
+        """
+        Initialize the harness.
+
+        Args:
+            config: Run settings
+            backend: Pre-built backend (otherwise created from config.backend)
+        """
+        self.config = config
+        self.backend = backend or create_backend(
+            config.backend, config.model, config.language, **config.backend_options
+        )
+
+    def _decoded(
+        self, entries: List[ManifestEntry]
+    ) -> Iterator[Tuple[ManifestEntry, Optional[np.ndarray], Optional[str]]]:
+        """Yield decoded audio in manifest order while workers decode ahead"""
+        tasks = [(entry.audio_path, self.config.sample_rate) for entry in entries]
+
+        if self.config.decode_workers <= 0:
+            for entry, task in zip(entries, tasks):
+                yield (entry, *_decode_task(task))
+            return
+
+        # Keep a bounded window of decodes in flight so memory stays flat on large corpora
+        window = max(2, self.config.decode_workers * max(1, self.config.batch_size) * 2)
+        with ProcessPoolExecutor(max_workers=self.config.decode_workers) as pool:
+            pending: Deque[Tuple[ManifestEntry, Future]] = deque()
+            position = 0
+            while position < len(tasks) or pending:
+                while position < len(tasks) and len(pending) < window:
+                    pending.append((entries[position], pool.submit(_decode_task, tasks[position])))
+                    position += 1
+                entry, future = pending.popleft()
+                audio, error = future.result()
+                yield entry, audio, error
+
+    def run(self, entries: List[ManifestEntry]) -> Dict[str, Any]:
+        """
+        Evaluate the backend over manifest entries.
+
+        Args:
+            entries: Manifest entries to score
+
+        Returns:
+            Dictionary with "rows" (per utterance) and "summary" (aggregates)
+        """
+        set_thread_count(self.config.threads)
+        load_start = time.perf_counter()
+        self.backend.load()
+        load_seconds = time.perf_counter() - load_start
+
+        rows: List[Dict[str, Any]] = []
+        run_start = time.perf_counter()
+        wait_seconds = 0.0
+        decoded = self._decoded(entries)
+
+        for batch_index, batch in enumerate(_batched(decoded, max(1, self.config.batch_size))):
+            ready = [(entry, audio) for entry, audio, error in batch if audio is not None]
+            for entry, _, error in batch:
+                if error is not None:
+                    rows.append(self._row(entry, batch_index, error=error))
+
+            if not ready:
+                continue
+
+            start = time.perf_counter()
+            try:
+                hypotheses = self.backend.transcribe_batch([audio for _, audio in ready], self.config.sample_rate)
+                error = None
+            except Exception as e:
+                logger.error(f"Backend {self.backend.name} failed on batch {batch_index}: {e}")
+                hypotheses = [""] * len(ready)
+                error = str(e)
+            latency = time.perf_counter() - start
+
+            batch_audio = sum(len(audio) for _, audio in ready) / self.config.sample_rate
+            for (entry, audio), hypothesis in zip(ready, hypotheses):
+                rows.append(
+                    self._row(
+                        entry,
+                        batch_index,
+                        hypothesis=hypothesis,
+                        duration=len(audio) / self.config.sample_rate,
+                        latency=latency,
+                        rtf=latency / batch_audio if batch_audio else 0.0,
+                        error=error,
+                    )
+                )
+            wait_seconds += latency
+
+        wall_seconds = time.perf_counter() - run_start
+        return {"rows": rows, "summary": self._summarize(rows, wall_seconds, wait_seconds, load_seconds)}
+
+    def _row(
+        self,
+        entry: ManifestEntry,
+        batch_index: int,
+        hypothesis: str = "",
+        duration: float = 0.0,
+        latency: float = 0.0,
+        rtf: float = 0.0,
+        error: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Build one result row"""
+        metrics = evaluate_transcription(hypothesis, entry.reference) if error is None else {}
+        return {
+            **self.backend.describe(),
+            "threads": self.config.threads,
+            "batch_size": self.config.batch_size,
+            "utterance_id": entry.utterance_id,
+            "audio_path": entry.audio_path,
+            "reference": entry.reference,
+            "hypothesis": hypothesis,
+            "duration_seconds": duration,
+            "latency_seconds": latency,
+            "rtf": rtf,
+            "batch_index": batch_index,
+            "wer": metrics.get("wer"),
+            "cer": metrics.get("cer"),
+            "substitutions": metrics.get("substitutions"),
+            "deletions": metrics.get("deletions"),
+            "insertions": metrics.get("insertions"),
+            "error": error,
+        }
+
+    def _summarize(
+        self, rows: List[Dict[str, Any]], wall_seconds: float, inference_seconds: float, load_seconds: float
+    ) -> Dict[str, Any]:
+        """Aggregate rows into corpus-level metrics"""
+        scored = [row for row in rows if row["error"] is None]
+        corpus = evaluate_batch([r["reference"] for r in scored], [r["hypothesis"] for r in scored])["corpus"]
+        audio_seconds = sum(row["duration_seconds"] for row in scored)
+
+        # Every utterance in a batch shares the batch latency; count each batch once
+        batch_latencies = {row["batch_index"]: row["latency_seconds"] for row in scored}
+
+        return {
+            **self.backend.describe(),
+            "threads": self.config.threads,
+            "batch_size": self.config.batch_size,
+            "decode_workers": self.config.decode_workers,
+            "utterances": len(rows),
+            "failed": len(rows) - len(scored),
+            "wer": corpus["wer"],
+            "cer": corpus.get("cer"),
+            "audio_seconds": audio_seconds,
+            "inference_seconds": inference_seconds,
+            "wall_seconds": wall_seconds,
+            "load_seconds": load_seconds,
+            "rtf": inference_seconds / audio_seconds if audio_seconds else 0.0,
+            "wall_rtf": wall_seconds / audio_seconds if audio_seconds else 0.0,
+            **latency_percentiles(batch_latencies.values()),
+        }
+
+
+def write_results(rows: List[Dict[str, Any]], path: str) -> str:
+    """
+    Write rows to a columnar file.
+
+    ``.parquet`` paths use pandas/pyarrow when installed and fall back to CSV
+    next to the requested path otherwise.
+
+    Returns:
+        Path actually written
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    if path.endswith(".parquet"):
+        try:
+            import pandas as pd
+
+            pd.DataFrame(rows).to_parquet(path, index=False)
+            return path
+        except ImportError as e:
+            path = os.path.splitext(path)[0] + ".csv"
+            logger.warning(f"Parquet output unavailable ({e}); writing {path} instead")
+
+    columns: List[str] = []
+    for row in rows:
+        columns.extend(key for key in row if key not in columns)
+
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        writer.writeheader()
+        writer.writerows(rows)
+    return path
+
+
+def run_evaluation(manifest_path: str, config: EvaluationConfig) -> Dict[str, Any]:
+    """
+    Evaluate one backend configuration over a manifest.
+
+    Args:
+        manifest_path: JSONL manifest path
+        config: Run settings
+
+    Returns:
+        Dictionary with "rows" and "summary"
+    """
+    entries = read_manifest(manifest_path, config.limit)
+    logger.info(
+        f"Evaluating {config.backend} ({config.model or 'default'}) on {len(entries)} utterances, "
+        f"batch_size={config.batch_size}, threads={config.threads}"
+    )
+    return EvaluationHarness(config).run(entries)
@@ -0,0 +1,328 @@
+"""
+Transcription accuracy metrics.
+Edit distance, WER/CER and word-level error counts shared by the tracking
+services (MLFlow, W&B) and the offline evaluation tools.
+
+Character distances use Myers' bit-parallel algorithm on Python integers, so
+a 10k-character reference costs ~10k big-integer operations instead of 100M
+Python-level cell updates. Word-level counts use a row-vectorized NumPy
+dynamic program that carries substitution/insertion/deletion counts along
+with the cost, which keeps memory at O(len(hypothesis)) per pair.
+"""
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, Hashable, List, Sequence, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+TextOrTokens = Union[str, Sequence[str]]
+
+
+@dataclass
+class ErrorCounts:
+    """Alignment counts between a reference and a hypothesis"""
+
+    substitutions: int
+    deletions: int
+    insertions: int
+    reference_length: int
+    hypothesis_length: int
+
+    @property
+    def errors(self) -> int:
+        """Total number of edit operations"""
+        return self.substitutions + self.deletions + self.insertions
+
+    @property
+    def hits(self) -> int:
+        """Number of reference tokens matched exactly"""
+        return self.reference_length - self.substitutions - self.deletions
+
+    @property
+    def error_rate(self) -> float:
+        """Errors normalized by reference length"""
+        if self.reference_length == 0:
+            return 0.0 if self.hypothesis_length == 0 else 1.0
+        return self.errors / self.reference_length
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return counts as a plain dictionary"""
+        return {
+            "substitutions": self.substitutions,
+            "deletions": self.deletions,
+            "insertions": self.insertions,
+            "hits": self.hits,
+            "reference_length": self.reference_length,
+            "hypothesis_length": self.hypothesis_length,
+            "error_rate": self.error_rate,
+        }
+
+
+def normalize_text(text: str) -> str:
+    """Normalize text the way the tracking services always have (lowercase, trimmed)"""
+    return " ".join((text or "").lower().split())
+
+
+def _tokenize(value: TextOrTokens) -> List[str]:
+    """Split text into words, or pass an existing token list through"""
+    if isinstance(value, str):
+        return normalize_text(value).split()
+    return list(value)
+
+
+def edit_distance(s1: Sequence[Hashable], s2: Sequence[Hashable]) -> int:
+    """
+    Levenshtein distance using Myers' bit-parallel algorithm.
+
+    Works on any sequences of hashable items (characters, word ids, ...).
+    The shorter sequence is used as the bit-vector pattern.
+
+    Args:
+        s1: First sequence
+        s2: Second sequence
+
+    Returns:
+        Minimum number of insertions, deletions and substitutions
+    """
+    if len(s1) < len(s2):
+        s1, s2 = s2, s1
+
+    m = len(s2)
+    if m == 0:
+        return len(s1)
+
+    # Match bit-vectors for every symbol of the pattern
+    peq: Dict[Hashable, int] = {}
+    for i, symbol in enumerate(s2):
+        peq[symbol] = peq.get(symbol, 0) | (1 << i)
+
+    mask = (1 << m) - 1
+    high_bit = 1 << (m - 1)
+    pv = mask
+    mv = 0
+    score = m
+
+    for symbol in s1:
+        eq = peq.get(symbol, 0)
+        xv = eq | mv
+        xh = ((((eq & pv) + pv) & mask) ^ pv) | eq
+        ph = (mv | ~(xh | pv)) & mask
+        mh = pv & xh
+
+        if ph & high_bit:
+            score += 1
+        elif mh & high_bit:
+            score -= 1
+
+        ph = ((ph << 1) | 1) & mask
+        mh = (mh << 1) & mask
+        pv = (mh | ~(xv | ph)) & mask
+        mv = ph & xv
+
+    return score
+
+
+def _encode_pair(reference: List[str], hypothesis: List[str], vocabulary: Dict[str, int]):
+    """Map words to integer ids from a shared vocabulary"""
+    ref_ids = np.fromiter((vocabulary.setdefault(w, len(vocabulary)) for w in reference), dtype=np.int64)
+    hyp_ids = np.fromiter((vocabulary.setdefault(w, len(vocabulary)) for w in hypothesis), dtype=np.int64)
+    return ref_ids, hyp_ids
+
+
+def _align_counts(ref_ids: np.ndarray, hyp_ids: np.ndarray) -> ErrorCounts:
+    """
+    Minimum edit alignment counts between two id sequences.
+
+    Each row of the Levenshtein table is computed with NumPy. The within-row
+    insertion chain D[j] = min_k(T[k] + j - k) is resolved with a running
+    minimum over packed (cost - k, k) keys, so the originating column k (and
+    therefore the carried counts) is recovered without a Python inner loop.
+    """
+    n = len(ref_ids)
+    m = len(hyp_ids)
+
+    if n == 0 or m == 0:
+        return ErrorCounts(0, n, m, n, m)
+
+    columns = np.arange(m + 1, dtype=np.int64)
+    stride = m + 1
+
+    cost = columns.copy()
+    subs = np.zeros(m + 1, dtype=np.int64)
+    ins = columns.copy()
+    dels = np.zeros(m + 1, dtype=np.int64)
+
+    t_cost = np.empty(m + 1, dtype=np.int64)
+    t_subs = np.empty(m + 1, dtype=np.int64)
+    t_ins = np.empty(m + 1, dtype=np.int64)
+    t_dels = np.empty(m + 1, dtype=np.int64)
+
+    for i in range(1, n + 1):
+        mismatch = (hyp_ids != ref_ids[i - 1]).astype(np.int64)
+        diagonal = cost[:-1] + mismatch
+        up = cost[1:] + 1
+        use_diagonal = diagonal <= up
+
+        t_cost[0] = i
+        t_subs[0] = 0
+        t_ins[0] = 0
+        t_dels[0] = i
+        t_cost[1:] = np.where(use_diagonal, diagonal, up)
+        t_subs[1:] = np.where(use_diagonal, subs[:-1] + mismatch, subs[1:])
+        t_ins[1:] = np.where(use_diagonal, ins[:-1], ins[1:])
+        t_dels[1:] = np.where(use_diagonal, dels[:-1], dels[1:] + 1)
+
+        # Resolve insertions: pick the column k minimizing t_cost[k] - k
+        keys = (t_cost - columns + m) * stride + columns
+        origin = np.minimum.accumulate(keys) % stride
+        chain = columns - origin
+
+        cost = t_cost[origin] + chain
+        subs = t_subs[origin]
+        ins = t_ins[origin] + chain
+        dels = t_dels[origin]
+
+    return ErrorCounts(int(subs[-1]), int(dels[-1]), int(ins[-1]), n, m)
+
+
+def word_error_counts(reference: TextOrTokens, hypothesis: TextOrTokens) -> ErrorCounts:
+    """
+    Word-level substitution/deletion/insertion counts.
+
+    Args:
+        reference: Ground truth text (or pre-split words)
+        hypothesis: Predicted text (or pre-split words)
+
+    Returns:
+        ErrorCounts for the minimum edit alignment
+    """
+    ref_words = _tokenize(reference)
+    hyp_words = _tokenize(hypothesis)
+    ref_ids, hyp_ids = _encode_pair(ref_words, hyp_words, {})
+    return _align_counts(ref_ids, hyp_ids)
+
+
+def word_error_rate(reference: TextOrTokens, hypothesis: TextOrTokens) -> float:
+    """Word error rate (S + D + I) / N"""
+    return word_error_counts(reference, hypothesis).error_rate
+
+
+def character_error_rate(reference: str, hypothesis: str) -> float:
+    """Character error rate on normalized text"""
+    ref = normalize_text(reference)
+    hyp = normalize_text(hypothesis)
+    if not ref:
+        return 0.0 if not hyp else 1.0
+    return edit_distance(ref, hyp) / len(ref)
+
+
+def character_accuracy(predicted: str, actual: str) -> float:
+    """
+    Character-level accuracy as 1 - distance / max_len.
+
+    Kept identical to the metric the tracking services have always logged.
+    """
+    if not actual:
+        return 0.0
+
+    max_len = max(len(predicted), len(actual))
+    if max_len == 0:
+        return 1.0
+
+    return 1.0 - (edit_distance(predicted, actual) / max_len)
+
+
+def evaluate_transcription(predicted: str, actual: str) -> Dict[str, Any]:
+    """
+    Compute the full set of accuracy metrics for one transcription.
+
+    Args:
+        predicted: Predicted transcription text
+        actual: Ground truth text
+
+    Returns:
+        Dictionary with WER/CER, word counts and accuracy scores
+    """
+    predicted_norm = normalize_text(predicted)
+    actual_norm = normalize_text(actual)
+    predicted_words = predicted_norm.split()
+    actual_words = actual_norm.split()
+
+    counts = word_error_counts(actual_words, predicted_words)
+    cer = character_error_rate(actual_norm, predicted_norm)
+
+    return {
+        "wer": counts.error_rate,
+        "cer": cer,
+        "word_accuracy": max(0.0, 1.0 - counts.error_rate) if actual_words else 0.0,
+        "char_accuracy": character_accuracy(predicted_norm, actual_norm),
+        "substitutions": counts.substitutions,
+        "deletions": counts.deletions,
+        "insertions": counts.insertions,
+        "length_ratio": len(predicted_norm) / len(actual_norm) if actual_norm else 0,
+        "predicted_length": len(predicted_norm),
+        "actual_length": len(actual_norm),
+        "predicted_word_count": len(predicted_words),
+        "actual_word_count": len(actual_words),
+    }
+
+
+def evaluate_batch(
+    references: Sequence[str],
+    hypotheses: Sequence[str],
+    include_cer: bool = True,
+) -> Dict[str, Any]:
+    """
+    Evaluate many (reference, hypothesis) pairs at once.
+
+    All pairs share one word vocabulary, so each word is hashed once per
+    batch, and corpus-level rates are weighted by reference length.
+
+    Args:
+        references: Ground truth texts
+        hypotheses: Predicted texts (same order as references)
+        include_cer: Whether to compute character error rates
+
+    Returns:
+        Dictionary with per-utterance results and corpus aggregates
+    """
+    if len(references) != len(hypotheses):
+        raise ValueError(f"Got {len(references)} references but {len(hypotheses)} hypotheses")
+
+    vocabulary: Dict[str, int] = {}
+    utterances: List[Dict[str, Any]] = []
+    totals = {"substitutions": 0, "deletions": 0, "insertions": 0, "reference_words": 0}
+    char_errors = 0
+    char_total = 0
+
+    for reference, hypothesis in zip(references, hypotheses):
+        ref_norm = normalize_text(reference)
+        hyp_norm = normalize_text(hypothesis)
+        ref_ids, hyp_ids = _encode_pair(ref_norm.split(), hyp_norm.split(), vocabulary)
+        counts = _align_counts(ref_ids, hyp_ids)
+
+        utterance: Dict[str, Any] = {"wer": counts.error_rate, **counts.to_dict()}
+        if include_cer:
+            distance = edit_distance(ref_norm, hyp_norm)
+            utterance["cer"] = distance / len(ref_norm) if ref_norm else float(bool(hyp_norm))
+            char_errors += distance
+            char_total += len(ref_norm)
+
+        utterances.append(utterance)
+        totals["substitutions"] += counts.substitutions
+        totals["deletions"] += counts.deletions
+        totals["insertions"] += counts.insertions
+        totals["reference_words"] += counts.reference_length
+
+    total_errors = totals["substitutions"] + totals["deletions"] + totals["insertions"]
+    corpus: Dict[str, Any] = {
+        "utterances": len(utterances),
+        "wer": total_errors / totals["reference_words"] if totals["reference_words"] else 0.0,
+        **totals,
+    }
+    if include_cer:
+        corpus["cer"] = char_errors / char_total if char_total else 0.0
+
+    return {"utterances": utterances, "corpus": corpus}
@@ -0,0 +1,327 @@
+"""
+Feature Engine
+Spectral feature extraction from a single shared STFT.
+
+Calling librosa.feature.mfcc, spectral_centroid, spectral_rolloff,
+spectral_bandwidth and chroma_stft one after another computes the same STFT
+five times. tonnetz adds a CQT-based chroma on top. The engine computes the
+STFT once per signal and derives every spectral feature from its magnitude and
+power spectrograms. Features are computed lazily, only when requested, and
+each intermediate (STFT, mel spectrogram, tuning, chroma) at most once.
+
+A 2-D input of shape (n_clips, n_samples) is processed as one batch. The STFT,
+the mel projection and the DCT run once over the whole stack, and every
+feature gets a leading clip axis.
+
+Values match the librosa defaults used by AudioPreprocessingService. The one
+exception is tonnetz, which is projected from the STFT chroma instead of a CQT
+chroma unless tonnetz_from_cqt is set.
+"""
+import logging
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import librosa
+import numpy as np
+import scipy.fft
+
+logger = logging.getLogger(__name__)
+
+SPECTRAL_FEATURES = (
+    "spectral_centroid",
+    "spectral_rolloff",
+    "spectral_bandwidth",
+    "zero_crossing_rate",
+    "chroma",
+    "tonnetz",
+)
+ALL_FEATURES = ("mfcc",) + SPECTRAL_FEATURES
+
+# Features each consumer needs. Callers declare who they compute for and get
+# nothing beyond that; wav2vec and the realtime path read the waveform only.
+FEATURE_REQUIREMENTS: Dict[str, Tuple[str, ...]] = {
+    "wav2vec": (),
+    "realtime": (),
+    "mfcc": ("mfcc",),
+    "analytics": ALL_FEATURES,  # TranscriptionFeature columns
+}
+
+
+def required_features(*consumers: str) -> Tuple[str, ...]:
+    """
+    Union of the features the given consumers declare, in canonical order.
+
+    Args:
+        consumers: Keys of FEATURE_REQUIREMENTS
+
+    Returns:
+        Feature names
+
+    Raises:
+        ValueError: For unknown consumers
+    """
+    wanted = set()
+    for consumer in consumers:
+        if consumer not in FEATURE_REQUIREMENTS:
+            raise ValueError(f"Unknown feature consumer: {consumer}")
+        wanted.update(FEATURE_REQUIREMENTS[consumer])
+    return tuple(name for name in ALL_FEATURES if name in wanted)
+
+
+class FeatureSet:
+    """Lazily computed features of one signal (or one batch of equal-length clips)"""
+
+    def __init__(self, engine: "FeatureEngine", audio: np.ndarray):
+        self.engine = engine
+        self.audio = audio
+        self._cache: Dict[str, Any] = {}
+
+    @property
+    def is_batch(self) -> bool:
+        return self.audio.ndim == 2
+
+    def _get(self, name: str, compute: Callable[[], Any]) -> Any:
+        if name not in self._cache:
+            self._cache[name] = compute()
+        return self._cache[name]
+
+    @property
+    def stft(self) -> np.ndarray:
+        """Complex STFT, computed once."""
+        engine = self.engine
+        return self._get(
+            "stft",
+            lambda: librosa.stft(self.audio, n_fft=engine.n_fft, hop_length=engine.hop_length, pad_mode="constant"),
+        )
+
+    @property
+    def magnitude(self) -> np.ndarray:
+        # librosa returns batched STFTs in Fortran order; matmul on those falls off the BLAS path
+        return self._get("magnitude", lambda: np.ascontiguousarray(np.abs(self.stft)))
+
+    @property
+    def power(self) -> np.ndarray:
+        return self._get("power", lambda: self.magnitude**2)
+
+    @property
+    def mel_db(self) -> np.ndarray:
+        """Log-power mel spectrogram (librosa.power_to_db with ref=1.0, top_db=80, per clip)."""
+
+        def compute() -> np.ndarray:
+            mel = np.matmul(self.engine.mel_basis, self.power)
+            log_mel = 10.0 * np.log10(np.maximum(mel, 1e-10))
+            return np.maximum(log_mel, log_mel.max(axis=(-2, -1), keepdims=True) - 80.0)
+
+        return self._get("mel_db", compute)
+
+    def get(self, name: str) -> np.ndarray:
+        """
+        Get one feature, computing it and its intermediates on first use.
+
+        Args:
+            name: One of ALL_FEATURES
+
+        Returns:
+            Feature array (leading clip axis for batches)
+
+        Raises:
+            ValueError: For unknown feature names
+        """
+        compute = getattr(self, f"_compute_{name}", None)
+        if name not in ALL_FEATURES or compute is None:
+            raise ValueError(f"Unknown feature: {name}")
+        return self._get(name, compute)
+
+    def extract(self, features: Optional[Iterable[str]] = None) -> Dict[str, np.ndarray]:
+        """
+        Get several features at once.
+
+        Args:
+            features: Feature names (all features when None)
+
+        Returns:
+            Dictionary of feature name to array
+        """
+        return {name: self.get(name) for name in (features or ALL_FEATURES)}
+
+    def _compute_mfcc(self) -> np.ndarray:
+        # MFCCs with delta and delta-delta stacked, as extract_mfcc_features returns them
+        mfccs = scipy.fft.dct(self.mel_db, axis=-2, type=2, norm="ortho")[..., : self.engine.n_mfcc, :]
+        delta = librosa.feature.delta(mfccs)
+        delta2 = librosa.feature.delta(mfccs, order=2)
+        return np.concatenate([mfccs, delta, delta2], axis=-2)
+
+    @property
+    def frequency_moments(self) -> np.ndarray:
+        """First and second frequency moments of each normalized magnitude frame, shape (..., 2, frames)."""
+
+        def compute() -> np.ndarray:
+            total = self.magnitude.sum(axis=-2, keepdims=True, dtype=np.float64)
+            total[total < np.finfo(np.float32).tiny] = 1.0
+            frequencies = self.engine.fft_frequencies
+            moments = np.matmul(np.stack([frequencies, frequencies**2]), self.magnitude.astype(np.float64))
+            return moments / total
+
+        return self._get("frequency_moments", compute)
+
+    def _compute_spectral_centroid(self) -> np.ndarray:
+        return self.frequency_moments[..., 0, :]
+
+    def _compute_spectral_rolloff(self) -> np.ndarray:
+        return librosa.feature.spectral_rolloff(S=self.magnitude, sr=self.engine.sample_rate)[..., 0, :]
+
+    def _compute_spectral_bandwidth(self) -> np.ndarray:
+        # sqrt(sum(p * (f - centroid)^2)) = sqrt(E[f^2] - centroid^2) for normalized frames
+        mean, mean_square = self.frequency_moments[..., 0, :], self.frequency_moments[..., 1, :]
+        return np.sqrt(np.maximum(mean_square - mean**2, 0.0))
+
+    def _compute_zero_crossing_rate(self) -> np.ndarray:
+        engine = self.engine
+        return librosa.feature.zero_crossing_rate(self.audio, frame_length=engine.n_fft, hop_length=engine.hop_length)[
+            ..., 0, :
+        ]
+
+    @property
+    def tuning(self) -> np.ndarray:
+        """Tuning offset per clip, as librosa.estimate_tuning gives it (one piptrack over the batch)."""
+
+        def compute() -> np.ndarray:
+            if self.engine.tuning is not None:
+                return np.full(len(self.audio) if self.is_batch else 1, self.engine.tuning)
+            pitch, magnitude = librosa.piptrack(S=self.power, sr=self.engine.sample_rate)
+            if not self.is_batch:
+                pitch, magnitude = pitch[np.newaxis], magnitude[np.newaxis]
+            tunings = []
+            for clip_pitch, clip_magnitude in zip(pitch, magnitude):
+                voiced = clip_pitch > 0
+                threshold = np.median(clip_magnitude[voiced]) if voiced.any() else 0.0
+                tunings.append(
+                    librosa.pitch_tuning(clip_pitch[(clip_magnitude >= threshold) & voiced], bins_per_octave=12)
+                )
+            return np.asarray(tunings)
+
+        return self._get("tuning", compute)
+
+    def _compute_chroma(self) -> np.ndarray:
+        power = self.power if self.is_batch else self.power[np.newaxis]
+        raw = np.stack([self.engine.chroma_basis(tuning) @ clip for tuning, clip in zip(self.tuning, power)])
+        return librosa.util.normalize(raw if self.is_batch else raw[0], norm=np.inf, axis=-2)
+
+    def _compute_tonnetz(self) -> np.ndarray:
+        engine = self.engine
+        if engine.tonnetz_from_cqt:
+            return librosa.feature.tonnetz(y=self.audio, sr=engine.sample_rate)
+        return librosa.feature.tonnetz(chroma=self.get("chroma"), sr=engine.sample_rate)
+
+
+class FeatureEngine:
+    """Shared-STFT feature extractor with cached filter banks"""
+
+    def __init__(
+        self,
+        sample_rate: int = 16000,
+        n_fft: int = 2048,
+        hop_length: int = 512,
+        n_mfcc: int = 13,
+        n_mels: int = 128,
+        tonnetz_from_cqt: bool = False,
+        tuning: Optional[float] = None,
+    ):
+        """
+        Initialize feature engine.
+
+        Args:
+            sample_rate: Sample rate of the audio it will analyze
+            n_fft: FFT window size
+            hop_length: Hop length
+            n_mfcc: Number of MFCC coefficients
+            n_mels: Mel bands behind the MFCCs
+            tonnetz_from_cqt: Compute tonnetz from a CQT chroma (slow, librosa's default)
+            tuning: Fixed chroma tuning offset in bins; estimated per clip when None
+        """
+        self.sample_rate = sample_rate
+        self.n_fft = n_fft
+        self.hop_length = hop_length
+        self.n_mfcc = n_mfcc
+        self.n_mels = n_mels
+        self.tonnetz_from_cqt = tonnetz_from_cqt
+        self.tuning = tuning
+        self.mel_basis = librosa.filters.mel(sr=sample_rate, n_fft=n_fft, n_mels=n_mels)
+        self.fft_frequencies = librosa.fft_frequencies(sr=sample_rate, n_fft=n_fft)
+        self._chroma_bases: Dict[float, np.ndarray] = {}
+
+    def chroma_basis(self, tuning: float) -> np.ndarray:
+        """Chroma filter bank for a tuning offset (cached; tuning has 0.01 resolution)."""
+        tuning = round(tuning, 2)
+        if tuning not in self._chroma_bases:
+            self._chroma_bases[tuning] = librosa.filters.chroma(
+                sr=self.sample_rate, n_fft=self.n_fft, tuning=tuning, n_chroma=12
+            )
+        return self._chroma_bases[tuning]
+
+    def analyze(self, audio: np.ndarray) -> FeatureSet:
+        """
+        Start a lazy analysis.
+
+        Args:
+            audio: Mono samples, or (n_clips, n_samples) equal-length clips
+
+        Returns:
+            FeatureSet computing features on demand
+        """
+        audio = np.asarray(audio, dtype=np.float32)
+        if audio.ndim not in (1, 2):
+            raise ValueError("Audio must be 1-D or a 2-D batch of clips")
+        return FeatureSet(self, audio)
+
+    def extract(self, audio: np.ndarray, features: Optional[Iterable[str]] = None) -> Dict[str, np.ndarray]:
+        """
+        Compute features of one signal or one batch.
+
+        Args:
+            audio: Mono samples, or (n_clips, n_samples) equal-length clips
+            features: Feature names (all features when None)
+
+        Returns:
+            Dictionary of feature name to array
+        """
+        return self.analyze(audio).extract(features)
+
+    def extract_batch(
+        self, clips: Sequence[np.ndarray], features: Optional[Iterable[str]] = None
+    ) -> List[Dict[str, np.ndarray]]:
+        """
+        Compute features of many clips, stacking equal-length clips into batches.
+
+        Args:
+            clips: Mono clips of any lengths
+            features: Feature names (all features when None)
+
+        Returns:
+            One feature dictionary per clip, in input order
+        """
+        features = tuple(features or ALL_FEATURES)
+        by_length: Dict[int, List[int]] = {}
+        for index, clip in enumerate(clips):
+            by_length.setdefault(len(clip), []).append(index)
+
+        results: List[Optional[Dict[str, np.ndarray]]] = [None] * len(clips)
+        for indices in by_length.values():
+            batch = self.extract(np.stack([clips[i] for i in indices]), features)
+            for position, index in enumerate(indices):
+                results[index] = {name: values[position] for name, values in batch.items()}
+        logger.info(f"Extracted features for {len(clips)} clips in {len(by_length)} batches")
+        return results
+
+
+@lru_cache(maxsize=8)
+def get_feature_engine(
+    sample_rate: int = 16000, n_fft: int = 2048, hop_length: int = 512, n_mfcc: int = 13
+) -> FeatureEngine:
+    """
+    Get a shared feature engine for the given parameters.
+
+    Returns:
+        FeatureEngine instance
+    """
+    return FeatureEngine(sample_rate=sample_rate, n_fft=n_fft, hop_length=hop_length, n_mfcc=n_mfcc)
@@ -35,8 +35,11 @@
         voicebridge_pb2_grpc = None  # type: ignore
 
 from config import settings
+from src.services.ingest_format import IngestFormat
 from src.services.model_monitoring_service import model_monitoring_service
-from src.services.openai_whisper_service import get_openai_whisper_service
+from src.services.profiling_service import span
+from src.services.transcription_backend import get_transcription_service
+from src.services.vad_service import vad_service
 
 logger = logging.getLogger(__name__)
 
@@ -45,7 +48,7 @@ class AudioStreamingServicer(object):  # type: ignore
     """gRPC servicer for audio streaming"""
 
     def __init__(self):
-        self.whisper_service = get_openai_whisper_service(settings.openai_api_key)
+        self.whisper_service = get_transcription_service(settings.openai_api_key)
         self.active_sessions: Dict[str, Dict[str, Any]] = {}
         self.subscriber_queue: Optional[Any] = None  # type: ignore
         self.session_lock = threading.Lock()
@@ -54,9 +57,7 @@ async def StreamAudio(self, request_iterator: AsyncIterator, context) -> AsyncIt
         """Stream audio data for real-time transcription"""
         session_id = None
         user_id = None
-        audio_buffer = b""
-        buffer_size = 0
-        max_buffer_size = 1024 * 1024  # 1MB buffer
+        language = settings.default_language
 
         try:
             async for audio_chunk in request_iterator:
@@ -75,77 +76,23 @@ async def StreamAudio(self, request_iterator: AsyncIterator, context) -> AsyncIt
 
                     logger.info(f"Started gRPC audio stream for session {session_id}")
 
-                # Accumulate audio data
-                audio_buffer += audio_chunk.audio_data
-                buffer_size += len(audio_chunk.audio_data)
-
-                # Process when buffer is full or on timeout
-                if buffer_size >= max_buffer_size or len(audio_buffer) > 0:
-                    start_time = time.time()
-
-                    try:
-                        # Process audio chunk
-                        result = await self.whisper_service.transcribe_audio_bytes(
-                            audio_buffer,
-                            language=audio_chunk.language or settings.default_language,
-                        )
-
-                        processing_time = time.time() - start_time
-
-                        # Record metrics
-                        model_monitoring_service.record_model_performance(
-                            model_name="whisper_grpc",
-                            accuracy=result.get("confidence", 0.0),
-                            confidence=result.get("confidence", 0.0),
-                            processing_time=processing_time,
-                            error_occurred="error" in result,
-                        )
-
-                        # Update session stats
-                        with self.session_lock:
-                            if session_id in self.active_sessions:
-                                self.active_sessions[session_id]["chunks_processed"] += 1
-                                self.active_sessions[session_id]["total_audio_duration"] += processing_time
-
-                        # Create response
-                        if voicebridge_pb2:
-                            response = voicebridge_pb2.TranscriptionResult(
-                                session_id=session_id,
-                                user_id=user_id,
-                                text=result.get("text", ""),
-                                confidence=result.get("confidence", 0.0),
-                                language=result.get("language", settings.default_language),
-                                timestamp=int(time.time() * 1000),
-                                status=voicebridge_pb2.TranscriptionStatus.COMPLETED
-                                if "error" not in result
-                                else voicebridge_pb2.TranscriptionStatus.FAILED,
-                                model_name="whisper",
-                                processing_time=processing_time,
-                            )
-
-                            yield response
-
-                        # Clear buffer
-                        audio_buffer = b""
-                        buffer_size = 0
-
-                    except Exception as e:
-                        logger.error(f"Error processing audio chunk: {e}")
-
-                        if voicebridge_pb2:
-                            error_response = voicebridge_pb2.TranscriptionResult(
-                                session_id=session_id,
-                                user_id=user_id,
-                                text="",
-                                confidence=0.0,
-                                language=settings.default_language,
-                                timestamp=int(time.time() * 1000),
-                                status=voicebridge_pb2.TranscriptionStatus.FAILED,
-                                model_name="whisper",
-                                processing_time=0.0,
-                            )
-
-                            yield error_response
+                language = audio_chunk.language or settings.default_language
+                # Raw PCM or bare Opus when the chunk declares it; encoded containers otherwise
+                ingest_format = IngestFormat.from_chunk(audio_chunk.format, audio_chunk.sample_rate, audio_chunk.channels)
+
+                # Only closed speech segments (split at pauses) are transcribed
+                gated = vad_service.gate(f"grpc:{session_id}", audio_chunk.audio_data, ingest_format=ingest_format)
+                for audio_buffer in gated:
+                    response = await self._transcribe_buffer(session_id, user_id, audio_buffer, language)
+                    if response is not None:
+                        yield response
+
+            # End of stream: transcribe the utterance still open in the VAD
+            if session_id:
+                for audio_buffer in vad_service.gate(f"grpc:{session_id}", b"", final=True):
+                    response = await self._transcribe_buffer(session_id, user_id, audio_buffer, language)
+                    if response is not None:
+                        yield response
 
         except Exception as e:
             logger.error(f"Error in StreamAudio: {e}")
@@ -155,11 +102,73 @@ async def StreamAudio(self, request_iterator: AsyncIterator, context) -> AsyncIt
         finally:
             # Clean up session
             if session_id:
+                vad_service.end_session(f"grpc:{session_id}")
                 with self.session_lock:
                     if session_id in self.active_sessions:
                         del self.active_sessions[session_id]
                 logger.info(f"Ended gRPC audio stream for session {session_id}")
 
+    async def _transcribe_buffer(self, session_id: str, user_id: str, audio_buffer: bytes, language: str):
+        """Transcribe one speech segment and build the stream response"""
+        start_time = time.time()
+
+        try:
+            # Process audio chunk
+            with span("inference"):
+                result = await self.whisper_service.transcribe_audio_bytes(audio_buffer, language=language)
+
+            processing_time = time.time() - start_time
+
+            # Record metrics
+            with span("metrics_fanout"):
+                model_monitoring_service.record_model_performance(
+                    model_name="whisper_grpc",
+                    accuracy=result.get("confidence", 0.0),
+                    confidence=result.get("confidence", 0.0),
+                    processing_time=processing_time,
+                    error_occurred="error" in result,
+                )
+
+            # Update session stats
+            with self.session_lock:
+                if session_id in self.active_sessions:
+                    self.active_sessions[session_id]["chunks_processed"] += 1
+                    self.active_sessions[session_id]["total_audio_duration"] += processing_time
+
+            # Create response
+            if voicebridge_pb2:
+                return voicebridge_pb2.TranscriptionResult(
+                    session_id=session_id,
+                    user_id=user_id,
+                    text=result.get("text", ""),
+                    confidence=result.get("confidence", 0.0),
+                    language=result.get("language", settings.default_language),
+                    timestamp=int(time.time() * 1000),
+                    status=voicebridge_pb2.TranscriptionStatus.COMPLETED
+                    if "error" not in result
+                    else voicebridge_pb2.TranscriptionStatus.FAILED,
+                    model_name="whisper",
+                    processing_time=processing_time,
+                )
+
+        except Exception as e:
+            logger.error(f"Error processing audio chunk: {e}")
+
+            if voicebridge_pb2:
+                return voicebridge_pb2.TranscriptionResult(
+                    session_id=session_id,
+                    user_id=user_id,
+                    text="",
+                    confidence=0.0,
+                    language=settings.default_language,
+                    timestamp=int(time.time() * 1000),
+                    status=voicebridge_pb2.TranscriptionStatus.FAILED,
+                    model_name="whisper",
+                    processing_time=0.0,
+                )
+
+        return None
+
     async def GetTranscriptionStatus(self, request, context):
         """Get transcription status for a session"""
         session_id = request.session_id
@@ -279,7 +288,7 @@ class AudioProcessingServicer(object):
     """gRPC servicer for audio processing"""
 
     def __init__(self):
-        self.whisper_service = get_openai_whisper_service(settings.openai_api_key)
+        self.whisper_service = get_transcription_service(settings.openai_api_key)
         self.processing_stats: Dict[str, Dict[str, Any]] = {}
         self.stats_lock = threading.Lock()
 
@@ -290,11 +299,13 @@ async def ProcessAudioChunk(self, request, context):
         user_id = request.user_id
 
         try:
-            # Process audio
-            result = await self.whisper_service.transcribe_audio_bytes(
-                request.audio_data,
-                language=request.language or settings.default_language,
-            )
+            # Process audio (skip the model when the chunk holds no speech)
+            language = request.language or settings.default_language
+            if vad_service.should_transcribe(request.audio_data):
+                with span("inference"):
+                    result = await self.whisper_service.transcribe_audio_bytes(request.audio_data, language=language)
+            else:
+                result = {"text": "", "confidence": 0.0, "language": language, "speech_detected": False}
 
             processing_time = time.time() - start_time
 
@@ -0,0 +1,146 @@
+"""
+Idempotency Store
+Remembers which Kafka audio chunks have already been transcribed.
+
+Offsets are committed only after results are published, so a rebalance, a
+worker restart or a retried fetch redelivers chunks whose results already went
+out. Chunk ids are deterministic ("<session_id>:<chunk_index>"), so the
+consumer checks the id here before inference and skips a replay with a lookup
+instead of a second model call and a duplicate result.
+
+Ids are kept in a bounded in-process LRU with a TTL. With
+IDEMPOTENCY_REDIS_ENABLED the ids are also written to Redis, so a chunk moved to
+another worker by a rebalance is recognised there too. Redis errors are logged
+and the store carries on with the local cache only.
+"""
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from config import settings
+
+try:
+    import redis.asyncio as aioredis  # type: ignore
+
+    REDIS_AVAILABLE = True
+except ImportError:
+    aioredis = None
+    REDIS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+class IdempotencyStore:
+    """Bounded LRU of processed keys, optionally shared through Redis"""
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        ttl_seconds: Optional[int] = None,
+        prefix: str = "voicebridge:processed:",
+    ):
+        """
+        Initialize store.
+
+        Args:
+            max_entries: Keys kept locally before the least recently used is evicted
+            ttl_seconds: How long a key is remembered, locally and in Redis
+            prefix: Redis key prefix
+        """
+        self.max_entries = max_entries or settings.idempotency_cache_size
+        self.ttl_seconds = ttl_seconds or settings.idempotency_ttl_seconds
+        self.prefix = prefix
+        self.redis: Optional[Any] = None
+        self._entries: "OrderedDict[str, float]" = OrderedDict()  # key -> expiry (monotonic)
+        self.stats = {"hits": 0, "redis_hits": 0, "misses": 0, "marked": 0, "evictions": 0, "redis_errors": 0}
+
+    async def connect(self, redis_url: Optional[str] = None) -> bool:
+        """
+        Connect to Redis when IDEMPOTENCY_REDIS_ENABLED is set.
+
+        Returns:
+            True if Redis is in use
+        """
+        if self.redis is not None:
+            return True
+        if not settings.idempotency_redis_enabled or not REDIS_AVAILABLE:
+            return False
+        try:
+            client = aioredis.from_url(redis_url or settings.redis_url)
+            await client.ping()
+            self.redis = client
+            logger.info("Idempotency store using Redis")
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to connect to Redis for idempotency: {e}")
+            logger.warning("Duplicate detection will use the local cache only")
+            return False
+
+    async def close(self):
+        """Close the Redis connection"""
+        if self.redis is not None:
+            await self.redis.close()
+            self.redis = None
+
+    async def seen(self, key: str) -> bool:
+        """
+        Whether a key was already marked as processed.
+
+        Args:
+            key: Idempotency key (chunk id)
+
+        Returns:
+            True if the key was marked and has not expired
+        """
+        expiry = self._entries.get(key)
+        if expiry is not None:
+            if expiry > time.monotonic():
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return True
+            del self._entries[key]
+
+        if self.redis is not None:
+            try:
+                if await self.redis.exists(self.prefix + key):
+                    self._remember(key)
+                    self.stats["redis_hits"] += 1
+                    return True
+            except Exception as e:
+                self.stats["redis_errors"] += 1
+                logger.warning(f"Idempotency lookup in Redis failed: {e}")
+
+        self.stats["misses"] += 1
+        return False
+
+    async def mark(self, key: str):
+        """
+        Record a key as processed.
+
+        Args:
+            key: Idempotency key (chunk id)
+        """
+        self._remember(key)
+        self.stats["marked"] += 1
+        if self.redis is not None:
+            try:
+                await self.redis.set(self.prefix + key, 1, ex=self.ttl_seconds)
+            except Exception as e:
+                self.stats["redis_errors"] += 1
+                logger.warning(f"Idempotency write to Redis failed: {e}")
+
+    def _remember(self, key: str):
+        self._entries[key] = time.monotonic() + self.ttl_seconds
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get lookup statistics"""
+        return {**self.stats, "entries": len(self._entries), "redis": self.redis is not None}
+
+
+# Global idempotency store instance
+idempotency_store = IdempotencyStore()
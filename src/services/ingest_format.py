@@ -0,0 +1,228 @@
+"""
+Ingest Format
+Negotiated wire formats for streamed audio.
+
+By default a stream carries encoded containers (WAV or WebM fragments), and
+each chunk goes through container sniffing and decoding. A client can instead
+declare its format up front, either in a WebSocket handshake message or in the
+format/sample_rate/channels fields of gRPC and Kafka AudioChunk messages:
+
+    {"type": "handshake", "codec": "pcm_s16le", "sample_rate": 48000,
+     "channels": 1, "frame_ms": 20}
+
+After that, each message is a bare frame: interleaved int16 or float32 PCM,
+or one Opus packet without a container. Frames are converted straight into a
+per-session PCMRingBuffer (int16 is scaled in the same pass that writes it),
+and the VAD reads whole analysis frames from there. No container is parsed
+and no intermediate buffers are built per message.
+"""
+import logging
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from src.services.audio_decoder import PCM_FORMATS, OpusPacketDecoder
+
+logger = logging.getLogger(__name__)
+
+CONTAINER = "container"
+RAW_CODECS = {"pcm_s16le": "s16le", "pcm_f32le": "f32le", "opus": None}
+CODEC_ALIASES = {
+    "s16le": "pcm_s16le",
+    "int16": "pcm_s16le",
+    "pcm16": "pcm_s16le",
+    "f32le": "pcm_f32le",
+    "float32": "pcm_f32le",
+}
+# Values of the AudioChunk format field that mean "encoded container"
+CONTAINER_FORMATS = {"", CONTAINER, "wav", "webm", "flac", "ogg", "mp3", "m4a"}
+
+MIN_FRAME_MS = 2.5
+MAX_FRAME_MS = 120.0  # the longest Opus frame
+
+
+@dataclass(frozen=True)
+class IngestFormat:
+    """Declared format of a raw audio stream"""
+
+    codec: str = CONTAINER
+    sample_rate: int = 16000
+    channels: int = 1
+    frame_ms: float = 20.0
+
+    @property
+    def is_raw(self) -> bool:
+        return self.codec != CONTAINER
+
+    @classmethod
+    def from_handshake(cls, message: Dict[str, Any]) -> "IngestFormat":
+        """
+        Validate a client handshake.
+
+        Args:
+            message: Decoded handshake JSON (codec, sample_rate, channels, frame_ms)
+
+        Returns:
+            IngestFormat
+
+        Raises:
+            ValueError: If a field is missing, unknown or out of range
+        """
+        codec = str(message.get("codec", CONTAINER)).lower()
+        codec = CODEC_ALIASES.get(codec, codec)
+        if codec != CONTAINER and codec not in RAW_CODECS:
+            raise ValueError(f"Unsupported codec: {codec}")
+        try:
+            sample_rate = int(message.get("sample_rate", 16000))
+            channels = int(message.get("channels", 1))
+            frame_ms = float(message.get("frame_ms", 20.0))
+        except (TypeError, ValueError):
+            raise ValueError("sample_rate, channels and frame_ms must be numbers")
+        if not 8000 <= sample_rate <= 192000:
+            raise ValueError(f"Unsupported sample rate: {sample_rate}")
+        if not 1 <= channels <= 8:
+            raise ValueError(f"Unsupported channel count: {channels}")
+        if not MIN_FRAME_MS <= frame_ms <= MAX_FRAME_MS:
+            raise ValueError(f"frame_ms must be between {MIN_FRAME_MS} and {MAX_FRAME_MS}")
+        return cls(codec=codec, sample_rate=sample_rate, channels=channels, frame_ms=frame_ms)
+
+    @classmethod
+    def from_chunk(cls, format: str, sample_rate: int, channels: int) -> Optional["IngestFormat"]:
+        """
+        Read the format declared in an AudioChunk (gRPC or Kafka).
+
+        Returns:
+            IngestFormat for raw codecs, None for encoded containers or unusable declarations
+        """
+        codec = CODEC_ALIASES.get((format or "").lower(), (format or "").lower())
+        if codec in CONTAINER_FORMATS or codec not in RAW_CODECS:
+            return None
+        try:
+            return cls.from_handshake({"codec": codec, "sample_rate": sample_rate or 16000, "channels": channels or 1})
+        except ValueError as e:
+            logger.warning(f"Ignoring invalid chunk format declaration: {e}")
+            return None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class PCMRingBuffer:
+    """Fixed-capacity float32 ring buffer; when full, the oldest samples are overwritten"""
+
+    def __init__(self, capacity: int):
+        """
+        Initialize ring buffer.
+
+        Args:
+            capacity: Capacity in samples
+        """
+        self._data = np.zeros(capacity, dtype=np.float32)
+        self._start = 0
+        self.available = 0
+        self.dropped = 0
+
+    @property
+    def capacity(self) -> int:
+        return self._data.size
+
+    def write(self, samples: np.ndarray, scale: Optional[float] = None) -> None:
+        """
+        Append samples, converting to float32 in place.
+
+        Args:
+            samples: Mono samples of any numeric dtype
+            scale: Multiply by this while writing (e.g. 1/32768 for int16 PCM)
+        """
+        if samples.size > self.capacity:
+            self.dropped += samples.size - self.capacity
+            samples = samples[-self.capacity :]
+        overflow = self.available + samples.size - self.capacity
+        if overflow > 0:
+            self._start = (self._start + overflow) % self.capacity
+            self.available -= overflow
+            self.dropped += overflow
+
+        position = (self._start + self.available) % self.capacity
+        first = min(samples.size, self.capacity - position)
+        # At most two contiguous pieces: up to the end of the storage, then from its start
+        for offset, source in ((position, samples[:first]), (0, samples[first:])):
+            if source.size:
+                destination = self._data[offset : offset + source.size]
+                if scale is None:
+                    destination[:] = source
+                else:
+                    np.multiply(source, np.float32(scale), out=destination, casting="unsafe")
+        self.available += samples.size
+
+    def read(self, count: int) -> np.ndarray:
+        """
+        Remove and return up to count of the oldest samples.
+
+        Returns:
+            A new float32 array (callers may keep it; the ring slots are reused)
+        """
+        count = min(count, self.available)
+        first = min(count, self.capacity - self._start)
+        out = np.empty(count, dtype=np.float32)
+        out[:first] = self._data[self._start : self._start + first]
+        out[first:] = self._data[: count - first]
+        self._start = (self._start + count) % self.capacity
+        self.available -= count
+        return out
+
+
+class RawFrameDecoder:
+    """Writes negotiated raw frames (PCM or bare Opus packets) into a ring buffer"""
+
+    def __init__(self, ingest_format: IngestFormat, capacity: int, preferred_rate: Optional[int] = None):
+        """
+        Initialize decoder.
+
+        Args:
+            ingest_format: Declared stream format (must be raw)
+            capacity: Ring buffer capacity in samples
+            preferred_rate: Rate to decode Opus to when the codec supports it
+
+        Raises:
+            ValueError: If the format is not raw or its codec cannot be decoded here
+        """
+        if not ingest_format.is_raw:
+            raise ValueError("RawFrameDecoder needs a raw ingest format")
+        self.format = ingest_format
+        self.ring = PCMRingBuffer(capacity)
+        self._opus: Optional[OpusPacketDecoder] = None
+        if ingest_format.codec == "opus":
+            self._opus = OpusPacketDecoder(preferred_rate or ingest_format.sample_rate, ingest_format.channels)
+        self.sample_rate = self._opus.sample_rate if self._opus else ingest_format.sample_rate
+        dtype = PCM_FORMATS.get(RAW_CODECS[ingest_format.codec] or "", "<f4")
+        self._dtype = np.dtype(dtype)
+        self._partial = b""  # bytes of an incomplete sample frame carried to the next message
+
+    def write(self, payload: bytes) -> int:
+        """
+        Decode one message into the ring buffer.
+
+        Returns:
+            Samples written
+        """
+        if self._opus is not None:
+            samples = self._opus.decode([payload])
+            self.ring.write(samples)
+            return samples.size
+
+        if self._partial:
+            payload = self._partial + payload
+        frame_bytes = self._dtype.itemsize * self.format.channels
+        usable = len(payload) - len(payload) % frame_bytes
+        self._partial = payload[usable:]
+        samples = np.frombuffer(payload, dtype=self._dtype, count=usable // self._dtype.itemsize)
+        scale = 1.0 / 32768 if self._dtype.kind == "i" else None
+        if self.format.channels > 1:
+            samples = samples.reshape(-1, self.format.channels).mean(axis=1, dtype=np.float32)
+            if scale is not None:
+                samples *= np.float32(scale)
+                scale = None
+        self.ring.write(samples, scale=scale)
+        return samples.size
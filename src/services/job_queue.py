@@ -0,0 +1,562 @@
+"""
+Job Queue
+Asyncio-native background jobs for the /transcribe/{task_id} workflow.
+
+Jobs run on the API's event loop: async handlers are awaited directly and
+plain functions run in the default executor, with at most JOB_QUEUE_CONCURRENCY
+jobs at a time. Higher priorities start first, and jobs of equal priority start
+in submission order.
+
+Job state is kept in a pluggable backend ("memory", "sqlite" or "redis", set
+by JOB_QUEUE_BACKEND). With SQLite or Redis, any process sharing the database
+can look up a job's state and result. Jobs are still executed by the process
+that accepted them. States and progress metadata follow Celery: PENDING,
+PROGRESS, SUCCESS, FAILURE and REVOKED, and handlers report progress with
+update_state(state="PROGRESS", meta={...}) just like a bound Celery task.
+Finished jobs are kept for JOB_RESULT_TTL_SECONDS.
+
+submit_group fans a list of calls out as separate jobs under one group id,
+like a Celery chord. Each finished job updates the group's progress from its
+completion callback, and the last one aggregates every outcome, failures
+included, into the group's result.
+"""
+import asyncio
+import functools
+import inspect
+import itertools
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from config import settings
+
+try:
+    import redis.asyncio as aioredis  # type: ignore
+
+    REDIS_AVAILABLE = True
+except ImportError:
+    aioredis = None
+    REDIS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+PENDING = "PENDING"
+PROGRESS = "PROGRESS"
+SUCCESS = "SUCCESS"
+FAILURE = "FAILURE"
+REVOKED = "REVOKED"
+READY_STATES = (SUCCESS, FAILURE, REVOKED)
+
+
+@dataclass
+class JobRecord:
+    """State of one job as stored in the backend"""
+
+    id: str
+    name: str
+    state: str = PENDING
+    meta: Dict[str, Any] = field(default_factory=dict)
+    result: Any = None
+    error: Optional[str] = None
+    priority: int = 0
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    expires_at: Optional[float] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.state in READY_STATES
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class MemoryJobBackend:
+    """Job records in a dict; visible to this process only"""
+
+    def __init__(self):
+        self._records: Dict[str, Dict[str, Any]] = {}
+
+    async def save(self, record: JobRecord):
+        self._records[record.id] = record.to_dict()
+
+    async def load(self, job_id: str) -> Optional[JobRecord]:
+        data = self._records.get(job_id)
+        if data is None:
+            return None
+        if data["expires_at"] is not None and data["expires_at"] < time.time():
+            del self._records[job_id]
+            return None
+        return JobRecord(**data)
+
+    async def purge_expired(self) -> int:
+        now = time.time()
+        expired = [
+            key for key, data in self._records.items() if data["expires_at"] is not None and data["expires_at"] < now
+        ]
+        for key in expired:
+            del self._records[key]
+        return len(expired)
+
+
+class SQLiteJobBackend:
+    """Job records in a SQLite file shared by every process on the host"""
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Initialize backend.
+
+        Args:
+            path: Database file (defaults to settings.job_queue_sqlite_path)
+        """
+        self.path = path or settings.job_queue_sqlite_path
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("CREATE TABLE IF NOT EXISTS jobs (id TEXT PRIMARY KEY, data TEXT, expires_at REAL)")
+
+    async def _run(self, sql: str, parameters: tuple = ()) -> sqlite3.Cursor:
+        def execute():
+            with self._lock:
+                return self._connection.execute(sql, parameters)
+
+        # sqlite3 blocks, so statements run in the default executor
+        return await asyncio.get_running_loop().run_in_executor(None, execute)
+
+    async def save(self, record: JobRecord):
+        await self._run(
+            "INSERT OR REPLACE INTO jobs (id, data, expires_at) VALUES (?, ?, ?)",
+            (record.id, json.dumps(record.to_dict()), record.expires_at),
+        )
+
+    async def load(self, job_id: str) -> Optional[JobRecord]:
+        cursor = await self._run(
+            "SELECT data FROM jobs WHERE id = ? AND (expires_at IS NULL OR expires_at >= ?)", (job_id, time.time())
+        )
+        row = cursor.fetchone()
+        return JobRecord(**json.loads(row[0])) if row else None
+
+    async def purge_expired(self) -> int:
+        cursor = await self._run("DELETE FROM jobs WHERE expires_at < ?", (time.time(),))
+        return cursor.rowcount
+
+
+class RedisJobBackend:
+    """Job records in Redis, expired by Redis itself"""
+
+    def __init__(self, redis_url: Optional[str] = None, prefix: str = "voicebridge:job:"):
+        """
+        Initialize backend.
+
+        Args:
+            redis_url: Redis URL (defaults to settings.redis_url)
+            prefix: Key prefix
+
+        Raises:
+            RuntimeError: If the redis package is not installed
+        """
+        if not REDIS_AVAILABLE:
+            raise RuntimeError("redis package is not installed")
+        self.redis = aioredis.from_url(redis_url or settings.redis_url)
+        self.prefix = prefix
+
+    async def save(self, record: JobRecord):
+        ttl = max(1, int(record.expires_at - time.time())) if record.expires_at is not None else None
+        await self.redis.set(self.prefix + record.id, json.dumps(record.to_dict()), ex=ttl)
+
+    async def load(self, job_id: str) -> Optional[JobRecord]:
+        data = await self.redis.get(self.prefix + job_id)
+        return JobRecord(**json.loads(data)) if data else None
+
+    async def purge_expired(self) -> int:
+        return 0
+
+
+def create_job_backend(kind: Optional[str] = None):
+    """
+    Create the configured job backend.
+
+    Args:
+        kind: "memory", "sqlite" or "redis" (defaults to settings.job_queue_backend)
+
+    Raises:
+        ValueError: If the backend name is unknown
+    """
+    kind = (kind or settings.job_queue_backend).lower()
+    if kind == "memory":
+        return MemoryJobBackend()
+    if kind == "sqlite":
+        return SQLiteJobBackend()
+    if kind == "redis":
+        return RedisJobBackend()
+    raise ValueError(f"Unknown job queue backend: {kind}")
+
+
+@dataclass
+class _JobGroup:
+    record: JobRecord
+    children: List[str]
+    outcomes: List[Optional[Dict[str, Any]]]
+    aggregate: Optional[Callable[[List[Dict[str, Any]], float], Any]] = None
+    revoked: bool = False
+
+
+class JobContext:
+    """Handle passed to a job handler as its first argument, like a bound Celery task's self"""
+
+    def __init__(self, queue: "JobQueue", record: JobRecord):
+        self.queue = queue
+        self.record = record
+
+    @property
+    def id(self) -> str:
+        return self.record.id
+
+    def update_state(self, state: str = PROGRESS, meta: Optional[Dict[str, Any]] = None):
+        """
+        Record progress; callable from the event loop or from an executor thread.
+
+        Final states are set by the queue from the handler's return value or exception,
+        so SUCCESS, FAILURE and REVOKED are ignored here.
+        """
+        if state in READY_STATES or self.record.ready:
+            return
+        self.record.state = state
+        self.record.meta = meta or {}
+        self.queue._persist(self.record)
+
+
+class JobQueue:
+    """Priority job queue with a concurrency limit, running on the current event loop"""
+
+    def __init__(self, backend: Any = None, concurrency: Optional[int] = None, result_ttl: Optional[int] = None):
+        """
+        Initialize queue.
+
+        Args:
+            backend: Job backend (created from settings on first use when omitted)
+            concurrency: Jobs run at once
+            result_ttl: Seconds a finished job stays queryable
+        """
+        self._backend = backend
+        self.concurrency = concurrency or settings.job_queue_concurrency
+        self.result_ttl = result_ttl or settings.job_result_ttl_seconds
+        self.handlers: Dict[str, Callable[..., Any]] = {}
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._workers: list = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._sequence = itertools.count()
+        self._records: Dict[str, JobRecord] = {}  # jobs of this process that are not finished
+        self._running: Dict[str, asyncio.Task] = {}
+        self._groups: Dict[str, _JobGroup] = {}
+        self._group_of: Dict[str, tuple] = {}  # child job id -> (group id, index)
+        self._saves: set = set()
+        self.stats = {"submitted": 0, "succeeded": 0, "failed": 0, "revoked": 0}
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            self._backend = create_job_backend()
+        return self._backend
+
+    def task(self, name: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+        """Decorator registering a job handler under a name"""
+
+        def register(handler: Callable[..., Any]) -> Callable[..., Any]:
+            self.handlers[name] = handler
+            return handler
+
+        return register
+
+    async def start(self):
+        """Start the workers on the running loop (called by submit when needed)"""
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._workers:
+            return
+        self._loop = loop
+        self._queue = asyncio.PriorityQueue()
+        self._workers = [asyncio.create_task(self._work()) for _ in range(self.concurrency)]
+        logger.info(f"Job queue started ({self.concurrency} workers)")
+
+    async def stop(self):
+        """Cancel running jobs and stop the workers"""
+        for task in list(self._running.values()):
+            task.cancel()
+        for worker in self._workers:
+            worker.cancel()
+        if self._workers:
+            await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        if self._saves:
+            await asyncio.gather(*list(self._saves), return_exceptions=True)
+
+    async def submit(self, name: str, *args: Any, priority: int = 0, **kwargs: Any) -> str:
+        """
+        Queue a job.
+
+        Args:
+            name: Registered handler name
+            *args: Positional arguments for the handler (kept in memory, not stored)
+            priority: Higher values start first
+            **kwargs: Keyword arguments for the handler
+
+        Returns:
+            Job id
+
+        Raises:
+            KeyError: If no handler is registered under the name
+        """
+        if name not in self.handlers:
+            raise KeyError(f"No job handler registered for {name!r}")
+        await self.start()
+        record = JobRecord(id=str(uuid.uuid4()), name=name, priority=priority)
+        await self.backend.save(record)
+        self._records[record.id] = record
+        self._queue.put_nowait((-priority, next(self._sequence), record.id, args, kwargs))
+        self.stats["submitted"] += 1
+        return record.id
+
+    async def submit_group(
+        self,
+        name: str,
+        arguments: Sequence[Sequence[Any]],
+        priority: int = 0,
+        aggregate: Optional[Callable[[List[Dict[str, Any]], float], Any]] = None,
+    ) -> str:
+        """
+        Queue one job per argument tuple and track them as a group.
+
+        The group's meta reports {"progress", "status", "total", "completed", "failed"}
+        as jobs finish. When the last one finishes, the group's result is
+        aggregate(outcomes, elapsed_seconds), where each outcome is {"index", "task_id",
+        "status": "completed" | "failed" | "cancelled", "result", "error"}; without an
+        aggregate function it is {"results": outcomes}. The group fails only if every job failed.
+
+        Args:
+            name: Registered handler name
+            arguments: Positional arguments for each job
+            priority: Higher values start first
+            aggregate: Builds the group result from the outcomes and the wall time
+
+        Returns:
+            Group id, queryable with get() and cancellable with cancel()
+
+        Raises:
+            KeyError: If no handler is registered under the name
+            ValueError: If there are no jobs
+        """
+        if not arguments:
+            raise ValueError("A job group needs at least one job")
+        await self.start()
+        total = len(arguments)
+        record = JobRecord(
+            id=str(uuid.uuid4()),
+            name=f"group:{name}",
+            state=PROGRESS,
+            meta={"progress": 0, "status": f"0/{total} jobs finished", "total": total, "completed": 0, "failed": 0},
+            priority=priority,
+        )
+        await self.backend.save(record)
+        self._records[record.id] = record
+        group = _JobGroup(record, [], [None] * total, aggregate)
+        self._groups[record.id] = group
+        for index, args in enumerate(arguments):
+            child_id = await self.submit(name, *args, priority=priority)
+            group.children.append(child_id)
+            self._group_of[child_id] = (record.id, index)
+        return record.id
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Current state of a job.
+
+        Returns:
+            Job record as a dict, or None if the job is unknown or its result has expired
+        """
+        record = self._records.get(job_id) or await self.backend.load(job_id)
+        return record.to_dict() if record else None
+
+    async def cancel(self, job_id: str) -> bool:
+        """
+        Revoke a job: a queued job never starts and a running async job is cancelled.
+
+        A plain function already running in the executor cannot be interrupted; its
+        result is discarded.
+
+        Returns:
+            True if the job was revoked, False if it is unknown or already finished
+        """
+        group = self._groups.get(job_id)
+        if group is not None:
+            group.revoked = True
+            for child_id in group.children:
+                await self.cancel(child_id)
+            return True
+
+        record = self._records.get(job_id)
+        if record is None or record.ready:
+            return False
+        running = self._running.get(job_id)
+        if running is not None:
+            running.cancel()
+        await self._finish(record, REVOKED)
+        return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get queue statistics"""
+        return {
+            **self.stats,
+            "queued": self._queue.qsize() if self._queue else 0,
+            "running": len(self._running),
+            "concurrency": self.concurrency,
+            "backend": type(self.backend).__name__,
+        }
+
+    async def _work(self):
+        while True:
+            _, _, job_id, args, kwargs = await self._queue.get()
+            record = self._records.get(job_id)
+            if record is None or record.ready:
+                continue  # revoked while queued
+            record.state = PROGRESS
+            record.started_at = time.time()
+            try:
+                await self.backend.save(record)
+            except Exception as e:
+                self.stats["failed"] += 1
+                self._fail_in_memory(record, e)
+                continue
+
+            task = asyncio.create_task(self._call(record, args, kwargs))
+            self._running[job_id] = task
+            try:
+                result = await task
+            except asyncio.CancelledError:
+                if record.state != REVOKED or asyncio.current_task().cancelling():
+                    raise  # the worker itself is being stopped
+                continue  # revoked while running; cancel() recorded it
+            except Exception as e:
+                logger.error(f"Job {record.name} {job_id} failed: {e}")
+                if not record.ready:
+                    await self._settle(record, FAILURE, error=str(e), meta={"error": str(e), "status": "failed"})
+            else:
+                if not record.ready:
+                    await self._settle(record, SUCCESS, result=result, meta={"progress": 100, "result": result})
+            finally:
+                self._running.pop(job_id, None)
+
+    async def _settle(self, record: JobRecord, state: str, **kwargs: Any):
+        """_finish for the worker loop: an error there fails the job instead of ending the worker"""
+        try:
+            await self._finish(record, state, **kwargs)
+        except Exception as e:
+            self._fail_in_memory(record, e)
+
+    def _fail_in_memory(self, record: JobRecord, error: Exception):
+        """Keep a job whose state could not be stored in memory as failed, so get() still reports it"""
+        logger.error(f"Job {record.name} {record.id} could not be recorded: {error}")
+        message = f"Job backend error: {error}"
+        record.state = FAILURE
+        record.error = message
+        record.meta = {"error": message, "status": "failed"}
+        record.finished_at = time.time()
+        record.expires_at = record.finished_at + self.result_ttl
+        self._records[record.id] = record
+
+    async def _call(self, record: JobRecord, args: tuple, kwargs: Dict[str, Any]) -> Any:
+        handler = self.handlers[record.name]
+        context = JobContext(self, record)
+        if inspect.iscoroutinefunction(handler):
+            return await handler(context, *args, **kwargs)
+        return await self._loop.run_in_executor(None, functools.partial(handler, context, *args, **kwargs))
+
+    async def _finish(self, record: JobRecord, state: str, result: Any = None, error: Optional[str] = None, meta=None):
+        record.state = state
+        record.result = result
+        record.error = error
+        if meta is not None:
+            record.meta = meta
+        record.finished_at = time.time()
+        record.expires_at = record.finished_at + self.result_ttl
+        self.stats[{SUCCESS: "succeeded", FAILURE: "failed", REVOKED: "revoked"}[state]] += 1
+        self._records.pop(record.id, None)
+        try:
+            await self.backend.save(record)
+        except Exception as e:
+            self._fail_in_memory(record, e)
+        else:
+            await self.backend.purge_expired()
+
+        membership = self._group_of.pop(record.id, None)
+        if membership is not None:
+            await self._child_finished(self._groups[membership[0]], membership[1], record)
+
+    async def _child_finished(self, group: _JobGroup, index: int, child: JobRecord):
+        """Completion callback of a grouped job: update the group's progress, aggregate after the last one"""
+        status = {SUCCESS: "completed", FAILURE: "failed", REVOKED: "cancelled"}[child.state]
+        group.outcomes[index] = {
+            "index": index,
+            "task_id": child.id,
+            "status": status,
+            "result": child.result,
+            "error": child.error,
+        }
+        finished = [outcome for outcome in group.outcomes if outcome is not None]
+        total = len(group.outcomes)
+        failed = sum(outcome["status"] != "completed" for outcome in finished)
+        record = group.record
+        if len(finished) < total:
+            record.meta = {
+                "progress": int(len(finished) * 100 / total),
+                "status": f"{len(finished)}/{total} jobs finished",
+                "total": total,
+                "completed": len(finished) - failed,
+                "failed": failed,
+            }
+            await self.backend.save(record)
+            return
+
+        del self._groups[record.id]
+        outcomes: List[Dict[str, Any]] = group.outcomes  # type: ignore[assignment]
+        elapsed = time.time() - record.created_at
+        result = group.aggregate(outcomes, elapsed) if group.aggregate else {"results": outcomes}
+        if group.revoked:
+            await self._finish(record, REVOKED, result=result, meta={"progress": 100, "result": result})
+        elif failed == total:
+            error = f"All {total} jobs failed"
+            await self._finish(record, FAILURE, result=result, error=error, meta={"error": error, "status": "failed"})
+        else:
+            await self._finish(record, SUCCESS, result=result, meta={"progress": 100, "result": result})
+
+    def _persist(self, record: JobRecord):
+        """Save a progress update in the background, from any thread"""
+
+        def schedule():
+            if record.ready:
+                return
+            save = asyncio.ensure_future(self.backend.save(record))
+            self._saves.add(save)
+            save.add_done_callback(self._saves.discard)
+
+        try:
+            on_loop = asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            on_loop = False
+        if on_loop:
+            schedule()
+        else:
+            self._loop.call_soon_threadsafe(schedule)
+
+
+# Global job queue instance
+job_queue = JobQueue()
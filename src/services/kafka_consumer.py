@@ -67,7 +67,12 @@ def is_connected(self) -> bool:
         return self.is_connected_flag
 
     def add_audio_handler(self, handler: Callable[[Dict[str, Any]], None]):
-        """Add handler for audio messages."""
+        """
+        Add handler for audio messages.
+
+        Uploads above the claim-check threshold arrive with content_ref instead of
+        content; handlers fetch the bytes when needed with blob_store.check_out(data, "content").
+        """
         self.audio_handlers.append(handler)
 
     def add_transcription_handler(self, handler: Callable[[Dict[str, Any]], None]):
@@ -0,0 +1,327 @@
+"""
+Kafka Consumer Engine
+Concurrent, partition-aware processing of consumed records.
+
+Records are fetched in batches and dispatched to one worker per message key
+(the session id for audio chunks), so records of a session are handled in
+order while different sessions run concurrently, up to a global limit. Offsets
+are committed manually: per partition, only up to the first record that has
+not finished, and only after the before_commit hook has run (the stream
+service flushes its producers there, so results are delivered before the
+input offset moves past them). A partition is paused when too many of its
+fetched records are still waiting and resumed when it has drained to half.
+On rebalance, fetched work is drained and committed before partitions are
+handed to another consumer.
+
+A record whose handler raises is retried with exponential backoff, up to
+KAFKA_HANDLER_MAX_ATTEMPTS. After the last attempt it goes to the on_failure
+hook (the stream service publishes it to a dead-letter topic) and only then
+counts as finished. Without a hook, or if the hook fails, the record stays
+unfinished: its partition is not committed past it, and it is redelivered
+after a restart or rebalance (at-least-once, never silently dropped).
+
+A handler that has taken a record in but not yet produced its results (the
+stream service while a chunk's audio sits in an open VAD segment) returns
+DEFERRED and calls complete() later. Until then the record holds back its
+partition's commit like an unfinished one, but it does not count towards
+pausing the partition, since the records that release it have to be fetched.
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Set
+
+from config import settings
+from src.services.prometheus_service import prometheus_metrics
+
+try:
+    from aiokafka.abc import ConsumerRebalanceListener  # type: ignore
+except Exception:  # aiokafka not installed
+    ConsumerRebalanceListener = object  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+DEFERRED = object()  # handler result: the record completes later, through ConcurrentConsumer.complete
+
+
+class _PartitionState:
+    """Fetched-but-uncommitted offsets of one partition"""
+
+    def __init__(self):
+        self.pending: Deque[int] = deque()  # in fetch order
+        self.done: Set[int] = set()
+        self.deferred: Set[int] = set()
+        self.committable: Optional[int] = None  # next offset to commit
+        self.paused = False
+
+    @property
+    def waiting(self) -> int:
+        """Fetched records not handled yet"""
+        return len(self.pending) - len(self.done) - len(self.deferred)
+
+    def complete(self, offset: int) -> None:
+        self.deferred.discard(offset)
+        self.done.add(offset)
+        while self.pending and self.pending[0] in self.done:
+            finished = self.pending.popleft()
+            self.done.discard(finished)
+            self.committable = finished + 1
+
+
+class _RebalanceListener(ConsumerRebalanceListener):
+    def __init__(self, engine: "ConcurrentConsumer"):
+        self.engine = engine
+
+    async def on_partitions_revoked(self, revoked):
+        await self.engine.release(revoked)
+
+    async def on_partitions_assigned(self, assigned):
+        logger.info(f"Assigned partitions: {sorted(assigned)}")
+
+
+class ConcurrentConsumer:
+    """Runs a handler over consumed records concurrently, keeping per-key order and committing manually"""
+
+    def __init__(
+        self,
+        consumer: Any,
+        handler: Callable[[Any], Awaitable[Any]],
+        concurrency: Optional[int] = None,
+        max_buffered: Optional[int] = None,
+        commit_interval_ms: Optional[int] = None,
+        before_commit: Optional[Callable[[], Awaitable[Any]]] = None,
+        poll_timeout_ms: int = 100,
+        drain_timeout: float = 30.0,
+        max_attempts: Optional[int] = None,
+        retry_backoff_ms: Optional[int] = None,
+        on_failure: Optional[Callable[[Any, Exception], Awaitable[Any]]] = None,
+    ):
+        """
+        Initialize engine.
+
+        Args:
+            consumer: aiokafka consumer with enable_auto_commit off
+            handler: Coroutine called with each record (returns DEFERRED to complete it later)
+            concurrency: Records handled at once across all keys
+            max_buffered: Fetched, unfinished records per partition before it is paused
+            commit_interval_ms: Minimum time between commits
+            before_commit: Coroutine awaited before each commit
+            poll_timeout_ms: getmany timeout
+            drain_timeout: Seconds to wait for in-flight work on rebalance and stop
+            max_attempts: Handler calls per record before it is given up
+            retry_backoff_ms: Delay before the first retry (doubled for each further one)
+            on_failure: Coroutine called with a given-up record and its last error
+                (e.g. dead-lettering); the record is committed only if it succeeds
+        """
+        self.consumer = consumer
+        self.handler = handler
+        self.concurrency = concurrency or settings.kafka_consumer_concurrency
+        self.max_buffered = max_buffered or settings.kafka_consumer_max_buffered
+        self.commit_interval = (commit_interval_ms or settings.kafka_commit_interval_ms) / 1000
+        self.before_commit = before_commit
+        self.poll_timeout_ms = poll_timeout_ms
+        self.drain_timeout = drain_timeout
+        self.max_attempts = max(1, max_attempts or settings.kafka_handler_max_attempts)
+        self.retry_backoff = (retry_backoff_ms or settings.kafka_handler_retry_backoff_ms) / 1000
+        self.on_failure = on_failure
+        self.rebalance_listener = _RebalanceListener(self)
+
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._partitions: Dict[Any, _PartitionState] = {}
+        self._queues: Dict[Any, Deque] = {}
+        self._workers: Dict[Any, asyncio.Task] = {}
+        self._committed: Dict[Any, int] = {}
+        self._last_commit = 0.0
+        self._running = False
+        self.in_flight = 0
+        self.stats = {
+            "processed": 0,
+            "failed": 0,
+            "retries": 0,
+            "dead_lettered": 0,
+            "uncommitted_failures": 0,
+            "commits": 0,
+            "pauses": 0,
+        }
+
+    async def run(self) -> None:
+        """Fetch and dispatch until stop() is called"""
+        self._running = True
+        while self._running:
+            try:
+                batches = await self.consumer.getmany(timeout_ms=self.poll_timeout_ms)
+            except Exception as e:
+                if not self._running:
+                    break
+                logger.error(f"Error fetching from Kafka: {e}")
+                await asyncio.sleep(1)
+                continue
+            if not self._running:
+                break  # stopped while fetching; the batch is not committed and will be redelivered
+            for tp, records in batches.items():
+                state = self._partitions.setdefault(tp, _PartitionState())
+                for record in records:
+                    state.pending.append(record.offset)
+                    self._dispatch(tp, record)
+                if state.waiting >= self.max_buffered and not state.paused:
+                    self.consumer.pause(tp)
+                    state.paused = True
+                    self.stats["pauses"] += 1
+            await self.commit()
+            self._record_metrics()
+
+    async def stop(self) -> None:
+        """Stop fetching, let in-flight work finish and commit it"""
+        self._running = False
+        await self._drain()
+        await self.commit(force=True)
+        self._record_metrics()
+
+    async def release(self, partitions) -> None:
+        """Finish and commit work from partitions that are being revoked, then forget them"""
+        await self._drain()
+        await self.commit(force=True)
+        for tp in partitions:
+            self._partitions.pop(tp, None)
+            self._committed.pop(tp, None)
+
+    async def commit(self, force: bool = False) -> None:
+        """Commit every partition up to its first unfinished record"""
+        if not force and time.monotonic() - self._last_commit < self.commit_interval:
+            return
+        offsets = {
+            tp: state.committable
+            for tp, state in self._partitions.items()
+            if state.committable is not None and state.committable != self._committed.get(tp)
+        }
+        if not offsets:
+            return
+        try:
+            if self.before_commit is not None:
+                await self.before_commit()
+            await self.consumer.commit(offsets)
+            self._committed.update(offsets)
+            self._last_commit = time.monotonic()
+            self.stats["commits"] += 1
+        except Exception as e:
+            # Uncommitted records are delivered again after a restart or rebalance
+            logger.error(f"Error committing Kafka offsets: {e}")
+
+    def complete(self, record: Any) -> None:
+        """Complete a record whose handler returned DEFERRED, so its offset can be committed"""
+        for tp, state in self._partitions.items():
+            if tp.topic == record.topic and tp.partition == record.partition:
+                if record.offset in state.deferred:
+                    self._complete(tp, record.offset)
+                return
+
+    def lag(self) -> Dict[Any, int]:
+        """Records per partition from the first unfinished one to the high watermark"""
+        lag = {}
+        for tp, state in self._partitions.items():
+            highwater = self.consumer.highwater(tp)
+            next_offset = state.pending[0] if state.pending else state.committable
+            if highwater is not None and next_offset is not None:
+                lag[tp] = max(0, highwater - next_offset)
+        return lag
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get engine statistics"""
+        return {
+            **self.stats,
+            "in_flight": self.in_flight,
+            "buffered": sum(len(state.pending) for state in self._partitions.values()),
+            "paused_partitions": sum(state.paused for state in self._partitions.values()),
+            "lag": {f"{tp.topic}-{tp.partition}": value for tp, value in self.lag().items()},
+        }
+
+    def _dispatch(self, tp: Any, record: Any) -> None:
+        key = record.key if record.key is not None else tp
+        queue = self._queues.get(key)
+        if queue is None:
+            queue = self._queues[key] = deque()
+        queue.append((tp, record))
+        if key not in self._workers:
+            self._workers[key] = asyncio.create_task(self._run_key(key, queue))
+
+    async def _run_key(self, key: Any, queue: Deque) -> None:
+        """Handle one key's records in order"""
+        try:
+            while queue:
+                tp, record = queue.popleft()
+                outcome = await self._handle(tp, record)
+                if outcome is DEFERRED:
+                    self._defer(tp, record.offset)
+                elif outcome:
+                    self._complete(tp, record.offset)
+        finally:
+            del self._queues[key]
+            del self._workers[key]
+
+    async def _handle(self, tp: Any, record: Any) -> Any:
+        """
+        Run the handler with retries.
+
+        Returns:
+            True if the record was handled or dead-lettered, DEFERRED if the handler
+            completes it later, False if it must stay uncommitted
+        """
+        where = f"{tp.topic}-{tp.partition}@{record.offset}"
+        error: Optional[Exception] = None
+        for attempt in range(1, self.max_attempts + 1):
+            async with self._semaphore:
+                self.in_flight += 1
+                try:
+                    outcome = await self.handler(record)
+                    self.stats["processed"] += 1
+                    return DEFERRED if outcome is DEFERRED else True
+                except Exception as e:
+                    error = e
+                    logger.warning(f"Error processing record {where} (attempt {attempt}/{self.max_attempts}): {e}")
+                finally:
+                    self.in_flight -= 1
+            if attempt == self.max_attempts or not self._running:
+                break
+            self.stats["retries"] += 1
+            await asyncio.sleep(self.retry_backoff * 2 ** (attempt - 1))
+
+        self.stats["failed"] += 1
+        if self.on_failure is not None and self._running:
+            try:
+                await self.on_failure(record, error)
+                self.stats["dead_lettered"] += 1
+                return True
+            except Exception as e:
+                logger.error(f"Error dead-lettering record {where}: {e}")
+        self.stats["uncommitted_failures"] += 1
+        logger.error(f"Giving up on record {where}; its offset stays uncommitted: {error}")
+        return False
+
+    def _defer(self, tp: Any, offset: int) -> None:
+        state = self._partitions.get(tp)
+        if state is None:  # revoked while in flight
+            return
+        state.deferred.add(offset)
+        self._resume_if_drained(tp, state)
+
+    def _complete(self, tp: Any, offset: int) -> None:
+        state = self._partitions.get(tp)
+        if state is None:  # revoked while in flight
+            return
+        state.complete(offset)
+        self._resume_if_drained(tp, state)
+
+    def _resume_if_drained(self, tp: Any, state: _PartitionState) -> None:
+        if state.paused and state.waiting <= self.max_buffered // 2:
+            self.consumer.resume(tp)
+            state.paused = False
+
+    async def _drain(self) -> None:
+        if self._workers:
+            _, pending = await asyncio.wait(list(self._workers.values()), timeout=self.drain_timeout)
+            if pending:
+                logger.warning(f"{len(pending)} Kafka key workers still running after {self.drain_timeout}s")
+
+    def _record_metrics(self) -> None:
+        prometheus_metrics.record_kafka_consumer(self.in_flight, self.lag())
@@ -0,0 +1,348 @@
+"""
+In-memory Kafka stand-in for VoiceBridge
+A broker, a producer with the aiokafka producer interface (start, send,
+send_and_wait, flush, stop) and a consumer with the parts of the aiokafka
+consumer interface the services use (subscribe, getmany, commit, pause,
+resume, highwater), all running inside the event loop. Batching follows
+the real client: records are grouped per topic partition until linger_ms has
+passed or max_batch_size bytes are queued, each batch is compressed with the
+producer's codec, and the delivery future of every record resolves once the
+broker has appended the batch. An optional round-trip latency makes the cost of
+awaiting each send visible without a running Kafka cluster.
+
+Used by tests and by the Kafka benchmarks in scripts/.
+"""
+import asyncio
+import gzip
+import logging
+import time
+import zlib
+from collections import defaultdict, namedtuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+try:
+    import lz4.frame as lz4_frame  # type: ignore
+
+    LZ4_AVAILABLE = True
+except ImportError:
+    lz4_frame = None
+    LZ4_AVAILABLE = False
+
+try:
+    import zstandard  # type: ignore
+
+    ZSTD_AVAILABLE = True
+except ImportError:
+    zstandard = None
+    ZSTD_AVAILABLE = False
+
+RecordMetadata = namedtuple("RecordMetadata", ["topic", "partition", "offset", "timestamp"])
+StoredRecord = namedtuple("StoredRecord", ["topic", "partition", "offset", "key", "value", "timestamp", "headers"])
+TopicPartition = namedtuple("TopicPartition", ["topic", "partition"])
+
+
+def compress(codec: Optional[str], data: bytes) -> bytes:
+    """
+    Compress a batch payload the way the broker would store it.
+
+    Raises:
+        ValueError: If the codec is unknown or its library is not installed
+    """
+    if codec is None:
+        return data
+    if codec == "gzip":
+        return gzip.compress(data, compresslevel=6)
+    if codec == "lz4" and LZ4_AVAILABLE:
+        return lz4_frame.compress(data)
+    if codec == "zstd" and ZSTD_AVAILABLE:
+        return zstandard.ZstdCompressor().compress(data)
+    raise ValueError(f"Compression codec not available: {codec}")
+
+
+class InMemoryBroker:
+    """Append-only partitioned topic logs"""
+
+    def __init__(self, partitions: int = 3, latency_ms: float = 0.0):
+        """
+        Initialize broker.
+
+        Args:
+            partitions: Partitions per topic
+            latency_ms: Simulated produce round-trip time per batch
+        """
+        self.partitions = partitions
+        self.latency_ms = latency_ms
+        self._logs: Dict[Tuple[str, int], List[StoredRecord]] = defaultdict(list)
+        self._committed: Dict[Tuple[str, str, int], int] = {}
+        self.stats = {"batches": 0, "records": 0, "bytes": 0, "stored_bytes": 0}
+
+    def partition_for(self, key: Optional[bytes]) -> int:
+        """Pick a partition for a key (keyless records go to partition 0)"""
+        return zlib.crc32(key) % self.partitions if key else 0
+
+    def append(self, topic: str, partition: int, records: List[Tuple], stored: int):
+        """
+        Append one batch.
+
+        Args:
+            topic: Topic name
+            partition: Partition number
+            records: (key, value, timestamp_ms, headers) tuples
+            stored: Size of the batch after compression
+
+        Returns:
+            Offset of the first record
+        """
+        log = self._logs[(topic, partition)]
+        base = len(log)
+        for i, (key, value, timestamp, headers) in enumerate(records):
+            log.append(StoredRecord(topic, partition, base + i, key, value, timestamp, headers))
+        self.stats["batches"] += 1
+        self.stats["records"] += len(records)
+        self.stats["bytes"] += sum(len(record[1]) for record in records)
+        self.stats["stored_bytes"] += stored
+        return base
+
+    def records(self, topic: str, partition: Optional[int] = None) -> List[StoredRecord]:
+        """Stored records of a topic, in offset order per partition"""
+        if partition is not None:
+            return list(self._logs.get((topic, partition), []))
+        return [record for p in range(self.partitions) for record in self._logs.get((topic, p), [])]
+
+    def read(self, topic: str, partition: int, offset: int, count: int) -> List[StoredRecord]:
+        """Up to count records of one partition, starting at offset"""
+        return self._logs.get((topic, partition), [])[offset : offset + count]
+
+    def end_offset(self, topic: str, partition: int) -> int:
+        return len(self._logs.get((topic, partition), []))
+
+    def commit(self, group_id: str, topic: str, partition: int, offset: int):
+        self._committed[(group_id, topic, partition)] = offset
+
+    def committed(self, group_id: str, topic: str, partition: int) -> Optional[int]:
+        return self._committed.get((group_id, topic, partition))
+
+
+default_broker = InMemoryBroker()
+
+
+class _Batch:
+    def __init__(self):
+        self.records: List[Tuple] = []
+        self.futures: List[asyncio.Future] = []
+        self.size = 0
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+
+class InMemoryKafkaProducer:
+    """Producer with the aiokafka interface, writing to an InMemoryBroker"""
+
+    def __init__(
+        self,
+        bootstrap_servers: Any = None,
+        broker: Optional[InMemoryBroker] = None,
+        key_serializer: Optional[Callable[[Any], bytes]] = None,
+        value_serializer: Optional[Callable[[Any], bytes]] = None,
+        compression_type: Optional[str] = None,
+        linger_ms: float = 0,
+        max_batch_size: int = 16384,
+        **kwargs: Any,
+    ):
+        """
+        Initialize producer. Unknown aiokafka options are accepted and ignored.
+
+        Raises:
+            ValueError: If the compression codec is not available
+        """
+        compress(compression_type, b"")
+        self.broker = broker or default_broker
+        self.key_serializer = key_serializer
+        self.value_serializer = value_serializer
+        self.compression_type = compression_type
+        self.linger_ms = linger_ms
+        self.max_batch_size = max_batch_size
+        self._batches: Dict[Tuple[str, int], _Batch] = {}
+        self._inflight: set = set()
+        self._started = False
+
+    async def start(self):
+        self._started = True
+
+    async def stop(self):
+        await self.flush()
+        self._started = False
+
+    async def send(
+        self,
+        topic: str,
+        value: Any = None,
+        key: Any = None,
+        partition: Optional[int] = None,
+        timestamp_ms: Optional[int] = None,
+        headers: Optional[List[Tuple[str, bytes]]] = None,
+    ) -> asyncio.Future:
+        """
+        Queue one record.
+
+        Returns:
+            Future resolving to RecordMetadata once the batch is stored
+        """
+        if not self._started:
+            raise RuntimeError("Producer is not started")
+        key_bytes = self.key_serializer(key) if self.key_serializer else key
+        value_bytes = self.value_serializer(value) if self.value_serializer else value
+        if partition is None:
+            partition = self.broker.partition_for(key_bytes)
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        batch = self._batches.get((topic, partition))
+        if batch is None:
+            batch = self._batches[(topic, partition)] = _Batch()
+            if self.linger_ms > 0:
+                batch.timer = loop.call_later(self.linger_ms / 1000, self._drain, topic, partition)
+        batch.records.append((key_bytes, value_bytes, timestamp_ms or int(time.time() * 1000), headers or []))
+        batch.futures.append(future)
+        batch.size += len(value_bytes or b"") + len(key_bytes or b"")
+        if self.linger_ms <= 0 or batch.size >= self.max_batch_size:
+            self._drain(topic, partition)
+        return future
+
+    async def send_and_wait(self, topic: str, value: Any = None, key: Any = None, **kwargs: Any) -> RecordMetadata:
+        return await (await self.send(topic, value=value, key=key, **kwargs))
+
+    async def flush(self):
+        """Send every open batch and wait for all deliveries"""
+        for topic, partition in list(self._batches):
+            self._drain(topic, partition)
+        while self._inflight:
+            await asyncio.gather(*list(self._inflight), return_exceptions=True)
+
+    def _drain(self, topic: str, partition: int):
+        batch = self._batches.pop((topic, partition), None)
+        if batch is None:
+            return
+        if batch.timer is not None:
+            batch.timer.cancel()
+        stored = len(compress(self.compression_type, b"".join(record[1] or b"" for record in batch.records)))
+
+        loop = asyncio.get_running_loop()
+        done = loop.create_future()
+        self._inflight.add(done)
+
+        def complete():
+            base = self.broker.append(topic, partition, batch.records, stored)
+            for i, (future, record) in enumerate(zip(batch.futures, batch.records)):
+                if not future.done():
+                    future.set_result(RecordMetadata(topic, partition, base + i, record[2]))
+            self._inflight.discard(done)
+            done.set_result(None)
+
+        if self.broker.latency_ms > 0:
+            loop.call_later(self.broker.latency_ms / 1000, complete)
+        else:
+            loop.call_soon(complete)
+
+
+class InMemoryKafkaConsumer:
+    """Consumer reading from an InMemoryBroker; every partition of the subscribed topics is assigned to it"""
+
+    def __init__(
+        self,
+        *topics: str,
+        broker: Optional[InMemoryBroker] = None,
+        group_id: Optional[str] = "default",
+        key_deserializer: Optional[Callable[[bytes], Any]] = None,
+        value_deserializer: Optional[Callable[[bytes], Any]] = None,
+        auto_offset_reset: str = "earliest",
+        max_poll_records: int = 500,
+        **kwargs: Any,
+    ):
+        """Initialize consumer. Unknown aiokafka options are accepted and ignored."""
+        self.broker = broker or default_broker
+        self.group_id = group_id
+        self.key_deserializer = key_deserializer
+        self.value_deserializer = value_deserializer
+        self.auto_offset_reset = auto_offset_reset
+        self.max_poll_records = max_poll_records
+        self._topics: List[str] = list(topics)
+        self._listener: Any = None
+        self._positions: Dict[TopicPartition, int] = {}
+        self._paused: set = set()
+        self.commits: List[Dict[TopicPartition, int]] = []
+
+    def subscribe(self, topics=(), listener: Any = None):
+        self._topics = list(topics)
+        self._listener = listener
+
+    async def start(self):
+        assigned = set()
+        for topic in self._topics:
+            for partition in range(self.broker.partitions):
+                tp = TopicPartition(topic, partition)
+                committed = self.broker.committed(self.group_id, topic, partition)
+                if committed is None:
+                    committed = 0 if self.auto_offset_reset == "earliest" else self.broker.end_offset(topic, partition)
+                self._positions[tp] = committed
+                assigned.add(tp)
+        if self._listener is not None:
+            await self._listener.on_partitions_assigned(assigned)
+
+    async def stop(self):
+        if self._listener is not None:
+            await self._listener.on_partitions_revoked(set(self._positions))
+        self._positions.clear()
+
+    def assignment(self) -> set:
+        return set(self._positions)
+
+    def highwater(self, tp: TopicPartition) -> int:
+        return self.broker.end_offset(tp.topic, tp.partition)
+
+    def pause(self, *partitions: TopicPartition):
+        self._paused.update(partitions)
+
+    def resume(self, *partitions: TopicPartition):
+        self._paused.difference_update(partitions)
+
+    def paused(self) -> set:
+        return set(self._paused)
+
+    async def commit(self, offsets: Optional[Dict[TopicPartition, int]] = None):
+        offsets = dict(offsets if offsets is not None else self._positions)
+        for tp, offset in offsets.items():
+            self.broker.commit(self.group_id, tp.topic, tp.partition, offset)
+        self.commits.append(offsets)
+
+    async def committed(self, tp: TopicPartition) -> Optional[int]:
+        return self.broker.committed(self.group_id, tp.topic, tp.partition)
+
+    async def getmany(self, *partitions: TopicPartition, timeout_ms: int = 0, max_records: Optional[int] = None):
+        """
+        Fetch records from the unpaused assigned partitions.
+
+        Returns:
+            Dict of TopicPartition to list of records (the same shape aiokafka returns)
+        """
+        budget = max_records or self.max_poll_records
+        result: Dict[TopicPartition, List[StoredRecord]] = {}
+        for tp in partitions or list(self._positions):
+            if tp in self._paused or budget <= 0:
+                continue
+            position = self._positions[tp]
+            records = self.broker.read(tp.topic, tp.partition, position, budget)
+            if records:
+                result[tp] = [
+                    record._replace(
+                        key=self.key_deserializer(record.key) if self.key_deserializer else record.key,
+                        value=self.value_deserializer(record.value) if self.value_deserializer else record.value,
+                    )
+                    for record in records
+                ]
+                self._positions[tp] = position + len(records)
+                budget -= len(records)
+        if not result and timeout_ms:
+            await asyncio.sleep(min(timeout_ms, 10) / 1000)
+        return result
@@ -1,45 +1,104 @@
 """
 Kafka producer service for sending audio data to processing queues.
+
+The kafka-python client is synchronous, so the async send methods never call
+it on the event loop. Messages go into a bounded in-memory outbox and return
+immediately; a background task hands them to the client in batches from a
+worker thread, and delivery callbacks update the stats. A caller that needs
+the broker acknowledgement passes wait=True. The acknowledgement level is set
+by KAFKA_PRODUCER_ACKS (0, 1 or all), and stop() drains the outbox and
+flushes the client before closing it.
 """
+import asyncio
+import base64
 import json
 import logging
-from typing import Any, Dict, Optional
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from kafka import KafkaProducer as KafkaProducerClient
 from kafka.errors import KafkaError
 
 from config import settings
+from src.services.blob_store import blob_store
+from src.services.prometheus_service import prometheus_metrics
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# (topic, key, message, delivery future or None, enqueue time)
+OutboxItem = Tuple[str, Optional[str], Dict[str, Any], Optional[asyncio.Future], float]
+
+
+def _json_default(value: Any) -> Any:
+    """Encode bytes (e.g. encrypted audio) as base64 strings"""
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return base64.b64encode(bytes(value)).decode("ascii")
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _parse_acks(acks: str) -> Any:
+    return "all" if str(acks).lower() in ("all", "-1") else int(acks)
+
 
 class KafkaProducer:
     """Kafka producer for audio streaming."""
 
-    def __init__(self):
+    def __init__(
+        self,
+        outbox_size: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        acks: Optional[str] = None,
+        client_factory: Callable[..., Any] = KafkaProducerClient,
+    ):
+        """
+        Initialize producer.
+
+        Args:
+            outbox_size: Messages the outbox holds before sends are rejected
+            batch_size: Messages handed to the client per worker-thread call
+            acks: Broker acknowledgement level: "0", "1" or "all"
+            client_factory: Synchronous client class (kafka-python KafkaProducer)
+        """
         self.producer: Optional[KafkaProducerClient] = None
         self.is_connected_flag = False
+        self.outbox_size = outbox_size or settings.kafka_outbox_size
+        self.batch_size = batch_size or settings.kafka_outbox_batch_size
+        self.acks = _parse_acks(acks or settings.kafka_producer_acks)
+        self.client_factory = client_factory
+        self._outbox: Optional[asyncio.Queue] = None
+        self._flusher: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.stats = {"enqueued": 0, "delivered": 0, "failed": 0, "dropped": 0}
 
     async def start(self):
         """Initialize and start the Kafka producer."""
         try:
-            self.producer = KafkaProducerClient(
-                bootstrap_servers=settings.kafka_bootstrap_servers,
-                value_serializer=lambda v: json.dumps(v).encode("utf-8"),
-                key_serializer=lambda k: k.encode("utf-8") if k else None,
-                acks="all",  # Wait for all replicas to acknowledge
-                retries=3,
-                retry_backoff_ms=100,
-                request_timeout_ms=30000,
-                max_block_ms=10000,
-            )
-
-            # Test connection
-            self.producer.flush(timeout=10)
+            self._loop = asyncio.get_running_loop()
+
+            def connect():
+                client = self.client_factory(
+                    bootstrap_servers=settings.kafka_bootstrap_servers,
+                    value_serializer=lambda v: json.dumps(v, default=_json_default).encode("utf-8"),
+                    key_serializer=lambda k: k.encode("utf-8") if k else None,
+                    acks=self.acks,
+                    retries=3,
+                    retry_backoff_ms=100,
+                    request_timeout_ms=30000,
+                    max_block_ms=10000,
+                    linger_ms=settings.kafka_linger_ms,
+                )
+                # Test connection
+                client.flush(timeout=10)
+                return client
+
+            # Bootstrapping blocks on the network, so it runs off the event loop
+            self.producer = await self._loop.run_in_executor(None, connect)
+            self._outbox = asyncio.Queue(maxsize=self.outbox_size)
+            self._flusher = asyncio.create_task(self._run_outbox())
             self.is_connected_flag = True
-            logger.info("Kafka producer started successfully")
+            logger.info(f"Kafka producer started successfully (acks={self.acks})")
 
         except Exception as e:
             logger.error(f"Failed to start Kafka producer: {e}")
@@ -47,12 +106,26 @@ async def start(self):
             raise
 
     async def stop(self):
-        """Stop the Kafka producer."""
+        """Stop the Kafka producer, delivering everything still in the outbox first."""
         try:
+            self.is_connected_flag = False
+            if self._flusher:
+                try:
+                    await asyncio.wait_for(self._outbox.join(), timeout=10)
+                except asyncio.TimeoutError:
+                    logger.warning(f"Kafka outbox not drained on shutdown: {self._outbox.qsize()} messages lost")
+                self._flusher.cancel()
+                self._flusher = None
+
             if self.producer:
-                self.producer.flush(timeout=10)
-                self.producer.close()
-                self.is_connected_flag = False
+                producer = self.producer
+                self.producer = None
+
+                def close():
+                    producer.flush(timeout=10)
+                    producer.close()
+
+                await asyncio.get_running_loop().run_in_executor(None, close)
                 logger.info("Kafka producer stopped")
         except Exception as e:
             logger.error(f"Error stopping Kafka producer: {e}")
@@ -61,51 +134,38 @@ def is_connected(self) -> bool:
         """Check if producer is connected."""
         return self.is_connected_flag
 
-    async def send_audio(self, audio_data: Dict[str, Any]) -> bool:
+    def get_stats(self) -> Dict[str, Any]:
+        """Get delivery statistics and outbox depth."""
+        return {**self.stats, "outbox": self._outbox.qsize() if self._outbox else 0}
+
+    async def send_audio(self, audio_data: Dict[str, Any], wait: bool = False) -> bool:
         """
         Send audio file data to Kafka for processing.
 
         Args:
             audio_data: Dictionary containing audio file information
+            wait: Wait for the broker acknowledgement instead of returning once queued
 
         Returns:
-            True if sent successfully, False otherwise
+            True if queued (or acknowledged, with wait), False otherwise
         """
-        if not self.producer or not self.is_connected_flag:
-            logger.error("Kafka producer not connected")
-            return False
-
-        try:
-            # Prepare message
-            message = {
-                "type": "audio_file",
-                "data": audio_data,
-                "timestamp": self._get_timestamp(),
-            }
-
-            # Send to audio processing topic
-            future = self.producer.send(
-                settings.kafka_audio_topic,
-                value=message,
-                key=audio_data.get("filename", "unknown"),
-            )
-
-            # Wait for confirmation
-            record_metadata = future.get(timeout=10)
-
-            logger.info(
-                f"Audio sent to Kafka: topic={record_metadata.topic}, "
-                f"partition={record_metadata.partition}, offset={record_metadata.offset}"
-            )
-
-            return True
-
-        except KafkaError as e:
-            logger.error(f"Kafka error sending audio: {e}")
-            return False
-        except Exception as e:
-            logger.error(f"Error sending audio to Kafka: {e}")
-            return False
+        # Large uploads go to the blob store and the message carries content_ref instead
+        if blob_store.should_check_in(audio_data.get("content")):
+            try:
+                audio_data = await asyncio.get_running_loop().run_in_executor(
+                    None, blob_store.check_in, audio_data, "content"
+                )
+            except OSError as e:
+                logger.error(f"Error storing audio in the blob store: {e}")
+                return False
+        message = {
+            "type": "audio_file",
+            "data": audio_data,
+            "timestamp": self._get_timestamp(),
+        }
+        return await self._enqueue(
+            settings.kafka_audio_topic, audio_data.get("filename", "unknown"), message, wait, "audio"
+        )
 
     async def send_audio_stream(self, audio_data: Dict[str, Any]) -> bool:
         """
@@ -115,88 +175,114 @@ async def send_audio_stream(self, audio_data: Dict[str, Any]) -> bool:
             audio_data: Dictionary containing real-time audio stream information
 
         Returns:
-            True if sent successfully, False otherwise
+            True if queued, False otherwise
         """
-        if not self.producer or not self.is_connected_flag:
-            logger.error("Kafka producer not connected")
-            return False
-
-        try:
-            # Prepare message for real-time stream
-            message = {
-                "type": "audio_stream",
-                "data": audio_data,
-                "timestamp": self._get_timestamp(),
-            }
-
-            # Send to audio stream topic
-            self.producer.send(
-                settings.kafka_audio_topic,
-                value=message,
-                key=audio_data.get("client_id", "unknown"),
-            )
-
-            # Don't wait for confirmation in real-time scenarios for better performance
-            # The future will be handled asynchronously
-
-            logger.debug(f"Audio stream sent to Kafka for client: {audio_data.get('client_id')}")
-            return True
-
-        except KafkaError as e:
-            logger.error(f"Kafka error sending audio stream: {e}")
-            return False
-        except Exception as e:
-            logger.error(f"Error sending audio stream to Kafka: {e}")
-            return False
-
-    async def send_transcription_result(self, result: Dict[str, Any]) -> bool:
+        # Prepare message for real-time stream
+        message = {
+            "type": "audio_stream",
+            "data": audio_data,
+            "timestamp": self._get_timestamp(),
+        }
+        # Never wait for confirmation in real-time scenarios
+        return await self._enqueue(
+            settings.kafka_audio_topic, audio_data.get("client_id", "unknown"), message, False, "audio stream"
+        )
+
+    async def send_transcription_result(self, result: Dict[str, Any], wait: bool = False) -> bool:
         """
         Send transcription result to Kafka.
 
         Args:
             result: Dictionary containing transcription results
+            wait: Wait for the broker acknowledgement instead of returning once queued
 
         Returns:
-            True if sent successfully, False otherwise
+            True if queued (or acknowledged, with wait), False otherwise
         """
+        message = {
+            "type": "transcription_result",
+            "data": result,
+            "timestamp": self._get_timestamp(),
+        }
+        key = result.get("client_id", result.get("task_id", "unknown"))
+        return await self._enqueue(settings.kafka_transcription_topic, key, message, wait, "transcription result")
+
+    async def _enqueue(self, topic: str, key: Optional[str], message: Dict[str, Any], wait: bool, kind: str) -> bool:
+        """Put one message in the outbox, optionally waiting for its acknowledgement"""
         if not self.producer or not self.is_connected_flag:
             logger.error("Kafka producer not connected")
             return False
 
+        delivery = self._loop.create_future() if wait else None
         try:
-            # Prepare message
-            message = {
-                "type": "transcription_result",
-                "data": result,
-                "timestamp": self._get_timestamp(),
-            }
-
-            # Send to transcription results topic
-            future = self.producer.send(
-                settings.kafka_transcription_topic,
-                value=message,
-                key=result.get("client_id", result.get("task_id", "unknown")),
-            )
-
-            # Wait for confirmation
-            record_metadata = future.get(timeout=10)
+            self._outbox.put_nowait((topic, key, message, delivery, time.perf_counter()))
+        except asyncio.QueueFull:
+            self.stats["dropped"] += 1
+            logger.warning(f"Kafka outbox full ({self.outbox_size}); dropping {kind}")
+            return False
+        self.stats["enqueued"] += 1
+        if delivery is None:
+            return True
 
+        try:
+            record_metadata = await asyncio.wait_for(delivery, timeout=10)
             logger.info(
-                f"Transcription result sent to Kafka: topic={record_metadata.topic}, "
+                f"{kind.capitalize()} sent to Kafka: topic={record_metadata.topic}, "
                 f"partition={record_metadata.partition}, offset={record_metadata.offset}"
             )
-
             return True
-
         except KafkaError as e:
-            logger.error(f"Kafka error sending transcription result: {e}")
+            logger.error(f"Kafka error sending {kind}: {e}")
             return False
         except Exception as e:
-            logger.error(f"Error sending transcription result to Kafka: {e}")
+            logger.error(f"Error sending {kind} to Kafka: {e!r}")
             return False
 
+    async def _run_outbox(self):
+        """Hand queued messages to the client in batches, from a worker thread"""
+        while True:
+            batch: List[OutboxItem] = [await self._outbox.get()]
+            while len(batch) < self.batch_size and not self._outbox.empty():
+                batch.append(self._outbox.get_nowait())
+            try:
+                await self._loop.run_in_executor(None, self._send_batch, batch)
+            except Exception as e:
+                for topic, _, _, delivery, enqueued_at in batch:
+                    self._on_delivery(topic, delivery, enqueued_at, None, e)
+            finally:
+                for _ in batch:
+                    self._outbox.task_done()
+
+    def _send_batch(self, batch: List[OutboxItem]) -> None:
+        """Runs in a worker thread; callbacks fire on the client's I/O thread"""
+        for topic, key, message, delivery, enqueued_at in batch:
+            try:
+                future = self.producer.send(topic, value=message, key=key)
+            except Exception as e:
+                self._loop.call_soon_threadsafe(self._on_delivery, topic, delivery, enqueued_at, None, e)
+                continue
+            future.add_callback(self._from_client_thread, topic, delivery, enqueued_at, False)
+            future.add_errback(self._from_client_thread, topic, delivery, enqueued_at, True)
+
+    def _from_client_thread(self, topic, delivery, enqueued_at, failed, outcome):
+        metadata, error = (None, outcome) if failed else (outcome, None)
+        self._loop.call_soon_threadsafe(self._on_delivery, topic, delivery, enqueued_at, metadata, error)
+
+    def _on_delivery(self, topic, delivery, enqueued_at, metadata, error) -> None:
+        """Record one delivery outcome on the event loop"""
+        if error is None:
+            self.stats["delivered"] += 1
+        else:
+            self.stats["failed"] += 1
+            logger.error(f"Kafka delivery to {topic} failed: {error}")
+        status = "success" if error is None else "error"
+        prometheus_metrics.record_kafka_delivery(topic, status, time.perf_counter() - enqueued_at)
+        if delivery is not None and not delivery.done():
+            if error is None:
+                delivery.set_result(metadata)
+            else:
+                delivery.set_exception(error)
+
     def _get_timestamp(self) -> float:
         """Get current timestamp."""
-        import time
-
         return time.time()
@@ -1,35 +1,79 @@
 """
 Kafka streaming service for VoiceBridge API
 Handles real-time audio streaming and processing with Kafka
+
+Production is batched: sends return as soon as the record is queued in the
+producer's accumulator, records are grouped for linger_ms or until
+max_batch_size bytes, and delivery futures are resolved in the background
+(see flush). Each topic gets its own producer and compression codec, so audio
+chunks, which are PCM, WAV or Opus and compress poorly, can skip the gzip pass
+that the small JSON-like transcription results still benefit from, and result
+events never wait behind audio batches. Avro codecs are built once per schema
+(see avro_codec).
+
+Transcription results are published as compact TranscriptionResult events on
+the transcription topic (publish_transcription_result); they never go to the
+audio topic, so the service's own consumer cannot feed them back to the model.
+
+With INFERENCE_MODE=kafka the API node does no inference: it only produces
+audio chunks and subscribes to the transcription topic, handing each result to
+the registered result handlers (see add_result_handler). Transcription runs in
+separate inference workers (src/workers/inference_worker.py) that consume the
+audio topic. Chunks are keyed by session, so every chunk of a session lands on
+the same partition and is handled, in order, by the worker that owns it.
+
+Chunk ids are deterministic (session and chunk index), and the consumer skips
+chunks already recorded in the idempotency store, so redelivered chunks are not
+transcribed or published twice. A chunk is recorded only once its audio has
+reached a published result or been dropped as silence, so a chunk redelivered
+after a crash that lost the open segment it was part of is transcribed again. Producers are idempotent (KAFKA_ENABLE_IDEMPOTENCE),
+so broker-side retries do not duplicate records either.
+
+A chunk whose audio the VAD gate is still holding (an open speech segment, or
+samples waiting for a full frame) has produced no result yet, so its offset is
+not committed until the segment it belongs to has been transcribed (see
+_release_chunks). Sessions that go quiet without a final chunk are flushed
+after half of VAD_SESSION_TTL_SECONDS, before the VAD would evict their audio,
+so an abandoned stream cannot hold back its partition's commits for good.
 """
 import asyncio
-import json
+import functools
 import logging
 import time
 import uuid
-from typing import Any, Dict, Optional
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, List, Optional
 
 try:
     from aiokafka import AIOKafkaConsumer, AIOKafkaProducer  # type: ignore
+    from aiokafka import codec as kafka_codec  # type: ignore
     from aiokafka.errors import KafkaError  # type: ignore
 
     KAFKA_AVAILABLE = True
 except Exception:  # ImportError or environment issues
     AIOKafkaProducer = None  # type: ignore
     AIOKafkaConsumer = None  # type: ignore
+    kafka_codec = None  # type: ignore
     KafkaError = Exception  # type: ignore
     KAFKA_AVAILABLE = False
-import io
-
-import avro.schema
-from avro.io import BinaryDecoder, BinaryEncoder, DatumReader, DatumWriter
 
 from config import settings
+from src.services.avro_codec import AvroCodec
+from src.services.blob_store import blob_store
+from src.services.idempotency_store import idempotency_store
+from src.services.ingest_format import IngestFormat
+from src.services.kafka_consumer_engine import DEFERRED, ConcurrentConsumer
 from src.services.model_monitoring_service import model_monitoring_service
-from src.services.openai_whisper_service import get_openai_whisper_service
+from src.services.profiling_service import span, timed
+from src.services.prometheus_service import prometheus_metrics
+from src.services.transcription_backend import get_transcription_service
+from src.services.vad_service import vad_service
 
 logger = logging.getLogger(__name__)
 
+# Configured codec name -> aiokafka compression_type
+COMPRESSION_CODECS = {"none": None, "gzip": "gzip", "snappy": "snappy", "lz4": "lz4", "zstd": "zstd"}
+
 # Avro schemas for Kafka messages
 AUDIO_CHUNK_SCHEMA = {
     "type": "record",
@@ -46,6 +90,8 @@
         {"name": "language", "type": "string"},
         {"name": "chunk_index", "type": "int"},
         {"name": "is_final", "type": "boolean"},
+        # Claim-check reference ("sha256:<hex>") when audio_data was moved to the blob store
+        {"name": "audio_data_ref", "type": ["null", "string"], "default": None},
     ],
 }
 
@@ -68,10 +114,46 @@
 }
 
 
+def resolve_compression(codec: Optional[str]) -> Optional[str]:
+    """
+    Map a configured codec name to an aiokafka compression_type.
+
+    Unknown names, and codecs whose compression library is not installed,
+    fall back to no compression with a warning.
+
+    Args:
+        codec: none, gzip, snappy, lz4 or zstd
+
+    Returns:
+        compression_type for the producer (None for uncompressed)
+    """
+    name = (codec or "none").lower()
+    if name not in COMPRESSION_CODECS:
+        logger.warning(f"Unknown Kafka compression codec {codec!r}; sending uncompressed")
+        return None
+    compression = COMPRESSION_CODECS[name]
+    if compression and kafka_codec is not None and not getattr(kafka_codec, f"has_{compression}")():
+        logger.warning(f"Kafka compression {compression} needs its library installed; sending uncompressed")
+        return None
+    return compression
+
+
 class KafkaStreamService:
     """Service for Kafka-based audio streaming and processing"""
 
-    def __init__(self):
+    def __init__(
+        self,
+        producer_factory: Optional[Callable[..., Any]] = None,
+        consumer_factory: Optional[Callable[..., Any]] = None,
+    ):
+        """
+        Initialize service.
+
+        Args:
+            producer_factory: Producer class to use instead of AIOKafkaProducer
+                (e.g. kafka_inmemory.InMemoryKafkaProducer in tests and benchmarks)
+            consumer_factory: Consumer class to use instead of AIOKafkaConsumer
+        """
         self.bootstrap_servers = settings.kafka_bootstrap_servers
         self.audio_topic = settings.kafka_audio_topic
         self.transcription_topic = settings.kafka_transcription_topic
@@ -79,16 +161,39 @@ def __init__(self):
         self.producer: Optional[AIOKafkaProducer] = None
         self.consumer: Optional[AIOKafkaConsumer] = None
         self.kafka_available: bool = KAFKA_AVAILABLE
+        self.producer_factory = producer_factory
+        self.consumer_factory = consumer_factory
+        self.consumer_engine: Optional[ConcurrentConsumer] = None
+        self._consumer_task: Optional[asyncio.Task] = None
+        self.result_consumer: Optional[AIOKafkaConsumer] = None
+        self._result_task: Optional[asyncio.Task] = None
+        self._sweep_task: Optional[asyncio.Task] = None
+        self.result_handlers: List[Callable[[Dict[str, Any]], Awaitable[Any]]] = []
+        self.idempotency_store = idempotency_store
+
+        # One batching producer per topic, each with the topic's compression codec
+        self.topic_compression: Dict[str, Optional[str]] = {
+            self.audio_topic: resolve_compression(settings.kafka_audio_compression),
+            self.transcription_topic: resolve_compression(settings.kafka_transcription_compression),
+        }
+        self._producers: Dict[str, Any] = {}
+        self._pending_deliveries: set = set()
+        self.delivery_stats = {"enqueued": 0, "delivered": 0, "failed": 0}
 
-        self.whisper_service = get_openai_whisper_service(settings.openai_api_key)
+        self.whisper_service = get_transcription_service(settings.openai_api_key)
 
         # Session management
         self.active_sessions: Dict[str, Dict[str, Any]] = {}
         self.session_lock = asyncio.Lock()
 
-        # Avro schemas
-        self.audio_schema = avro.schema.parse(json.dumps(AUDIO_CHUNK_SCHEMA))
-        self.transcription_schema = avro.schema.parse(json.dumps(TRANSCRIPTION_RESULT_SCHEMA))
+        # Chunks whose audio the VAD gate still holds, per gate session, and their records
+        self._held_chunks: Dict[str, Dict[str, Any]] = {}
+        self._held_records: Dict[str, Any] = {}
+        self.held_chunk_timeout = settings.vad_session_ttl_seconds / 2
+
+        # Avro codecs
+        self.audio_codec = AvroCodec(AUDIO_CHUNK_SCHEMA)
+        self.transcription_codec = AvroCodec(TRANSCRIPTION_RESULT_SCHEMA)
 
         # Processing stats
         self.processing_stats = {
@@ -97,6 +202,10 @@ def __init__(self):
             "failed_transcriptions": 0,
             "average_processing_time": 0.0,
             "total_audio_duration": 0.0,
+            "vad_skipped_chunks": 0,
+            "empty_chunks_skipped": 0,
+            "duplicate_chunks_skipped": 0,
+            "results_received": 0,
         }
 
     async def start(self):
@@ -105,91 +214,206 @@ async def start(self):
             if not self.kafka_available:
                 logger.warning("Kafka not available. Running in direct-processing (mock) mode.")
                 return False
-            # Start producer
-            self.producer = AIOKafkaProducer(
+            await self.start_producers()
+            if settings.inference_mode == "kafka":
+                # Inference workers consume the audio topic; this node only routes their results
+                await self.start_result_consumer()
+            else:
+                await self.start_consumer()
+            return True
+
+        except Exception as e:
+            logger.error(f"Failed to start Kafka service: {e}")
+            return False
+
+    async def start_producers(self) -> bool:
+        """
+        Start one batching producer per topic.
+
+        Returns:
+            True if producers are running
+        """
+        factory = self.producer_factory or (AIOKafkaProducer if self.kafka_available else None)
+        if factory is None:
+            return False
+        for topic, compression in self.topic_compression.items():
+            if topic in self._producers:
+                continue
+            # Values are serialized per topic before sending, so the producer only encodes keys
+            producer = factory(
                 bootstrap_servers=self.bootstrap_servers,
-                value_serializer=self._serialize_audio_chunk,
                 key_serializer=lambda x: x.encode("utf-8") if x else None,
-                compression_type="gzip",
+                compression_type=compression,
+                linger_ms=settings.kafka_linger_ms,
+                max_batch_size=settings.kafka_max_batch_size,
+                enable_idempotence=settings.kafka_enable_idempotence,
                 retry_backoff_ms=100,
                 request_timeout_ms=30000,
             )
-            await self.producer.start()
-            logger.info("Kafka producer started")
-
-            # Start consumer
-            self.consumer = AIOKafkaConsumer(
-                self.audio_topic,
-                bootstrap_servers=self.bootstrap_servers,
-                group_id="voicebridge-transcription-group",
-                value_deserializer=self._deserialize_audio_chunk,
-                key_deserializer=lambda x: x.decode("utf-8") if x else None,
-                auto_offset_reset="latest",
-                enable_auto_commit=True,
-                max_poll_records=10,
-            )
-            await self.consumer.start()
-            logger.info("Kafka consumer started")
-
-            # Start processing loop
-            asyncio.create_task(self._process_audio_streams())
-
-            return True
-
-        except Exception as e:
-            logger.error(f"Failed to start Kafka service: {e}")
+            await producer.start()
+            self._producers[topic] = producer
+            logger.info(f"Kafka producer started for {topic} (compression={compression or 'none'})")
+        self.producer = self._producers[self.audio_topic]
+        return True
+
+    async def start_consumer(self, concurrency: Optional[int] = None) -> bool:
+        """
+        Start the audio consumer and its processing loop.
+
+        Offsets are committed manually by the consumer engine once results are produced.
+        Chunks that still fail after retries go to KAFKA_DEAD_LETTER_TOPIC before their
+        offsets are committed.
+
+        Args:
+            concurrency: Chunks transcribed at once (defaults to KAFKA_CONSUMER_CONCURRENCY)
+
+        Returns:
+            True if the consumer is running
+        """
+        factory = self.consumer_factory or (AIOKafkaConsumer if self.kafka_available else None)
+        if factory is None:
             return False
+        await self.idempotency_store.connect()
+        self.consumer = factory(
+            bootstrap_servers=self.bootstrap_servers,
+            group_id="voicebridge-transcription-group",
+            value_deserializer=self._deserialize_audio_chunk,
+            key_deserializer=lambda x: x.decode("utf-8") if x else None,
+            auto_offset_reset="latest",
+            enable_auto_commit=False,
+            max_poll_records=settings.kafka_consumer_max_buffered,
+        )
+        self.consumer_engine = ConcurrentConsumer(
+            self.consumer,
+            self._handle_record,
+            concurrency=concurrency,
+            before_commit=self.flush,
+            on_failure=self._dead_letter if settings.kafka_dead_letter_topic else None,
+        )
+        self.consumer.subscribe([self.audio_topic], listener=self.consumer_engine.rebalance_listener)
+        await self.consumer.start()
+        logger.info("Kafka consumer started")
+
+        # Start processing loop
+        self._consumer_task = asyncio.create_task(self._process_audio_streams())
+        self._sweep_task = asyncio.create_task(self._sweep_held_chunks())
+        return True
+
+    async def start_result_consumer(self) -> bool:
+        """
+        Subscribe to the transcription topic and pass every result to the result handlers.
+
+        The consumer joins no group (group_id=None): every API node is assigned all
+        partitions, sees every result and keeps the ones for sessions it holds. No
+        per-node group is left behind on the broker when a node restarts.
+
+        Returns:
+            True if the consumer is running
+        """
+        factory = self.consumer_factory or (AIOKafkaConsumer if self.kafka_available else None)
+        if factory is None:
+            return False
+        self.result_consumer = factory(
+            bootstrap_servers=self.bootstrap_servers,
+            group_id=None,
+            value_deserializer=self._deserialize_transcription_result,
+            key_deserializer=lambda x: x.decode("utf-8") if x else None,
+            auto_offset_reset="latest",
+        )
+        self.result_consumer.subscribe([self.transcription_topic])
+        await self.result_consumer.start()
+        self._result_task = asyncio.create_task(self._route_results())
+        logger.info("Kafka result consumer started")
+        return True
+
+    def add_result_handler(self, handler: Callable[[Dict[str, Any]], Awaitable[Any]]):
+        """Register a coroutine called with every result consumed from the transcription topic"""
+        self.result_handlers.append(handler)
+
+    async def flush(self):
+        """Send every queued record and wait until all delivery futures have resolved"""
+        for producer in self._producers.values():
+            await producer.flush()
+        if self._pending_deliveries:
+            await asyncio.gather(*list(self._pending_deliveries), return_exceptions=True)
 
     async def stop(self):
         """Stop Kafka producer and consumer"""
         try:
-            if self.producer:
-                await self.producer.stop()
-                logger.info("Kafka producer stopped")
+            # Finish and commit consumed work while the producers can still publish its results
+            if self.consumer_engine:
+                await self.consumer_engine.stop()
+
+            if self._producers:
+                await self.flush()
+                for producer in self._producers.values():
+                    await producer.stop()
+                self._producers.clear()
+                self.producer = None
+                logger.info("Kafka producers stopped")
 
             if self.consumer:
                 await self.consumer.stop()
+                self.consumer = None
                 logger.info("Kafka consumer stopped")
 
+            if self._consumer_task:
+                await asyncio.wait([self._consumer_task], timeout=5)
+                self._consumer_task = None
+            if self._sweep_task:
+                self._sweep_task.cancel()
+                await asyncio.wait([self._sweep_task], timeout=5)
+                self._sweep_task = None
+
+            if self._result_task:
+                self._result_task.cancel()
+                await asyncio.wait([self._result_task], timeout=5)
+                self._result_task = None
+            if self.result_consumer:
+                await self.result_consumer.stop()
+                self.result_consumer = None
+                logger.info("Kafka result consumer stopped")
+
         except Exception as e:
             logger.error(f"Error stopping Kafka service: {e}")
 
+    @timed("avro_serialize")
     def _serialize_audio_chunk(self, data: Dict[str, Any]) -> bytes:
         """Serialize audio chunk data to Avro format"""
         try:
-            writer = DatumWriter(self.audio_schema)
-            bytes_writer = io.BytesIO()
-            encoder = BinaryEncoder(bytes_writer)
-            writer.write(data, encoder)
-            return bytes_writer.getvalue()
+            return self.audio_codec.encode(data)
         except Exception as e:
             logger.error(f"Error serializing audio chunk: {e}")
             return b""
 
+    @timed("avro_deserialize")
     def _deserialize_audio_chunk(self, data: bytes) -> Dict[str, Any]:
         """Deserialize audio chunk data from Avro format"""
         try:
-            reader = DatumReader(self.audio_schema)
-            bytes_reader = io.BytesIO(data)
-            decoder = BinaryDecoder(bytes_reader)
-            result = reader.read(decoder)
+            result = self.audio_codec.decode(data)
             return dict(result) if result is not None else {}
         except Exception as e:
             logger.error(f"Error deserializing audio chunk: {e}")
             return {}
 
+    @timed("avro_serialize")
     def _serialize_transcription_result(self, data: Dict[str, Any]) -> bytes:
         """Serialize transcription result to Avro format"""
         try:
-            writer = DatumWriter(self.transcription_schema)
-            bytes_writer = io.BytesIO()
-            encoder = BinaryEncoder(bytes_writer)
-            writer.write(data, encoder)
-            return bytes_writer.getvalue()
+            return self.transcription_codec.encode(data)
         except Exception as e:
             logger.error(f"Error serializing transcription result: {e}")
             return b""
 
+    @timed("avro_deserialize")
+    def _deserialize_transcription_result(self, data: bytes) -> Dict[str, Any]:
+        """Deserialize transcription result data from Avro format"""
+        try:
+            return self.transcription_codec.decode(data)
+        except Exception as e:
+            logger.error(f"Error deserializing transcription result: {e}")
+            return {}
+
     async def send_audio_chunk(
         self,
         session_id: str,
@@ -199,51 +423,51 @@ async def send_audio_chunk(
         channels: int = 1,
         format: str = "wav",
         language: str = "en",
-        chunk_index: int = 0,
+        chunk_index: Optional[int] = None,
         is_final: bool = False,
     ) -> bool:
-        """Send audio chunk to Kafka for processing"""
+        """
+        Queue an audio chunk for Kafka. Returns once the record is in the producer's
+        batch; delivery is confirmed in the background (see flush).
+
+        Args:
+            chunk_index: Position of the chunk in the session. With an index the chunk id
+                is "<session_id>:<chunk_index>", so a resent or redelivered chunk is
+                recognised and not transcribed again; without one it gets a random id.
+
+        Returns:
+            True if the chunk was queued (or processed directly without Kafka)
+        """
         try:
-            if not self.producer:
-                # Fallback: process directly without Kafka
-                logger.info("Kafka producer not started. Processing audio chunk directly (fallback mode).")
-                chunk_id = str(uuid.uuid4())
-                timestamp = int(time.time() * 1000)
-                audio_chunk_data = {
-                    "session_id": session_id,
-                    "user_id": user_id,
-                    "chunk_id": chunk_id,
-                    "audio_data": audio_data,
-                    "sample_rate": sample_rate,
-                    "channels": channels,
-                    "format": format,
-                    "timestamp": timestamp,
-                    "language": language,
-                    "chunk_index": chunk_index,
-                    "is_final": is_final,
-                }
-                await self._process_audio_chunk(audio_chunk_data)
-                return True
-
-            chunk_id = str(uuid.uuid4())
-            timestamp = int(time.time() * 1000)
-
             audio_chunk_data = {
                 "session_id": session_id,
                 "user_id": user_id,
-                "chunk_id": chunk_id,
+                "chunk_id": f"{session_id}:{chunk_index}" if chunk_index is not None else str(uuid.uuid4()),
                 "audio_data": audio_data,
                 "sample_rate": sample_rate,
                 "channels": channels,
                 "format": format,
-                "timestamp": timestamp,
+                "timestamp": int(time.time() * 1000),
                 "language": language,
-                "chunk_index": chunk_index,
+                "chunk_index": chunk_index or 0,
                 "is_final": is_final,
+                "audio_data_ref": None,
             }
 
+            if not self.producer:
+                # Fallback: process directly without Kafka
+                logger.info("Kafka producer not started. Processing audio chunk directly (fallback mode).")
+                await self._process_audio_chunk(audio_chunk_data)
+                return True
+
+            # Large audio goes to the blob store; only its reference is sent
+            if blob_store.should_check_in(audio_data):
+                audio_chunk_data = await asyncio.get_running_loop().run_in_executor(
+                    None, blob_store.check_in, audio_chunk_data, "audio_data"
+                )
+
             # Send to Kafka
-            await self.producer.send(self.audio_topic, key=session_id, value=audio_chunk_data)
+            await self._produce(self.audio_topic, session_id, self._serialize_audio_chunk(audio_chunk_data))
 
             # Update session info
             async with self.session_lock:
@@ -258,61 +482,216 @@ async def send_audio_chunk(
 
                 self.active_sessions[session_id]["chunks_sent"] += 1
 
-            logger.debug(f"Sent audio chunk {chunk_id} for session {session_id}")
+            logger.debug(f"Queued audio chunk {audio_chunk_data['chunk_id']} for session {session_id}")
             return True
 
         except Exception as e:
             logger.error(f"Error sending audio chunk: {e}")
             return False
 
+    async def _produce(self, topic: str, key: str, value: bytes) -> None:
+        """Append one serialized record to the topic's producer batch without waiting for delivery"""
+        producer = self._producers.get(topic, self.producer)
+        with span("kafka_send"):
+            delivery = await producer.send(topic, key=key, value=value)
+        self.delivery_stats["enqueued"] += 1
+        self._pending_deliveries.add(delivery)
+        delivery.add_done_callback(functools.partial(self._on_delivery, topic, time.perf_counter()))
+
+    def _on_delivery(self, topic: str, enqueued_at: float, delivery: asyncio.Future) -> None:
+        """Record the outcome of one background delivery"""
+        self._pending_deliveries.discard(delivery)
+        error = "cancelled" if delivery.cancelled() else delivery.exception()
+        if error is not None:
+            self.delivery_stats["failed"] += 1
+            logger.error(f"Kafka delivery to {topic} failed: {error}")
+        else:
+            self.delivery_stats["delivered"] += 1
+        status = "success" if error is None else "error"
+        prometheus_metrics.record_kafka_delivery(topic, status, time.perf_counter() - enqueued_at)
+
     async def _process_audio_streams(self):
         """Process audio streams from Kafka"""
-        if not self.consumer:
+        if not self.consumer_engine:
             logger.warning("Kafka consumer not started. Skipping stream processing loop.")
             return
         logger.info("Started audio stream processing")
 
         try:
-            async for message in self.consumer:
-                try:
-                    audio_chunk = message.value
-                    if not audio_chunk:
-                        continue
-
-                    # Process audio chunk
-                    await self._process_audio_chunk(audio_chunk)
-
-                except Exception as e:
-                    logger.error(f"Error processing message: {e}")
-                    continue
-
+            await self.consumer_engine.run()
         except Exception as e:
             logger.error(f"Error in audio stream processing: {e}")
 
-    async def _process_audio_chunk(self, audio_chunk: Dict[str, Any]):
-        """Process a single audio chunk"""
+    async def _route_results(self):
+        """Hand consumed transcription results to the result handlers"""
+        while True:
+            try:
+                batches = await self.result_consumer.getmany(timeout_ms=100)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error fetching transcription results: {e}")
+                await asyncio.sleep(1)
+                continue
+            for records in batches.values():
+                for record in records:
+                    if not record.value:
+                        continue
+                    self.processing_stats["results_received"] += 1
+                    for handler in self.result_handlers:
+                        try:
+                            await handler(record.value)
+                        except Exception as e:
+                            logger.error(f"Error in transcription result handler: {e}")
+
+    async def _handle_record(self, message: Any):
+        """Process one consumed record (called concurrently across sessions, in order within one)"""
+        if message.value and await self._process_audio_chunk(message.value):
+            # Completed by _release_chunks once the chunk's segment has been transcribed
+            self._held_records[message.value["chunk_id"]] = message
+            return DEFERRED
+
+    async def _dead_letter(self, message: Any, error: Exception):
+        """Publish a chunk that failed every attempt (e.g. its blob is missing) to the dead-letter topic"""
+        value = self._serialize_audio_chunk(message.value) if message.value else b""
+        if not value:
+            raise ValueError("Chunk cannot be re-serialized for the dead-letter topic")
+        await self._produce(settings.kafka_dead_letter_topic, message.key, value)
+        logger.warning(f"Chunk {message.value.get('chunk_id')} sent to {settings.kafka_dead_letter_topic}: {error}")
+
+    async def _process_audio_chunk(self, audio_chunk: Dict[str, Any]) -> bool:
+        """
+        Process a single audio chunk through the VAD gate.
+
+        Returns:
+            True while the gate still holds some of the chunk's audio (an open segment
+            or a partial frame); it is released once that audio has been transcribed
+        """
         session_id = audio_chunk["session_id"]
-        user_id = audio_chunk["user_id"]
         chunk_id = audio_chunk["chunk_id"]
+        if chunk_id in self._held_records or await self.idempotency_store.seen(chunk_id):
+            # Redelivered after its results were published, or its audio is already in the gate
+            self.processing_stats["duplicate_chunks_skipped"] += 1
+            return chunk_id in self._held_records
+
+        # Silence never reaches the model; speech is transcribed per segment, split at pauses
+        ingest_format = IngestFormat.from_chunk(
+            audio_chunk.get("format", ""), audio_chunk.get("sample_rate", 0), audio_chunk.get("channels", 0)
+        )
         audio_data = audio_chunk["audio_data"]
+        if not audio_data and not audio_chunk.get("audio_data_ref") and not audio_chunk.get("is_final", False):
+            # Nothing to transcribe and no open segment to close
+            self.processing_stats["empty_chunks_skipped"] += 1
+            return False
+        if audio_chunk.get("audio_data_ref"):
+            audio_data = await asyncio.get_running_loop().run_in_executor(
+                None, blob_store.check_out, audio_chunk, "audio_data"
+            )
+        gate_session = f"kafka:{session_id}"
+        payloads = vad_service.gate(
+            gate_session,
+            audio_data,
+            final=audio_chunk.get("is_final", False),
+            ingest_format=ingest_format,
+        )
+        self._hold_chunk(gate_session, audio_chunk)
+        if not payloads:
+            self.processing_stats["vad_skipped_chunks"] += 1
+
+        for index, audio_data in enumerate(payloads):
+            segment_id = chunk_id if len(payloads) == 1 else f"{chunk_id}-{index}"
+            await self._transcribe_segment(audio_chunk, segment_id, audio_data)
+
+        # Chunks whose audio is in the results just queued for publishing are done
+        await self._release_chunks(gate_session)
+        return chunk_id in self._held_records
+
+    def _hold_chunk(self, gate_session: str, audio_chunk: Dict[str, Any]) -> None:
+        """Record where the chunk's audio ends in its gate session; it is held until released"""
+        held = self._held_chunks.setdefault(gate_session, {"chunks": deque()})
+        held["chunks"].append(
+            (vad_service.sessions.get(gate_session), vad_service.audio_position(gate_session), audio_chunk["chunk_id"])
+        )
+        held["last_chunk"] = audio_chunk
+        held["updated"] = time.monotonic()
+        self._held_records.setdefault(audio_chunk["chunk_id"], None)
+
+    async def _release_chunks(self, gate_session: str) -> None:
+        """Release the chunks of a gate session whose audio has been transcribed or dropped as silence"""
+        held = self._held_chunks.get(gate_session)
+        if held is None:
+            return
+        session = vad_service.sessions.get(gate_session)
+        retained = vad_service.retained_from(gate_session)
+        chunks = held["chunks"]
+        while chunks:
+            chunk_session, end, chunk_id = chunks[0]
+            # A chunk from a session the gate has since ended or evicted has nothing left to wait for
+            if chunk_session is session and retained is not None and end > retained:
+                break
+            chunks.popleft()
+            await self._release_chunk(chunk_id)
+        if not chunks:
+            del self._held_chunks[gate_session]
+
+    async def _release_chunk(self, chunk_id: str) -> None:
+        """Mark a released chunk processed and complete its record, so its offset can be committed"""
+        await self.idempotency_store.mark(chunk_id)
+        record = self._held_records.pop(chunk_id, None)
+        if record is not None and self.consumer_engine:
+            self.consumer_engine.complete(record)
+
+    async def _sweep_held_chunks(self):
+        """Flush gate sessions that went quiet while holding chunks, so their offsets get committed"""
+        interval = max(min(self.held_chunk_timeout / 2, 5.0), 0.05)
+        while True:
+            await asyncio.sleep(interval)
+            cutoff = time.monotonic() - self.held_chunk_timeout
+            for gate_session in [s for s, held in self._held_chunks.items() if held["updated"] < cutoff]:
+                try:
+                    await self._flush_held_chunks(gate_session)
+                except Exception as e:
+                    logger.error(f"Error flushing idle stream {gate_session}: {e}")
+
+    async def _flush_held_chunks(self, gate_session: str) -> None:
+        """Close an idle gate session as a final chunk would, transcribe what it held and release its chunks"""
+        held = self._held_chunks.pop(gate_session)
+        audio_chunk = held["last_chunk"]
+        ingest_format = IngestFormat.from_chunk(
+            audio_chunk.get("format", ""), audio_chunk.get("sample_rate", 0), audio_chunk.get("channels", 0)
+        )
+        payloads = vad_service.gate(gate_session, b"", final=True, ingest_format=ingest_format)
+        logger.info(f"Stream {gate_session} went quiet without a final chunk; flushed {len(payloads)} segment(s)")
+        for index, audio_data in enumerate(payloads):
+            segment_id = f"{audio_chunk['chunk_id']}-idle" + (f"-{index}" if len(payloads) > 1 else "")
+            await self._transcribe_segment(audio_chunk, segment_id, audio_data)
+        for _, _, chunk_id in held["chunks"]:
+            await self._release_chunk(chunk_id)
+
+    async def _transcribe_segment(self, audio_chunk: Dict[str, Any], chunk_id: str, audio_data: bytes):
+        """Transcribe one speech segment and publish the result"""
+        session_id = audio_chunk["session_id"]
+        user_id = audio_chunk["user_id"]
         language = audio_chunk.get("language", settings.default_language)
 
         start_time = time.time()
 
         try:
             # Process audio with Whisper
-            result = await self.whisper_service.transcribe_audio_bytes(audio_data, language=language)
+            with span("inference"):
+                result = await self.whisper_service.transcribe_audio_bytes(audio_data, language=language)
 
             processing_time = time.time() - start_time
 
             # Record metrics
-            model_monitoring_service.record_model_performance(
-                model_name="whisper_kafka",
-                accuracy=result.get("confidence", 0.0),
-                confidence=result.get("confidence", 0.0),
-                processing_time=processing_time,
-                error_occurred="error" in result,
-            )
+            with span("metrics_fanout"):
+                model_monitoring_service.record_model_performance(
+                    model_name="whisper_kafka",
+                    accuracy=result.get("confidence", 0.0),
+                    confidence=result.get("confidence", 0.0),
+                    processing_time=processing_time,
+                    error_occurred="error" in result,
+                )
 
             # Update processing stats
             self.processing_stats["total_chunks_processed"] += 1
@@ -330,23 +709,17 @@ async def _process_audio_chunk(self, audio_chunk: Dict[str, Any]):
                     self.processing_stats["total_audio_duration"] / total_processed
                 )
 
-            # Create transcription result
-            transcription_result = {
-                "session_id": session_id,
-                "user_id": user_id,
-                "chunk_id": chunk_id,
-                "text": result.get("text", ""),
-                "confidence": result.get("confidence", 0.0),
-                "language": result.get("language", language),
-                "timestamp": int(time.time() * 1000),
-                "processing_time": processing_time,
-                "model_name": "whisper",
-                "status": "success" if "error" not in result else "error",
-                "error_message": result.get("error") if "error" in result else None,
-            }
-
             # Send transcription result to Kafka
-            await self._send_transcription_result(transcription_result)
+            await self.publish_transcription_result(
+                session_id,
+                user_id,
+                result.get("text", ""),
+                confidence=result.get("confidence", 0.0),
+                language=result.get("language", language),
+                processing_time=processing_time,
+                chunk_id=chunk_id,
+                error_message=result.get("error"),
+            )
 
             # Update session info
             async with self.session_lock:
@@ -360,21 +733,66 @@ async def _process_audio_chunk(self, audio_chunk: Dict[str, Any]):
             logger.error(f"Error processing audio chunk {chunk_id}: {e}")
 
             # Send error result
-            error_result = {
+            await self.publish_transcription_result(
+                session_id,
+                user_id,
+                "",
+                language=language,
+                processing_time=time.time() - start_time,
+                chunk_id=chunk_id,
+                error_message=str(e),
+            )
+
+    async def publish_transcription_result(
+        self,
+        session_id: str,
+        user_id: str,
+        text: str,
+        confidence: float = 0.0,
+        language: str = "en",
+        processing_time: float = 0.0,
+        chunk_id: Optional[str] = None,
+        model_name: str = "whisper",
+        error_message: Optional[str] = None,
+    ) -> bool:
+        """
+        Publish a transcription result event on the transcription topic.
+
+        Results are batched by the transcription topic's own producer and never
+        touch the audio topic, so they are not picked up again by the consumer.
+
+        Args:
+            session_id: Streaming session the result belongs to
+            user_id: User identifier
+            text: Transcribed text
+            confidence: Model confidence
+            language: Detected or requested language
+            processing_time: Inference time in seconds
+            chunk_id: Audio chunk or segment the result is for (generated when omitted)
+            model_name: Model that produced the result
+            error_message: Error description; marks the result as failed
+
+        Returns:
+            True if the event was queued, False if no producer is running
+        """
+        if not self._producers.get(self.transcription_topic):
+            return False
+        await self._send_transcription_result(
+            {
                 "session_id": session_id,
                 "user_id": user_id,
-                "chunk_id": chunk_id,
-                "text": "",
-                "confidence": 0.0,
+                "chunk_id": chunk_id or str(uuid.uuid4()),
+                "text": text,
+                "confidence": confidence,
                 "language": language,
                 "timestamp": int(time.time() * 1000),
-                "processing_time": time.time() - start_time,
-                "model_name": "whisper",
-                "status": "error",
-                "error_message": str(e),
+                "processing_time": processing_time,
+                "model_name": model_name,
+                "status": "error" if error_message else "success",
+                "error_message": error_message,
             }
-
-            await self._send_transcription_result(error_result)
+        )
+        return True
 
     async def _send_transcription_result(self, result: Dict[str, Any]):
         """Send transcription result to Kafka"""
@@ -386,11 +804,7 @@ async def _send_transcription_result(self, result: Dict[str, Any]):
             serialized_result = self._serialize_transcription_result(result)
 
             # Send to transcription topic
-            await self.producer.send(
-                self.transcription_topic,
-                key=result["session_id"],
-                value=serialized_result,
-            )
+            await self._produce(self.transcription_topic, result["session_id"], serialized_result)
 
             logger.debug(f"Sent transcription result for session {result['session_id']}")
 
@@ -406,6 +820,9 @@ async def get_processing_stats(self) -> Dict[str, Any]:
         """Get processing statistics"""
         return {
             **self.processing_stats,
+            "delivery": {**self.delivery_stats, "pending": len(self._pending_deliveries)},
+            "consumer": self.consumer_engine.get_stats() if self.consumer_engine else None,
+            "idempotency": self.idempotency_store.get_stats(),
             "active_sessions": len(self.active_sessions),
             "timestamp": int(time.time() * 1000),
         }
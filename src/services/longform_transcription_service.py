@@ -0,0 +1,329 @@
+"""
+Long-form Transcription Service
+Segment-parallel transcription for long uploads.
+
+Long recordings are split at silence with AudioProcessor.detect_speech_segments.
+Speech longer than the backend's maximum segment length is cut into
+overlapping windows. Segments are transcribed concurrently with a bounded
+number in flight, then stitched back in time order with per-segment
+timestamps. Words repeated across a window overlap are removed. Latency
+follows the longest segment rather than the total duration.
+
+Short or undecodable audio goes straight to the backend, so this service is a
+drop-in wrapper around any transcription service.
+"""
+import asyncio
+import logging
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from config import settings
+from src.services.audio_frame import AudioFrame, AudioInput
+from src.services.audio_processor import AudioProcessor
+from src.services.profiling_service import span
+from src.services.transcription_backend import get_transcription_service
+
+logger = logging.getLogger(__name__)
+
+# (start_sample, end_sample, overlaps_previous)
+SegmentWindow = Tuple[int, int, bool]
+
+_audio_processor = AudioProcessor()
+
+
+def plan_segments(
+    audio: np.ndarray,
+    sample_rate: int,
+    max_segment_seconds: float,
+    overlap_seconds: float = 1.0,
+    merge_gap_seconds: float = 0.3,
+    padding_seconds: float = 0.1,
+    min_duration_seconds: float = 0.1,
+) -> List[SegmentWindow]:
+    """
+    Split audio at silence into windows no longer than max_segment_seconds.
+
+    Args:
+        audio: Mono audio
+        sample_rate: Sample rate
+        max_segment_seconds: Longest window sent to the backend
+        overlap_seconds: Overlap between windows cut from one long speech run
+        merge_gap_seconds: Pauses up to this long do not split
+        padding_seconds: Context kept around each speech run
+        min_duration_seconds: Shorter speech runs are ignored
+
+    Returns:
+        Windows as (start_sample, end_sample, overlaps_previous), in time order
+    """
+    segments = _audio_processor.detect_speech_segments(
+        audio,
+        sample_rate,
+        min_duration=min_duration_seconds,
+        merge_gap=merge_gap_seconds,
+        padding=padding_seconds,
+    )
+
+    max_samples = max(1, int(max_segment_seconds * sample_rate))
+    overlap = min(int(overlap_seconds * sample_rate), max_samples // 2)
+    step = max_samples - overlap
+
+    windows: List[SegmentWindow] = []
+    for segment in segments:
+        start, end = segment["start_sample"], segment["end_sample"]
+        if end - start <= max_samples:
+            windows.append((start, end, False))
+            continue
+        for window_start in range(start, end, step):
+            window_end = min(window_start + max_samples, end)
+            windows.append((window_start, window_end, window_start > start))
+            if window_end >= end:
+                break
+    return windows
+
+
+def _match_key(word: str) -> str:
+    return re.sub(r"[^\w']", "", word.lower())
+
+
+def remove_overlap(previous_text: str, text: str, max_words: int = 12) -> str:
+    """
+    Drop the words at the start of text that repeat the end of previous_text.
+
+    Args:
+        previous_text: Transcript of the preceding overlapping window
+        text: Transcript of the current window
+        max_words: Longest repeated run considered
+
+    Returns:
+        text without the duplicated prefix
+    """
+    previous = [_match_key(w) for w in previous_text.split()]
+    words = text.split()
+    current = [_match_key(w) for w in words]
+
+    for length in range(min(max_words, len(previous), len(current)), 0, -1):
+        if previous[-length:] == current[:length]:
+            return " ".join(words[length:])
+    return text
+
+
+def stitch_results(windows: List[SegmentWindow], results: List[Dict[str, Any]], sample_rate: int) -> Dict[str, Any]:
+    """
+    Combine per-window results into one transcript with timestamps.
+
+    Args:
+        windows: Windows from plan_segments
+        results: Backend result per window, same order
+        sample_rate: Sample rate of the planned audio
+
+    Returns:
+        Dictionary with text, duration-weighted confidence, segments and errors
+    """
+    segments: List[Dict[str, Any]] = []
+    errors: List[Dict[str, Any]] = []
+    weighted_confidence = 0.0
+    total_duration = 0.0
+    previous_text = ""
+
+    for (start, end, overlaps_previous), result in zip(windows, results):
+        start_time, end_time = start / sample_rate, end / sample_rate
+        if "error" in result:
+            errors.append({"start_time": start_time, "end_time": end_time, "error": result["error"]})
+            previous_text = ""
+            continue
+
+        text = (result.get("text") or "").strip()
+        if overlaps_previous and previous_text:
+            text = remove_overlap(previous_text, text)
+        previous_text = (result.get("text") or "").strip()
+
+        confidence = result.get("confidence", 0.0)
+        duration = end_time - start_time
+        weighted_confidence += confidence * duration
+        total_duration += duration
+        if text:
+            segments.append(
+                {"start_time": start_time, "end_time": end_time, "text": text, "confidence": confidence}
+            )
+
+    stitched: Dict[str, Any] = {
+        "text": " ".join(segment["text"] for segment in segments),
+        "confidence": weighted_confidence / total_duration if total_duration else 0.0,
+        "segments": segments,
+        "segment_count": len(windows),
+    }
+    if errors:
+        stitched["segment_errors"] = errors
+        if len(errors) == len(windows):
+            stitched["error"] = errors[0]["error"]
+    return stitched
+
+
+def transcribe_long_audio_sync(
+    audio: np.ndarray,
+    sample_rate: int,
+    transcribe: Callable[[np.ndarray, int], Dict[str, Any]],
+    max_workers: int,
+    max_segment_seconds: float,
+    overlap_seconds: float = 1.0,
+) -> Dict[str, Any]:
+    """
+    Thread-pool variant for synchronous backends (Celery workers).
+
+    Args:
+        audio: Mono audio
+        sample_rate: Sample rate
+        transcribe: Function transcribing one (audio, sample_rate) segment
+        max_workers: Segments transcribed at once
+        max_segment_seconds: Longest window sent to the backend
+        overlap_seconds: Overlap between windows of one long speech run
+
+    Returns:
+        Stitched result (see stitch_results)
+    """
+    windows = plan_segments(audio, sample_rate, max_segment_seconds, overlap_seconds)
+    if not windows:
+        return {"text": "", "confidence": 0.0, "segments": [], "segment_count": 0}
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        results = list(executor.map(lambda w: transcribe(audio[w[0] : w[1]], sample_rate), windows))
+    return stitch_results(windows, results, sample_rate)
+
+
+class LongFormTranscriptionService:
+    """Wraps a transcription backend with segment-parallel long-form mode"""
+
+    def __init__(
+        self,
+        backend: Any,
+        max_concurrency: int = 4,
+        min_duration_seconds: float = 30.0,
+        max_segment_seconds: float = 30.0,
+        overlap_seconds: float = 1.0,
+        merge_gap_seconds: float = 0.3,
+        padding_seconds: float = 0.1,
+        sample_rate: int = 16000,
+    ):
+        """
+        Initialize long-form service.
+
+        Args:
+            backend: Service with async transcribe_audio_bytes(audio_bytes, language)
+            max_concurrency: Segments in flight per request
+            min_duration_seconds: Audio at least this long uses long-form mode
+            max_segment_seconds: Longest window sent to the backend
+            overlap_seconds: Overlap between windows of one long speech run
+            merge_gap_seconds: Pauses up to this long do not split
+            padding_seconds: Context kept around each speech run
+            sample_rate: Decode sample rate
+        """
+        self.backend = backend
+        self.max_concurrency = max(1, max_concurrency)
+        self.min_duration_seconds = min_duration_seconds
+        self.max_segment_seconds = max_segment_seconds
+        self.overlap_seconds = overlap_seconds
+        self.merge_gap_seconds = merge_gap_seconds
+        self.padding_seconds = padding_seconds
+        self.sample_rate = sample_rate
+
+    async def transcribe_audio_bytes(self, audio_bytes: AudioInput, language: str = "en") -> Dict[str, Any]:
+        """
+        Transcribe audio, using long-form mode when it is long enough.
+
+        Args:
+            audio_bytes: Encoded audio, or an AudioFrame decoded at ingest
+            language: Target language code
+
+        Returns:
+            Dictionary with transcription results (plus segments in long-form mode)
+        """
+        if isinstance(audio_bytes, AudioFrame):
+            frame = audio_bytes.resampled(self.sample_rate)
+        else:
+            loop = asyncio.get_running_loop()
+            with span("decode"):
+                frame = await loop.run_in_executor(None, AudioFrame.try_from_bytes, audio_bytes, self.sample_rate)
+
+        if frame is None or frame.duration < self.min_duration_seconds:
+            return await self.backend.transcribe_audio_bytes(frame or audio_bytes, language=language)
+        return await self.transcribe_array(frame, language)
+
+    async def transcribe_array(self, audio: Union[AudioFrame, np.ndarray], language: str = "en") -> Dict[str, Any]:
+        """
+        Transcribe decoded audio segment by segment with bounded concurrency.
+
+        Args:
+            audio: AudioFrame, or mono float32 samples at self.sample_rate
+            language: Target language code
+
+        Returns:
+            Stitched result with text, confidence, language and segments
+        """
+        start_time = time.time()
+        frame = audio if isinstance(audio, AudioFrame) else AudioFrame(samples=audio, sample_rate=self.sample_rate)
+        frame = frame.resampled(self.sample_rate)
+        windows = plan_segments(
+            frame.samples,
+            self.sample_rate,
+            self.max_segment_seconds,
+            self.overlap_seconds,
+            self.merge_gap_seconds,
+            self.padding_seconds,
+        )
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def transcribe_window(window: SegmentWindow) -> Dict[str, Any]:
+            async with semaphore:
+                # Segments are views into the shared frame; backends encode only if they upload files
+                segment = frame.slice(window[0], window[1])
+                try:
+                    return await self.backend.transcribe_audio_bytes(segment, language=language)
+                except Exception as e:
+                    logger.error(f"Segment transcription failed: {e}")
+                    return {"text": "", "confidence": 0.0, "error": str(e)}
+
+        results = await asyncio.gather(*(transcribe_window(window) for window in windows))
+        stitched = stitch_results(windows, list(results), self.sample_rate)
+        stitched.update(
+            {
+                "language": next((r["language"] for r in results if r.get("language")), language),
+                "provider": next((r["provider"] for r in results if r.get("provider")), "unknown"),
+                "audio_duration": frame.duration,
+                "processing_time": time.time() - start_time,
+                "long_form": True,
+            }
+        )
+        logger.info(
+            f"Long-form transcription: {stitched['audio_duration']:.1f}s audio, {len(windows)} segments, "
+            f"{stitched['processing_time']:.2f}s"
+        )
+        return stitched
+
+
+# Global instance (singleton pattern)
+_longform_service: Optional[LongFormTranscriptionService] = None
+
+
+def get_longform_transcription_service() -> LongFormTranscriptionService:
+    """
+    Get global long-form service wrapping the configured backend.
+
+    Returns:
+        LongFormTranscriptionService instance
+    """
+    global _longform_service
+    if _longform_service is None:
+        _longform_service = LongFormTranscriptionService(
+            get_transcription_service(settings.openai_api_key),
+            max_concurrency=settings.longform_max_concurrency,
+            min_duration_seconds=settings.longform_min_duration_seconds,
+            max_segment_seconds=settings.longform_max_segment_seconds,
+            overlap_seconds=settings.longform_overlap_seconds,
+            merge_gap_seconds=settings.longform_merge_gap_seconds,
+            sample_rate=settings.sample_rate,
+        )
+    return _longform_service
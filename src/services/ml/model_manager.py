@@ -6,6 +6,7 @@
 from typing import Any, Dict, List, Optional
 
 from ..openai_whisper_service import get_openai_whisper_service
+from ..stub_transcription_service import get_stub_transcription_service
 from ..wav2vec_service import get_wav2vec_service
 
 logger = logging.getLogger(__name__)
@@ -47,6 +48,16 @@ def _initialize_models(self):
                 }
             except Exception as e:
                 logger.warning(f"Wav2Vec2 model not available: {e}")
+
+            # Initialize deterministic stub backend (performance testing)
+            self.models["stub"] = get_stub_transcription_service()
+            self.model_configs["stub"] = {
+                "type": "stub",
+                "model_name": "stub",
+                "languages": self.models["stub"].get_supported_languages(),
+                "max_audio_duration": 25 * 60,
+                "supports_streaming": True
+            }
                 
             logger.info(f"Initialized {len(self.models)} models: {list(self.models.keys())}")
             
@@ -175,6 +186,8 @@ async def reload_model(self, model_name: str) -> bool:
                 self.models["whisper"] = get_openai_whisper_service()
             elif model_name == "wav2vec":
                 self.models["wav2vec"] = get_wav2vec_service()
+            elif model_name == "stub":
+                self.models["stub"] = get_stub_transcription_service()
                 
             logger.info(f"Model {model_name} reloaded successfully")
             return True
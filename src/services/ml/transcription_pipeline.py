@@ -8,6 +8,7 @@
 
 import numpy as np
 
+from ..profiling_service import timed
 from .model_manager import ModelManager
 from .performance_monitor import PerformanceMonitor
 
@@ -83,6 +84,7 @@ async def transcribe_audio(self, audio_bytes: bytes,
                 "processing_time": time.time() - start_time
             }
 
+    @timed("pipeline_preprocess")
     async def _preprocess_audio(self, audio_bytes: bytes) -> Dict[str, Any]:
         """
         Preprocess audio data for model input.
@@ -116,6 +118,7 @@ async def _preprocess_audio(self, audio_bytes: bytes) -> Dict[str, Any]:
                 "error": str(e)
             }
 
+    @timed("pipeline_inference")
     async def _run_inference(self, preprocessed_audio: Dict[str, Any], 
                            language: str, model_name: str) -> Dict[str, Any]:
         """
@@ -156,6 +159,7 @@ async def _run_inference(self, preprocessed_audio: Dict[str, Any],
                 "confidence": 0.0
             }
 
+    @timed("pipeline_postprocess")
     async def _postprocess_results(self, inference_result: Dict[str, Any], 
                                  language: str, model_name: str) -> Dict[str, Any]:
         """
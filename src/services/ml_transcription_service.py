@@ -3,12 +3,17 @@
 Main ML transcription service that combines Wav2Vec2 and preprocessing services
 """
 # type: ignore
+import asyncio
 import logging
-from typing import Any, Dict
-
-import numpy as np
-
-from src.services.audio_preprocessing_service import get_preprocessing_service
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Set
+
+from src.services.audio_frame import AudioFrame, AudioInput, as_audio_frame
+from src.services.audio_preprocessing_service import (
+    get_preprocessing_service,
+    serialize_feature_statistics,
+)
+from src.services.feature_engine import required_features
 from src.services.wav2vec_service import get_wav2vec_service
 
 logger = logging.getLogger(__name__)
@@ -17,17 +22,31 @@
 class MLTranscriptionService:
     """ML-based transcription service"""
 
-    def __init__(self, use_preprocessing: bool = True, use_wav2vec: bool = True):
+    def __init__(
+        self,
+        use_preprocessing: bool = True,
+        use_wav2vec: bool = True,
+        analytics_sink: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ):
         """
         Initialize ML transcription service
 
         Args:
             use_preprocessing: Whether to use preprocessing
             use_wav2vec: Whether to use Wav2Vec2
+            analytics_sink: Receives full feature statistics per transcription, computed
+                off the request path (e.g. VoiceBridgeDataService.save_transcription)
         """
         self.use_preprocessing = use_preprocessing
         self.use_wav2vec = use_wav2vec
 
+        # The request path computes only what the model needs; analytics get the full set later
+        self.realtime_features = required_features("wav2vec" if use_wav2vec else "realtime")
+        self.analytics_features = required_features("analytics")
+        self.analytics_sink = analytics_sink
+        self._analytics_executor: Optional[ThreadPoolExecutor] = None
+        self._analytics_tasks: Set[asyncio.Future] = set()
+
         # Initialize services
         self.wav2vec_service = None
         self.preprocessing_service = None
@@ -40,12 +59,12 @@ def __init__(self, use_preprocessing: bool = True, use_wav2vec: bool = True):
 
         logger.info(f"MLTranscriptionService initialized - Preprocessing: {use_preprocessing}, Wav2Vec2: {use_wav2vec}")
 
-    async def transcribe_audio_bytes(self, audio_bytes: bytes, language: str = "en") -> Dict[str, Any]:
+    async def transcribe_audio_bytes(self, audio_bytes: AudioInput, language: str = "en") -> Dict[str, Any]:
         """
         Convert audio data to text using ML models
 
         Args:
-            audio_bytes: Raw audio data
+            audio_bytes: Raw audio data, or an AudioFrame decoded at ingest
             language: Language code
 
         Returns:
@@ -66,14 +85,21 @@ async def transcribe_audio_bytes(self, audio_bytes: bytes, language: str = "en")
 
             start_time = time.time()
 
+            # Decode once; preprocessing and Wav2Vec2 share the same frame
+            audio = as_audio_frame(audio_bytes) or audio_bytes
+            audio_size = audio_bytes.samples.nbytes if isinstance(audio_bytes, AudioFrame) else len(audio_bytes)
+
             # Preprocessing (optional)
             if self.use_preprocessing and self.preprocessing_service:
                 try:
-                    preprocessed = self.preprocessing_service.preprocess_audio_bytes(audio_bytes)
+                    preprocessed = self.preprocessing_service.preprocess_audio_bytes(
+                        audio, features=self.realtime_features
+                    )
                     if preprocessed.get("preprocessing_successful"):
                         result["preprocessing_used"] = True
                         result["audio_duration"] = preprocessed.get("duration", 0.0)
-                        result["mfcc_features_shape"] = preprocessed.get("mfcc_features", np.array([])).shape
+                        if "mfcc_features" in preprocessed:
+                            result["mfcc_features_shape"] = preprocessed["mfcc_features"].shape
                         logger.info(f"Audio preprocessing completed: {result['audio_duration']:.2f}s")
                     else:
                         logger.warning(f"Preprocessing failed: {preprocessed.get('error', 'Unknown error')}")
@@ -83,7 +109,7 @@ async def transcribe_audio_bytes(self, audio_bytes: bytes, language: str = "en")
             # Wav2Vec2 transcription
             if self.use_wav2vec and self.wav2vec_service:
                 try:
-                    transcription_result = self.wav2vec_service.transcribe_audio_bytes(audio_bytes, language)
+                    transcription_result = self.wav2vec_service.transcribe_audio_bytes(audio, language)
 
                     if not transcription_result.get("error"):
                         result["text"] = transcription_result.get("text", "")
@@ -102,13 +128,16 @@ async def transcribe_audio_bytes(self, audio_bytes: bytes, language: str = "en")
                     result["error"] = str(e)
             else:
                 # Fallback: Simple audio detection
-                result["text"] = f"Audio detected ({len(audio_bytes)} bytes) - ML transcription service not active"
+                result["text"] = f"Audio detected ({audio_size} bytes) - ML transcription service not active"
                 result["confidence"] = 0.5
                 result["provider"] = "Fallback"
 
             # Processing time
             result["processing_time"] = time.time() - start_time
 
+            if self.analytics_sink and isinstance(audio, AudioFrame):
+                self._schedule_analytics(audio, result)
+
             return result
 
         except Exception as e:
@@ -121,6 +150,52 @@ async def transcribe_audio_bytes(self, audio_bytes: bytes, language: str = "en")
                 "provider": "ML Pipeline",
             }
 
+    def set_analytics_sink(self, sink: Optional[Callable[[Dict[str, Any]], None]]) -> None:
+        """Set (or clear) the receiver of per-transcription feature analytics."""
+        self.analytics_sink = sink
+
+    def _schedule_analytics(self, frame: AudioFrame, result: Dict[str, Any]) -> None:
+        """Compute the full feature set in the background; the response does not wait for it."""
+        if self._analytics_executor is None:
+            self._analytics_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="feature-analytics")
+        record = {
+            "audio_duration": frame.duration,
+            "sample_rate": frame.sample_rate,
+            "original_text": result.get("text", ""),
+            "confidence_score": result.get("confidence", 0.0),
+            "language_detected": result.get("language"),
+            "model_used": result.get("model") or result.get("provider"),
+            "preprocessing_used": result.get("preprocessing_used", False),
+            "processing_time": result.get("processing_time"),
+        }
+        task = asyncio.get_running_loop().run_in_executor(self._analytics_executor, self._run_analytics, frame, record)
+        self._analytics_tasks.add(task)
+        task.add_done_callback(self._analytics_tasks.discard)
+
+    def _run_analytics(self, frame: AudioFrame, record: Dict[str, Any]) -> None:
+        try:
+            preprocessing_service = self.preprocessing_service or get_preprocessing_service()
+            preprocessed = preprocessing_service.preprocess_audio_bytes(frame, features=self.analytics_features)
+            if not preprocessed.get("preprocessing_successful"):
+                logger.warning(f"Feature analytics skipped: {preprocessed.get('error', 'Unknown error')}")
+                return
+            record["features"] = serialize_feature_statistics(preprocessed["feature_statistics"])
+            self.analytics_sink(record)
+        except Exception as e:
+            logger.error(f"Feature analytics failed: {e}")
+
+    async def wait_for_analytics(self) -> None:
+        """Wait for background feature analytics in flight (e.g. at shutdown)."""
+        if self._analytics_tasks:
+            await asyncio.gather(*list(self._analytics_tasks), return_exceptions=True)
+
+    async def stop(self) -> None:
+        """Finish background feature analytics and shut their worker thread down."""
+        await self.wait_for_analytics()
+        if self._analytics_executor is not None:
+            self._analytics_executor.shutdown(wait=True)
+            self._analytics_executor = None
+
     def get_service_info(self) -> Dict[str, Any]:
         """Return service information"""
         info = {
@@ -140,6 +215,8 @@ def get_service_info(self) -> Dict[str, Any]:
             preprocessing_info = {
                 "provider": "Audio Preprocessing",
                 "features": ["MFCC", "Spectral", "Normalization"],
+                "realtime_features": list(self.realtime_features),
+                "analytics_enabled": self.analytics_sink is not None,
                 "is_available": True,
             }
             services_dict = info["services"]
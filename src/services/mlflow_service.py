@@ -12,6 +12,13 @@
 import mlflow.sklearn
 import numpy as np
 
+from src.services.evaluation.metrics import (
+    character_accuracy,
+    edit_distance,
+    evaluate_transcription,
+    word_error_rate,
+)
+
 logger = logging.getLogger(__name__)
 
 
@@ -177,80 +184,22 @@ def _calculate_text_similarity(self, predicted: str, actual: str) -> Dict[str, f
                 "has_prediction": bool(predicted),
             }
 
-        # Simple character-level similarity
-        predicted_lower = predicted.lower().strip()
-        actual_lower = actual.lower().strip()
-
-        # Character-level accuracy
-        char_accuracy = self._calculate_character_accuracy(predicted_lower, actual_lower)
-
-        # Word-level accuracy
-        predicted_words = predicted_lower.split()
-        actual_words = actual_lower.split()
-        word_accuracy = self._calculate_word_accuracy(predicted_words, actual_words)
-
-        # Length metrics
-        length_ratio = len(predicted_lower) / len(actual_lower) if len(actual_lower) > 0 else 0
-
-        return {
-            "char_accuracy": char_accuracy,
-            "word_accuracy": word_accuracy,
-            "length_ratio": length_ratio,
-            "predicted_length": len(predicted_lower),
-            "actual_length": len(actual_lower),
-            "predicted_word_count": len(predicted_words),
-            "actual_word_count": len(actual_words),
-        }
+        return evaluate_transcription(predicted, actual)
 
     def _calculate_character_accuracy(self, predicted: str, actual: str) -> float:
         """Calculate character-level accuracy"""
-        if not actual:
-            return 0.0
-
-        # Simple edit distance-based accuracy
-        max_len = max(len(predicted), len(actual))
-        if max_len == 0:
-            return 1.0
-
-        # Calculate Levenshtein distance
-        distance = self._levenshtein_distance(predicted, actual)
-        return 1.0 - (distance / max_len)
+        return character_accuracy(predicted, actual)
 
     def _calculate_word_accuracy(self, predicted_words: List[str], actual_words: List[str]) -> float:
-        """Calculate word-level accuracy"""
-        if not actual_words:
+        """Calculate word-level accuracy (1 - WER over the aligned word sequences)"""
+        if not actual_words or not predicted_words:
             return 0.0
 
-        if not predicted_words:
-            return 0.0
-
-        # Simple word matching
-        matches = 0
-        for pred_word in predicted_words:
-            if pred_word in actual_words:
-                matches += 1
-
-        return matches / len(actual_words)
+        return max(0.0, 1.0 - word_error_rate(actual_words, predicted_words))
 
     def _levenshtein_distance(self, s1: str, s2: str) -> int:
         """Calculate Levenshtein distance between two strings"""
-        if len(s1) < len(s2):
-            return self._levenshtein_distance(s2, s1)
-
-        if len(s2) == 0:
-            return len(s1)
-
-        previous_row = list(range(len(s2) + 1))
-        for i, c1 in enumerate(s1):
-            current_row = [i + 1]
-            for j, c2 in enumerate(s2):
-                insertions = previous_row[j + 1] + 1
-                deletions = current_row[j] + 1
-                substitutions = previous_row[j] + (c1 != c2)
-                current_row.append(min(insertions, deletions, substitutions))
-            previous_row = current_row
-
-        return previous_row[-1]
+        return edit_distance(s1, s2)
 
     def log_model_artifact(self, artifact_path: str, artifact_name: str = None):
         """Log model artifacts"""
@@ -20,6 +20,9 @@
 
 from openai import AsyncOpenAI
 
+from src.services.audio_decoder import sniff_format
+from src.services.audio_frame import AudioInput, as_audio_bytes
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -43,12 +46,12 @@ def __init__(self, api_key: Optional[str] = None):
             self.client = AsyncOpenAI(api_key=self.api_key)
             logger.info("OpenAI Whisper API service initialized successfully")
 
-    async def transcribe_audio_bytes(self, audio_bytes: bytes, language: str = "en") -> Dict[str, Any]:
+    async def transcribe_audio_bytes(self, audio_bytes: AudioInput, language: str = "en") -> Dict[str, Any]:
         """
         Transcribe audio from bytes using OpenAI Whisper API.
 
         Args:
-            audio_bytes: Raw audio data as bytes
+            audio_bytes: Raw audio data as bytes, or an AudioFrame (its original upload is sent)
             language: Target language code ('en' for English, 'tr' for Turkish, etc.)
 
         Returns:
@@ -57,9 +60,13 @@ async def transcribe_audio_bytes(self, audio_bytes: bytes, language: str = "en")
         if not self.client:
             return await self._mock_transcription(language)
 
+        audio_bytes = as_audio_bytes(audio_bytes)
+
         try:
-            # Create temporary file with appropriate extension
-            with tempfile.NamedTemporaryFile(suffix=".webm", delete=False) as temp_file:
+            # Name the upload after its container (VAD and long-form segments are WAV); headerless
+            # MediaRecorder chunks are not recognized and keep the .webm name
+            suffix = f".{sniff_format(audio_bytes) or 'webm'}"
+            with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as temp_file:
                 temp_file.write(audio_bytes)
                 temp_file_path = temp_file.name
 
@@ -0,0 +1,220 @@
+"""
+Profiling service for VoiceBridge API
+Per-stage timing spans and an on-demand sampling profiler.
+
+Spans are exported as the Prometheus histogram
+``voicebridge_stage_duration_seconds{stage=...}``. When profiling is disabled
+``span()`` returns a shared no-op object and ``timed()`` wrappers call straight
+through, so instrumented hot paths pay one attribute check.
+
+The sampling profiler walks ``sys._current_frames()`` at a fixed interval and
+returns folded stacks ("outer;inner;leaf count" per line), the input format of
+flamegraph.pl, inferno and speedscope.
+"""
+import functools
+import inspect
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, Dict
+
+from config import settings
+from src.services.prometheus_service import prometheus_metrics
+
+logger = logging.getLogger(__name__)
+
+MAX_PROFILE_SECONDS = 60.0
+
+
+class _ProfilingState:
+    """Mutable switch shared by all spans"""
+
+    __slots__ = ("enabled",)
+
+    def __init__(self, enabled: bool):
+        self.enabled = enabled
+
+
+_state = _ProfilingState(settings.profiling_enabled)
+
+
+def set_profiling_enabled(enabled: bool) -> None:
+    """Turn span recording on or off at runtime."""
+    _state.enabled = enabled
+
+
+def is_profiling_enabled() -> bool:
+    """Whether spans are currently recorded."""
+    return _state.enabled
+
+
+def record_stage(stage: str, duration: float) -> None:
+    """Record one stage duration in seconds."""
+    prometheus_metrics.record_stage_duration(stage, duration)
+
+
+class _Span:
+    """Context manager that times one stage"""
+
+    __slots__ = ("stage", "start")
+
+    def __init__(self, stage: str):
+        self.stage = stage
+        self.start = 0.0
+
+    def __enter__(self) -> "_Span":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        record_stage(self.stage, time.perf_counter() - self.start)
+        return False
+
+
+class _NoopSpan:
+    """Span used while profiling is disabled"""
+
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def span(stage: str):
+    """
+    Time a block of code as a pipeline stage.
+
+    Usage:
+        with span("encryption"):
+            encrypted = encrypt(data)
+
+    Args:
+        stage: Stage label for the Prometheus histogram
+
+    Returns:
+        Context manager (a shared no-op when profiling is disabled)
+    """
+    return _Span(stage) if _state.enabled else _NOOP_SPAN
+
+
+def timed(stage: str) -> Callable:
+    """
+    Decorator form of span() for sync and async functions.
+
+    Args:
+        stage: Stage label for the Prometheus histogram
+
+    Returns:
+        Decorator
+    """
+
+    def decorator(func: Callable) -> Callable:
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if not _state.enabled:
+                    return await func(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    record_stage(stage, time.perf_counter() - start)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _state.enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record_stage(stage, time.perf_counter() - start)
+
+        return wrapper
+
+    return decorator
+
+
+class ProfilerBusyError(RuntimeError):
+    """Raised when a sampling capture is already running"""
+
+
+class SamplingProfiler:
+    """Wall-clock sampling profiler over all Python threads"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    @property
+    def busy(self) -> bool:
+        """Whether a capture is in progress."""
+        return self._lock.locked()
+
+    def capture(self, seconds: float, interval: float = 0.005) -> Dict[str, int]:
+        """
+        Sample every thread's stack for a period of time.
+
+        Blocks the calling thread; run it off the event loop.
+
+        Args:
+            seconds: Capture duration (capped at MAX_PROFILE_SECONDS)
+            interval: Seconds between samples
+
+        Returns:
+            Mapping of folded stack to sample count
+        """
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusyError("A profile capture is already running")
+
+        try:
+            seconds = min(max(seconds, 0.0), MAX_PROFILE_SECONDS)
+            interval = max(interval, 0.001)
+            own_thread = threading.get_ident()
+            stacks: Counter = Counter()
+            deadline = time.perf_counter() + seconds
+
+            while time.perf_counter() < deadline:
+                names = {t.ident: t.name for t in threading.enumerate()}
+                for thread_id, frame in sys._current_frames().items():
+                    if thread_id == own_thread:
+                        continue
+                    stacks[self._fold(names.get(thread_id, str(thread_id)), frame)] += 1
+                time.sleep(interval)
+
+            logger.info(f"Captured {sum(stacks.values())} samples over {seconds:.1f}s")
+            return dict(stacks)
+        finally:
+            self._lock.release()
+
+    @staticmethod
+    def _fold(thread_name: str, frame: Any) -> str:
+        """Render a frame chain as 'thread;outer;...;leaf'."""
+        parts = []
+        while frame is not None:
+            code = frame.f_code
+            parts.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+            frame = frame.f_back
+        parts.append(thread_name)
+        return ";".join(reversed(parts))
+
+    @staticmethod
+    def to_folded(stacks: Dict[str, int]) -> str:
+        """Format captured stacks as folded text, heaviest first."""
+        lines = [f"{stack} {count}" for stack, count in sorted(stacks.items(), key=lambda item: -item[1])]
+        return "\n".join(lines) + "\n"
+
+
+# Global profiler instance
+sampling_profiler = SamplingProfiler()
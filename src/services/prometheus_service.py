@@ -155,6 +155,60 @@ def _setup_metrics(self):
             registry=self.registry,
         )
 
+        # Pipeline Stage Timing (see profiling_service.span)
+        self.stage_duration = Histogram(
+            "voicebridge_stage_duration_seconds",
+            "Duration of individual request pipeline stages",
+            ["stage"],  # decode, encryption, rate_limit, kafka_send, inference, ...
+            buckets=(0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+            registry=self.registry,
+        )
+
+        # Voice activity detection gate
+        self.vad_decisions = Counter(
+            "voicebridge_vad_decisions_total",
+            "Audio chunks seen by the VAD gate",
+            ["decision"],  # speech, silence, passthrough
+            registry=self.registry,
+        )
+        self.vad_audio_seconds = Counter(
+            "voicebridge_vad_audio_seconds_total",
+            "Seconds of audio seen by the VAD gate",
+            ["kind"],  # total, speech
+            registry=self.registry,
+        )
+
+        # Audio decode cost per container (see audio_decoder.decode_audio)
+        self.audio_decode_duration = Histogram(
+            "voicebridge_audio_decode_seconds",
+            "Time to decode one audio payload",
+            ["format", "status"],  # wav, webm, flac, ...; success, error
+            buckets=(0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0),
+            registry=self.registry,
+        )
+
+        # Kafka delivery outcome and enqueue-to-ack latency (see kafka_stream_service)
+        self.kafka_delivery_duration = Histogram(
+            "voicebridge_kafka_delivery_seconds",
+            "Time from queueing a Kafka record to its broker acknowledgement",
+            ["topic", "status"],  # success, error
+            buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+            registry=self.registry,
+        )
+
+        # Kafka consumer engine (see kafka_consumer_engine)
+        self.kafka_consumer_lag = Gauge(
+            "voicebridge_kafka_consumer_lag",
+            "Records per partition from the first unfinished one to the high watermark",
+            ["topic", "partition"],
+            registry=self.registry,
+        )
+        self.kafka_consumer_in_flight = Gauge(
+            "voicebridge_kafka_consumer_in_flight",
+            "Consumed records currently being processed",
+            registry=self.registry,
+        )
+
         # Application Info
         self.app_info = Info("voicebridge_app_info", "Application information", registry=self.registry)
 
@@ -244,6 +298,32 @@ def record_model_performance(self, model_name: str, accuracy: float, latency: fl
         self.model_accuracy.labels(model_name=model_name).set(accuracy)
         self.model_latency.labels(model_name=model_name).observe(latency)
 
+    def record_stage_duration(self, stage: str, duration: float):
+        """Record duration of one pipeline stage"""
+        self.stage_duration.labels(stage=stage).observe(duration)
+
+    def record_vad_decision(self, decision: str, audio_seconds: float = 0.0, speech_seconds: float = 0.0):
+        """Record one VAD gate decision"""
+        self.vad_decisions.labels(decision=decision).inc()
+        if audio_seconds:
+            self.vad_audio_seconds.labels(kind="total").inc(audio_seconds)
+        if speech_seconds:
+            self.vad_audio_seconds.labels(kind="speech").inc(speech_seconds)
+
+    def record_audio_decode(self, file_format: str, status: str, duration: float):
+        """Record one audio decode"""
+        self.audio_decode_duration.labels(format=file_format, status=status).observe(duration)
+
+    def record_kafka_delivery(self, topic: str, status: str, duration: float):
+        """Record one Kafka delivery"""
+        self.kafka_delivery_duration.labels(topic=topic, status=status).observe(duration)
+
+    def record_kafka_consumer(self, in_flight: int, lag: Dict[Any, int]):
+        """Record consumer in-flight count and per-partition lag (keyed by TopicPartition)"""
+        self.kafka_consumer_in_flight.set(in_flight)
+        for tp, value in lag.items():
+            self.kafka_consumer_lag.labels(topic=tp.topic, partition=str(tp.partition)).set(value)
+
     def get_metrics(self) -> str:
         """Get Prometheus metrics in text format"""
         return str(generate_latest(self.registry).decode("utf-8"))
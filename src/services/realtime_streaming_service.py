@@ -1,6 +1,11 @@
 """
 Real-time streaming service for VoiceBridge API
 Handles WebSocket connections, audio streaming, and real-time text delivery
+
+With INFERENCE_MODE=kafka, audio is not transcribed here: chunks are produced to
+the audio topic keyed by session, and results published by the inference
+workers come back through kafka_stream_service and are routed to the session's
+WebSocket (route_transcription_result).
 """
 import asyncio
 import json
@@ -15,8 +20,10 @@
 from config import settings
 from src.services.kafka_stream_service import kafka_stream_service
 from src.services.model_monitoring_service import model_monitoring_service
-from src.services.openai_whisper_service import get_openai_whisper_service
+from src.services.profiling_service import span, timed
 from src.services.prometheus_service import prometheus_metrics
+from src.services.transcription_backend import get_transcription_service
+from src.services.vad_service import vad_service
 
 logger = logging.getLogger(__name__)
 
@@ -25,7 +32,7 @@ class RealtimeStreamingService:
     """Service for real-time audio streaming and text delivery"""
 
     def __init__(self):
-        self.whisper_service = get_openai_whisper_service(settings.openai_api_key)
+        self.whisper_service = get_transcription_service(settings.openai_api_key)
 
         # Connection management
         self.active_connections: Dict[str, websockets.WebSocketServerProtocol] = {}
@@ -49,6 +56,9 @@ def __init__(self):
             "average_processing_time": 0.0,
         }
 
+        # Results from inference workers (INFERENCE_MODE=kafka)
+        kafka_stream_service.add_result_handler(self.route_transcription_result)
+
     async def handle_websocket_connection(self, websocket, path: str, user: Optional[Any] = None):
         """Handle new WebSocket connection"""
         connection_id = str(uuid.uuid4())
@@ -242,6 +252,7 @@ async def _handle_text_message(self, websocket, data: Dict[str, Any], connection
     async def _process_audio_stream(self, session_id: str, connection_id: str):
         """Process audio stream for a session"""
         logger.info(f"Started audio processing for session {session_id}")
+        chunk_index = 0
 
         try:
             while connection_id in self.active_connections:
@@ -252,41 +263,27 @@ async def _process_audio_stream(self, session_id: str, connection_id: str):
                         audio_chunks = self.audio_buffers[session_id].copy()
                         self.audio_buffers[session_id].clear()
 
-                if audio_chunks:
-                    # Combine audio chunks
-                    combined_audio = b"".join(audio_chunks)
-
-                    # Process audio
-                    start_time = time.time()
-                    result = await self.whisper_service.transcribe_audio_bytes(
-                        combined_audio, language=settings.default_language
-                    )
-                    processing_time = time.time() - start_time
-
-                    # Record metrics
-                    model_monitoring_service.record_model_performance(
-                        model_name="whisper_realtime",
-                        accuracy=result.get("confidence", 0.0),
-                        confidence=result.get("confidence", 0.0),
-                        processing_time=processing_time,
-                        error_occurred="error" in result,
-                    )
-
-                    # Update stats
-                    self.stats["total_transcriptions"] += 1
-                    total_transcriptions = self.stats["total_transcriptions"]
-                    if total_transcriptions > 0:
-                        self.stats["average_processing_time"] = (
-                            self.stats["average_processing_time"] * (total_transcriptions - 1) + processing_time
-                        ) / total_transcriptions
-
-                    # Send transcription result
-                    if "error" not in result and result.get("text", "").strip():
-                        await self._send_transcription_result(session_id, result, processing_time)
-
-                    # Update session info
-                    if connection_id in self.connection_sessions:
-                        self.connection_sessions[connection_id]["transcriptions_sent"] += 1
+                if audio_chunks and self._offload_to_workers():
+                    for chunk in audio_chunks:
+                        await kafka_stream_service.send_audio_chunk(
+                            session_id, "realtime_user", chunk, chunk_index=chunk_index
+                        )
+                        chunk_index += 1
+                elif audio_chunks:
+                    # Gate each chunk in arrival order; undecodable chunks pass through combined as before
+                    segments: List[bytes] = []
+                    passthrough: List[bytes] = []
+                    for chunk in audio_chunks:
+                        gated = vad_service.gate(f"realtime:{session_id}", chunk)
+                        if len(gated) == 1 and gated[0] is chunk:
+                            passthrough.append(chunk)
+                        else:
+                            segments.extend(gated)
+                    if passthrough:
+                        segments.append(b"".join(passthrough))
+
+                    for audio_segment in segments:
+                        await self._transcribe_segment(session_id, connection_id, audio_segment)
 
                 # Wait before next processing cycle
                 await asyncio.sleep(0.1)
@@ -296,6 +293,39 @@ async def _process_audio_stream(self, session_id: str, connection_id: str):
         except Exception as e:
             logger.error(f"Error in audio processing for session {session_id}: {e}")
 
+    async def _transcribe_segment(self, session_id: str, connection_id: str, audio_segment: bytes):
+        """Transcribe one speech segment and publish the result"""
+        start_time = time.time()
+        with span("inference"):
+            result = await self.whisper_service.transcribe_audio_bytes(audio_segment, language=settings.default_language)
+        processing_time = time.time() - start_time
+
+        # Record metrics
+        with span("metrics_fanout"):
+            model_monitoring_service.record_model_performance(
+                model_name="whisper_realtime",
+                accuracy=result.get("confidence", 0.0),
+                confidence=result.get("confidence", 0.0),
+                processing_time=processing_time,
+                error_occurred="error" in result,
+            )
+
+        # Update stats
+        self.stats["total_transcriptions"] += 1
+        total_transcriptions = self.stats["total_transcriptions"]
+        if total_transcriptions > 0:
+            self.stats["average_processing_time"] = (
+                self.stats["average_processing_time"] * (total_transcriptions - 1) + processing_time
+            ) / total_transcriptions
+
+        # Send transcription result
+        if "error" not in result and result.get("text", "").strip():
+            await self._send_transcription_result(session_id, result, processing_time)
+
+        # Update session info
+        if connection_id in self.connection_sessions:
+            self.connection_sessions[connection_id]["transcriptions_sent"] += 1
+
     async def _send_transcription_result(self, session_id: str, result: Dict[str, Any], processing_time: float):
         """Send transcription result to subscribers"""
         try:
@@ -313,21 +343,62 @@ async def _send_transcription_result(self, session_id: str, result: Dict[str, An
             if session_id in self.text_queue:
                 await self.text_queue[session_id].put(transcription_data)
 
-            # Send to Kafka for further processing
-            if kafka_stream_service.producer:
-                await kafka_stream_service.send_audio_chunk(
-                    session_id=session_id,
-                    user_id="realtime_user",  # Could be extracted from session
-                    audio_data=b"",  # Empty for text-only result
-                    language=result.get("language", settings.default_language),
-                    is_final=True,
-                )
+            # Publish a result event for downstream consumers (never an audio message)
+            await kafka_stream_service.publish_transcription_result(
+                session_id,
+                "realtime_user",  # Could be extracted from session
+                transcription_data["text"],
+                confidence=transcription_data["confidence"],
+                language=transcription_data["language"],
+                processing_time=processing_time,
+            )
 
             logger.debug(f"Sent transcription result for session {session_id}")
 
         except Exception as e:
             logger.error(f"Error sending transcription result: {e}")
 
+    def _offload_to_workers(self) -> bool:
+        """Whether inference runs in Kafka inference workers instead of this process"""
+        return settings.inference_mode == "kafka" and kafka_stream_service.producer is not None
+
+    async def route_transcription_result(self, result: Dict[str, Any]):
+        """
+        Deliver a result event from an inference worker to the session's WebSocket.
+
+        Every API node sees every result; results for sessions held by other nodes are ignored.
+
+        Args:
+            result: TranscriptionResult record consumed from the transcription topic
+        """
+        session_id = result.get("session_id")
+        if session_id not in self.text_queue:
+            return
+        if result.get("status") != "success" or not result.get("text", "").strip():
+            return
+
+        processing_time = result.get("processing_time", 0.0)
+        await self.text_queue[session_id].put(
+            {
+                "type": "transcription",
+                "session_id": session_id,
+                "text": result["text"],
+                "confidence": result.get("confidence", 0.0),
+                "language": result.get("language", settings.default_language),
+                "processing_time": processing_time,
+                "timestamp": time.time(),
+            }
+        )
+
+        self.stats["total_transcriptions"] += 1
+        total_transcriptions = self.stats["total_transcriptions"]
+        self.stats["average_processing_time"] = (
+            self.stats["average_processing_time"] * (total_transcriptions - 1) + processing_time
+        ) / total_transcriptions
+        for connection_id in self.session_connections.get(session_id, set()):
+            if connection_id in self.connection_sessions:
+                self.connection_sessions[connection_id]["transcriptions_sent"] += 1
+
     async def _stream_text_updates(self, session_id: str, websocket):
         """Stream text updates to WebSocket client"""
         try:
@@ -351,6 +422,7 @@ async def _stream_text_updates(self, session_id: str, websocket):
         except Exception as e:
             logger.error(f"Error in text streaming for session {session_id}: {e}")
 
+    @timed("ws_send")
     async def _send_message(self, websocket, data: Dict[str, Any]):
         """Send message to WebSocket client"""
         try:
@@ -424,6 +496,12 @@ async def _cleanup_connection(self, connection_id: str, session_id: str):
                 if session_id in self.text_subscribers:
                     del self.text_subscribers[session_id]
 
+                vad_service.end_session(f"realtime:{session_id}")
+                if self._offload_to_workers():
+                    # Let the worker that owns the session close its open segment and VAD state
+                    await kafka_stream_service.send_audio_chunk(session_id, "realtime_user", b"", is_final=True)
+                    await kafka_stream_service.cleanup_session(session_id)
+
             # Update stats
             self.stats["active_connections"] = len(self.active_connections)
 
@@ -442,19 +520,26 @@ async def process_audio(self, audio_data: Dict[str, Any]) -> Dict[str, Any]:
             if not audio_bytes:
                 return {"error": "No audio data provided"}
 
-            # Process audio with Whisper
+            # Process audio with Whisper (skipped when the recording holds no speech)
             start_time = time.time()
-            result = await self.whisper_service.transcribe_audio_bytes(audio_bytes, language=settings.default_language)
+            if vad_service.should_transcribe(audio_bytes):
+                with span("inference"):
+                    result = await self.whisper_service.transcribe_audio_bytes(
+                        audio_bytes, language=settings.default_language
+                    )
+            else:
+                result = {"text": "", "confidence": 0.0, "language": settings.default_language}
             processing_time = time.time() - start_time
 
             # Record metrics
-            model_monitoring_service.record_model_performance(
-                model_name="whisper_realtime",
-                accuracy=result.get("confidence", 0.0),
-                confidence=result.get("confidence", 0.0),
-                processing_time=processing_time,
-                error_occurred="error" in result,
-            )
+            with span("metrics_fanout"):
+                model_monitoring_service.record_model_performance(
+                    model_name="whisper_realtime",
+                    accuracy=result.get("confidence", 0.0),
+                    confidence=result.get("confidence", 0.0),
+                    processing_time=processing_time,
+                    error_occurred="error" in result,
+                )
 
             # Update stats
             self.stats["total_transcriptions"] += 1
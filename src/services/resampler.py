@@ -0,0 +1,259 @@
+"""
+Resampling Service
+Polyphase resampling with cached filter kernels.
+
+The anti-aliasing filter for a rate pair is a Kaiser-windowed sinc, designed
+once per (src_rate, dst_rate, quality) and kept in a bounded LRU cache.
+Per-call resamplers (torchaudio.transforms.Resample, librosa.resample) rebuild
+the kernel on every request instead. Filtering runs through
+scipy.signal.upfirdn, which evaluates only the output samples that are kept.
+Integer ratios such as 48k -> 16k therefore reduce to a plain 3:1 polyphase
+decimator with no upsampling stage.
+
+StreamingResampler keeps the filter history between chunks, so realtime audio
+resampled chunk by chunk matches the whole signal resampled in one go. Chunks
+resampled independently click at every boundary.
+
+Whole recordings go through soxr when it is installed (it comes with
+librosa). Its multistage C filters are several times faster than a single
+polyphase stage on long inputs, and they are built in C at negligible cost per
+call. Without soxr, the cached polyphase kernels are used.
+"""
+import logging
+from dataclasses import dataclass
+from functools import lru_cache
+from math import gcd
+from typing import Any, Dict, Optional
+
+import numpy as np
+from scipy.signal import upfirdn
+
+from config import settings
+
+try:
+    import soxr
+
+    SOXR_AVAILABLE = True
+except ImportError:
+    SOXR_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+QUALITY_PRESETS: Dict[str, Dict[str, float]] = {
+    # zero_crossings: sinc lobes per side; rolloff: passband edge as a fraction of
+    # the lower Nyquist; beta: Kaiser window shape (stopband attenuation)
+    "low": {"zero_crossings": 8, "rolloff": 0.85, "beta": 6.0},
+    "medium": {"zero_crossings": 16, "rolloff": 0.9, "beta": 8.6},
+    "high": {"zero_crossings": 32, "rolloff": 0.945, "beta": 12.0},
+}
+SOXR_QUALITY = {"low": "LQ", "medium": "HQ", "high": "VHQ"}
+
+# Rate pairs needing more polyphase branches than this (e.g. 44101 -> 16000) are
+# rejected; the kernel would be unreasonably long
+MAX_PHASES = 2048
+
+
+@dataclass(frozen=True, eq=False)
+class ResamplerKernel:
+    """Polyphase filter for one rate pair"""
+
+    src_rate: int
+    dst_rate: int
+    quality: str
+    up: int
+    down: int
+    half_width: int  # filter half-length in upsampled samples
+    taps: np.ndarray  # 2 * half_width + 1 coefficients, centred
+    alignment: int  # buffer starts congruent to this (mod down) map outputs to whole indices
+
+    @property
+    def support(self) -> int:
+        """Input samples needed on each side of an output sample."""
+        return self.half_width // self.up + 1
+
+
+@lru_cache(maxsize=settings.resampler_cache_size)
+def get_kernel(src_rate: int, dst_rate: int, quality: str = "medium") -> ResamplerKernel:
+    """
+    Get the cached filter kernel for a rate pair, designing it on first use.
+
+    Args:
+        src_rate: Input sample rate
+        dst_rate: Output sample rate
+        quality: Preset name from QUALITY_PRESETS
+
+    Returns:
+        ResamplerKernel
+
+    Raises:
+        ValueError: For unknown presets, invalid rates or unsupported ratios
+    """
+    if quality not in QUALITY_PRESETS:
+        raise ValueError(f"Unknown resampler quality: {quality}")
+    if src_rate <= 0 or dst_rate <= 0:
+        raise ValueError(f"Invalid sample rates: {src_rate} -> {dst_rate}")
+
+    divisor = gcd(src_rate, dst_rate)
+    up, down = dst_rate // divisor, src_rate // divisor
+    if max(up, down) > MAX_PHASES:
+        raise ValueError(f"Unsupported resampling ratio {src_rate} -> {dst_rate}")
+
+    preset = QUALITY_PRESETS[quality]
+    # Cutoff relative to the upsampled Nyquist frequency
+    cutoff = preset["rolloff"] / max(up, down)
+    half_width = int(np.ceil(preset["zero_crossings"] / cutoff))
+    offsets = np.arange(-half_width, half_width + 1)
+    taps = up * cutoff * np.sinc(cutoff * offsets) * np.kaiser(offsets.size, preset["beta"])
+
+    logger.debug(f"Designed {taps.size}-tap resampler kernel for {src_rate} -> {dst_rate} ({quality})")
+    return ResamplerKernel(
+        src_rate=src_rate,
+        dst_rate=dst_rate,
+        quality=quality,
+        up=up,
+        down=down,
+        half_width=half_width,
+        taps=taps.astype(np.float32),
+        alignment=(half_width * pow(up, -1, down)) % down if down > 1 else 0,
+    )
+
+
+def kernel_cache_info() -> Dict[str, Any]:
+    """
+    Get kernel cache statistics.
+
+    Returns:
+        Dictionary with hits, misses, size and maxsize
+    """
+    info = get_kernel.cache_info()
+    return {"hits": info.hits, "misses": info.misses, "size": info.currsize, "maxsize": info.maxsize}
+
+
+class StreamingResampler:
+    """Stateful resampler for chunked input; chunk boundaries are seamless"""
+
+    def __init__(self, src_rate: int, dst_rate: int, quality: Optional[str] = None):
+        """
+        Initialize streaming resampler.
+
+        Args:
+            src_rate: Input sample rate
+            dst_rate: Output sample rate
+            quality: Preset name (defaults to settings.resampler_quality)
+        """
+        self.kernel = get_kernel(src_rate, dst_rate, quality or settings.resampler_quality)
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget all input; the next chunk starts a new signal."""
+        kernel = self.kernel
+        # Zeros stand in for the signal before its first sample
+        start = -kernel.support
+        start -= (start - kernel.alignment) % kernel.down
+        self._buffer = np.zeros(-start, dtype=np.float32)
+        self._buffer_start = start  # absolute input index of _buffer[0]
+        self._received = 0
+        self._next_output = 0
+
+    @property
+    def pending(self) -> int:
+        """Output samples owed for input already received (the held-back look-ahead)."""
+        return -(-(self._received * self.kernel.up) // self.kernel.down) - self._next_output
+
+    def process(self, chunk: np.ndarray) -> np.ndarray:
+        """
+        Resample the next chunk.
+
+        Output lags the input by a few samples (the filter's look-ahead); the
+        held-back samples come out with the next chunk or on flush.
+
+        Args:
+            chunk: Mono samples at src_rate
+
+        Returns:
+            Float32 samples at dst_rate that are complete so far
+        """
+        chunk = np.asarray(chunk, dtype=np.float32)
+        if chunk.size:
+            self._buffer = np.concatenate((self._buffer, chunk))
+            self._received += chunk.size
+        kernel = self.kernel
+        ready = -(-(self._received * kernel.up - kernel.half_width) // kernel.down)
+        return self._emit(ready)
+
+    def flush(self) -> np.ndarray:
+        """
+        Emit the held-back tail and reset.
+
+        Returns:
+            Remaining float32 samples at dst_rate
+        """
+        kernel = self.kernel
+        total = -(-(self._received * kernel.up) // kernel.down)
+        self._buffer = np.concatenate((self._buffer, np.zeros(kernel.support + 1, dtype=np.float32)))
+        tail = self._emit(total)
+        self.reset()
+        return tail
+
+    def _emit(self, ready: int) -> np.ndarray:
+        if ready <= self._next_output:
+            return np.zeros(0, dtype=np.float32)
+
+        kernel = self.kernel
+        output = upfirdn(kernel.taps, self._buffer, kernel.up, kernel.down)
+        # Output index of output[0]; exact because _buffer_start is aligned
+        offset = (self._buffer_start * kernel.up - kernel.half_width) // kernel.down
+        result = output[self._next_output - offset : ready - offset]
+        self._next_output = ready
+
+        # Drop input the next output no longer needs, keeping the start aligned
+        first_needed = -(-(ready * kernel.down - kernel.half_width) // kernel.up)
+        keep_from = first_needed - (first_needed - kernel.alignment) % kernel.down
+        if keep_from > self._buffer_start:
+            self._buffer = self._buffer[keep_from - self._buffer_start :]
+            self._buffer_start = keep_from
+        return result.astype(np.float32, copy=False)
+
+
+def resample_polyphase(audio: np.ndarray, orig_sr: int, target_sr: int, quality: Optional[str] = None) -> np.ndarray:
+    """
+    Resample a complete signal with the cached polyphase kernel.
+
+    Gives exactly what StreamingResampler produces for the same signal.
+
+    Args:
+        audio: Mono samples
+        orig_sr: Source sample rate
+        target_sr: Target sample rate
+        quality: Preset name (defaults to settings.resampler_quality)
+
+    Returns:
+        Resampled float32 samples (the input itself when rates match)
+    """
+    if orig_sr == target_sr:
+        return audio
+    resampler = StreamingResampler(orig_sr, target_sr, quality)
+    head = resampler.process(audio)
+    return np.concatenate((head, resampler.flush()))
+
+
+def resample(audio: np.ndarray, orig_sr: int, target_sr: int, quality: Optional[str] = None) -> np.ndarray:
+    """
+    Resample a complete mono signal (soxr when available, else polyphase).
+
+    Args:
+        audio: Samples
+        orig_sr: Source sample rate
+        target_sr: Target sample rate
+        quality: Preset name (defaults to settings.resampler_quality)
+
+    Returns:
+        Resampled float32 samples (the input itself when rates match)
+    """
+    if orig_sr == target_sr:
+        return audio
+    quality = quality or settings.resampler_quality
+    if SOXR_AVAILABLE and quality in SOXR_QUALITY:
+        samples = np.asarray(audio, dtype=np.float32)
+        return soxr.resample(samples, orig_sr, target_sr, quality=SOXR_QUALITY[quality])
+    return resample_polyphase(audio, orig_sr, target_sr, quality)
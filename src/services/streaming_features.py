@@ -0,0 +1,370 @@
+"""
+Streaming Feature Service
+Incremental feature extraction for live sessions.
+
+Each session keeps its STFT overlap (the last frame's worth of samples) and
+emits feature frames as PCM arrives. Frames are identical to what
+FeatureEngine computes on the whole recording, with two exceptions. Chroma
+uses a fixed tuning instead of one estimated over the recording. The 80 dB
+floor on the log-mel spectrogram is taken from the loudest frame seen so far,
+which only affects frames far below the session's peak.
+
+MFCC deltas use librosa's 9-frame Savitzky-Golay window, so frames come out
+four frames (about 130 ms) behind the audio.
+
+Running mean/std/min/max are kept with Welford's method. At session end the
+summary has the same keys as
+AudioPreprocessingService._calculate_feature_statistics. It costs O(1) in the
+recording length, with no need to re-process the audio for TranscriptionFeature.
+"""
+import logging
+import time
+from typing import Any, Callable, Dict, Iterable, Optional
+
+import librosa
+import numpy as np
+import scipy.fft
+from scipy.signal import get_window, savgol_filter
+
+from config import settings
+from src.services.audio_preprocessing_service import serialize_feature_statistics
+from src.services.feature_engine import ALL_FEATURES, FeatureEngine, get_feature_engine
+
+logger = logging.getLogger(__name__)
+
+DELTA_WIDTH = 9  # librosa.feature.delta default
+DELTA_LAG = DELTA_WIDTH // 2
+
+
+class RunningStatistics:
+    """Running mean, variance, min and max over the last axis (Welford, merged per block)"""
+
+    def __init__(self):
+        self.count = 0
+        self.mean: Optional[np.ndarray] = None
+        self.min: Optional[np.ndarray] = None
+        self.max: Optional[np.ndarray] = None
+        self._m2: Optional[np.ndarray] = None
+
+    def update(self, block: np.ndarray) -> None:
+        """
+        Add observations.
+
+        Args:
+            block: Array of shape (..., n_observations)
+        """
+        n = block.shape[-1]
+        if n == 0:
+            return
+        block = block.astype(np.float64, copy=False)
+        block_mean = block.mean(axis=-1)
+        block_m2 = np.square(block - block_mean[..., np.newaxis]).sum(axis=-1)
+        block_min, block_max = block.min(axis=-1), block.max(axis=-1)
+
+        if self.count == 0:
+            self.mean, self._m2, self.min, self.max = block_mean, block_m2, block_min, block_max
+        else:
+            total = self.count + n
+            delta = block_mean - self.mean
+            self.mean = self.mean + delta * (n / total)
+            self._m2 = self._m2 + block_m2 + np.square(delta) * (self.count * n / total)
+            self.min = np.minimum(self.min, block_min)
+            self.max = np.maximum(self.max, block_max)
+        self.count += n
+
+    @property
+    def std(self) -> Optional[np.ndarray]:
+        """Population standard deviation (np.std default)."""
+        return None if self._m2 is None else np.sqrt(self._m2 / self.count)
+
+
+class StreamingFeatureExtractor:
+    """Per-session incremental feature extractor"""
+
+    def __init__(self, engine: Optional[FeatureEngine] = None, features: Optional[Iterable[str]] = None):
+        """
+        Initialize extractor.
+
+        Args:
+            engine: Engine supplying parameters and filter banks (shared default engine when None)
+            features: Features to extract (all features when None)
+        """
+        self.engine = engine or get_feature_engine(settings.sample_rate)
+        requested = set(features or ALL_FEATURES)
+        unknown = requested - set(ALL_FEATURES)
+        if unknown:
+            raise ValueError(f"Unknown features: {sorted(unknown)}")
+        self.features = tuple(name for name in ALL_FEATURES if name in requested)
+        self.tuning = self.engine.tuning if self.engine.tuning is not None else 0.0
+        self.window = get_window("hann", self.engine.n_fft, fftbins=True).astype(np.float32)
+
+        self._buffer = np.zeros(0, dtype=np.float32)
+        self._buffer_start = 0  # absolute sample index of _buffer[0]
+        self._received = 0
+        self._next_frame = 0
+        self._log_mel_peak = -np.inf
+
+        # Raw MFCC frames still inside a delta window; _history_start is the frame index of column 0
+        self._mfcc_history = np.zeros((self.engine.n_mfcc, 0), dtype=np.float32)
+        self._history_start = 0
+        self._mfcc_emitted = 0
+        # Other features wait here until the matching MFCC deltas are complete
+        self._pending: Dict[str, np.ndarray] = {}
+
+        self.statistics = {name: RunningStatistics() for name in self.features}
+        self.frame_count = 0
+
+    def process(self, audio: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Feed samples at the engine's sample rate.
+
+        Args:
+            audio: Mono samples
+
+        Returns:
+            Newly completed feature frames per feature (frames on the last axis)
+        """
+        audio = np.asarray(audio, dtype=np.float32)
+        if audio.size:
+            self._buffer = np.concatenate((self._buffer, audio))
+            self._received += audio.size
+        half = self.engine.n_fft // 2
+        ready = (self._received - half) // self.engine.hop_length + 1 if self._received >= half else 0
+        return self._emit(self._frames(ready), final=False)
+
+    def flush(self) -> Dict[str, np.ndarray]:
+        """
+        Emit the remaining frames, padding the end like librosa. The stream ends here.
+
+        Returns:
+            Remaining feature frames per feature
+        """
+        total = 1 + self._received // self.engine.hop_length if self._received else 0
+        return self._emit(self._frames(total, final=True), final=True)
+
+    @property
+    def duration(self) -> float:
+        """Seconds of audio received."""
+        return self._received / self.engine.sample_rate
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Statistics of all emitted frames, keyed like _calculate_feature_statistics.
+
+        Returns:
+            Dictionary of statistic name to value
+        """
+        stats: Dict[str, Any] = {}
+        for name, running in self.statistics.items():
+            if running.count == 0:
+                continue
+            stats[f"{name}_mean"] = running.mean
+            stats[f"{name}_std"] = running.std
+            # Like the offline statistics, multi-row spectral features (chroma, tonnetz) have no min/max
+            if name == "mfcc" or running.mean.ndim == 0:
+                stats[f"{name}_min"] = running.min
+                stats[f"{name}_max"] = running.max
+        return stats
+
+    def _frames(self, stop: int, final: bool = False) -> Optional[Dict[str, np.ndarray]]:
+        """Compute per-frame features for frames [_next_frame, stop)."""
+        start = self._next_frame
+        if stop <= start:
+            return None
+        engine = self.engine
+        half = engine.n_fft // 2
+
+        positions = np.arange(start, stop)[:, np.newaxis] * engine.hop_length - half + np.arange(engine.n_fft)
+        inside = (positions >= 0) & (positions < self._received)
+        # Edge padding for ZCR (librosa pads the signal with its first/last sample), zeros for the STFT
+        offsets = np.clip(positions, 0, self._received - 1) - self._buffer_start
+        edge_frames = self._buffer[offsets]
+        frames = np.where(inside, edge_frames, 0.0).astype(np.float32)
+
+        self._next_frame = stop
+        keep_from = max(stop * engine.hop_length - half, 0)
+        if not final and keep_from > self._buffer_start:
+            self._buffer = self._buffer[keep_from - self._buffer_start :]
+            self._buffer_start = keep_from
+
+        magnitude = np.abs(np.fft.rfft(frames * self.window, axis=1)).T.astype(np.float32)
+        power = magnitude**2
+        wanted = set(self.features)
+        output: Dict[str, np.ndarray] = {}
+
+        if "mfcc" in wanted:
+            log_mel = 10.0 * np.log10(np.maximum(engine.mel_basis @ power, 1e-10))
+            self._log_mel_peak = max(self._log_mel_peak, float(log_mel.max()))
+            log_mel = np.maximum(log_mel, self._log_mel_peak - 80.0)
+            output["mfcc"] = scipy.fft.dct(log_mel, axis=0, type=2, norm="ortho")[: engine.n_mfcc]
+        if wanted & {"spectral_centroid", "spectral_bandwidth"}:
+            total = magnitude.sum(axis=0, dtype=np.float64)
+            total[total < np.finfo(np.float32).tiny] = 1.0
+            mean = (engine.fft_frequencies @ magnitude.astype(np.float64)) / total
+            mean_square = ((engine.fft_frequencies**2) @ magnitude.astype(np.float64)) / total
+            output["spectral_centroid"] = mean
+            output["spectral_bandwidth"] = np.sqrt(np.maximum(mean_square - mean**2, 0.0))
+        if "spectral_rolloff" in wanted:
+            output["spectral_rolloff"] = librosa.feature.spectral_rolloff(S=magnitude, sr=engine.sample_rate)[0]
+        if "zero_crossing_rate" in wanted:
+            signs = np.signbit(np.where(np.abs(edge_frames) <= 1e-10, 0.0, edge_frames))
+            output["zero_crossing_rate"] = (signs[:, 1:] != signs[:, :-1]).sum(axis=1) / engine.n_fft
+        if wanted & {"chroma", "tonnetz"}:
+            chroma = librosa.util.normalize(engine.chroma_basis(self.tuning) @ power, norm=np.inf, axis=0)
+            output["chroma"] = chroma
+            output["tonnetz"] = librosa.feature.tonnetz(chroma=chroma, sr=engine.sample_rate)
+
+        return {name: output[name] for name in self.features}
+
+    def _emit(self, frames: Optional[Dict[str, np.ndarray]], final: bool) -> Dict[str, np.ndarray]:
+        """Align frames with the delayed MFCC deltas and update the running statistics."""
+        for name, values in (frames or {}).items():
+            if name != "mfcc":
+                previous = self._pending.get(name)
+                self._pending[name] = values if previous is None else np.concatenate((previous, values), axis=-1)
+
+        emitted: Dict[str, np.ndarray] = {}
+        if "mfcc" in self.features:
+            emitted["mfcc"] = self._mfcc_with_deltas(frames["mfcc"] if frames else None, final)
+            count = emitted["mfcc"].shape[-1]
+        else:
+            count = next(iter(self._pending.values())).shape[-1] if self._pending else 0
+
+        for name, pending in self._pending.items():
+            emitted[name] = pending[..., :count]
+            self._pending[name] = pending[..., count:]
+        if count:
+            for name, values in emitted.items():
+                self.statistics[name].update(values)
+        self.frame_count += count
+        return {name: emitted[name] for name in self.features if name in emitted}
+
+    def _mfcc_with_deltas(self, mfcc: Optional[np.ndarray], final: bool) -> np.ndarray:
+        """MFCCs stacked with delta and delta-delta for every frame whose delta window is complete."""
+        if mfcc is not None:
+            self._mfcc_history = np.concatenate((self._mfcc_history, mfcc), axis=1)
+        history = self._mfcc_history
+        available = self._history_start + history.shape[1]
+        start = self._mfcc_emitted
+
+        width = DELTA_WIDTH
+        if available >= DELTA_WIDTH:
+            # The last DELTA_LAG frames need frames that have not arrived unless the stream has ended
+            stop = available if final else available - DELTA_LAG
+        elif final:
+            # Shorter than one delta window: use the longest odd window that fits
+            width = available if available % 2 else available - 1
+            stop = available
+        else:
+            stop = start
+        if stop <= start:
+            return np.zeros((3 * self.engine.n_mfcc, 0), dtype=np.float32)
+
+        if width >= 3:
+            deltas = [savgol_filter(history, width, order, deriv=order, axis=1) for order in (1, 2)]
+        else:
+            deltas = [np.zeros_like(history), np.zeros_like(history)]
+        local = slice(start - self._history_start, stop - self._history_start)
+        stacked = np.concatenate([history, *deltas], axis=0)[:, local]
+
+        # Frames before stop - DELTA_WIDTH are outside every remaining delta window (including the end edge)
+        keep_from = max(self._history_start, stop - DELTA_WIDTH)
+        self._mfcc_history = history[:, keep_from - self._history_start :]
+        self._history_start = keep_from
+        self._mfcc_emitted = stop
+        return stacked
+
+
+class StreamingFeatureService:
+    """Per-session streaming features with summaries at session end"""
+
+    def __init__(
+        self,
+        features: Optional[Iterable[str]] = None,
+        summary_sink: Optional[Callable[[Dict[str, Any]], None]] = None,
+        session_ttl: Optional[int] = None,
+    ):
+        """
+        Initialize streaming feature service.
+
+        Args:
+            features: Features to extract per session (all features when None)
+            summary_sink: Receives each session summary when the session ends
+            session_ttl: Idle sessions older than this many seconds are dropped
+        """
+        self.features = tuple(features) if features is not None else ALL_FEATURES
+        self.summary_sink = summary_sink
+        self.session_ttl = session_ttl if session_ttl is not None else settings.vad_session_ttl_seconds
+        self.sessions: Dict[str, StreamingFeatureExtractor] = {}
+        self.last_seen: Dict[str, float] = {}
+        self.stats = {"sessions_completed": 0, "frames": 0}
+
+    def process(self, session_id: str, audio: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Feed decoded session audio.
+
+        Args:
+            session_id: Stream/session identifier
+            audio: Mono float32 samples at the engine's sample rate
+
+        Returns:
+            Newly completed feature frames
+        """
+        extractor = self.sessions.get(session_id)
+        if extractor is None:
+            self._evict_idle()
+            extractor = self.sessions[session_id] = StreamingFeatureExtractor(features=self.features)
+        self.last_seen[session_id] = time.time()
+        frames = extractor.process(audio)
+        self.stats["frames"] += next(iter(frames.values())).shape[-1] if frames else 0
+        return frames
+
+    def end_session(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Flush a session and return its feature summary.
+
+        Returns:
+            JSON-ready summary (statistics under "features"), or None for unknown sessions
+        """
+        extractor = self.sessions.pop(session_id, None)
+        self.last_seen.pop(session_id, None)
+        if extractor is None:
+            return None
+        extractor.flush()
+        summary = {
+            "session_id": session_id,
+            "frame_count": extractor.frame_count,
+            "audio_duration": extractor.duration,
+            "sample_rate": extractor.engine.sample_rate,
+            "features": serialize_feature_statistics(extractor.summary()),
+        }
+        self.stats["sessions_completed"] += 1
+        if self.summary_sink is not None:
+            try:
+                self.summary_sink(summary)
+            except Exception as e:
+                logger.error(f"Feature summary sink failed for session {session_id}: {e}")
+        return summary
+
+    def set_summary_sink(self, sink: Optional[Callable[[Dict[str, Any]], None]]) -> None:
+        """Set (or clear with None) the callback receiving session summaries."""
+        self.summary_sink = sink
+
+    @property
+    def enabled(self) -> bool:
+        """Whether summaries have a receiver (without one there is nothing to extract for)."""
+        return self.summary_sink is not None
+
+    def _evict_idle(self) -> None:
+        cutoff = time.time() - self.session_ttl
+        for session_id in [s for s, seen in self.last_seen.items() if seen < cutoff]:
+            self.sessions.pop(session_id, None)
+            self.last_seen.pop(session_id, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return streaming feature statistics."""
+        return {**self.stats, "active_sessions": len(self.sessions)}
+
+
+# Global streaming feature service instance
+streaming_feature_service = StreamingFeatureService()
@@ -0,0 +1,242 @@
+"""
+Stub Transcription Service
+Deterministic, model-free transcription backend for performance testing.
+
+Produces text derived from a hash of the audio, so the same input always gives
+the same output, and simulates upstream behaviour with configurable latency
+distributions, injected errors and a concurrency cap. Benchmarks and CI load
+tests use it to measure pipeline overhead without a model in the loop.
+"""
+import asyncio
+import hashlib
+import logging
+import math
+import random
+import time
+from typing import Any, Dict, Optional
+
+from config import settings
+from src.services.audio_frame import AudioInput, as_audio_bytes
+
+logger = logging.getLogger(__name__)
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "normal", "lognormal")
+
+STUB_VOCABULARY = (
+    "hello world this is a test of the voice bridge speech recognition system real time audio "
+    "stream transcription works correctly microphone levels are good please continue speaking now"
+).split()
+
+
+class StubTranscriptionService:
+    """Drop-in replacement for OpenAIWhisperService with reproducible behaviour."""
+
+    def __init__(
+        self,
+        latency_distribution: str = "fixed",
+        latency_ms: float = 0.0,
+        latency_jitter_ms: float = 0.0,
+        latency_sigma: float = 0.5,
+        error_rate: float = 0.0,
+        max_concurrency: int = 0,
+        seed: int = 0,
+        fixed_text: str = "",
+    ):
+        """
+        Initialize stub service.
+
+        Args:
+            latency_distribution: 'fixed', 'uniform', 'normal' or 'lognormal'
+            latency_ms: Fixed latency, or the mean (uniform/normal) / median (lognormal)
+            latency_jitter_ms: Half-width for uniform, standard deviation for normal
+            latency_sigma: Shape parameter for lognormal latency
+            error_rate: Fraction of requests that fail with an injected error
+            max_concurrency: Maximum in-flight requests (0 = unlimited)
+            seed: Seed for latency and error sampling
+            fixed_text: Return this text instead of hash-derived text
+        """
+        if latency_distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(
+                f"Unknown latency distribution '{latency_distribution}'. "
+                f"Expected one of: {', '.join(LATENCY_DISTRIBUTIONS)}"
+            )
+        if not 0.0 <= error_rate <= 1.0:
+            raise ValueError("error_rate must be between 0 and 1")
+
+        self.latency_distribution = latency_distribution
+        self.latency_ms = max(0.0, latency_ms)
+        self.latency_jitter_ms = max(0.0, latency_jitter_ms)
+        self.latency_sigma = max(0.0, latency_sigma)
+        self.error_rate = error_rate
+        self.max_concurrency = max(0, max_concurrency)
+        self.seed = seed
+        self.fixed_text = fixed_text
+
+        self._rng = random.Random(seed)
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._semaphore_loop: Optional[asyncio.AbstractEventLoop] = None
+
+        self.stats: Dict[str, Any] = {
+            "requests": 0,
+            "errors": 0,
+            "in_flight": 0,
+            "max_in_flight": 0,
+            "total_queue_wait": 0.0,
+        }
+
+        logger.info(
+            f"Stub transcription service: {latency_distribution} latency {latency_ms}ms, "
+            f"error_rate={error_rate}, max_concurrency={max_concurrency or 'unlimited'}"
+        )
+
+    def sample_latency(self) -> float:
+        """Draw one simulated latency in seconds."""
+        if self.latency_distribution == "fixed" or self.latency_ms == 0.0:
+            latency_ms = self.latency_ms
+        elif self.latency_distribution == "uniform":
+            jitter = self.latency_jitter_ms
+            latency_ms = self._rng.uniform(self.latency_ms - jitter, self.latency_ms + jitter)
+        elif self.latency_distribution == "normal":
+            latency_ms = self._rng.gauss(self.latency_ms, self.latency_jitter_ms)
+        else:
+            latency_ms = self._rng.lognormvariate(math.log(self.latency_ms), self.latency_sigma)
+        return max(0.0, latency_ms) / 1000.0
+
+    def text_for_audio(self, audio_bytes: bytes) -> str:
+        """Deterministic transcript derived from the audio content."""
+        if self.fixed_text:
+            return self.fixed_text
+
+        digest = hashlib.sha256(audio_bytes).digest()
+        word_count = 3 + digest[0] % 6
+        words = [STUB_VOCABULARY[digest[i + 1] % len(STUB_VOCABULARY)] for i in range(word_count)]
+        return " ".join(words).capitalize() + "."
+
+    def _get_semaphore(self) -> Optional[asyncio.Semaphore]:
+        """Create the concurrency limiter lazily, once per running event loop."""
+        if not self.max_concurrency:
+            return None
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    async def transcribe_audio_bytes(self, audio_bytes: AudioInput, language: str = "en") -> Dict[str, Any]:
+        """
+        Transcribe audio from bytes.
+
+        Args:
+            audio_bytes: Raw audio data as bytes, or an AudioFrame
+            language: Target language code
+
+        Returns:
+            Dictionary with transcription results
+        """
+        audio_bytes = as_audio_bytes(audio_bytes)
+        semaphore = self._get_semaphore()
+        queued_at = time.perf_counter()
+
+        if semaphore is not None:
+            await semaphore.acquire()
+        try:
+            self.stats["total_queue_wait"] += time.perf_counter() - queued_at
+            self.stats["requests"] += 1
+            self.stats["in_flight"] += 1
+            self.stats["max_in_flight"] = max(self.stats["max_in_flight"], self.stats["in_flight"])
+
+            # Draw both samples up front so the sequence only depends on the seed
+            latency = self.sample_latency()
+            fail = self.error_rate > 0 and self._rng.random() < self.error_rate
+            if latency > 0:
+                await asyncio.sleep(latency)
+
+            if fail:
+                self.stats["errors"] += 1
+                return {
+                    "text": "",
+                    "confidence": 0.0,
+                    "language": language,
+                    "error": "Injected stub error",
+                    "provider": "stub",
+                }
+
+            digest = hashlib.sha256(audio_bytes).digest()
+            return {
+                "text": self.text_for_audio(audio_bytes),
+                "confidence": 0.8 + (digest[-1] / 255.0) * 0.19,
+                "language": language,
+                "provider": "stub",
+                "processing_time": latency,
+            }
+        finally:
+            self.stats["in_flight"] -= 1
+            if semaphore is not None:
+                semaphore.release()
+
+    async def transcribe_audio_file(self, file_path: str, language: str = "en") -> Dict[str, Any]:
+        """
+        Transcribe audio from file path.
+
+        Args:
+            file_path: Path to audio file
+            language: Target language code
+
+        Returns:
+            Dictionary with transcription results
+        """
+        try:
+            with open(file_path, "rb") as f:
+                audio_bytes = f.read()
+        except OSError as e:
+            return {"text": "", "confidence": 0.0, "language": language, "error": str(e), "provider": "stub"}
+        return await self.transcribe_audio_bytes(audio_bytes, language)
+
+    def is_api_available(self) -> bool:
+        """The stub never needs external credentials."""
+        return True
+
+    def get_service_info(self) -> Dict[str, Any]:
+        """Get information about the service."""
+        return {
+            "provider": "stub",
+            "api_available": True,
+            "model": "stub",
+            "latency_distribution": self.latency_distribution,
+            "latency_ms": self.latency_ms,
+            "error_rate": self.error_rate,
+            "max_concurrency": self.max_concurrency,
+            "stats": dict(self.stats),
+            "supported_languages": self.get_supported_languages(),
+        }
+
+    def get_supported_languages(self) -> list:
+        """The stub accepts any language code; report the common ones."""
+        return ["en", "tr", "es", "fr", "de", "it", "pt", "ru", "ja", "ko", "zh"]
+
+
+# Global instance (singleton pattern)
+_stub_service = None
+
+
+def get_stub_transcription_service() -> StubTranscriptionService:
+    """
+    Get global stub transcription service configured from settings.
+
+    Returns:
+        StubTranscriptionService instance
+    """
+    global _stub_service
+    if _stub_service is None:
+        _stub_service = StubTranscriptionService(
+            latency_distribution=settings.stub_latency_distribution,
+            latency_ms=settings.stub_latency_ms,
+            latency_jitter_ms=settings.stub_latency_jitter_ms,
+            latency_sigma=settings.stub_latency_sigma,
+            error_rate=settings.stub_error_rate,
+            max_concurrency=settings.stub_max_concurrency,
+            seed=settings.stub_seed,
+            fixed_text=settings.stub_fixed_text,
+        )
+    return _stub_service
+
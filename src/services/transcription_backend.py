@@ -0,0 +1,33 @@
+"""
+Transcription Backend
+Selects the transcription service used by the API, gRPC, Kafka and realtime paths.
+
+TRANSCRIPTION_BACKEND=openai (the default) uses OpenAIWhisperService; "stub"
+uses the model-free StubTranscriptionService for benchmarks and load tests.
+Only the selected backend's module is imported.
+"""
+from typing import Optional
+
+from config import settings
+
+
+def get_transcription_service(api_key: Optional[str] = None):
+    """
+    Get the transcription service selected by settings.transcription_backend.
+
+    Args:
+        api_key: OpenAI API key (ignored by the stub backend)
+
+    Returns:
+        StubTranscriptionService or OpenAIWhisperService instance
+    """
+    if settings.transcription_backend == "stub":
+        from src.services.stub_transcription_service import (
+            get_stub_transcription_service,
+        )
+
+        return get_stub_transcription_service()
+
+    from src.services.openai_whisper_service import get_openai_whisper_service
+
+    return get_openai_whisper_service(api_key)
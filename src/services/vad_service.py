@@ -0,0 +1,680 @@
+"""
+Voice Activity Detection Service
+Streaming VAD stage that sits in front of every transcription backend.
+
+Frames are classified with vectorized NumPy features: frame energy against
+an adaptive per-session noise floor, the share of energy in the speech band,
+and spectral flatness, which rejects broadband noise. Hangover keeps short
+pauses inside an utterance. A pause longer than the hangover closes the
+segment, and only closed speech segments are sent to inference. Silence and
+background noise never reach the model.
+
+WebM/Opus streams (MediaRecorder) are decoded incrementally per session when
+libopus is installed. Audio that cannot be decoded here is passed through
+unchanged (fail open), so the gate never drops audio it does not understand.
+"""
+import io
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import soundfile as sf
+
+from config import settings
+from src.services.audio_decoder import (
+    OPUS_AVAILABLE,
+    StreamingWebMDecoder,
+    record_decode,
+    sniff_format,
+)
+from src.services.audio_frame import AudioFrame, AudioInput, as_audio_frame
+from src.services.ingest_format import IngestFormat, RawFrameDecoder
+from src.services.profiling_service import span
+from src.services.prometheus_service import prometheus_metrics
+from src.services.resampler import StreamingResampler, resample
+from src.services.streaming_features import (
+    StreamingFeatureService,
+    streaming_feature_service,
+)
+
+logger = logging.getLogger(__name__)
+
+EPSILON = 1e-12
+
+
+@dataclass
+class VADConfig:
+    """VAD tuning parameters"""
+
+    sample_rate: int = 16000
+    frame_ms: int = 30
+    energy_margin_db: float = 10.0  # required level above the noise floor
+    min_energy_db: float = -55.0  # absolute floor in dBFS
+    initial_noise_floor_db: float = -45.0  # upper bound for the first estimate
+    band_low_hz: float = 80.0
+    band_high_hz: float = 4000.0
+    band_ratio_threshold: float = 0.5
+    flatness_threshold: float = 0.4
+    hangover_ms: int = 300
+    pre_roll_ms: int = 150
+    min_speech_ms: int = 120
+    max_segment_seconds: float = 15.0
+    noise_adaptation: float = 0.05
+
+    @classmethod
+    def from_settings(cls) -> "VADConfig":
+        """Build a config from application settings."""
+        return cls(
+            sample_rate=settings.sample_rate,
+            energy_margin_db=settings.vad_energy_margin_db,
+            hangover_ms=settings.vad_hangover_ms,
+            min_speech_ms=settings.vad_min_speech_ms,
+            max_segment_seconds=settings.vad_max_segment_seconds,
+        )
+
+    @property
+    def frame_length(self) -> int:
+        return int(self.sample_rate * self.frame_ms / 1000)
+
+    def frames_for(self, milliseconds: float) -> int:
+        return int(np.ceil(milliseconds / self.frame_ms))
+
+
+@dataclass
+class SpeechSegment:
+    """A closed speech segment ready for inference"""
+
+    audio: np.ndarray
+    sample_rate: int
+    start_time: float
+    end_time: float
+    forced_split: bool = False
+
+    @property
+    def duration(self) -> float:
+        return self.end_time - self.start_time
+
+    def to_wav_bytes(self) -> bytes:
+        """Encode as 16-bit PCM WAV for backends that take file bytes."""
+        buffer = io.BytesIO()
+        sf.write(buffer, self.audio, self.sample_rate, format="WAV", subtype="PCM_16")
+        return buffer.getvalue()
+
+
+def frame_features(frames: np.ndarray, config: VADConfig) -> Dict[str, np.ndarray]:
+    """
+    Compute per-frame VAD features for a (n_frames, frame_length) array.
+
+    Returns:
+        Dictionary with energy_db, band_ratio and flatness arrays
+    """
+    energy_db = 10.0 * np.log10(np.mean(frames * frames, axis=1) + EPSILON)
+
+    window = np.hanning(frames.shape[1]).astype(frames.dtype)
+    power = np.abs(np.fft.rfft(frames * window, axis=1)) ** 2
+    freqs = np.fft.rfftfreq(frames.shape[1], d=1.0 / config.sample_rate)
+    band = (freqs >= config.band_low_hz) & (freqs <= config.band_high_hz)
+
+    total = power.sum(axis=1) + EPSILON
+    band_ratio = power[:, band].sum(axis=1) / total
+    flatness = np.exp(np.mean(np.log(power + EPSILON), axis=1)) / (total / power.shape[1])
+
+    return {"energy_db": energy_db, "band_ratio": band_ratio, "flatness": flatness}
+
+
+class VADSession:
+    """Per-stream VAD state: noise floor, hangover and the open segment"""
+
+    def __init__(self, config: VADConfig):
+        self.config = config
+        self.noise_floor_db: Optional[float] = None
+        self.frames_since_speech = np.iinfo(np.int64).max // 2
+        self.remainder = np.zeros(0, dtype=np.float32)
+        self.position = 0  # samples consumed into frames so far
+
+        self.pre_roll = np.zeros(0, dtype=np.float32)
+        self.segment_parts: List[np.ndarray] = []
+        self.segment_start = 0
+        self.segment_samples = 0
+        self.segment_speech_frames = 0
+        self.resampler: Optional[StreamingResampler] = None
+        self.stream_decoder: Optional[StreamingWebMDecoder] = None
+        self.raw_decoder: Optional[RawFrameDecoder] = None
+
+        self.last_seen = time.time()
+        self.stats = {"frames": 0, "speech_frames": 0, "segments": 0, "discarded_segments": 0}
+
+    @property
+    def in_segment(self) -> bool:
+        return bool(self.segment_parts)
+
+    def resample(self, audio: np.ndarray, sample_rate: int) -> np.ndarray:
+        """Bring a chunk to config.sample_rate, carrying filter state across chunks."""
+        if sample_rate == self.config.sample_rate:
+            return audio
+        if self.resampler is None or self.resampler.kernel.src_rate != sample_rate:
+            try:
+                self.resampler = StreamingResampler(sample_rate, self.config.sample_rate)
+            except ValueError:
+                return resample(audio, sample_rate, self.config.sample_rate)
+        return self.resampler.process(audio)
+
+    def classify(self, frames: np.ndarray) -> np.ndarray:
+        """Return the raw per-frame speech decision and adapt the noise floor."""
+        config = self.config
+        features = frame_features(frames, config)
+        energy_db = features["energy_db"]
+
+        if self.noise_floor_db is None:
+            self.noise_floor_db = min(float(np.percentile(energy_db, 10)), config.initial_noise_floor_db)
+
+        threshold = max(self.noise_floor_db + config.energy_margin_db, config.min_energy_db)
+        speech = (
+            (energy_db > threshold)
+            & (features["band_ratio"] > config.band_ratio_threshold)
+            & (features["flatness"] < config.flatness_threshold)
+        )
+
+        # Track the noise floor from non-speech frames; drop immediately when it gets quieter
+        quiet = energy_db[~speech]
+        if quiet.size:
+            level = float(np.mean(quiet))
+            self.noise_floor_db += config.noise_adaptation * (level - self.noise_floor_db)
+            self.noise_floor_db = min(self.noise_floor_db, float(np.min(quiet)) + config.energy_margin_db / 2)
+
+        return speech
+
+    def apply_hangover(self, speech: np.ndarray) -> np.ndarray:
+        """Extend speech decisions by the hangover, carrying state across calls."""
+        n = len(speech)
+        index = np.arange(n, dtype=np.int64)
+        last_speech = np.where(speech, index, -self.frames_since_speech - 1)
+        last_speech = np.maximum.accumulate(last_speech)
+        distance = index - last_speech
+
+        self.frames_since_speech = int(distance[-1]) if n else self.frames_since_speech
+        return distance <= self.config.frames_for(self.config.hangover_ms)
+
+    def process(self, audio: np.ndarray) -> List[SpeechSegment]:
+        """
+        Feed mono float32 samples; return segments closed by this call.
+
+        Args:
+            audio: Samples at config.sample_rate
+
+        Returns:
+            Closed speech segments, in order
+        """
+        self.last_seen = time.time()
+        config = self.config
+        frame_length = config.frame_length
+
+        if self.remainder.size:
+            audio = np.concatenate([self.remainder, audio])
+        n_frames = len(audio) // frame_length
+        self.remainder = audio[n_frames * frame_length :].copy()
+        if n_frames == 0:
+            return []
+
+        frames = audio[: n_frames * frame_length].reshape(n_frames, frame_length)
+        speech = self.classify(frames)
+        active = self.apply_hangover(speech)
+        self.stats["frames"] += n_frames
+        self.stats["speech_frames"] += int(speech.sum())
+
+        segments: List[SpeechSegment] = []
+        max_samples = int(config.max_segment_seconds * config.sample_rate)
+        pre_roll_samples = int(config.pre_roll_ms * config.sample_rate / 1000)
+        speech_counts = np.concatenate([[0], np.cumsum(speech)])
+
+        # Walk runs of equal activity (one iteration per run, not per frame)
+        boundaries = np.flatnonzero(np.diff(active.astype(np.int8))) + 1
+        starts = np.concatenate([[0], boundaries])
+        ends = np.concatenate([boundaries, [n_frames]])
+
+        for start, end in zip(starts, ends):
+            if active[start]:
+                # Append in pieces so no segment grows past max_segment_seconds
+                offset = start
+                while offset < end:
+                    if not self.in_segment:
+                        self.segment_parts = [self.pre_roll] if self.pre_roll.size else []
+                        self.segment_start = self.position + offset * frame_length - self.pre_roll.size
+                        self.segment_samples = self.pre_roll.size
+                        self.segment_speech_frames = 0
+                        self.pre_roll = np.zeros(0, dtype=np.float32)
+
+                    capacity = max(1, -(-(max_samples - self.segment_samples) // frame_length))
+                    piece_end = min(end, offset + capacity)
+                    self.segment_parts.append(frames[offset:piece_end].reshape(-1).copy())
+                    self.segment_samples += (piece_end - offset) * frame_length
+                    self.segment_speech_frames += int(speech_counts[piece_end] - speech_counts[offset])
+                    offset = piece_end
+
+                    if self.segment_samples >= max_samples:
+                        segments.extend(self._close_segment(forced=True))
+            else:
+                run_audio = frames[start:end].reshape(-1)
+                if self.in_segment:
+                    segments.extend(self._close_segment())
+                tail = run_audio[-pre_roll_samples:] if pre_roll_samples else run_audio[:0]
+                if tail.size < pre_roll_samples and self.pre_roll.size:
+                    tail = np.concatenate([self.pre_roll, tail])[-pre_roll_samples:]
+                self.pre_roll = tail.astype(np.float32, copy=True)
+
+        self.position += n_frames * frame_length
+        return segments
+
+    def flush(self) -> List[SpeechSegment]:
+        """Close any open segment (end of stream)."""
+        segments = []
+        if self.resampler is not None:
+            tail = self.resampler.flush()
+            segments = self.process(tail) if tail.size else []
+        if self.remainder.size and self.in_segment:
+            self.segment_parts.append(self.remainder)
+            self.segment_samples += self.remainder.size
+        self.remainder = np.zeros(0, dtype=np.float32)
+        return segments + (self._close_segment() if self.in_segment else [])
+
+    def _close_segment(self, forced: bool = False) -> List[SpeechSegment]:
+        """Emit the open segment if it holds enough actual speech."""
+        config = self.config
+        parts, speech_frames = self.segment_parts, self.segment_speech_frames
+        start = self.segment_start
+        self.segment_parts = []
+        self.segment_samples = 0
+        self.segment_speech_frames = 0
+
+        if speech_frames < config.frames_for(config.min_speech_ms):
+            self.stats["discarded_segments"] += 1
+            return []
+
+        audio = np.concatenate(parts) if len(parts) > 1 else parts[0]
+        self.stats["segments"] += 1
+        return [
+            SpeechSegment(
+                audio=audio,
+                sample_rate=config.sample_rate,
+                start_time=start / config.sample_rate,
+                end_time=(start + audio.size) / config.sample_rate,
+                forced_split=forced,
+            )
+        ]
+
+
+def decode_audio_bytes(audio: AudioInput, sample_rate: int) -> Optional[np.ndarray]:
+    """
+    Get mono float32 samples, decoding bytes only if they are not a frame yet.
+
+    Returns:
+        Samples at sample_rate, or None when the format is not decodable here
+    """
+    if not isinstance(audio, AudioFrame) and not audio:
+        return None
+    frame = as_audio_frame(audio, sample_rate)
+    return frame.samples if frame is not None else None
+
+
+class VADService:
+    """Session-aware VAD gate shared by the WebSocket, gRPC, Kafka and Celery paths"""
+
+    def __init__(
+        self,
+        config: Optional[VADConfig] = None,
+        enabled: Optional[bool] = None,
+        feature_service: Optional[StreamingFeatureService] = None,
+    ):
+        """
+        Initialize VAD service.
+
+        Args:
+            config: Gate configuration (from settings when None)
+            enabled: Gate switch (settings.vad_enabled when None)
+            feature_service: Also extracts streaming features from every session's audio when set
+                and it has a summary sink
+        """
+        self.config = config or VADConfig.from_settings()
+        self.enabled = settings.vad_enabled if enabled is None else enabled
+        self.feature_service = feature_service
+        self.session_ttl = settings.vad_session_ttl_seconds
+        self.sessions: Dict[str, VADSession] = {}
+        self.stats: Dict[str, Any] = {
+            "chunks": 0,
+            "chunks_without_speech": 0,
+            "undecodable_chunks": 0,
+            "segments": 0,
+            "speech_seconds": 0.0,
+            "audio_seconds": 0.0,
+        }
+
+    def _session(self, session_id: str) -> VADSession:
+        session = self.sessions.get(session_id)
+        if session is None:
+            self._evict_idle()
+            session = VADSession(self.config)
+            self.sessions[session_id] = session
+        return session
+
+    def _evict_idle(self) -> None:
+        cutoff = time.time() - self.session_ttl
+        for session_id in [s for s, session in self.sessions.items() if session.last_seen < cutoff]:
+            del self.sessions[session_id]
+
+    def process(self, session_id: str, audio: np.ndarray) -> List[SpeechSegment]:
+        """
+        Feed decoded samples for a session.
+
+        Args:
+            session_id: Stream/session identifier
+            audio: Mono float32 samples at config.sample_rate
+
+        Returns:
+            Speech segments closed by this chunk
+        """
+        session = self._session(session_id)
+        with span("vad"):
+            segments = session.process(audio)
+        if self.feature_service is not None and self.feature_service.enabled:
+            with span("features"):
+                self.feature_service.process(session_id, audio)
+        self._record(audio.size, segments, speech=bool(segments) or session.in_segment)
+        return segments
+
+    def process_bytes(self, session_id: str, audio_bytes: AudioInput) -> Optional[List[SpeechSegment]]:
+        """
+        Decode and feed an encoded chunk for a session.
+
+        Returns:
+            Closed speech segments, or None when the chunk could not be decoded
+            (callers should then transcribe the original bytes)
+        """
+        if isinstance(audio_bytes, AudioFrame):
+            audio = decode_audio_bytes(audio_bytes, self.config.sample_rate)
+        elif audio_bytes and self._stream_decoder(session_id, audio_bytes) is not None:
+            audio = self._decode_stream_chunk(session_id, audio_bytes)
+        else:
+            # Decode at the source rate; the session's streaming resampler keeps chunk boundaries seamless
+            frame = AudioFrame.try_from_bytes(audio_bytes, sample_rate=None) if audio_bytes else None
+            audio = self._session(session_id).resample(frame.samples, frame.sample_rate) if frame else None
+        if audio is None:
+            self._record_passthrough()
+            return None
+        return self.process(session_id, audio)
+
+    def _stream_decoder(self, session_id: str, audio_bytes: bytes) -> Optional[StreamingWebMDecoder]:
+        """The session's WebM/Opus stream decoder, created when a stream starts with a WebM header."""
+        session = self._session(session_id)
+        if session.stream_decoder is None and OPUS_AVAILABLE and sniff_format(audio_bytes) == "webm":
+            session.stream_decoder = StreamingWebMDecoder(self.config.sample_rate)
+        return session.stream_decoder
+
+    def _decode_stream_chunk(self, session_id: str, audio_bytes: bytes) -> Optional[np.ndarray]:
+        """Decode the next chunk of a MediaRecorder stream (only its first chunk carries the header)."""
+        session = self._session(session_id)
+        start = time.perf_counter()
+        try:
+            samples = session.stream_decoder.feed(audio_bytes)
+        except Exception as e:
+            logger.warning(f"WebM stream decode failed for session {session_id}: {e}")
+            record_decode("webm", time.perf_counter() - start, len(audio_bytes), success=False)
+            session.stream_decoder = None
+            return None
+        record_decode("webm", time.perf_counter() - start, len(audio_bytes))
+        return session.resample(samples, session.stream_decoder.sample_rate)
+
+    def process_frames(
+        self, session_id: str, payload: bytes, ingest_format: IngestFormat
+    ) -> Optional[List[SpeechSegment]]:
+        """
+        Feed one bare frame of a stream whose format was negotiated up front.
+
+        The frame is converted into the session's ring buffer without any
+        container parsing; the VAD then reads whole analysis frames from it.
+
+        Args:
+            session_id: Stream/session identifier
+            payload: Raw PCM or one Opus packet, as declared
+            ingest_format: Declared stream format
+
+        Returns:
+            Closed speech segments, or None when the declared codec cannot be decoded here
+        """
+        decoder = self._raw_decoder(session_id, ingest_format)
+        if decoder is None:
+            self._record_passthrough()
+            return None
+        start = time.perf_counter()
+        try:
+            decoder.write(payload)
+        except Exception as e:
+            logger.warning(f"Raw frame decode failed for session {session_id}: {e}")
+            record_decode(ingest_format.codec, time.perf_counter() - start, len(payload), success=False)
+            self._record_passthrough()
+            return None
+        record_decode(ingest_format.codec, time.perf_counter() - start, len(payload))
+
+        ring = decoder.ring
+        count = ring.available
+        if decoder.sample_rate == self.config.sample_rate:
+            count -= count % self.config.frame_length  # the rest waits for the next frame
+        audio = self._session(session_id).resample(ring.read(count), decoder.sample_rate)
+        return self.process(session_id, audio)
+
+    def _raw_decoder(self, session_id: str, ingest_format: IngestFormat) -> Optional[RawFrameDecoder]:
+        session = self._session(session_id)
+        if session.raw_decoder is None or session.raw_decoder.format != ingest_format:
+            try:
+                capacity = int(settings.ingest_ring_seconds * ingest_format.sample_rate)
+                session.raw_decoder = RawFrameDecoder(ingest_format, capacity, preferred_rate=self.config.sample_rate)
+            except ValueError as e:
+                logger.warning(f"Cannot decode {ingest_format.codec} for session {session_id}: {e}")
+                return None
+        return session.raw_decoder
+
+    def flush(self, session_id: str) -> List[SpeechSegment]:
+        """Close the session's open segment, if any."""
+        session = self.sessions.get(session_id)
+        if session is None:
+            return []
+        segments = []
+        decoder = session.raw_decoder
+        if decoder is not None and decoder.ring.available:
+            tail = session.resample(decoder.ring.read(decoder.ring.available), decoder.sample_rate)
+            segments = self.process(session_id, tail)
+        closed = session.flush()
+        self._record(0, closed, speech=bool(closed))
+        return segments + closed
+
+    def end_session(self, session_id: str) -> List[SpeechSegment]:
+        """Flush and forget a session (its feature summary goes to the feature service's sink)."""
+        segments = self.flush(session_id)
+        self.sessions.pop(session_id, None)
+        if self.feature_service is not None:
+            summary = self.feature_service.end_session(session_id)
+            if summary is not None:
+                logger.debug(
+                    f"Feature summary for session {session_id}: "
+                    f"{summary['frame_count']} frames, {summary['audio_duration']:.1f}s"
+                )
+        return segments
+
+    def is_speaking(self, session_id: str) -> bool:
+        """Whether the session currently has an open speech segment."""
+        session = self.sessions.get(session_id)
+        return bool(session and session.in_segment)
+
+    def audio_position(self, session_id: str) -> int:
+        """
+        Samples (at config.sample_rate) of session audio received so far.
+
+        Audio still buffered ahead of the VAD (a raw ring buffer, the resampler's
+        look-ahead) is included, so this is where the next chunk's audio starts.
+        """
+        session = self.sessions.get(session_id)
+        if session is None:
+            return 0
+        return session.position + session.remainder.size + self._pending_input(session)
+
+    def retained_from(self, session_id: str) -> Optional[int]:
+        """
+        First sample (on the audio_position timeline) still held for a segment not yet emitted.
+
+        Audio before it has been emitted or dropped as silence. The pre-roll is not
+        counted: it is silence kept only as context for the next segment.
+
+        Returns:
+            Sample index, or None when the session holds no audio
+        """
+        session = self.sessions.get(session_id)
+        if session is None:
+            return None
+        if session.in_segment:
+            return session.segment_start
+        if session.remainder.size or self._pending_input(session):
+            return session.position
+        return None
+
+    def _pending_input(self, session: VADSession) -> int:
+        """Samples (at config.sample_rate) received for a session but not yet fed to its VAD."""
+        pending = session.resampler.pending if session.resampler is not None else 0
+        decoder = session.raw_decoder
+        if decoder is not None and decoder.ring.available:
+            pending += -(-decoder.ring.available * self.config.sample_rate // decoder.sample_rate)
+        return pending
+
+    def detect(self, audio: np.ndarray) -> List[SpeechSegment]:
+        """Segment a complete recording (no session state kept)."""
+        session = VADSession(self.config)
+        with span("vad"):
+            segments = session.process(audio) + session.flush()
+        self._record(audio.size, segments, speech=bool(segments))
+        return segments
+
+    def contains_speech(self, audio_bytes: AudioInput) -> Optional[bool]:
+        """
+        Check a complete recording for speech.
+
+        Returns:
+            True/False, or None when the audio could not be decoded
+        """
+        audio = decode_audio_bytes(audio_bytes, self.config.sample_rate)
+        if audio is None:
+            self._record_passthrough()
+            return None
+        return bool(self.detect(audio))
+
+    def gate(
+        self, session_id: str, audio_bytes: bytes, final: bool = False, ingest_format: Optional[IngestFormat] = None
+    ) -> List[bytes]:
+        """
+        Run one streamed chunk through the gate.
+
+        Args:
+            session_id: Stream/session identifier
+            audio_bytes: Encoded audio chunk, or a bare frame when ingest_format is raw
+            final: Last chunk of the stream; closes any open segment
+            ingest_format: Format the client negotiated (encoded containers when None)
+
+        Returns:
+            Audio payloads to transcribe: WAV-encoded speech segments, the
+            original chunk when VAD is disabled or the chunk is not decodable
+            (raw frames: WAV chunks of INGEST_MIN_CHUNK_SECONDS), or an empty
+            list when there is nothing to transcribe yet
+        """
+        raw = ingest_format is not None and ingest_format.is_raw
+        if not self.enabled:
+            if raw:
+                return self._gate_raw_ungated(session_id, audio_bytes, final, ingest_format)
+            return [audio_bytes] if audio_bytes else []
+
+        if not audio_bytes:
+            segments = []
+        elif raw:
+            segments = self.process_frames(session_id, audio_bytes, ingest_format)
+        else:
+            segments = self.process_bytes(session_id, audio_bytes)
+        if segments is None:
+            if final:
+                self.end_session(session_id)
+            return [audio_bytes]
+        if final:
+            segments = segments + self.end_session(session_id)
+        return [segment.to_wav_bytes() for segment in segments]
+
+    def _gate_raw_ungated(
+        self, session_id: str, payload: bytes, final: bool, ingest_format: IngestFormat
+    ) -> List[bytes]:
+        """
+        Raw frames with the VAD disabled: collect them into WAV chunks of INGEST_MIN_CHUNK_SECONDS.
+
+        A bare 20 ms frame means nothing to a backend on its own, and sending
+        every one would cost one backend call per frame.
+        """
+        decoder = self._raw_decoder(session_id, ingest_format)
+        if decoder is None:
+            # Not decodable here (e.g. Opus without opuslib): pass the frame through as the VAD path does
+            if payload:
+                self._record_passthrough()
+            if final:
+                self.end_session(session_id)
+            return [payload] if payload else []
+        if payload:
+            start = time.perf_counter()
+            try:
+                decoder.write(payload)
+            except Exception as e:
+                # Drop the bad frame, as process_frames does; the buffered audio is still good
+                logger.warning(f"Raw frame decode failed for session {session_id}: {e}")
+                record_decode(ingest_format.codec, time.perf_counter() - start, len(payload), success=False)
+                self._record_passthrough()
+            else:
+                record_decode(ingest_format.codec, time.perf_counter() - start, len(payload))
+
+        ring = decoder.ring
+        minimum = min(int(settings.ingest_min_chunk_seconds * decoder.sample_rate), ring.capacity)
+        if not final and ring.available < max(minimum, 1):
+            return []
+        audio = ring.read(ring.available)
+        if final:
+            self.end_session(session_id)
+        return [AudioFrame(audio, decoder.sample_rate).to_wav_bytes()] if audio.size else []
+
+    def should_transcribe(self, audio_bytes: AudioInput) -> bool:
+        """
+        Gate for complete recordings (REST uploads, Celery tasks, unary gRPC).
+
+        Returns:
+            False only when VAD is enabled and found no speech in decodable audio
+        """
+        if not self.enabled:
+            return True
+        return self.contains_speech(audio_bytes) is not False
+
+    def _record(self, samples: int, segments: List[SpeechSegment], speech: bool) -> None:
+        speech_seconds = sum(segment.duration for segment in segments)
+        audio_seconds = samples / self.config.sample_rate
+        if samples:
+            self.stats["chunks"] += 1
+            self.stats["audio_seconds"] += audio_seconds
+            if not speech:
+                self.stats["chunks_without_speech"] += 1
+            prometheus_metrics.record_vad_decision("speech" if speech else "silence", audio_seconds, speech_seconds)
+        elif speech_seconds:
+            prometheus_metrics.record_vad_decision("speech", 0.0, speech_seconds)
+        self.stats["segments"] += len(segments)
+        self.stats["speech_seconds"] += speech_seconds
+
+    def _record_passthrough(self) -> None:
+        self.stats["undecodable_chunks"] += 1
+        prometheus_metrics.record_vad_decision("passthrough")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return gate statistics."""
+        return {**self.stats, "enabled": self.enabled, "active_sessions": len(self.sessions)}
+
+
+# Global VAD service instance
+vad_service = VADService(feature_service=streaming_feature_service if settings.streaming_features_enabled else None)
@@ -2,16 +2,14 @@
 Wav2Vec2 Speech Recognition Service
 Speech recognition service using Wav2Vec2 model with Hugging Face Transformers
 """
-import io
 import logging
 from typing import Any, Dict
 
-import numpy as np
-import soundfile as sf
 import torch
-import torchaudio
 from transformers import Wav2Vec2ForCTC, Wav2Vec2Processor
 
+from src.services.audio_frame import AudioInput, as_audio_frame
+
 logger = logging.getLogger(__name__)
 
 
@@ -56,48 +54,36 @@ def load_model(self) -> bool:
             self.is_loaded = False
             return False
 
-    def preprocess_audio(self, audio_bytes: bytes, target_sample_rate: int = 16000) -> torch.Tensor:
+    def preprocess_audio(self, audio_bytes: AudioInput, target_sample_rate: int = 16000) -> torch.Tensor:
         """
         Preprocess audio data
 
         Args:
-            audio_bytes: Raw audio data
+            audio_bytes: Raw audio data, or an AudioFrame decoded at ingest
             target_sample_rate: Target sample rate
 
         Returns:
             Preprocessed audio tensor
         """
         try:
-            # Convert audio data to numpy array
-            audio_array, sample_rate = sf.read(io.BytesIO(audio_bytes))
-
-            # Convert to mono (if stereo)
-            if len(audio_array.shape) > 1:
-                audio_array = np.mean(audio_array, axis=1)
-
-            # Adjust sample rate
-            if sample_rate != target_sample_rate:
-                resampler = torchaudio.transforms.Resample(sample_rate, target_sample_rate)
-                audio_tensor = torch.from_numpy(audio_array).float()
-                audio_tensor = resampler(audio_tensor)
-            else:
-                audio_tensor = torch.from_numpy(audio_array).float()
-
-            # Normalize
-            audio_tensor = audio_tensor / torch.max(torch.abs(audio_tensor))
+            # Decode, mono mix and resample happen once per request, in the AudioFrame
+            frame = as_audio_frame(audio_bytes, target_sample_rate)
+            if frame is None:
+                raise ValueError("Could not decode audio")
 
-            return audio_tensor
+            # Peak-normalized samples are cached on the frame; from_numpy shares the buffer
+            return torch.from_numpy(frame.normalized)
 
         except Exception as e:
             logger.error(f"Audio preprocessing failed: {e}")
             raise
 
-    def transcribe_audio_bytes(self, audio_bytes: bytes, language: str = "en") -> Dict[str, Any]:
+    def transcribe_audio_bytes(self, audio_bytes: AudioInput, language: str = "en") -> Dict[str, Any]:
         """
         Convert audio data to text
 
         Args:
-            audio_bytes: Raw audio data
+            audio_bytes: Raw audio data, or an AudioFrame
             language: Language code
 
         Returns:
@@ -5,12 +5,14 @@
 import logging
 import os
 import tempfile
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Union
 
 import numpy as np
 import torch
 import whisper
 
+from src.services.audio_frame import AudioFrame, AudioInput
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -52,18 +54,22 @@ def _load_model(self) -> None:
             logger.error(f"Failed to load Whisper model: {e}")
             raise
 
-    def transcribe_audio_bytes(self, audio_bytes: bytes, language: str = "tr") -> Dict[str, Any]:
+    def transcribe_audio_bytes(self, audio_bytes: AudioInput, language: str = "tr") -> Dict[str, Any]:
         """
         Transcribe audio from bytes.
 
         Args:
-            audio_bytes: Raw audio data as bytes
+            audio_bytes: Raw audio data as bytes, or an already decoded AudioFrame
             language: Target language code ('tr' for Turkish, 'en' for English, None for auto-detect)
 
         Returns:
             Dictionary with transcription results
         """
         try:
+            if isinstance(audio_bytes, AudioFrame):
+                # Already decoded: hand the samples to Whisper, no temp file or ffmpeg pass
+                return self._transcribe_file(audio_bytes.resampled(whisper.audio.SAMPLE_RATE).samples, language)
+
             # Create temporary file
             with tempfile.NamedTemporaryFile(suffix=".webm", delete=False) as temp_file:
                 temp_file.write(audio_bytes)
@@ -109,12 +115,12 @@ def transcribe_audio_file(self, file_path: str, language: str = "tr") -> Dict[st
                 "error": str(e),
             }
 
-    def _transcribe_file(self, file_path: str, language: str = "tr") -> Dict[str, Any]:
+    def _transcribe_file(self, file_path: Union[str, np.ndarray], language: str = "tr") -> Dict[str, Any]:
         """
         Internal method to transcribe audio file.
 
         Args:
-            file_path: Path to audio file
+            file_path: Path to audio file, or 16 kHz float32 samples
             language: Target language code
 
         Returns:
@@ -4,12 +4,26 @@
 """
 import logging
 import time
+import uuid
 from typing import Any, Dict, List, Optional
 
+from celery import chord, group
+
 from celery_app import celery_app
+from src.services.blob_store import task_blob_store
+from src.tasks.transcription_jobs import summarize_batch
+from src.tasks.transcription_tasks import (
+    load_audio_from_message,
+    require_staged,
+    stage_audio,
+    transcribe_with_backend,
+)
 
 logger = logging.getLogger(__name__)
 
+# The files of batch "<id>" run as group "<id>:files"; the chord callback's task id is the batch id
+BATCH_FILES_SUFFIX = ":files"
+
 
 class TaskManager:
     """Manages and coordinates different types of tasks."""
@@ -43,7 +57,8 @@ def transcribe_audio_chunk(self, audio_data: Dict[str, Any]) -> Dict[str, Any]:
     Transcribe a single audio chunk.
     
     Args:
-        audio_data: Audio data dictionary
+        audio_data: Audio data dictionary ("audio_bytes" or a staged "audio_bytes_ref",
+            optional "filename" and "language")
         
     Returns:
         Transcription result
@@ -57,23 +72,21 @@ def transcribe_audio_chunk(self, audio_data: Dict[str, Any]) -> Dict[str, Any]:
         
         start_time = time.time()
         
-        # Extract audio content
-        audio_bytes = audio_data.get("audio_bytes", b"")
-        if not audio_bytes:
-            raise ValueError("No audio data provided")
-        
         self.update_state(state="PROGRESS", meta={"progress": 30, "status": "Processing audio"})
         
-        # Simulate transcription processing
-        # In real implementation, this would call the actual transcription service
+        audio_array, sample_rate, audio_size = load_audio_from_message(audio_data)
+        # Same backend as the API (TRANSCRIPTION_BACKEND), not the blocking speech_recognition helper
+        transcription = transcribe_with_backend(audio_array, sample_rate, audio_data.get("language"))
         processing_time = time.time() - start_time
         
         result = {
-            "transcription": "Mock transcription result",
-            "confidence": 0.85,
-            "language": "en",
+            "transcription": transcription.get("text", ""),
+            "confidence": transcription.get("confidence", 0.0),
+            "language": transcription.get("language", audio_data.get("language")),
             "processing_time": processing_time,
-            "audio_size": len(audio_bytes),
+            "filename": audio_data.get("filename"),
+            "audio_duration": len(audio_array) / sample_rate,
+            "audio_size": audio_size,
             "status": "completed"
         }
         
@@ -102,11 +115,14 @@ def batch_transcribe_audio(self, audio_files: List[Dict[str, Any]]) -> Dict[str,
     """
     Batch transcribe multiple audio files.
     
+    See start_batch, which callers on the API side can use directly; poll the
+    returned batch_id for progress and the batch result.
+    
     Args:
-        audio_files: List of audio file data
+        audio_files: List of audio file data with staged "audio_bytes_ref" (see stage_audio)
         
     Returns:
-        Batch transcription results
+        Batch id and file count
     """
     try:
         task_manager.task_stats["total_tasks"] += 1
@@ -114,46 +130,13 @@ def batch_transcribe_audio(self, audio_files: List[Dict[str, Any]]) -> Dict[str,
         
         self.update_state(state="PROGRESS", meta={"progress": 0, "status": "Starting batch transcription"})
         
-        results = []
-        total_files = len(audio_files)
-        
-        for i, audio_data in enumerate(audio_files):
-            try:
-                # Process each file
-                result = transcribe_audio_chunk.delay(audio_data)
-                results.append({
-                    "index": i,
-                    "task_id": result.id,
-                    "status": "processing"
-                })
-                
-                # Update progress
-                progress = int((i + 1) / total_files * 100)
-                self.update_state(
-                    state="PROGRESS", 
-                    meta={"progress": progress, "status": f"Processing file {i + 1}/{total_files}"}
-                )
-                
-            except Exception as e:
-                results.append({
-                    "index": i,
-                    "error": str(e),
-                    "status": "failed"
-                })
-        
-        batch_result = {
-            "batch_id": f"batch_{int(time.time())}",
-            "total_files": total_files,
-            "results": results,
-            "status": "completed"
-        }
-        
-        self.update_state(state="SUCCESS", meta={"progress": 100, "result": batch_result})
+        require_staged(audio_files)
+        batch_result = start_batch(audio_files)
         
         task_manager.task_stats["completed_tasks"] += 1
         task_manager.task_stats["active_tasks"] -= 1
         
-        logger.info(f"Batch transcription completed for {total_files} files")
+        logger.info(f"Batch transcription queued for {len(audio_files)} files")
         return batch_result
         
     except Exception as e:
@@ -168,6 +151,91 @@ def batch_transcribe_audio(self, audio_files: List[Dict[str, Any]]) -> Dict[str,
         return {"error": error_msg, "status": "failed"}
 
 
+def start_batch(audio_files: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Fan a batch out as a chord: one transcribe_audio_chunk per file, then aggregate_batch_results.
+    
+    Call it on the dispatching side: inline audio is staged in the blob store here,
+    so no Celery message carries audio bytes. Workers pull the files one at a time
+    (acks_late, prefetch 1). The group is saved in the result backend, so
+    get_batch_progress can report per-file progress while the batch runs; the
+    aggregated result is stored under the batch id.
+    
+    Args:
+        audio_files: Audio file data, one dict per file (inline or staged audio)
+        
+    Returns:
+        Batch id, file count and status
+    """
+    batch_id = str(uuid.uuid4())
+    header = group(transcribe_audio_chunk.s(stage_audio(audio_data)) for audio_data in audio_files)
+    header = header.set(task_id=batch_id + BATCH_FILES_SUFFIX)
+    callback = aggregate_batch_results.s(batch_id=batch_id, submitted_at=time.time())
+    aggregate = chord(header, callback).apply_async(task_id=batch_id)
+    if aggregate.parent is not None:
+        aggregate.parent.save()
+    
+    logger.info(f"Batch {batch_id} queued for {len(audio_files)} files")
+    return {"batch_id": batch_id, "total_files": len(audio_files), "status": "processing"}
+
+
+def get_batch_progress(batch_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Per-file progress of a batch started by start_batch.
+    
+    Args:
+        batch_id: Batch id returned by start_batch
+        
+    Returns:
+        {"progress", "status", "total", "completed", "failed"} (the job queue's group meta),
+        or None if the id is not a batch
+    """
+    files = celery_app.GroupResult.restore(batch_id + BATCH_FILES_SUFFIX)
+    if files is None or not files.results:
+        return None
+    finished = [result for result in files.results if result.ready()]
+    failed = sum(
+        1
+        for result in finished
+        if not result.successful() or (isinstance(result.result, dict) and result.result.get("status") == "failed")
+    )
+    total = len(files.results)
+    return {
+        "progress": int(len(finished) * 100 / total),
+        "status": f"{len(finished)}/{total} files finished",
+        "total": total,
+        "completed": len(finished) - failed,
+        "failed": failed,
+    }
+
+
+@celery_app.task(name="aggregate_batch_results")
+def aggregate_batch_results(results: List[Dict[str, Any]], batch_id: str, submitted_at: float) -> Dict[str, Any]:
+    """
+    Chord callback: combine the per-file results of a batch.
+    
+    Args:
+        results: transcribe_audio_chunk results, in submission order
+        batch_id: Batch identifier
+        submitted_at: Submission time (epoch seconds)
+        
+    Returns:
+        Batch result with per-file results, failure counts and throughput
+    """
+    outcomes = [
+        {
+            "index": index,
+            "status": "failed" if result.get("status") == "failed" else "completed",
+            "result": result,
+            "error": result.get("error"),
+        }
+        for index, result in enumerate(results)
+    ]
+    summary = summarize_batch(outcomes, time.time() - submitted_at)
+    logger.info(f"Batch {batch_id}: {summary['succeeded']}/{summary['total_files']} files transcribed")
+    return {"batch_id": batch_id, **summary}
+
+
 @celery_app.task(bind=True, name="process_audio_stream")
 def process_audio_stream(self, stream_data: Dict[str, Any]) -> Dict[str, Any]:
     """
@@ -240,10 +308,10 @@ def process_audio_stream(self, stream_data: Dict[str, Any]) -> Dict[str, Any]:
 @celery_app.task(bind=True, name="cleanup_old_tasks")
 def cleanup_old_tasks(self, max_age_hours: int = 24) -> Dict[str, Any]:
     """
-    Clean up old completed tasks.
+    Clean up audio staged for tasks that finished long ago.
     
     Args:
-        max_age_hours: Maximum age of tasks to keep in hours
+        max_age_hours: Staged audio not written for this many hours is deleted
         
     Returns:
         Cleanup result
@@ -254,12 +322,11 @@ def cleanup_old_tasks(self, max_age_hours: int = 24) -> Dict[str, Any]:
         
         self.update_state(state="PROGRESS", meta={"progress": 10, "status": "Starting cleanup"})
         
-        # Simulate cleanup process
-        # In real implementation, this would clean up old task results
-        time.sleep(1)  # Simulate cleanup time
+        # Task results expire in the result backend; staged audio has to be removed here
+        cleaned_blobs = task_blob_store.purge(max_age_hours * 3600)
         
         cleanup_result = {
-            "cleaned_tasks": 0,  # Would be actual count in real implementation
+            "cleaned_blobs": cleaned_blobs,
             "max_age_hours": max_age_hours,
             "status": "completed"
         }
@@ -269,7 +336,7 @@ def cleanup_old_tasks(self, max_age_hours: int = 24) -> Dict[str, Any]:
         task_manager.task_stats["completed_tasks"] += 1
         task_manager.task_stats["active_tasks"] -= 1
         
-        logger.info(f"Task cleanup completed")
+        logger.info(f"Task cleanup completed: {cleaned_blobs} staged audio files removed")
         return cleanup_result
         
     except Exception as e:
@@ -0,0 +1,128 @@
+"""
+Background transcription jobs for the job queue.
+
+These are the asyncio counterparts of the Celery tasks in transcription_tasks:
+they run on the API's event loop with the configured transcription backend
+(no blocking network calls), and report progress with the same meta shape.
+Batches are submitted as a job group and summarized by summarize_batch.
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+from config import settings
+from src.services.audio_frame import AudioFrame
+from src.services.job_queue import JobContext, job_queue
+from src.services.longform_transcription_service import (
+    get_longform_transcription_service,
+)
+from src.services.vad_service import vad_service
+
+logger = logging.getLogger(__name__)
+
+
+@job_queue.task("transcribe_audio")
+async def transcribe_audio_job(
+    job: JobContext, audio_bytes: bytes, filename: str = "unknown", language: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Transcribe an uploaded audio file.
+
+    Args:
+        job: Job context for progress updates
+        audio_bytes: Audio file content
+        filename: Original file name
+        language: Language code (defaults to settings.default_language)
+
+    Returns:
+        Dictionary with transcription results
+
+    Raises:
+        RuntimeError: If the transcription backend reports an error
+    """
+    job.update_state(state="PROGRESS", meta={"progress": 10, "status": "Processing audio"})
+    start_time = time.time()
+    language = language or settings.default_language
+
+    job.update_state(state="PROGRESS", meta={"progress": 30, "status": "Loading audio"})
+    frame = await asyncio.get_running_loop().run_in_executor(
+        None, AudioFrame.try_from_bytes, audio_bytes, settings.sample_rate
+    )
+    audio = frame or audio_bytes
+    audio_duration = frame.duration if frame else len(audio_bytes) / (16000 * 2)  # Rough estimate if undecodable
+
+    job.update_state(state="PROGRESS", meta={"progress": 50, "status": "Transcribing audio"})
+    speech_detected = vad_service.should_transcribe(audio)
+    if speech_detected:
+        # The long-form service wraps the configured backend (swapped by /configure)
+        longform_service = get_longform_transcription_service()
+        transcriber = longform_service if settings.longform_enabled else longform_service.backend
+        result = await transcriber.transcribe_audio_bytes(audio, language=language)
+        if "error" in result:
+            raise RuntimeError(f"Transcription failed: {result['error']}")
+    else:
+        result = {"text": "", "confidence": 0.0, "language": language}
+
+    job.update_state(state="PROGRESS", meta={"progress": 80, "status": "Finalizing results"})
+    processing_time = time.time() - start_time
+
+    transcription = {
+        "transcription": result.get("text", ""),
+        "confidence": result.get("confidence", 0.0),
+        "language": result.get("language", language),
+        "processing_time": processing_time,
+        "filename": filename,
+        "audio_duration": audio_duration,
+        "speech_detected": speech_detected,
+        "status": "completed",
+    }
+    if result.get("long_form"):
+        transcription["segments"] = result["segments"]
+
+    logger.info(f"Transcription job completed for {filename} in {processing_time:.2f}s")
+    return transcription
+
+
+def summarize_batch(outcomes: List[Dict[str, Any]], elapsed_seconds: float) -> Dict[str, Any]:
+    """
+    Aggregate per-file outcomes into one batch result.
+
+    Args:
+        outcomes: One {"index", "status", "result", "error"} dict per file, in submission order
+        elapsed_seconds: Wall time from submission to the last file finishing
+
+    Returns:
+        Batch result with per-file results, failure counts and throughput
+    """
+    results = []
+    audio_seconds = 0.0
+    for outcome in outcomes:
+        entry = {"index": outcome["index"], "status": outcome["status"]}
+        if outcome["status"] == "completed":
+            result = outcome["result"] or {}
+            audio_seconds += result.get("audio_duration", 0.0)
+            entry.update(
+                filename=result.get("filename"),
+                transcription=result.get("transcription", ""),
+                confidence=result.get("confidence", 0.0),
+                audio_duration=result.get("audio_duration", 0.0),
+            )
+        else:
+            entry["error"] = outcome.get("error") or outcome["status"]
+        results.append(entry)
+
+    succeeded = sum(entry["status"] == "completed" for entry in results)
+    elapsed = max(elapsed_seconds, 1e-9)
+    return {
+        "total_files": len(results),
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "results": results,
+        "elapsed_seconds": elapsed_seconds,
+        "files_per_second": succeeded / elapsed,
+        "audio_seconds": audio_seconds,
+        "realtime_factor": audio_seconds / elapsed,
+        "status": "completed" if succeeded == len(results) else "partial" if succeeded else "failed",
+    }
+
@@ -1,16 +1,33 @@
 """
 Celery tasks for audio transcription processing.
+
+Task messages are JSON, so audio never travels in them: dispatchers call
+stage_audio() (or the dispatch_* helpers) to store the bytes once in the
+blob store and send only the reference ("content_ref" / "audio_bytes_ref").
+Workers map the blob read-only, so broker memory and serialization time do
+not grow with the audio. Single-file tasks still accept inline bytes from
+older callers; batch tasks take references only.
 """
-import io
+import asyncio
 import logging
+import threading
 import time
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional, Tuple
 
-import librosa
 import numpy as np
 import speech_recognition as sr
 
 from celery_app import celery_app
+from config import settings
+from src.services.audio_frame import AudioFrame
+from src.services.audio_preprocessing_service import (
+    get_preprocessing_service,
+    serialize_feature_statistics,
+)
+from src.services.blob_store import task_blob_store
+from src.services.longform_transcription_service import transcribe_long_audio_sync
+from src.services.transcription_backend import get_transcription_service
+from src.services.vad_service import vad_service
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -19,6 +36,98 @@
 # Initialize speech recognizer
 recognizer = sr.Recognizer()
 
+# One event loop per worker thread for the async transcription backends
+_worker_loops = threading.local()
+
+# Audio fields of a task message: "content" for uploads, "audio_bytes" for streams
+AUDIO_FIELDS = ("content", "audio_bytes")
+
+
+def audio_field(audio_data: Dict[str, Any]) -> Optional[str]:
+    """Name of the field holding the audio, inline or as "<field>_ref"; None if there is none"""
+    for field in AUDIO_FIELDS:
+        if audio_data.get(field) or audio_data.get(f"{field}_ref"):
+            return field
+    return None
+
+
+def stage_audio(audio_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Replace inline audio with a blob store reference before the message is sent to Celery.
+
+    Args:
+        audio_data: Task message with "content" or "audio_bytes"
+
+    Returns:
+        A copy carrying "<field>_ref" instead of the bytes (the message itself if it has no inline audio)
+    """
+    field = audio_field(audio_data)
+    return task_blob_store.stage(audio_data, field) if field else audio_data
+
+
+def dispatch_transcription(audio_data: Dict[str, Any]):
+    """
+    Queue transcribe_audio_task with the audio staged in the blob store.
+
+    Returns:
+        Celery AsyncResult
+    """
+    return transcribe_audio_task.delay(stage_audio(audio_data))
+
+
+def require_staged(audio_files: List[Dict[str, Any]]) -> None:
+    """
+    Check that batch task messages carry blob references, not audio bytes.
+
+    Raises:
+        ValueError: If any file has inline audio
+    """
+    for index, audio_data in enumerate(audio_files):
+        if any(audio_data.get(field) for field in AUDIO_FIELDS):
+            raise ValueError(f"File {index} has inline audio; stage it with stage_audio() before dispatching")
+
+
+def dispatch_batch_transcription(audio_files: List[Dict[str, Any]]):
+    """
+    Queue batch_transcribe_task with every file staged in the blob store.
+
+    Returns:
+        Celery AsyncResult
+    """
+    return batch_transcribe_task.delay([stage_audio(audio_data) for audio_data in audio_files])
+
+
+def dispatch_feature_extraction(audio_files: List[Dict[str, Any]]):
+    """
+    Queue extract_features_batch_task with every file staged in the blob store.
+
+    Returns:
+        Celery AsyncResult
+    """
+    return extract_features_batch_task.delay([stage_audio(audio_data) for audio_data in audio_files])
+
+
+def load_audio_from_message(audio_data: Dict[str, Any]) -> Tuple[np.ndarray, int, int]:
+    """
+    Decode the audio of a task message, mapping staged audio instead of copying it.
+
+    Returns:
+        Tuple of (audio_array, sample_rate, encoded size in bytes)
+
+    Raises:
+        ValueError: If the message has no audio or it cannot be decoded
+        FileNotFoundError: If the referenced blob does not exist
+    """
+    field = audio_field(audio_data)
+    if field is None:
+        raise ValueError("No audio content found in audio_data")
+    with task_blob_store.checked_out(audio_data, field) as audio_bytes:
+        audio_array, sample_rate = load_audio_from_bytes(audio_bytes)
+        if audio_array.base is not None:
+            # e.g. 16kHz mono float WAV decodes to a view of the mapping, which closes with the block
+            audio_array = audio_array.copy()
+        return audio_array, sample_rate, len(audio_bytes)
+
 
 @celery_app.task(bind=True, name="transcribe_audio_task")
 def transcribe_audio_task(self, audio_data: Dict[str, Any]) -> Dict[str, Any]:
@@ -37,27 +146,46 @@ def transcribe_audio_task(self, audio_data: Dict[str, Any]) -> Dict[str, Any]:
 
         start_time = time.time()
 
-        # Extract audio content
-        if "content" in audio_data:
-            # File upload case
-            audio_bytes = audio_data["content"]
-            filename = audio_data.get("filename", "unknown")
-        elif "audio_bytes" in audio_data:
-            # Real-time stream case
-            audio_bytes = audio_data["audio_bytes"]
+        # File uploads carry "content", real-time streams "audio_bytes"
+        if audio_field(audio_data) == "audio_bytes":
             filename = f"stream_{audio_data.get('client_id', 'unknown')}"
         else:
-            raise ValueError("No audio content found in audio_data")
+            filename = audio_data.get("filename", "unknown")
 
         self.update_state(state="PROGRESS", meta={"progress": 30, "status": "Loading audio"})
 
         # Load and preprocess audio
-        audio_array, sample_rate = load_audio_from_bytes(audio_bytes)
+        audio_array, sample_rate, _ = load_audio_from_message(audio_data)
+
+        audio_duration = len(audio_array) / sample_rate
+
+        long_form = settings.longform_enabled and audio_duration >= settings.longform_min_duration_seconds
+
+        # Drop silence and noise; only detected speech is sent to the recognizer
+        speech_detected = True
+        if not long_form and vad_service.enabled and sample_rate == vad_service.config.sample_rate:
+            segments = vad_service.detect(audio_array.astype(np.float32, copy=False))
+            speech_detected = bool(segments)
+            if segments:
+                audio_array = np.concatenate([segment.audio for segment in segments])
 
         self.update_state(state="PROGRESS", meta={"progress": 50, "status": "Transcribing audio"})
 
-        # Perform transcription
-        transcription_result = transcribe_audio(audio_array, sample_rate)
+        # Perform transcription (long files: split at silence, segments in parallel)
+        if long_form:
+            transcription_result = transcribe_long_audio_sync(
+                audio_array,
+                sample_rate,
+                transcribe_audio,
+                max_workers=settings.longform_max_concurrency,
+                max_segment_seconds=settings.longform_max_segment_seconds,
+                overlap_seconds=settings.longform_overlap_seconds,
+            )
+            speech_detected = bool(transcription_result["segments"])
+        elif speech_detected:
+            transcription_result = transcribe_audio(audio_array, sample_rate)
+        else:
+            transcription_result = {"text": "", "confidence": 0.0}
 
         self.update_state(state="PROGRESS", meta={"progress": 80, "status": "Finalizing results"})
 
@@ -71,10 +199,14 @@ def transcribe_audio_task(self, audio_data: Dict[str, Any]) -> Dict[str, Any]:
             "processing_time": processing_time,
             "filename": filename,
             "sample_rate": sample_rate,
-            "audio_duration": len(audio_array) / sample_rate,
+            "audio_duration": audio_duration,
+            "speech_detected": speech_detected,
             "status": "completed",
         }
 
+        if long_form:
+            result["segments"] = transcription_result["segments"]
+
         # If this is a real-time stream, include client_id
         if "client_id" in audio_data:
             result["client_id"] = audio_data["client_id"]
@@ -104,24 +236,54 @@ def load_audio_from_bytes(audio_bytes: bytes) -> tuple[np.ndarray, int]:
         Tuple of (audio_array, sample_rate)
     """
     try:
-        # Create a BytesIO object from the audio bytes
-        audio_io = io.BytesIO(audio_bytes)
-
-        # Load audio using librosa
-        audio_array, sample_rate = librosa.load(audio_io, sr=None, mono=True)
-
-        # Resample to 16kHz if needed (optimal for speech recognition)
-        if sample_rate != 16000:
-            audio_array = librosa.resample(audio_array, orig_sr=sample_rate, target_sr=16000)
-            sample_rate = 16000
-
-        return audio_array, int(sample_rate)
+        # Decode, mono mix and resample to 16kHz (optimal for speech recognition) in one pass
+        frame = AudioFrame.from_bytes(audio_bytes, sample_rate=16000)
+        return frame.samples, frame.sample_rate
 
     except Exception as e:
         logger.error(f"Error loading audio: {e}")
         raise ValueError(f"Failed to load audio: {e}")
 
 
+def run_backend(coroutine):
+    """
+    Run a transcription backend coroutine from a (synchronous) Celery worker.
+
+    The backends keep async clients bound to the loop that first used them, so
+    each worker thread reuses one loop instead of asyncio.run's fresh one.
+    """
+    loop = getattr(_worker_loops, "loop", None)
+    if loop is None or loop.is_closed():
+        loop = _worker_loops.loop = asyncio.new_event_loop()
+    return loop.run_until_complete(coroutine)
+
+
+def transcribe_with_backend(
+    audio_array: np.ndarray, sample_rate: int, language: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Transcribe audio with the backend selected by TRANSCRIPTION_BACKEND.
+
+    Args:
+        audio_array: Mono float32 samples
+        sample_rate: Sample rate of the audio
+        language: Language code (defaults to settings.default_language)
+
+    Returns:
+        Backend result with "text", "confidence" and "language"
+
+    Raises:
+        RuntimeError: If the backend reports an error
+    """
+    language = language or settings.default_language
+    service = get_transcription_service(settings.openai_api_key)
+    frame = AudioFrame(samples=audio_array, sample_rate=sample_rate)
+    result = run_backend(service.transcribe_audio_bytes(frame, language=language))
+    if "error" in result:
+        raise RuntimeError(f"Transcription failed: {result['error']}")
+    return result
+
+
 def transcribe_audio(audio_array: np.ndarray, sample_rate: int) -> Dict[str, Any]:
     """
     Transcribe audio array using speech recognition.
@@ -134,11 +296,13 @@ def transcribe_audio(audio_array: np.ndarray, sample_rate: int) -> Dict[str, Any
         Dictionary with transcription text and confidence
     """
     try:
-        # Convert numpy array to AudioData for speech_recognition
+        # speech_recognition expects 16-bit PCM; decoded audio is float32 in [-1, 1]
+        if audio_array.dtype != np.int16:
+            audio_array = (np.clip(audio_array, -1.0, 1.0) * 32767).astype(np.int16)
         audio_data = sr.AudioData(
             audio_array.tobytes(),
             sample_rate,
-            sample_rate * 2,  # 2 bytes per sample (16-bit)
+            2,  # sample width in bytes (16-bit)
         )
 
         # Perform transcription using Google Speech Recognition
@@ -169,14 +333,18 @@ def transcribe_audio(audio_array: np.ndarray, sample_rate: int) -> Dict[str, Any
 @celery_app.task(name="batch_transcribe_task")
 def batch_transcribe_task(audio_files: list) -> Dict[str, Any]:
     """
-    Batch transcription task for multiple audio files.
+    Batch transcription task for multiple audio files (queue it with dispatch_batch_transcription).
 
     Args:
-        audio_files: List of audio file data
+        audio_files: List of audio file data with staged audio references
 
     Returns:
         Dictionary with batch transcription results
+
+    Raises:
+        ValueError: If a file has inline audio
     """
+    require_staged(audio_files)
     results = []
 
     for i, audio_data in enumerate(audio_files):
@@ -193,3 +361,46 @@ def batch_transcribe_task(audio_files: list) -> Dict[str, Any]:
         "results": results,
         "status": "processing",
     }
+
+
+@celery_app.task(name="extract_features_batch_task")
+def extract_features_batch_task(audio_files: list) -> Dict[str, Any]:
+    """
+    Batch feature extraction task for analytics.
+
+    Equal-length clips are analyzed together as one 2-D batch. Queue it with
+    dispatch_feature_extraction.
+
+    Args:
+        audio_files: List of audio file data with staged "content_ref" or "audio_bytes_ref"
+
+    Returns:
+        Dictionary with per-file feature statistics
+
+    Raises:
+        ValueError: If a file has inline audio
+    """
+    require_staged(audio_files)
+    service = get_preprocessing_service()
+    results: list = [None] * len(audio_files)
+    clips, indices = [], []
+
+    for i, audio_data in enumerate(audio_files):
+        try:
+            audio_array, _, _ = load_audio_from_message(audio_data)
+            peak = float(np.max(np.abs(audio_array))) if audio_array.size else 0.0
+            clips.append(audio_array / peak if peak > 0 else audio_array)
+            indices.append(i)
+        except Exception as e:
+            results[i] = {"index": i, "error": str(e), "status": "failed"}
+
+    for i, clip, features in zip(indices, clips, service.extract_features_batch(clips, sample_rate=16000)):
+        statistics = service._calculate_feature_statistics(features.pop("mfcc"), features)
+        results[i] = {
+            "index": i,
+            "duration": len(clip) / 16000,
+            "feature_statistics": serialize_feature_statistics(statistics),
+            "status": "completed",
+        }
+
+    return {"total_files": len(audio_files), "results": results, "status": "completed"}
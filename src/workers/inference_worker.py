@@ -0,0 +1,111 @@
+"""
+Inference worker for VoiceBridge
+Consumes audio chunks from Kafka, transcribes them and publishes the results.
+
+Run workers next to API nodes started with INFERENCE_MODE=kafka:
+
+    python -m src.workers.inference_worker --concurrency 4
+
+Workers share one consumer group, so the audio topic's partitions are split
+between them. Chunks are keyed by session, which keeps each session on one
+worker: its chunks are transcribed in order and its VAD state stays in one
+process. Results go to the transcription topic, where every API node picks up
+the ones for its own WebSockets. Inference therefore scales with the number of
+workers (up to the partition count), independently of the API nodes.
+"""
+import argparse
+import asyncio
+import logging
+import signal
+from typing import Any, Dict, List, Optional
+
+from config import settings
+from src.services.kafka_stream_service import KafkaStreamService
+
+logger = logging.getLogger(__name__)
+
+
+class InferenceWorker:
+    """Kafka consumer that runs transcription for the audio topic"""
+
+    def __init__(self, service: Optional[KafkaStreamService] = None, concurrency: Optional[int] = None):
+        """
+        Initialize worker.
+
+        Args:
+            service: Stream service to consume and publish with (a new one by default)
+            concurrency: Chunks transcribed at once (defaults to KAFKA_CONSUMER_CONCURRENCY)
+        """
+        self.service = service or KafkaStreamService()
+        self.concurrency = concurrency or settings.kafka_consumer_concurrency
+        self._stop_event: Optional[asyncio.Event] = None
+
+    async def start(self) -> bool:
+        """
+        Start the result producers and the audio consumer.
+
+        Returns:
+            True if the worker is consuming
+        """
+        if not await self.service.start_producers():
+            logger.error("Kafka is not available; inference worker cannot start")
+            return False
+        if not await self.service.start_consumer(concurrency=self.concurrency):
+            await self.service.stop()
+            return False
+        logger.info(
+            f"Inference worker consuming {self.service.audio_topic} "
+            f"(concurrency={self.concurrency}), publishing to {self.service.transcription_topic}"
+        )
+        return True
+
+    async def stop(self):
+        """Finish in-flight chunks, publish their results and commit, then disconnect"""
+        await self.service.stop()
+        logger.info("Inference worker stopped")
+
+    async def run(self) -> bool:
+        """
+        Run until the process receives SIGINT or SIGTERM.
+
+        Returns:
+            False if the worker could not start
+        """
+        self._stop_event = asyncio.Event()
+        if not await self.start():
+            return False
+
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(signum, self._stop_event.set)
+            except (NotImplementedError, RuntimeError):
+                pass  # Windows; KeyboardInterrupt still ends asyncio.run
+
+        await self._stop_event.wait()
+        await self.stop()
+        return True
+
+    async def get_stats(self) -> Dict[str, Any]:
+        """Get processing and consumer statistics"""
+        return await self.service.get_processing_stats()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description="VoiceBridge Kafka inference worker")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=None,
+        help="Chunks transcribed at once (default: KAFKA_CONSUMER_CONCURRENCY)",
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    worker = InferenceWorker(concurrency=args.concurrency)
+    return 0 if asyncio.run(worker.run()) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,197 @@
+"""
+Audio decoder test suite.
+"""
+import io
+import struct
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from src.services.audio_decoder import (
+    WebMDemuxer,
+    decode_audio,
+    decode_pcm,
+    decode_wav,
+    get_decode_stats,
+    parse_wav_header,
+    sniff_format,
+)
+from src.services.audio_frame import AudioFrame
+from src.services.audio_processor import AudioProcessor
+
+SAMPLE_RATE = 16000
+
+
+def tone(seconds: float = 0.5, channels: int = 1) -> np.ndarray:
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    mono = 0.5 * np.sin(2 * np.pi * 440 * t)
+    return np.stack([mono, -mono * 0.5], axis=1)[:, :channels] if channels > 1 else mono
+
+
+def wav_bytes(samples: np.ndarray, subtype: str = "PCM_16") -> bytes:
+    buffer = io.BytesIO()
+    sf.write(buffer, samples, SAMPLE_RATE, format="WAV", subtype=subtype)
+    return buffer.getvalue()
+
+
+def ebml(element_id: int, payload: bytes = b"", unknown_size: bool = False) -> bytes:
+    """Encode one EBML element with an 8-byte size field."""
+    id_bytes = element_id.to_bytes((element_id.bit_length() + 7) // 8, "big")
+    size = (1 << 56) - 1 if unknown_size else len(payload)
+    return id_bytes + (0x01 << 56 | size).to_bytes(8, "big") + payload
+
+
+def webm_stream(packets, laced: bool = False) -> bytes:
+    """Minimal WebM file with one Opus track, as MediaRecorder writes it (unknown-size segment and cluster)."""
+    head = b"OpusHead" + bytes([1, 1]) + struct.pack("<HIhB", 312, 48000, 0, 0)
+    track = ebml(
+        0xAE,
+        ebml(0xD7, b"\x01")
+        + ebml(0x83, b"\x02")
+        + ebml(0x86, b"A_OPUS")
+        + ebml(0x63A2, head)
+        + ebml(0xE1, ebml(0xB5, struct.pack(">d", 48000.0)) + ebml(0x9F, b"\x01")),
+    )
+    if laced:
+        # One Block with Xiph lacing, inside a BlockGroup
+        sizes = b"".join(bytes([255] * (len(p) // 255) + [len(p) % 255]) for p in packets[:-1])
+        block = b"\x81\x00\x00\x02" + bytes([len(packets) - 1]) + sizes + b"".join(packets)
+        blocks = ebml(0xA0, ebml(0xA1, block))
+    else:
+        blocks = b"".join(ebml(0xA3, b"\x81" + struct.pack(">h", 20 * i) + b"\x80" + p) for i, p in enumerate(packets))
+    header = ebml(0x1A45DFA3, ebml(0x4282, b"webm"))
+    segment = ebml(0x18538067, unknown_size=True) + ebml(0x1654AE6B, track)
+    cluster = ebml(0x1F43B675, unknown_size=True) + ebml(0xE7, b"\x00") + blocks
+    return header + segment + cluster
+
+
+class TestContainerSniffing:
+    """Test magic-byte format detection."""
+
+    def test_sniff_formats(self):
+        """Test detection of each supported container."""
+        assert sniff_format(wav_bytes(tone())) == "wav"
+        flac = io.BytesIO()
+        sf.write(flac, tone(), SAMPLE_RATE, format="FLAC")
+        assert sniff_format(flac.getvalue()) == "flac"
+        assert sniff_format(webm_stream([b"x"])) == "webm"
+        assert sniff_format(b"ID3\x04" + b"\x00" * 20) == "mp3"
+        assert sniff_format(b"\x00\x00\x00\x20ftypM4A ") == "m4a"
+        assert sniff_format(b"not audio at all") is None
+
+    def test_validation_uses_content(self):
+        """Test that content decides over the filename extension."""
+        processor = AudioProcessor()
+        assert processor.is_valid_audio_format("recording.bin", wav_bytes(tone()))
+        assert not processor.is_valid_audio_format("fake.wav", b"OggS" + b"\x00" * 40)
+        assert processor.is_valid_audio_format("clip.wav", b"unrecognized")
+        assert not processor.is_valid_audio_format("notes.txt", b"unrecognized")
+
+
+class TestWavDecoding:
+    """Test the WAV/PCM fast path."""
+
+    @pytest.mark.parametrize("subtype", ["PCM_U8", "PCM_16", "PCM_24", "PCM_32", "FLOAT", "DOUBLE"])
+    def test_matches_soundfile(self, subtype):
+        """Test every WAV sample format against soundfile."""
+        data = wav_bytes(tone(channels=2), subtype)
+        expected, _ = sf.read(io.BytesIO(data), dtype="float32")
+        decoded = decode_wav(data)
+
+        assert decoded.sample_rate == SAMPLE_RATE
+        assert decoded.channels == 2
+        np.testing.assert_allclose(decoded.samples, expected.mean(axis=1), atol=1e-6)
+
+    def test_float_wav_is_zero_copy(self):
+        """Test that mono float32 samples are a view of the input bytes."""
+        data = wav_bytes(tone(), "FLOAT")
+        samples = decode_wav(data).samples
+        assert samples.base is not None and not samples.flags.owndata
+        assert np.shares_memory(samples, np.frombuffer(data, dtype=np.uint8))
+
+    def test_streaming_header_and_extra_chunks(self):
+        """Test a data size left at 0xFFFFFFFF and a LIST chunk before the data."""
+        data = bytearray(wav_bytes(tone()))
+        info = parse_wav_header(bytes(data))
+        struct.pack_into("<I", data, info.data_offset - 4, 0xFFFFFFFF)
+        listed = bytes(data[:36]) + b"LIST" + struct.pack("<I", 3) + b"abc\x00" + bytes(data[36:])
+
+        decoded = decode_wav(listed)
+        assert decoded.samples.size == info.data_size // 2
+        with pytest.raises(ValueError):
+            parse_wav_header(b"RIFF\x00\x00\x00\x00WAVE")
+
+    def test_malformed_headers_raise_value_error(self):
+        """Test that truncated fmt chunks and impossible sample depths are ValueErrors, not crashes."""
+        truncated = b"RIFF\x0e\x00\x00\x00WAVEfmt \x10\x00\x00\x00\x01\x00"
+        data = bytearray(wav_bytes(tone()))
+        for bits in (0, 4):
+            struct.pack_into("<HH", data, 32, 0, bits)  # block_align, bits_per_sample
+            with pytest.raises(ValueError):
+                decode_wav(bytes(data))
+        with pytest.raises(ValueError):
+            parse_wav_header(truncated)
+        with pytest.raises(ValueError):
+            decode_audio(truncated)
+        assert AudioFrame.try_from_bytes(truncated) is None
+        # The fast path rejects the bad depth, so soundfile gets to decode the file
+        assert decode_audio(bytes(data)).sample_rate == SAMPLE_RATE
+
+    def test_odd_depth_uses_block_align(self):
+        """Test that 12-bit PCM in 16-bit containers is decoded as 16-bit samples."""
+        data = bytearray(wav_bytes(tone()))
+        struct.pack_into("<H", data, 34, 12)
+        info = parse_wav_header(bytes(data))
+        assert (info.bits_per_sample, info.sample_width) == (12, 2)
+        np.testing.assert_allclose(decode_wav(bytes(data)).samples, decode_wav(wav_bytes(tone())).samples)
+
+    def test_raw_pcm_and_metrics(self):
+        """Test headerless PCM and per-format decode statistics."""
+        pcm = (tone() * 32767).astype("<i2").tobytes()
+        decoded = decode_pcm(pcm, SAMPLE_RATE)
+        np.testing.assert_allclose(decoded.samples, tone(), atol=1e-4)
+        with pytest.raises(ValueError):
+            decode_pcm(pcm, SAMPLE_RATE, sample_format="mulaw")
+
+        before = get_decode_stats().get("wav", {}).get("decodes", 0)
+        frame = AudioFrame.from_bytes(wav_bytes(tone()), sample_rate=SAMPLE_RATE)
+        assert frame.source_channels == 1
+        assert get_decode_stats()["wav"]["decodes"] == before + 1
+        with pytest.raises(ValueError):
+            decode_audio(b"garbage that is not audio")
+        assert get_decode_stats()["unknown"]["failures"] >= 1
+
+
+class TestWebMDemuxer:
+    """Test incremental WebM demuxing."""
+
+    @pytest.mark.parametrize("laced", [False, True])
+    def test_packets_in_any_chunking(self, laced):
+        """Test that byte-at-a-time feeding gives the same packets as one buffer."""
+        packets = [bytes([i]) * (40 + 100 * i) for i in range(4)]
+        stream = webm_stream(packets, laced=laced)
+
+        whole = WebMDemuxer()
+        assert whole.feed(stream) == packets
+        assert whole.codec_id == "A_OPUS"
+        assert whole.codec_private.startswith(b"OpusHead")
+
+        incremental = WebMDemuxer()
+        received = []
+        for i in range(len(stream)):
+            received.extend(incremental.feed(stream[i : i + 1]))
+        assert received == packets
+
+    def test_opus_decode(self):
+        """Test WebM/Opus decoding at the requested rate."""
+        opuslib = pytest.importorskip("opuslib")
+        encoder = opuslib.Encoder(48000, 1, opuslib.APPLICATION_AUDIO)
+        t = np.arange(48000) / 48000
+        pcm = (0.5 * np.sin(2 * np.pi * 440 * t)).astype(np.float32)
+        packets = [encoder.encode_float(pcm[i : i + 960].tobytes(), 960) for i in range(0, pcm.size, 960)]
+
+        decoded = decode_audio(webm_stream(packets), sample_rate=SAMPLE_RATE)
+        assert decoded.format == "webm"
+        assert decoded.sample_rate == SAMPLE_RATE
+        assert abs(decoded.samples.size - SAMPLE_RATE) <= 312
@@ -0,0 +1,104 @@
+"""
+AudioFrame test suite.
+"""
+import io
+import os
+import tempfile
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from src.services.audio_frame import AudioFrame, as_audio_bytes, as_audio_frame
+from src.services.audio_preprocessing_service import AudioPreprocessingService
+from src.services.audio_processor import AudioProcessor
+
+
+def wav_bytes(samples: np.ndarray, sample_rate: int) -> bytes:
+    buffer = io.BytesIO()
+    sf.write(buffer, samples, sample_rate, format="WAV", subtype="PCM_16")
+    return buffer.getvalue()
+
+
+def tone(seconds: float, sample_rate: int, channels: int = 1) -> np.ndarray:
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    mono = (0.5 * np.sin(2 * np.pi * 440 * t)).astype(np.float32)
+    return mono if channels == 1 else np.stack([mono] * channels, axis=1)
+
+
+class TestAudioFrame:
+    """Test decode-once audio frames."""
+
+    def test_from_bytes_mixes_and_resamples(self):
+        """Test stereo 48 kHz input becomes mono 16 kHz float32."""
+        frame = AudioFrame.from_bytes(wav_bytes(tone(1.0, 48000, channels=2), 48000))
+
+        assert frame.sample_rate == 16000
+        assert frame.samples.dtype == np.float32
+        assert frame.samples.ndim == 1
+        assert frame.duration == pytest.approx(1.0, abs=1e-3)
+        assert frame.source_channels == 2
+        assert frame.channel_layout == "stereo"
+        assert frame.source_sample_rate == 48000
+
+    def test_undecodable_input(self):
+        """Test error handling for bytes that are not audio."""
+        with pytest.raises(ValueError):
+            AudioFrame.from_bytes(b"")
+        assert AudioFrame.try_from_bytes(b"not audio at all") is None
+        assert as_audio_frame(b"not audio at all") is None
+
+    def test_derived_values_are_cached(self):
+        """Test lazy features, resampling and hashing are computed once."""
+        data = wav_bytes(tone(0.5, 16000), 16000)
+        frame = AudioFrame.from_bytes(data)
+        calls = []
+
+        def compute(f):
+            calls.append(1)
+            return f.samples.mean()
+
+        assert frame.feature("mean", compute) == frame.feature("mean", compute)
+        assert len(calls) == 1
+        assert frame.normalized is frame.normalized
+        assert np.max(np.abs(frame.normalized)) == pytest.approx(1.0)
+        assert frame.resampled(8000) is frame.resampled(8000)
+        assert frame.resampled(16000) is frame
+        assert frame.source_hash == AudioFrame.from_bytes(data).source_hash
+
+    def test_slices_share_memory(self):
+        """Test sub-frames are views."""
+        frame = AudioFrame.from_bytes(wav_bytes(tone(1.0, 16000), 16000))
+        part = frame.slice(1000, 5000)
+        assert np.shares_memory(part.samples, frame.samples)
+        assert part.duration == pytest.approx(0.25)
+
+    def test_as_audio_bytes(self):
+        """Test backends that upload files get the original bytes back."""
+        data = wav_bytes(tone(0.2, 16000), 16000)
+        frame = AudioFrame.from_bytes(data)
+        assert as_audio_bytes(frame) is data
+        assert as_audio_bytes(data) is data
+
+        decoded = AudioFrame.from_bytes(as_audio_bytes(frame.slice(0, 1600)))
+        assert decoded.duration == pytest.approx(0.1)
+
+    def test_services_accept_frames(self):
+        """Test preprocessing and audio info work from a shared frame."""
+        data = wav_bytes(tone(1.0, 22050, channels=2), 22050)
+        frame = AudioFrame.from_bytes(data)
+
+        preprocessed = AudioPreprocessingService().preprocess_audio_bytes(frame)
+        assert preprocessed["preprocessing_successful"]
+        assert preprocessed["mfcc_features"] is frame.feature("features", None).get("mfcc")
+
+        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as f:
+            f.write(data)
+        try:
+            info = AudioProcessor().get_audio_info(f.name)
+        finally:
+            os.unlink(f.name)
+        assert info["channels"] == 2
+        assert info["sample_rate"] == 22050
+        assert info["duration"] == pytest.approx(1.0, abs=1e-3)
+        assert AudioProcessor().get_audio_info(frame)["channels"] == 2
@@ -0,0 +1,77 @@
+"""
+Speech segment detection test suite.
+"""
+import librosa
+import numpy as np
+
+from src.services.audio_processor import AudioProcessor, frame_rms
+
+SAMPLE_RATE = 16000
+
+
+def bursts(pattern, seed: int = 0) -> np.ndarray:
+    """Build audio from (seconds, loud) pairs."""
+    rng = np.random.default_rng(seed)
+    parts = [
+        rng.standard_normal(int(seconds * SAMPLE_RATE)).astype(np.float32) * (0.3 if loud else 0.005)
+        for seconds, loud in pattern
+    ]
+    return np.concatenate(parts)
+
+
+class TestSpeechSegmentation:
+    """Test the vectorized segment extraction."""
+
+    def test_frame_rms_matches_librosa(self):
+        """Test the block-sum RMS against librosa for several rates and lengths."""
+        rng = np.random.default_rng(0)
+        for sample_rate in (8000, 16000, 22050):
+            frame_length, hop_length = int(0.025 * sample_rate), int(0.010 * sample_rate)
+            for length in (frame_length, 12345):
+                audio = rng.standard_normal(length).astype(np.float32)
+                expected = librosa.feature.rms(y=audio, frame_length=frame_length, hop_length=hop_length)[0]
+                np.testing.assert_allclose(frame_rms(audio, frame_length, hop_length), expected, atol=1e-5)
+
+    def test_segments_found(self):
+        """Test segment boundaries and sample offsets."""
+        audio = bursts([(1.0, False), (1.0, True), (1.0, False), (0.5, True), (0.5, False)])
+        segments = AudioProcessor().detect_speech_segments(audio, SAMPLE_RATE)
+
+        assert len(segments) == 2
+        assert abs(segments[0]["start_time"] - 1.0) < 0.03
+        assert abs(segments[0]["end_time"] - 2.0) < 0.03
+        assert segments[1]["end_sample"] <= len(audio)
+        assert segments[0]["duration"] == segments[0]["end_time"] - segments[0]["start_time"]
+
+    def test_merge_gap_padding_and_min_duration(self):
+        """Test the merge-gap, padding and min-duration parameters."""
+        processor = AudioProcessor()
+        audio = bursts([(1.0, False), (0.5, True), (0.2, False), (0.5, True), (1.0, False), (0.05, True), (1.0, False)])
+
+        assert len(processor.detect_speech_segments(audio, SAMPLE_RATE)) == 2
+        merged = processor.detect_speech_segments(audio, SAMPLE_RATE, merge_gap=0.3)
+        assert len(merged) == 1
+
+        padded = processor.detect_speech_segments(audio, SAMPLE_RATE, merge_gap=0.3, padding=0.25)
+        assert padded[0]["start_time"] < merged[0]["start_time"] - 0.2
+        assert padded[0]["end_time"] > merged[0]["end_time"] + 0.2
+
+        short = processor.detect_speech_segments(audio, SAMPLE_RATE, min_duration=0.01)
+        assert len(short) == 3
+
+    def test_split_returns_views(self):
+        """Test that splitting does not copy audio."""
+        processor = AudioProcessor()
+        audio = bursts([(0.5, False), (1.0, True), (0.5, False), (1.0, True)])
+        segments = processor.detect_speech_segments(audio, SAMPLE_RATE)
+        pieces = processor.split_audio_by_segments(audio, SAMPLE_RATE, segments)
+
+        assert len(pieces) == len(segments) == 2
+        assert all(np.shares_memory(piece, audio) for piece in pieces)
+        assert [len(p) for p in pieces] == [s["end_sample"] - s["start_sample"] for s in segments]
+
+    def test_silence_only(self):
+        """Test that silent and empty audio give no segments."""
+        processor = AudioProcessor()
+        assert processor.detect_speech_segments(np.zeros(SAMPLE_RATE, dtype=np.float32), SAMPLE_RATE) == []
+        assert processor.detect_speech_segments(np.zeros(0, dtype=np.float32), SAMPLE_RATE) == []
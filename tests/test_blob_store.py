@@ -0,0 +1,132 @@
+"""
+Blob store and claim-check test suite.
+"""
+import hashlib
+import io
+import json
+import os
+import time
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from src.services import kafka_stream_service as stream_module
+from src.services.blob_store import BlobStore
+from src.services.kafka_inmemory import InMemoryBroker, InMemoryKafkaProducer
+from src.services.kafka_stream_service import KafkaStreamService
+from src.tasks import transcription_tasks
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """Blob store in a temporary directory, with claim-check on above 1 KB."""
+    monkeypatch.setattr("config.settings.claim_check_enabled", True)
+    monkeypatch.setattr("config.settings.claim_check_threshold_bytes", 1024)
+    return BlobStore(str(tmp_path))
+
+
+class TestBlobStore:
+    """Test content addressing and the claim-check helpers."""
+
+    def test_put_get_deduplicates_and_verifies(self, store):
+        """Test that identical payloads share one blob and corruption is detected."""
+        payload = os.urandom(5000)
+        reference = store.put(payload)
+        assert reference == "sha256:" + hashlib.sha256(payload).hexdigest()
+        assert store.put(payload) == reference
+        assert store.stats["deduplicated"] == 1
+        assert store.get(reference) == payload
+
+        with open(store.path(reference), "r+b") as f:
+            f.write(b"X")
+        with pytest.raises(ValueError):
+            store.get(reference)
+        assert store.delete(reference) and not store.exists(reference)
+        with pytest.raises(FileNotFoundError):
+            store.get(reference)
+        with pytest.raises(ValueError):
+            store.path("sha256:../../etc/passwd")
+
+    def test_check_in_threshold(self, store, monkeypatch):
+        """Test that only large payloads are moved and both forms check out."""
+        small = {"filename": "a.wav", "content": b"x" * 1024}
+        assert store.check_in(small, "content") is small
+        assert store.check_out(small, "content") == small["content"]
+
+        large = {"filename": "b.wav", "content": b"y" * 1025}
+        checked = store.check_in(large, "content")
+        assert checked["content"] == b"" and checked["content_ref"].startswith("sha256:")
+        assert large["content"] == b"y" * 1025  # the caller's dict is not modified
+        assert store.check_out(checked, "content") == large["content"]
+
+        monkeypatch.setattr("config.settings.claim_check_enabled", False)
+        assert store.check_in(large, "content") is large
+
+
+class TestStreamClaimCheck:
+    """Test claim-check on the Avro audio topic."""
+
+    @pytest.mark.asyncio
+    async def test_large_chunk_sent_by_reference(self, store, monkeypatch):
+        """Test that a large chunk travels as a reference and the consumer side resolves it."""
+        monkeypatch.setattr(stream_module, "blob_store", store)
+        broker = InMemoryBroker(partitions=1)
+        service = KafkaStreamService(producer_factory=lambda **kwargs: InMemoryKafkaProducer(broker=broker, **kwargs))
+        await service.start_producers()
+        audio = os.urandom(4000)
+        await service.send_audio_chunk("s1", "u1", audio)
+        await service.send_audio_chunk("s1", "u1", b"small")
+        await service.flush()
+
+        records = broker.records(service.audio_topic)
+        chunks = [service._deserialize_audio_chunk(record.value) for record in records]
+        assert len(records[0].value) < 200
+        assert chunks[0]["audio_data"] == b"" and chunks[0]["audio_data_ref"] == store.put(audio)
+        assert chunks[1]["audio_data"] == b"small" and chunks[1]["audio_data_ref"] is None
+
+        gated = []
+        monkeypatch.setattr(stream_module.vad_service, "gate", lambda session, data, **kwargs: gated.append(data) or [])
+        for chunk in chunks:
+            await service._process_audio_chunk(chunk)
+        assert gated == [audio, b"small"]
+        await service.stop()
+
+
+class TestCeleryStaging:
+    """Test that Celery task messages carry blob references instead of audio."""
+
+    def test_stage_open_and_purge(self, store):
+        """Test that staging drops the bytes whatever their size and the blob maps back read-only."""
+        message = {"filename": "a.wav", "content": b"tiny"}
+        staged = store.stage(message, "content")
+        assert "content" not in staged and message["content"] == b"tiny"
+        assert store.stage({"filename": "b.wav", "content": b""}, "content")["content"] == b""
+
+        with store.checked_out(staged, "content") as view:
+            assert view[:] == b"tiny"
+            with pytest.raises(TypeError):
+                view[0] = 0
+        with store.checked_out(message, "content") as view:
+            assert view == b"tiny"
+
+        old = store.put(b"old audio")
+        os.utime(store.path(old), (time.time() - 7200, time.time() - 7200))
+        assert store.purge(3600) == 1
+        assert not store.exists(old) and store.exists(staged["content_ref"])
+
+    def test_task_message_size_independent_of_audio(self, store, monkeypatch):
+        """Test that a staged message stays small and workers decode the mapped audio."""
+        monkeypatch.setattr(transcription_tasks, "task_blob_store", store)
+        buffer = io.BytesIO()
+        samples = (np.sin(np.arange(160000) / 10) * 0.5).astype(np.float32)
+        sf.write(buffer, samples, 16000, format="WAV", subtype="FLOAT")
+        audio = buffer.getvalue()
+
+        message = transcription_tasks.stage_audio({"filename": "long.wav", "content": audio})
+        assert len(json.dumps(message)) < 200 < len(audio)
+        audio_array, sample_rate, size = transcription_tasks.load_audio_from_message(message)
+        assert sample_rate == 16000 and size == len(audio)
+        np.testing.assert_allclose(audio_array, samples)
+        with pytest.raises(ValueError):
+            transcription_tasks.load_audio_from_message({"filename": "empty.wav"})
@@ -0,0 +1,156 @@
+"""
+Celery transcription task test suite.
+"""
+import json
+import os
+import time
+
+import numpy as np
+import pytest
+
+from src.services.blob_store import BlobStore
+from src.tasks import modular_tasks, transcription_tasks
+from src.tasks.modular_tasks import get_batch_progress, transcribe_audio_chunk
+
+SAMPLE_RATE = 16000
+
+
+def tone(seconds: float = 0.5) -> np.ndarray:
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return (0.5 * np.sin(2 * np.pi * 440 * t)).astype(np.float32)
+
+
+class FakeResult:
+    """Finished or pending child of a saved Celery group."""
+
+    def __init__(self, result=None, ready=True, successful=True):
+        self.result = result
+        self._ready = ready
+        self._successful = successful
+
+    def ready(self):
+        return self._ready
+
+    def successful(self):
+        return self._successful
+
+
+class TestTranscriptionTasks:
+    """Test the worker-side transcription path."""
+
+    def test_chunk_uses_configured_backend(self, monkeypatch):
+        """Test that transcribe_audio_chunk runs the selected backend and reports failures as results."""
+        monkeypatch.setattr("config.settings.transcription_backend", "stub")
+        pcm = (tone() * 32767).astype("<i2")
+        frame = transcription_tasks.AudioFrame(samples=tone(), sample_rate=SAMPLE_RATE)
+        message = {"filename": "a.wav", "audio_bytes": frame.to_wav_bytes(), "language": "en"}
+
+        result = transcribe_audio_chunk.apply(args=(message,)).get()
+        assert result["status"] == "completed" and result["transcription"]
+        assert result["filename"] == "a.wav" and result["audio_duration"] == pytest.approx(pcm.size / SAMPLE_RATE)
+        # The worker thread keeps one loop for the async backend
+        assert transcribe_audio_chunk.apply(args=(message,)).get()["status"] == "completed"
+
+        failed = transcribe_audio_chunk.apply(args=({"filename": "empty.wav"},)).get()
+        assert failed["status"] == "failed" and "No audio content" in failed["error"]
+
+    def test_speech_recognition_gets_16_bit_pcm(self, monkeypatch):
+        """Test that float samples are converted to the 16-bit PCM AudioData declares."""
+        captured = {}
+
+        def recognize_google(audio_data, language):
+            captured["audio"] = audio_data
+            return "hello"
+
+        monkeypatch.setattr(transcription_tasks.recognizer, "recognize_google", recognize_google)
+        assert transcription_tasks.transcribe_audio(tone(), SAMPLE_RATE)["text"] == "hello"
+        audio = captured["audio"]
+        samples = np.frombuffer(audio.get_raw_data(), dtype="<i2")
+        assert audio.sample_width == 2 and samples.size == tone().size
+        np.testing.assert_allclose(samples / 32767, tone(), atol=1e-4)
+
+
+class TestBatchProgress:
+    """Test per-file progress of Celery batches."""
+
+    def test_progress_from_saved_group(self, monkeypatch):
+        """Test that finished, failed and pending files are counted from the saved group."""
+        group = type("Group", (), {})()
+        group.results = [
+            FakeResult({"status": "completed"}),
+            FakeResult({"status": "failed", "error": "decode failed"}),
+            FakeResult(ready=False),
+            FakeResult(ready=False),
+        ]
+        restored = {}
+
+        def restore(group_id):
+            restored["id"] = group_id
+            return group if group_id == "b1" + modular_tasks.BATCH_FILES_SUFFIX else None
+
+        monkeypatch.setattr(modular_tasks.celery_app.GroupResult, "restore", restore)
+        assert get_batch_progress("b1") == {
+            "progress": 50,
+            "status": "2/4 files finished",
+            "total": 4,
+            "completed": 1,
+            "failed": 1,
+        }
+        assert get_batch_progress("other") is None
+
+
+class TestBatchStaging:
+    """Test that batch messages carry blob references from the dispatching side."""
+
+    @pytest.fixture
+    def store(self, tmp_path, monkeypatch):
+        store = BlobStore(str(tmp_path))
+        monkeypatch.setattr(transcription_tasks, "task_blob_store", store)
+        return store
+
+    def test_dispatch_stages_before_sending(self, store, monkeypatch):
+        """Test that the batch helpers send only references, whatever the audio size."""
+        files = [{"filename": f"{i}.wav", "content": bytes([i]) * 100000} for i in range(3)]
+        sent = {}
+        task = transcription_tasks.batch_transcribe_task
+        monkeypatch.setattr(task, "delay", lambda audio_files: sent.update(batch_task=audio_files))
+
+        class FakeChord:
+            def __init__(self, header, callback):
+                sent["header"] = [signature.args[0] for signature in header.tasks]
+
+            def apply_async(self, task_id):
+                return type("Result", (), {"id": task_id, "parent": None})()
+
+        monkeypatch.setattr(modular_tasks, "chord", FakeChord)
+        transcription_tasks.dispatch_batch_transcription(files)
+        batch = modular_tasks.start_batch(files)
+
+        for messages in (sent["batch_task"], sent["header"]):
+            assert len(json.dumps(messages)) < 500
+            assert [message["content_ref"] for message in messages] == [store.put(f["content"]) for f in files]
+        assert batch["total_files"] == 3 and batch["status"] == "processing"
+
+    def test_batch_tasks_reject_inline_audio(self, store):
+        """Test that batch tasks refuse messages that already carried audio through the broker."""
+        inline = [{"filename": "a.wav", "content": b"RIFF"}]
+        with pytest.raises(ValueError):
+            transcription_tasks.batch_transcribe_task.apply(args=(inline,)).get()
+        with pytest.raises(ValueError):
+            transcription_tasks.extract_features_batch_task.apply(args=(inline,)).get()
+        failed = modular_tasks.batch_transcribe_audio.apply(args=(inline,)).get()
+        assert failed["status"] == "failed" and "inline audio" in failed["error"]
+
+    def test_cleanup_purges_only_staged_task_audio(self, store, tmp_path_factory, monkeypatch):
+        """Test that the cleanup task leaves claim-check blobs of the Kafka store alone."""
+        claim_check = BlobStore(str(tmp_path_factory.mktemp("claim-check")))
+        monkeypatch.setattr(modular_tasks, "task_blob_store", store)
+        monkeypatch.setattr("src.services.blob_store.blob_store", claim_check)
+        staged, referenced = store.put(b"staged audio"), claim_check.put(b"unconsumed chunk")
+        two_hours_ago = time.time() - 7200
+        for path in (store.path(staged), claim_check.path(referenced)):
+            os.utime(path, (two_hours_ago, two_hours_ago))
+
+        result = modular_tasks.cleanup_old_tasks.apply(kwargs={"max_age_hours": 1}).get()
+        assert result["cleaned_blobs"] == 1
+        assert not store.exists(staged) and claim_check.exists(referenced)
@@ -0,0 +1,188 @@
+"""
+Evaluation metrics test suite.
+"""
+import random
+
+import pytest
+
+from src.services.evaluation.metrics import (
+    character_accuracy,
+    character_error_rate,
+    edit_distance,
+    evaluate_batch,
+    evaluate_transcription,
+    word_error_counts,
+    word_error_rate,
+)
+
+
+def reference_edit_distance(s1, s2) -> int:
+    """Plain O(n*m) dynamic program, used to cross-check the fast paths"""
+    previous_row = list(range(len(s2) + 1))
+    for i, c1 in enumerate(s1):
+        current_row = [i + 1]
+        for j, c2 in enumerate(s2):
+            current_row.append(min(previous_row[j + 1] + 1, current_row[j] + 1, previous_row[j] + (c1 != c2)))
+        previous_row = current_row
+    return previous_row[-1]
+
+
+class TestEditDistance:
+    """Test the bit-parallel edit distance."""
+
+    @pytest.mark.parametrize(
+        "s1,s2,expected",
+        [
+            ("", "", 0),
+            ("abc", "", 3),
+            ("", "abc", 3),
+            ("kitten", "sitting", 3),
+            ("flaw", "lawn", 2),
+            ("same", "same", 0),
+        ],
+    )
+    def test_known_distances(self, s1, s2, expected):
+        """Test classic Levenshtein examples."""
+        assert edit_distance(s1, s2) == expected
+
+    def test_matches_reference_dynamic_program(self):
+        """Test random strings against the O(n*m) reference implementation."""
+        rng = random.Random(0)
+        for _ in range(500):
+            s1 = "".join(rng.choice("abc ") for _ in range(rng.randint(0, 80)))
+            s2 = "".join(rng.choice("abc ") for _ in range(rng.randint(0, 80)))
+            assert edit_distance(s1, s2) == reference_edit_distance(s1, s2)
+
+    def test_long_pattern(self):
+        """Test patterns longer than a machine word."""
+        s1 = "a" * 300 + "b" * 300
+        s2 = "a" * 290 + "c" * 20 + "b" * 290
+        assert edit_distance(s1, s2) == reference_edit_distance(s1, s2)
+
+
+class TestWordErrorRate:
+    """Test word-level alignment counts."""
+
+    def test_counts(self):
+        """Test substitution, deletion and insertion counts."""
+        counts = word_error_counts("the cat sat on the mat", "the bat sat on mat today")
+        assert counts.substitutions == 1
+        assert counts.deletions == 1
+        assert counts.insertions == 1
+        assert counts.errors == 3
+        assert counts.hits == 4
+        assert word_error_rate("the cat sat on the mat", "the bat sat on mat today") == pytest.approx(0.5)
+
+    def test_total_matches_edit_distance(self):
+        """Test that S+D+I equals the word edit distance."""
+        rng = random.Random(1)
+        words = ["a", "b", "c", "d"]
+        for _ in range(300):
+            ref = [rng.choice(words) for _ in range(rng.randint(0, 25))]
+            hyp = [rng.choice(words) for _ in range(rng.randint(0, 25))]
+            counts = word_error_counts(ref, hyp)
+            assert counts.errors == reference_edit_distance(ref, hyp)
+            assert counts.reference_length - counts.deletions == counts.hypothesis_length - counts.insertions
+
+    def test_empty_inputs(self):
+        """Test empty reference and hypothesis handling."""
+        assert word_error_rate("", "") == 0.0
+        assert word_error_rate("", "extra words") == 1.0
+        assert word_error_rate("two words", "") == 1.0
+
+    def test_case_and_whitespace_normalized(self):
+        """Test that case and spacing do not count as errors."""
+        assert word_error_rate("Hello  World", " hello world ") == 0.0
+        assert character_error_rate("Hello  World", "hello world") == 0.0
+
+
+class TestEvaluation:
+    """Test aggregate evaluation helpers."""
+
+    def test_evaluate_transcription(self):
+        """Test single transcription metrics."""
+        metrics = evaluate_transcription("hello world", "hello there world")
+        assert metrics["wer"] == pytest.approx(1 / 3)
+        assert metrics["word_accuracy"] == pytest.approx(2 / 3)
+        assert metrics["deletions"] == 1
+        assert 0.0 < metrics["char_accuracy"] < 1.0
+
+    def test_character_accuracy_legacy_semantics(self):
+        """Test that character accuracy keeps the 1 - distance / max_len definition."""
+        assert character_accuracy("abc", "abd") == pytest.approx(2 / 3)
+        assert character_accuracy("abc", "") == 0.0
+
+    def test_evaluate_batch(self):
+        """Test batch evaluation aggregates by reference length."""
+        result = evaluate_batch(["a b c d", "e f"], ["a b c d", "x"])
+        assert len(result["utterances"]) == 2
+        assert result["utterances"][0]["wer"] == 0.0
+        assert result["utterances"][1]["wer"] == 1.0
+        assert result["corpus"]["wer"] == pytest.approx(2 / 6)
+
+    def test_evaluate_batch_length_mismatch(self):
+        """Test that mismatched inputs are rejected."""
+        with pytest.raises(ValueError):
+            evaluate_batch(["a"], [])
+
+
+class TestEvaluationHarness:
+    """Test the offline evaluation harness with the stub backend."""
+
+    @pytest.fixture
+    def manifest(self, tmp_path):
+        """Write a small manifest with generated audio."""
+        import json
+
+        import numpy as np
+        import soundfile as sf
+
+        lines = []
+        for i in range(3):
+            path = tmp_path / f"utt{i}.wav"
+            sf.write(str(path), np.zeros(16000 * (i + 1), dtype=np.float32), 16000)
+            lines.append(json.dumps({"id": f"utt{i}", "audio_filepath": path.name, "text": "hello world"}))
+        lines.append(json.dumps({"id": "missing", "audio_filepath": "missing.wav", "text": "hello"}))
+        manifest_path = tmp_path / "manifest.jsonl"
+        manifest_path.write_text("\n".join(lines) + "\n")
+        return str(manifest_path)
+
+    def test_run_evaluation(self, manifest, tmp_path):
+        """Test scoring, RTF and failure accounting."""
+        from src.services.evaluation.harness import (
+            EvaluationConfig,
+            run_evaluation,
+            write_results,
+        )
+
+        config = EvaluationConfig(
+            backend="stub", batch_size=2, decode_workers=0, backend_options={"fixed_text": "hello world"}
+        )
+        result = run_evaluation(manifest, config)
+        summary = result["summary"]
+
+        assert summary["utterances"] == 4
+        assert summary["failed"] == 1
+        assert summary["wer"] == 0.0
+        assert summary["audio_seconds"] == pytest.approx(6.0)
+        assert "latency_p95" in summary
+
+        output = write_results(result["rows"], str(tmp_path / "results.csv"))
+        assert open(output).readline().startswith("backend,model")
+
+    def test_unknown_backend(self):
+        """Test that unknown backends are rejected."""
+        from src.services.evaluation.harness import create_backend
+
+        with pytest.raises(ValueError):
+            create_backend("does-not-exist")
+
+    def test_backend_must_implement_transcribe_batch(self):
+        """Test that a backend without transcribe_batch cannot be instantiated."""
+        from src.services.evaluation.harness import EvaluationBackend
+
+        class IncompleteBackend(EvaluationBackend):
+            name = "incomplete"
+
+        with pytest.raises(TypeError):
+            IncompleteBackend()
@@ -0,0 +1,155 @@
+"""
+Feature engine test suite.
+"""
+import librosa
+import numpy as np
+import pytest
+
+from src.services.audio_frame import AudioFrame
+from src.services.audio_preprocessing_service import (
+    AudioPreprocessingService,
+    serialize_feature_statistics,
+)
+from src.services.feature_engine import ALL_FEATURES, FeatureEngine, required_features
+
+SAMPLE_RATE = 16000
+
+
+def clip(seconds: float = 2.0, frequency: float = 220.0, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return (0.3 * np.sin(2 * np.pi * frequency * t) + 0.05 * rng.standard_normal(t.size)).astype(np.float32)
+
+
+class TestFeatureEngine:
+    """Test shared-STFT feature extraction."""
+
+    def test_matches_librosa(self):
+        """Test features against the separate librosa calls they replace."""
+        audio = clip()
+        features = FeatureEngine(SAMPLE_RATE).extract(audio)
+
+        mfccs = librosa.feature.mfcc(y=audio, sr=SAMPLE_RATE, n_mfcc=13, n_fft=2048, hop_length=512)
+        expected_mfcc = np.vstack([mfccs, librosa.feature.delta(mfccs), librosa.feature.delta(mfccs, order=2)])
+        np.testing.assert_allclose(features["mfcc"], expected_mfcc, atol=1e-4)
+
+        np.testing.assert_allclose(
+            features["spectral_centroid"], librosa.feature.spectral_centroid(y=audio, sr=SAMPLE_RATE)[0], rtol=1e-5
+        )
+        np.testing.assert_allclose(
+            features["spectral_rolloff"], librosa.feature.spectral_rolloff(y=audio, sr=SAMPLE_RATE)[0], rtol=1e-5
+        )
+        np.testing.assert_allclose(
+            features["spectral_bandwidth"], librosa.feature.spectral_bandwidth(y=audio, sr=SAMPLE_RATE)[0], rtol=1e-5
+        )
+        np.testing.assert_allclose(
+            features["zero_crossing_rate"], librosa.feature.zero_crossing_rate(audio)[0], atol=1e-7
+        )
+        np.testing.assert_allclose(features["chroma"], librosa.feature.chroma_stft(y=audio, sr=SAMPLE_RATE), atol=1e-5)
+        np.testing.assert_allclose(
+            features["tonnetz"], librosa.feature.tonnetz(chroma=features["chroma"], sr=SAMPLE_RATE), atol=1e-6
+        )
+
+    def test_lazy_subset_shares_stft(self):
+        """Test that only requested features are computed, from one STFT."""
+        feature_set = FeatureEngine(SAMPLE_RATE).analyze(clip())
+        feature_set.get("mfcc")
+        assert set(feature_set._cache) == {"stft", "magnitude", "power", "mel_db", "mfcc"}
+
+        stft = feature_set.stft
+        feature_set.extract(["spectral_centroid", "chroma"])
+        assert feature_set.stft is stft
+        assert "tonnetz" not in feature_set._cache
+
+        with pytest.raises(ValueError):
+            feature_set.get("pitch")
+
+    def test_batch_matches_single_clips(self):
+        """Test that a 2-D batch gives the per-clip results."""
+        engine = FeatureEngine(SAMPLE_RATE)
+        clips = [clip(frequency=f, seed=i) for i, f in enumerate((150.0, 220.0, 330.0))]
+        batch = engine.extract(np.stack(clips))
+
+        for index, audio in enumerate(clips):
+            single = engine.extract(audio)
+            for name in ALL_FEATURES:
+                assert batch[name].shape == (3,) + single[name].shape
+                np.testing.assert_allclose(batch[name][index], single[name], rtol=1e-5, atol=1e-5)
+
+    def test_extract_batch_groups_lengths(self):
+        """Test mixed-length clips keep their order."""
+        engine = FeatureEngine(SAMPLE_RATE)
+        clips = [clip(1.0), clip(2.0), clip(1.0, seed=1)]
+        results = engine.extract_batch(clips, ["spectral_centroid"])
+
+        assert [len(r["spectral_centroid"]) for r in results] == [32, 63, 32]
+        np.testing.assert_allclose(
+            results[1]["spectral_centroid"], engine.extract(clips[1], ["spectral_centroid"])["spectral_centroid"]
+        )
+
+    def test_preprocessing_service_uses_engine(self):
+        """Test the service keeps its output format."""
+        service = AudioPreprocessingService()
+        audio = clip()
+
+        assert service.extract_mfcc_features(audio, SAMPLE_RATE).shape == (39, 63)
+        spectral = service.extract_spectral_features(audio, SAMPLE_RATE)
+        assert set(spectral) == set(ALL_FEATURES) - {"mfcc"}
+        assert spectral["chroma"].shape == (12, 63)
+
+        batch = service.extract_features_batch([audio, audio], SAMPLE_RATE, ["mfcc"])
+        np.testing.assert_allclose(batch[0]["mfcc"], service.extract_mfcc_features(audio, SAMPLE_RATE), atol=1e-5)
+
+
+class TestFeatureRequirements:
+    """Test declarative per-consumer feature selection."""
+
+    def test_required_features(self):
+        """Test the union of consumer requirements."""
+        assert required_features("wav2vec") == ()
+        assert required_features("realtime", "mfcc") == ("mfcc",)
+        assert required_features("analytics") == ALL_FEATURES
+        with pytest.raises(ValueError):
+            required_features("dashboard")
+
+    def test_preprocessing_computes_only_requested(self):
+        """Test that the realtime path skips the STFT entirely."""
+        service = AudioPreprocessingService()
+        frame = AudioFrame.from_array(clip(), SAMPLE_RATE)
+
+        realtime = service.preprocess_audio_bytes(frame, features=required_features("realtime"))
+        assert realtime["preprocessing_successful"]
+        assert realtime["duration"] == pytest.approx(2.0)
+        assert "mfcc_features" not in realtime
+        assert realtime["spectral_features"] == {}
+        assert frame.feature("features", None)._cache == {}
+
+        analytics = service.preprocess_audio_bytes(frame, features=required_features("analytics"))
+        statistics = serialize_feature_statistics(analytics["feature_statistics"])
+        assert len(statistics["mfcc_mean"]) == 39
+        assert isinstance(statistics["spectral_centroid_mean"], float)
+        assert len(statistics["tonnetz_std"]) == 6
+
+    @pytest.mark.asyncio
+    async def test_ml_service_defers_analytics(self):
+        """Test that full features are computed off the request path."""
+        pytest.importorskip("torch")
+        from src.services.ml_transcription_service import MLTranscriptionService
+
+        records = []
+        service = MLTranscriptionService(use_wav2vec=False, analytics_sink=records.append)
+        result = await service.transcribe_audio_bytes(AudioFrame.from_array(clip(), SAMPLE_RATE))
+
+        assert result["preprocessing_used"]
+        assert "mfcc_features_shape" not in result
+        await service.wait_for_analytics()
+        assert len(records) == 1
+        assert records[0]["audio_duration"] == pytest.approx(2.0)
+        assert set(records[0]["features"]) >= {"mfcc_mean", "chroma_mean", "tonnetz_std"}
+
+        await service.stop()
+        assert service._analytics_executor is None
+
+        service.set_analytics_sink(None)
+        await service.transcribe_audio_bytes(AudioFrame.from_array(clip(), SAMPLE_RATE))
+        assert not service._analytics_tasks and service._analytics_executor is None
@@ -0,0 +1,91 @@
+"""
+Idempotency store test suite.
+"""
+import time
+
+import pytest
+
+from src.services.idempotency_store import IdempotencyStore
+from src.services.kafka_inmemory import InMemoryBroker, InMemoryKafkaProducer
+from src.services.kafka_stream_service import KafkaStreamService
+
+
+class FakeRedis:
+    """Async Redis double holding keys in a dict."""
+
+    def __init__(self):
+        self.data = {}
+
+    async def exists(self, key):
+        return int(key in self.data)
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = (value, ex)
+
+
+class TestIdempotencyStore:
+    """Test the local LRU and the shared Redis layer."""
+
+    @pytest.mark.asyncio
+    async def test_lru_eviction_and_ttl(self, monkeypatch):
+        """Test that the least recently used key is evicted and keys expire."""
+        store = IdempotencyStore(max_entries=2, ttl_seconds=60)
+        await store.mark("a")
+        await store.mark("b")
+        assert await store.seen("a")  # refreshes "a"
+        await store.mark("c")
+        assert not await store.seen("b")
+        assert await store.seen("a") and await store.seen("c")
+        assert store.stats["evictions"] == 1
+
+        now = time.monotonic()
+        monkeypatch.setattr("src.services.idempotency_store.time.monotonic", lambda: now + 61)
+        assert not await store.seen("a")
+
+    @pytest.mark.asyncio
+    async def test_keys_shared_through_redis(self):
+        """Test that a key marked by one worker is seen by another through Redis."""
+        redis = FakeRedis()
+        first, second = IdempotencyStore(ttl_seconds=30), IdempotencyStore()
+        first.redis = second.redis = redis
+        await first.mark("s1:0")
+        assert redis.data == {"voicebridge:processed:s1:0": (1, 30)}
+        assert await second.seen("s1:0")
+        assert second.get_stats()["redis_hits"] == 1
+        assert await second.seen("s1:0")  # now cached locally
+        assert second.stats["hits"] == 1
+
+
+class TestRedeliveredChunks:
+    """Test that the stream service skips chunks it has already processed."""
+
+    @pytest.mark.asyncio
+    async def test_redelivery_costs_a_lookup(self, monkeypatch):
+        """Test that a replayed chunk is neither transcribed nor published again."""
+        broker = InMemoryBroker(partitions=1)
+        service = KafkaStreamService(producer_factory=lambda **kwargs: InMemoryKafkaProducer(broker=broker, **kwargs))
+        service.idempotency_store = IdempotencyStore()
+        monkeypatch.setattr("src.services.kafka_stream_service.vad_service.enabled", False)
+        calls = []
+
+        async def transcribe(audio_data, language=None):
+            calls.append(audio_data)
+            return {"text": "hello", "confidence": 1.0, "language": "en"}
+
+        monkeypatch.setattr(service.whisper_service, "transcribe_audio_bytes", transcribe)
+        await service.start_producers()
+        for _ in range(2):
+            assert await service.send_audio_chunk("s1", "u1", b"\x01" * 64, chunk_index=7)
+        await service.flush()
+
+        chunks = [service._deserialize_audio_chunk(record.value) for record in broker.records(service.audio_topic)]
+        assert [chunk["chunk_id"] for chunk in chunks] == ["s1:7", "s1:7"]
+        for chunk in chunks + chunks:
+            await service._process_audio_chunk(chunk)
+        await service.flush()
+
+        assert len(calls) == 1
+        assert service.processing_stats["duplicate_chunks_skipped"] == 3
+        results = broker.records(service.transcription_topic)
+        assert [service._deserialize_transcription_result(r.value)["chunk_id"] for r in results] == ["s1:7"]
+        await service.stop()
@@ -0,0 +1,156 @@
+"""
+Inference worker end-to-end test suite.
+"""
+import asyncio
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.services import realtime_streaming_service as realtime_module
+from src.services.kafka_inmemory import (
+    InMemoryBroker,
+    InMemoryKafkaConsumer,
+    InMemoryKafkaProducer,
+)
+from src.services.kafka_stream_service import KafkaStreamService
+from src.services.vad_service import vad_service
+from src.workers.inference_worker import InferenceWorker
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, data):
+        self.sent.append(data)
+
+
+def make_service(broker: InMemoryBroker) -> KafkaStreamService:
+    return KafkaStreamService(
+        producer_factory=lambda **kwargs: InMemoryKafkaProducer(broker=broker, **kwargs),
+        consumer_factory=lambda **kwargs: InMemoryKafkaConsumer(broker=broker, **kwargs),
+    )
+
+
+async def wait_for(condition, timeout: float = 3.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not reached"
+        await asyncio.sleep(0.01)
+
+
+class TestInferenceWorker:
+    """Test API nodes offloading transcription to a Kafka inference worker."""
+
+    @pytest.mark.asyncio
+    async def test_results_routed_back_to_sessions(self, monkeypatch):
+        """Test that audio from two sessions is transcribed by the worker and delivered to the right queue."""
+        monkeypatch.setattr("config.settings.inference_mode", "kafka")
+        monkeypatch.setattr("config.settings.kafka_commit_interval_ms", 1)
+        monkeypatch.setattr(vad_service, "enabled", False)
+        broker = InMemoryBroker(partitions=2)
+
+        api = make_service(broker)
+        monkeypatch.setattr(realtime_module, "kafka_stream_service", api)
+        realtime = realtime_module.RealtimeStreamingService()
+
+        async def no_local_inference(audio_data, language=None):
+            raise AssertionError("the API node must not transcribe")
+
+        async def transcribe(audio_data, language=None):
+            await asyncio.sleep(0.01)
+            return {"text": audio_data.decode(), "confidence": 0.9, "language": "en"}
+
+        monkeypatch.setattr(api.whisper_service, "transcribe_audio_bytes", no_local_inference)
+        monkeypatch.setattr(realtime.whisper_service, "transcribe_audio_bytes", no_local_inference)
+        worker_service = make_service(broker)
+        monkeypatch.setattr(worker_service.whisper_service, "transcribe_audio_bytes", transcribe)
+
+        assert await api.start()
+        assert api.consumer is None and api.result_consumer is not None
+        assert api.result_consumer.group_id is None  # no per-node group left on the broker
+        worker = InferenceWorker(worker_service, concurrency=2)
+        assert await worker.start()
+
+        sessions = {"session-a": ["one", "two", "three"], "session-b": ["uno", "dos"]}
+        tasks = []
+        for session_id, words in sessions.items():
+            connection_id = f"conn-{session_id}"
+            realtime.active_connections[connection_id] = FakeWebSocket()
+            realtime.connection_sessions[connection_id] = {"transcriptions_sent": 0}
+            realtime.session_connections[session_id] = {connection_id}
+            realtime.text_queue[session_id] = asyncio.Queue()
+            realtime.audio_buffers[session_id] = [word.encode() for word in words]
+            tasks.append(asyncio.create_task(realtime._process_audio_stream(session_id, connection_id)))
+
+        try:
+            await wait_for(lambda: realtime.stats["total_transcriptions"] == 5)
+            for session_id, words in sessions.items():
+                queue = realtime.text_queue[session_id]
+                assert [queue.get_nowait()["text"] for _ in words] == words
+                assert queue.empty()
+                assert realtime.connection_sessions[f"conn-{session_id}"]["transcriptions_sent"] == len(words)
+        finally:
+            realtime.active_connections.clear()
+            await asyncio.gather(*tasks)
+            await worker.stop()
+            await api.stop()
+
+        assert len(broker.records(api.audio_topic)) == 5
+        assert len(broker.records(api.transcription_topic)) == 5
+        assert api.processing_stats["results_received"] == 5
+        assert worker_service.processing_stats["successful_transcriptions"] == 5
+
+    def test_ws_endpoint_offloads_to_worker(self, monkeypatch):
+        """Test that /ws sends its audio to the worker and the result comes back on the same socket."""
+        import main
+
+        monkeypatch.setattr("config.settings.inference_mode", "kafka")
+        monkeypatch.setattr("config.settings.kafka_commit_interval_ms", 1)
+        monkeypatch.setattr(vad_service, "enabled", False)
+        broker = InMemoryBroker(partitions=2)
+        api = main.kafka_stream_service
+        monkeypatch.setattr(api, "producer_factory", lambda **kwargs: InMemoryKafkaProducer(broker=broker, **kwargs))
+        monkeypatch.setattr(api, "consumer_factory", lambda **kwargs: InMemoryKafkaConsumer(broker=broker, **kwargs))
+
+        async def no_local_inference(audio_data, language=None):
+            raise AssertionError("the API node must not transcribe")
+
+        async def transcribe(audio_data, language=None):
+            return {"text": audio_data.decode(), "confidence": 0.9, "language": "en"}
+
+        monkeypatch.setattr(main.whisper_service, "transcribe_audio_bytes", no_local_inference)
+        monkeypatch.setattr(api.whisper_service, "transcribe_audio_bytes", no_local_inference)
+        worker_service = make_service(broker)
+        monkeypatch.setattr(worker_service.whisper_service, "transcribe_audio_bytes", transcribe)
+        worker = InferenceWorker(worker_service, concurrency=2)
+
+        async def start():
+            assert await api.start()
+            assert await worker.start()
+
+        async def stop():
+            await worker.stop()
+            await api.stop()
+
+        with TestClient(main.app) as client:
+            client.portal.call(start)
+            try:
+                with client.websocket_connect("/ws/kafka_client") as websocket:
+                    for word in ("hello", "world"):
+                        websocket.send_bytes(word.encode())
+                    # Results may overtake the second acknowledgment
+                    messages = [websocket.receive_json() for _ in range(4)]
+                assert [m["type"] for m in messages].count("acknowledgment") == 2
+                assert [m["text"] for m in messages if m["type"] == "transcription"] == ["hello", "world"]
+                deadline = time.monotonic() + 3.0
+                while main.kafka_sessions:  # the server closes the session after the disconnect
+                    assert time.monotonic() < deadline, "session not closed"
+                    time.sleep(0.01)
+            finally:
+                client.portal.call(stop)
+
+        chunks = [api._deserialize_audio_chunk(record.value) for record in broker.records(api.audio_topic)]
+        assert [chunk["chunk_index"] for chunk in chunks] == [0, 1, 2]
+        assert chunks[-1]["is_final"] and not main.kafka_sessions
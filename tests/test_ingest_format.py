@@ -0,0 +1,166 @@
+"""
+Negotiated ingest format test suite.
+"""
+import io
+import json
+
+import numpy as np
+import pytest
+import soundfile as sf
+from fastapi.testclient import TestClient
+
+from src.services.ingest_format import IngestFormat, PCMRingBuffer, RawFrameDecoder
+from src.services.vad_service import VADConfig, VADService
+
+SAMPLE_RATE = 16000
+
+
+def speech_then_pause() -> np.ndarray:
+    """One second of harmonic tone between quiet noise."""
+    rng = np.random.default_rng(0)
+    t = np.arange(SAMPLE_RATE) / SAMPLE_RATE
+    tone = 0.2 * sum(np.sin(2 * np.pi * 140 * k * t) / k for k in range(1, 8))
+    quiet = rng.standard_normal(SAMPLE_RATE) * 0.001
+    return np.concatenate([quiet, tone, quiet]).astype(np.float32)
+
+
+def frames(audio: np.ndarray, frame_ms: float = 20.0, sample_rate: int = SAMPLE_RATE):
+    pcm = (audio * 32767).astype("<i2").tobytes()
+    size = int(sample_rate * frame_ms / 1000) * 2
+    return [pcm[i : i + size] for i in range(0, len(pcm), size)]
+
+
+class TestIngestFormat:
+    """Test handshake parsing and the ring buffer."""
+
+    def test_handshake_validation(self):
+        """Test accepted handshakes, aliases and rejected values."""
+        declared = IngestFormat.from_handshake({"codec": "S16LE", "sample_rate": 48000, "channels": 2, "frame_ms": 10})
+        assert declared == IngestFormat("pcm_s16le", 48000, 2, 10.0)
+        assert declared.is_raw
+        assert not IngestFormat.from_handshake({}).is_raw
+
+        for bad in ({"codec": "mp3"}, {"sample_rate": 100}, {"channels": 0}, {"frame_ms": 500}, {"channels": "x"}):
+            with pytest.raises(ValueError):
+                IngestFormat.from_handshake(bad)
+
+        assert IngestFormat.from_chunk("pcm_f32le", 16000, 1) == IngestFormat("pcm_f32le", 16000, 1)
+        assert IngestFormat.from_chunk("wav", 16000, 1) is None
+        assert IngestFormat.from_chunk("", 0, 0) is None
+
+    def test_ring_buffer_wraps_and_drops_oldest(self):
+        """Test wrap-around reads and overwrite on overflow."""
+        ring = PCMRingBuffer(8)
+        ring.write(np.arange(6, dtype=np.float32))
+        np.testing.assert_array_equal(ring.read(4), [0, 1, 2, 3])
+        ring.write(np.arange(6, 12, dtype=np.int16), scale=0.5)
+        np.testing.assert_array_equal(ring.read(100), [4, 5, 3, 3.5, 4, 4.5, 5, 5.5])
+
+        ring.write(np.arange(11, dtype=np.float32))
+        assert ring.dropped == 3
+        np.testing.assert_array_equal(ring.read(8), np.arange(3, 11))
+
+    def test_raw_decoder_carries_partial_samples(self):
+        """Test stereo int16 split mid-sample across messages."""
+        stereo = (np.stack([np.arange(100), -np.arange(100)], axis=1) * 100).astype("<i2").tobytes()
+        decoder = RawFrameDecoder(IngestFormat("pcm_s16le", SAMPLE_RATE, 2), capacity=1000)
+        decoder.write(stereo[:7])
+        decoder.write(stereo[7:])
+        np.testing.assert_array_equal(decoder.ring.read(1000), np.zeros(100, dtype=np.float32))
+
+        with pytest.raises(ValueError):
+            RawFrameDecoder(IngestFormat(), capacity=10)
+
+
+class TestRawIngestGate:
+    """Test the VAD gate on negotiated raw frames."""
+
+    def test_raw_frames_match_container_path(self):
+        """Test that 20 ms PCM frames give the same segment as WAV chunks."""
+        audio = speech_then_pause()
+        pcm16 = IngestFormat("pcm_s16le", SAMPLE_RATE, 1)
+
+        raw_vad = VADService(VADConfig(), enabled=True)
+        raw = [p for frame in frames(audio) for p in raw_vad.gate("raw", frame, ingest_format=pcm16)]
+        raw += raw_vad.gate("raw", b"", final=True, ingest_format=pcm16)
+
+        wav_vad = VADService(VADConfig(), enabled=True)
+        buffer = io.BytesIO()
+        sf.write(buffer, audio, SAMPLE_RATE, format="WAV", subtype="PCM_16")
+        wav = wav_vad.gate("wav", buffer.getvalue(), final=True)
+
+        assert len(raw) == len(wav) == 1
+        np.testing.assert_allclose(sf.read(io.BytesIO(raw[0]))[0], sf.read(io.BytesIO(wav[0]))[0], atol=1e-4)
+
+    def test_resampled_and_disabled_paths(self):
+        """Test 48 kHz float frames and WAV wrapping when the gate is disabled."""
+        audio = speech_then_pause()
+        high = np.repeat(audio, 3)  # crude 48 kHz version; the VAD resamples it
+        f32 = IngestFormat("pcm_f32le", 48000, 1)
+        vad = VADService(VADConfig(), enabled=True)
+        payloads = []
+        for start in range(0, high.size, 960):
+            payloads += vad.gate("s", high[start : start + 960].tobytes(), ingest_format=f32)
+        payloads += vad.gate("s", b"", final=True, ingest_format=f32)
+        assert len(payloads) == 1
+
+        disabled = VADService(VADConfig(), enabled=False)
+        pcm16 = IngestFormat("pcm_s16le", SAMPLE_RATE, 1)
+        assert disabled.gate("d", frames(audio)[0], ingest_format=pcm16) == []
+        wrapped = disabled.gate("d", b"", final=True, ingest_format=pcm16)
+        decoded, rate = sf.read(io.BytesIO(wrapped[0]))
+        assert rate == SAMPLE_RATE and decoded.size == 320
+
+    def test_disabled_gate_batches_frames_and_survives_bad_frames(self, monkeypatch):
+        """Test that ungated raw frames go out in chunks of INGEST_MIN_CHUNK_SECONDS and decode errors are dropped."""
+        monkeypatch.setattr("config.settings.ingest_min_chunk_seconds", 0.5)
+        audio = speech_then_pause()  # 3 s = 150 frames of 20 ms
+        pcm16 = IngestFormat("pcm_s16le", SAMPLE_RATE, 1)
+        disabled = VADService(VADConfig(), enabled=False)
+        payloads = [p for frame in frames(audio) for p in disabled.gate("d", frame, ingest_format=pcm16)]
+        assert len(payloads) == 6
+        assert all(sf.read(io.BytesIO(p))[0].size == SAMPLE_RATE // 2 for p in payloads)
+
+        good = frames(audio)[0]
+        disabled.gate("bad", good, ingest_format=pcm16)
+        decoder = disabled.sessions["bad"].raw_decoder
+
+        def fail(payload):
+            raise ValueError("corrupt packet")
+
+        monkeypatch.setattr(decoder, "write", fail)
+        assert disabled.gate("bad", good, ingest_format=pcm16) == []
+        assert disabled.stats["undecodable_chunks"] == 1
+        final = disabled.gate("bad", b"", final=True, ingest_format=pcm16)
+        assert sf.read(io.BytesIO(final[0]))[0].size == 320
+        assert "bad" not in disabled.sessions
+
+    def test_disabled_gate_passes_through_undecodable_codec(self, monkeypatch):
+        """Test that frames of a codec that cannot be decoded here are passed through and counted."""
+        disabled = VADService(VADConfig(), enabled=False)
+        monkeypatch.setattr(disabled, "_raw_decoder", lambda session_id, ingest_format: None)
+        opus = IngestFormat("opus", 48000, 1)
+
+        assert disabled.gate("o", b"packet", ingest_format=opus) == [b"packet"]
+        assert disabled.gate("o", b"", final=True, ingest_format=opus) == []
+        assert disabled.stats["undecodable_chunks"] == 1
+
+
+class TestWebSocketHandshake:
+    """Test format negotiation over /ws."""
+
+    def test_handshake_ack_and_error(self):
+        """Test that a valid handshake is acknowledged and an invalid one reported."""
+        from main import app
+
+        with TestClient(app).websocket_connect("/ws/handshake_client") as websocket:
+            websocket.send_text(json.dumps({"type": "handshake", "codec": "pcm_s16le", "sample_rate": 48000}))
+            ack = websocket.receive_json()
+            assert ack["type"] == "handshake_ack"
+            assert ack["codec"] == "pcm_s16le" and ack["sample_rate"] == 48000
+
+            websocket.send_text(json.dumps({"type": "handshake", "codec": "aac"}))
+            assert websocket.receive_json()["type"] == "error"
+
+            websocket.send_bytes(frames(speech_then_pause(), sample_rate=48000)[0])
+            assert websocket.receive_json()["type"] == "acknowledgment"
@@ -0,0 +1,286 @@
+"""
+Job queue test suite.
+"""
+import asyncio
+import time
+
+import pytest
+
+from src.services.job_queue import (
+    FAILURE,
+    PROGRESS,
+    REVOKED,
+    SUCCESS,
+    JobQueue,
+    MemoryJobBackend,
+    SQLiteJobBackend,
+)
+
+
+async def wait_for(condition, timeout: float = 2.0):
+    deadline = time.monotonic() + timeout
+    while not await condition():
+        assert time.monotonic() < deadline, "condition not reached"
+        await asyncio.sleep(0.005)
+
+
+async def finished(queue: JobQueue, job_id: str):
+    async def ready():
+        job = await queue.get(job_id)
+        return job is not None and job["state"] in (SUCCESS, FAILURE, REVOKED)
+
+    await wait_for(ready)
+    return await queue.get(job_id)
+
+
+class TestJobQueue:
+    """Test ordering, progress, results and cancellation."""
+
+    @pytest.mark.asyncio
+    async def test_priority_order_and_concurrency_limit(self):
+        """Test that higher priorities start first and no more than the limit run at once."""
+        queue = JobQueue(backend=MemoryJobBackend(), concurrency=2)
+        gate = asyncio.Event()
+        started, running = [], {"now": 0, "max": 0}
+
+        @queue.task("work")
+        async def work(job, label):
+            started.append(label)
+            running["now"] += 1
+            running["max"] = max(running["max"], running["now"])
+            await gate.wait()
+            running["now"] -= 1
+            return label
+
+        blockers = [await queue.submit("work", f"blocker{i}") for i in range(2)]
+        await asyncio.sleep(0.01)
+        low = await queue.submit("work", "low", priority=0)
+        high = await queue.submit("work", "high", priority=5)
+        assert (await queue.get(high))["state"] == "PENDING"
+        gate.set()
+
+        for job_id in blockers + [low, high]:
+            assert (await finished(queue, job_id))["state"] == SUCCESS
+        assert started == ["blocker0", "blocker1", "high", "low"]
+        assert running["max"] == 2
+        assert (await queue.get(high))["result"] == "high"
+        await queue.stop()
+
+    @pytest.mark.asyncio
+    async def test_progress_failure_and_result_ttl(self, monkeypatch):
+        """Test Celery-style progress meta, failures, executor handlers and result expiry."""
+        queue = JobQueue(backend=MemoryJobBackend(), result_ttl=60)
+        step = asyncio.Event()
+
+        @queue.task("async_job")
+        async def async_job(job):
+            job.update_state(state="PROGRESS", meta={"progress": 50, "status": "Transcribing audio"})
+            await step.wait()
+            return {"transcription": "hello"}
+
+        @queue.task("sync_job")
+        def sync_job(job, value):
+            job.update_state(state="PROGRESS", meta={"progress": 10, "status": "Processing audio"})
+            if value < 0:
+                raise ValueError("negative")
+            return value * 2
+
+        job_id = await queue.submit("async_job")
+        await asyncio.sleep(0.02)
+        job = await queue.get(job_id)
+        assert job["state"] == PROGRESS and job["meta"] == {"progress": 50, "status": "Transcribing audio"}
+        step.set()
+        job = await finished(queue, job_id)
+        assert job["result"] == {"transcription": "hello"}
+        assert job["meta"] == {"progress": 100, "result": {"transcription": "hello"}}
+
+        assert (await finished(queue, await queue.submit("sync_job", 21)))["result"] == 42
+        failed = await finished(queue, await queue.submit("sync_job", -1))
+        assert failed["state"] == FAILURE and failed["error"] == "negative"
+        assert queue.get_stats()["failed"] == 1
+
+        now = time.time()
+        monkeypatch.setattr("src.services.job_queue.time.time", lambda: now + 61)
+        assert await queue.get(job_id) is None
+        await queue.stop()
+
+    @pytest.mark.asyncio
+    async def test_cancel_queued_and_running_jobs(self):
+        """Test that a revoked queued job never starts and a running one is cancelled."""
+        queue = JobQueue(backend=MemoryJobBackend(), concurrency=1)
+        ran = []
+
+        @queue.task("sleep")
+        async def sleep(job, label):
+            ran.append(label)
+            await asyncio.sleep(10)
+
+        running = await queue.submit("sleep", "running")
+        queued = await queue.submit("sleep", "queued")
+        await asyncio.sleep(0.01)
+        assert await queue.cancel(queued)
+        assert await queue.cancel(running)
+        assert not await queue.cancel(running)
+
+        after = await queue.submit("sleep", "after")
+        await asyncio.sleep(0.01)
+        assert ran == ["running", "after"]
+        assert (await queue.get(running))["state"] == REVOKED
+        assert (await queue.get(queued))["state"] == REVOKED
+        assert await queue.cancel(after)
+        assert queue.stats["revoked"] == 3
+        await queue.stop()
+
+    @pytest.mark.asyncio
+    async def test_backend_errors_fail_the_job_not_the_worker(self):
+        """Test that a failing backend save marks the job failed and the worker keeps running."""
+
+        class FlakyBackend(MemoryJobBackend):
+            fail_states = set()
+
+            async def save(self, record):
+                if record.state in self.fail_states:
+                    raise ConnectionError("redis unavailable")
+                await super().save(record)
+
+        backend = FlakyBackend()
+        queue = JobQueue(backend=backend, concurrency=1)
+
+        @queue.task("echo")
+        async def echo(job, value):
+            return value
+
+        backend.fail_states = {PROGRESS}
+        on_start = await finished(queue, await queue.submit("echo", 1))
+        backend.fail_states = {SUCCESS}
+        on_finish = await finished(queue, await queue.submit("echo", 2))
+        backend.fail_states = set()
+        healthy = await finished(queue, await queue.submit("echo", 3))
+
+        for job in (on_start, on_finish):
+            assert job["state"] == FAILURE
+            assert job["error"] == "Job backend error: redis unavailable"
+        assert healthy["state"] == SUCCESS and healthy["result"] == 3
+        await queue.stop()
+
+    @pytest.mark.asyncio
+    async def test_sqlite_backend_shared_between_queues(self, tmp_path):
+        """Test that another process's queue can read a job's state from SQLite."""
+        path = str(tmp_path / "jobs.db")
+        producer = JobQueue(backend=SQLiteJobBackend(path))
+
+        @producer.task("echo")
+        async def echo(job, value):
+            return {"value": value}
+
+        job_id = await producer.submit("echo", "x")
+        await finished(producer, job_id)
+        reader = JobQueue(backend=SQLiteJobBackend(path))
+        job = await reader.get(job_id)
+        assert job["state"] == SUCCESS and job["result"] == {"value": "x"}
+        assert await reader.get("missing") is None
+        await producer.stop()
+
+
+class TestJobGroups:
+    """Test fan-out of job groups and aggregation of their results."""
+
+    @pytest.mark.asyncio
+    async def test_group_progress_and_partial_failure(self):
+        """Test that group progress follows its jobs and failures are aggregated, not fatal."""
+        from src.tasks.transcription_jobs import summarize_batch
+
+        queue = JobQueue(backend=MemoryJobBackend(), concurrency=2)
+        gates = {name: asyncio.Event() for name in ("a.wav", "b.wav", "c.wav")}
+
+        @queue.task("transcribe")
+        async def transcribe(job, filename):
+            await gates[filename].wait()
+            if filename == "b.wav":
+                raise RuntimeError("decode failed")
+            return {"filename": filename, "transcription": filename[0], "confidence": 0.9, "audio_duration": 2.0}
+
+        files = [("a.wav",), ("b.wav",), ("c.wav",)]
+        group_id = await queue.submit_group("transcribe", files, aggregate=summarize_batch)
+        gates["a.wav"].set()
+        gates["b.wav"].set()
+
+        async def two_finished():
+            return (await queue.get(group_id))["meta"]["progress"] == 66
+
+        await wait_for(two_finished)
+        meta = (await queue.get(group_id))["meta"]
+        assert meta == {"progress": 66, "status": "2/3 jobs finished", "total": 3, "completed": 1, "failed": 1}
+
+        gates["c.wav"].set()
+        group = await finished(queue, group_id)
+        result = group["result"]
+        assert group["state"] == SUCCESS and result["status"] == "partial"
+        assert (result["total_files"], result["succeeded"], result["failed"]) == (3, 2, 1)
+        assert [entry["status"] for entry in result["results"]] == ["completed", "failed", "completed"]
+        assert result["results"][1]["error"] == "decode failed"
+        assert result["audio_seconds"] == 4.0 and result["files_per_second"] > 0
+        await queue.stop()
+
+    @pytest.mark.asyncio
+    async def test_cancel_group_and_all_failed(self):
+        """Test that cancelling a group revokes its jobs and that a group fails only if every job failed."""
+        queue = JobQueue(backend=MemoryJobBackend(), concurrency=1)
+
+        @queue.task("sleep")
+        async def sleep(job, seconds):
+            await asyncio.sleep(seconds)
+            if seconds < 0:
+                raise ValueError("negative")
+
+        group_id = await queue.submit_group("sleep", [(10,), (10,)])
+        await asyncio.sleep(0.01)
+        assert await queue.cancel(group_id)
+        group = await finished(queue, group_id)
+        assert group["state"] == REVOKED
+        assert [outcome["status"] for outcome in group["result"]["results"]] == ["cancelled", "cancelled"]
+        assert not await queue.cancel(group_id)
+
+        failed = await finished(queue, await queue.submit_group("sleep", [(-1,), (-1,)]))
+        assert failed["state"] == FAILURE and failed["error"] == "All 2 jobs failed"
+        with pytest.raises(ValueError):
+            await queue.submit_group("sleep", [])
+        await queue.stop()
+
+
+class TestTranscribeTaskEndpoint:
+    """Test GET and DELETE /transcribe/{task_id} on the job queue."""
+
+    @pytest.mark.asyncio
+    async def test_status_result_and_cancel(self, monkeypatch):
+        """Test that the endpoints report progress, results and cancellation."""
+        import main
+
+        queue = JobQueue(backend=MemoryJobBackend(), concurrency=1)
+        step = asyncio.Event()
+
+        @queue.task("transcribe_audio")
+        async def transcribe(job, audio_bytes, filename):
+            job.update_state(state="PROGRESS", meta={"progress": 50, "status": "Transcribing audio"})
+            await step.wait()
+            return {"transcription": audio_bytes.decode(), "filename": filename}
+
+        monkeypatch.setattr(main, "job_queue", queue)
+        job_id = await queue.submit("transcribe_audio", b"hello", "a.wav")
+        other = await queue.submit("transcribe_audio", b"bye", "b.wav")
+        await asyncio.sleep(0.01)
+
+        response = await main.get_transcription_result(job_id)
+        assert response["status"] == "processing" and response["meta"]["progress"] == 50
+        assert await main.cancel_transcription(other) == {"task_id": other, "cancelled": True}
+        assert (await main.get_transcription_result(other))["status"] == "cancelled"
+
+        step.set()
+        await finished(queue, job_id)
+        response = await main.get_transcription_result(job_id)
+        assert response == {
+            "task_id": job_id,
+            "status": "completed",
+            "result": {"transcription": "hello", "filename": "a.wav"},
+        }
+        await queue.stop()
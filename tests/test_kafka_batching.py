@@ -0,0 +1,186 @@
+"""
+Batched Kafka production test suite.
+"""
+import asyncio
+import io
+import json
+
+import avro.schema
+import pytest
+from avro.io import BinaryEncoder, DatumWriter
+
+from src.services.avro_codec import AvroCodec
+from src.services.kafka_inmemory import InMemoryBroker, InMemoryKafkaProducer
+from src.services.kafka_stream_service import (
+    AUDIO_CHUNK_SCHEMA,
+    TRANSCRIPTION_RESULT_SCHEMA,
+    KafkaStreamService,
+    resolve_compression,
+)
+
+
+def make_service(broker: InMemoryBroker) -> KafkaStreamService:
+    def factory(**kwargs):
+        return InMemoryKafkaProducer(broker=broker, **kwargs)
+
+    return KafkaStreamService(producer_factory=factory)
+
+
+def transcription_result(session_id: str = "s1") -> dict:
+    return {
+        "session_id": session_id,
+        "user_id": "u1",
+        "chunk_id": "c1",
+        "text": "hello world",
+        "confidence": 0.5,
+        "language": "en",
+        "timestamp": 1,
+        "processing_time": 0.25,
+        "model_name": "whisper",
+        "status": "success",
+        "error_message": None,
+    }
+
+
+class TestAvroCodec:
+    """Test the cached Avro codec."""
+
+    def test_matches_avro_library(self):
+        """Test that the compiled codec writes the same bytes as avro's DatumWriter and reads them back."""
+        audio_chunk = {
+            "session_id": "sessi\u00f6n",
+            "user_id": "u1",
+            "chunk_id": "c1",
+            "audio_data": bytes(range(256)) * 3,
+            "sample_rate": 48000,
+            "channels": 2,
+            "format": "pcm_s16le",
+            "timestamp": 1_700_000_000_000,
+            "language": "tr",
+            "chunk_index": -5,
+            "is_final": True,
+            "audio_data_ref": "sha256:" + "0" * 64,
+        }
+        failed = {**transcription_result(), "status": "error", "error_message": "timeout"}
+        cases = [(AUDIO_CHUNK_SCHEMA, audio_chunk)]
+        cases += [(TRANSCRIPTION_RESULT_SCHEMA, transcription_result()), (TRANSCRIPTION_RESULT_SCHEMA, failed)]
+        for schema, record in cases:
+            codec = AvroCodec(schema)
+            assert codec.backend in ("compiled", "fastavro")
+            expected = io.BytesIO()
+            DatumWriter(avro.schema.parse(json.dumps(schema))).write(record, BinaryEncoder(expected))
+
+            encoded = codec.encode(record)
+            assert encoded == expected.getvalue()
+            assert codec.decode(encoded) == record
+
+        with pytest.raises(Exception):
+            AvroCodec(TRANSCRIPTION_RESULT_SCHEMA).encode({**transcription_result(), "text": None})
+
+    def test_compression_fallback(self):
+        """Test codec name resolution and fallback when a library is missing."""
+        from src.services import kafka_stream_service
+
+        assert resolve_compression("none") is None
+        assert resolve_compression("GZIP") == "gzip"
+        assert resolve_compression("brotli") is None
+        if kafka_stream_service.kafka_codec is not None and not kafka_stream_service.kafka_codec.has_lz4():
+            assert resolve_compression("lz4") is None
+
+
+class TestBatchedProduction:
+    """Test linger batching and background delivery."""
+
+    @pytest.mark.asyncio
+    async def test_sends_are_batched_and_confirmed_in_background(self, monkeypatch):
+        """Test that queued chunks share one batch per partition and resolve on flush."""
+        monkeypatch.setattr("config.settings.kafka_linger_ms", 1000)
+        broker = InMemoryBroker(partitions=1)
+        service = make_service(broker)
+        assert await service.start_producers()
+
+        for index in range(20):
+            assert await service.send_audio_chunk("s1", "u1", b"\x00" * 320, format="pcm_s16le", chunk_index=index)
+        # Queued, not delivered: linger keeps the batch open
+        assert service.delivery_stats == {"enqueued": 20, "delivered": 0, "failed": 0}
+        assert broker.records(service.audio_topic) == []
+
+        await service.flush()
+        stats = await service.get_processing_stats()
+        assert stats["delivery"] == {"enqueued": 20, "delivered": 20, "failed": 0, "pending": 0}
+        assert broker.stats["batches"] == 1
+
+        records = broker.records(service.audio_topic)
+        decoded = [service._deserialize_audio_chunk(record.value) for record in records]
+        assert [chunk["chunk_index"] for chunk in decoded] == list(range(20))
+        assert records[0].key == b"s1"
+        await service.stop()
+
+    @pytest.mark.asyncio
+    async def test_batch_size_limit_and_per_topic_codecs(self, monkeypatch):
+        """Test max_batch_size splitting, per-topic producers and result serialization."""
+        monkeypatch.setattr("config.settings.kafka_linger_ms", 1000)
+        monkeypatch.setattr("config.settings.kafka_max_batch_size", 1000)
+        broker = InMemoryBroker(partitions=1)
+        service = make_service(broker)
+        await service.start_producers()
+        assert service.topic_compression[service.audio_topic] is None
+        assert service.topic_compression[service.transcription_topic] == "gzip"
+        assert len(service._producers) == 2
+
+        for _ in range(5):
+            await service.send_audio_chunk("s1", "u1", b"\x01" * 400)
+        await asyncio.sleep(0)
+        # The third chunk pushes the open batch past 1000 bytes and sends it before linger expires
+        assert broker.stats["batches"] == 1
+
+        await service._send_transcription_result(transcription_result())
+        await service.flush()
+        assert broker.stats["batches"] == 3
+        results = broker.records(service.transcription_topic)
+        assert len(results) == 1
+        assert service.transcription_codec.decode(results[0].value) == transcription_result()
+        await service.stop()
+        assert service.producer is None
+
+
+class TestTranscriptionResultEvents:
+    """Test that results are published as events and never re-enter the audio pipeline."""
+
+    @pytest.mark.asyncio
+    async def test_realtime_results_go_to_transcription_topic(self, monkeypatch):
+        """Test that a realtime result is one TranscriptionResult event and no audio message."""
+        from src.services import realtime_streaming_service as realtime
+
+        broker = InMemoryBroker(partitions=1)
+        service = make_service(broker)
+        await service.start_producers()
+        monkeypatch.setattr(realtime, "kafka_stream_service", service)
+
+        result = {"text": "merhaba", "confidence": 0.9, "language": "tr"}
+        await realtime.realtime_streaming_service._send_transcription_result("s1", result, 0.5)
+        await service.flush()
+
+        assert broker.records(service.audio_topic) == []
+        events = [service.transcription_codec.decode(r.value) for r in broker.records(service.transcription_topic)]
+        assert len(events) == 1
+        assert events[0]["text"] == "merhaba" and events[0]["language"] == "tr"
+        assert events[0]["status"] == "success" and events[0]["error_message"] is None
+        assert events[0]["chunk_id"]
+        await service.stop()
+
+    @pytest.mark.asyncio
+    async def test_empty_chunks_are_not_transcribed(self, monkeypatch):
+        """Test that an empty, non-final chunk is skipped before the model."""
+        service = make_service(InMemoryBroker(partitions=1))
+        calls = []
+
+        async def transcribe(audio_data, language=None):
+            calls.append(audio_data)
+            return {"text": "x", "confidence": 1.0}
+
+        monkeypatch.setattr(service.whisper_service, "transcribe_audio_bytes", transcribe)
+        assert not await service.publish_transcription_result("s1", "u1", "not started")
+        assert await service.send_audio_chunk("s1", "u1", b"")
+        assert calls == []
+        assert service.processing_stats["empty_chunks_skipped"] == 1
@@ -0,0 +1,392 @@
+"""
+Kafka consumer engine test suite.
+"""
+import asyncio
+import time
+
+import numpy as np
+import pytest
+
+from src.services import kafka_stream_service as stream_module
+from src.services.idempotency_store import IdempotencyStore
+from src.services.kafka_consumer_engine import DEFERRED, ConcurrentConsumer
+from src.services.kafka_inmemory import (
+    InMemoryBroker,
+    InMemoryKafkaConsumer,
+    InMemoryKafkaProducer,
+    TopicPartition,
+)
+from src.services.kafka_stream_service import KafkaStreamService
+from src.services.vad_service import VADService
+
+TOPIC = "audio"
+SAMPLE_RATE = 16000
+
+
+async def produce(broker: InMemoryBroker, keys, per_key: int):
+    producer = InMemoryKafkaProducer(broker=broker, key_serializer=str.encode)
+    await producer.start()
+    for index in range(per_key):
+        for key in keys:
+            await producer.send(TOPIC, key=key, value=f"{key}:{index}".encode())
+    await producer.stop()
+
+
+async def start_engine(broker: InMemoryBroker, handler, **kwargs):
+    consumer = InMemoryKafkaConsumer(broker=broker, group_id="test", key_deserializer=bytes.decode)
+    engine = ConcurrentConsumer(consumer, handler, poll_timeout_ms=5, commit_interval_ms=1, **kwargs)
+    consumer.subscribe([TOPIC], listener=engine.rebalance_listener)
+    await consumer.start()
+    return consumer, engine, asyncio.create_task(engine.run())
+
+
+def speech_chunks(seconds: float = 0.5):
+    """Raw PCM chunks of one second of quiet noise, one second of harmonic tone and one more of noise."""
+    rng = np.random.default_rng(0)
+    t = np.arange(SAMPLE_RATE) / SAMPLE_RATE
+    tone = 0.2 * sum(np.sin(2 * np.pi * 140 * k * t) / k for k in range(1, 8))
+    quiet = rng.standard_normal(SAMPLE_RATE) * 0.001
+    pcm = (np.concatenate([quiet, tone, quiet]) * 32767).astype("<i2").tobytes()
+    size = int(SAMPLE_RATE * seconds) * 2
+    return [pcm[i : i + size] for i in range(0, len(pcm), size)]
+
+
+async def wait_for(condition, timeout: float = 2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not reached"
+        await asyncio.sleep(0.005)
+
+
+class TestConcurrentConsumer:
+    """Test ordering, concurrency, commits and backpressure."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_across_keys_ordered_within_key(self):
+        """Test that three sessions run in parallel while each stays in order."""
+        broker = InMemoryBroker(partitions=1)
+        await produce(broker, ["a", "b", "c"], per_key=4)
+        seen = []
+        running = {"now": 0, "max": 0}
+
+        async def handler(record):
+            running["now"] += 1
+            running["max"] = max(running["max"], running["now"])
+            await asyncio.sleep(0.05)
+            running["now"] -= 1
+            seen.append(record.value.decode())
+
+        start = time.perf_counter()
+        consumer, engine, task = await start_engine(broker, handler, concurrency=4)
+        await wait_for(lambda: len(seen) == 12)
+        elapsed = time.perf_counter() - start
+        await engine.stop()
+        await task
+
+        assert running["max"] == 3
+        assert elapsed < 12 * 0.05 / 2
+        for key in "abc":
+            assert [value for value in seen if value.startswith(key)] == [f"{key}:{i}" for i in range(4)]
+        assert await consumer.committed(TopicPartition(TOPIC, 0)) == 12
+
+    @pytest.mark.asyncio
+    async def test_commits_stop_at_first_unfinished_record(self):
+        """Test that a slow record holds back the commit and shows up as lag."""
+        broker = InMemoryBroker(partitions=1)
+        await produce(broker, ["slow", "fast"], per_key=3)
+        release = asyncio.Event()
+        flushed = []
+
+        async def handler(record):
+            if record.key == "slow":
+                await release.wait()
+
+        async def before_commit():
+            flushed.append(True)
+
+        consumer, engine, task = await start_engine(broker, handler, before_commit=before_commit)
+        await wait_for(lambda: engine.stats["processed"] == 3)
+        await asyncio.sleep(0.02)
+        # Offset 0 (slow) is unfinished, so nothing can be committed yet
+        assert consumer.commits == []
+        assert engine.get_stats()["lag"] == {f"{TOPIC}-0": 6}
+
+        release.set()
+        await wait_for(lambda: engine.stats["processed"] == 6)
+        await engine.stop()
+        await task
+        assert await consumer.committed(TopicPartition(TOPIC, 0)) == 6
+        assert len(flushed) == engine.stats["commits"] >= 1
+
+    @pytest.mark.asyncio
+    async def test_partition_paused_under_backpressure(self):
+        """Test that a partition is paused when its buffer fills and resumed when it drains."""
+        broker = InMemoryBroker(partitions=1)
+        await produce(broker, ["k"], per_key=10)
+        release = asyncio.Event()
+
+        async def handler(record):
+            await release.wait()
+
+        consumer, engine, task = await start_engine(broker, handler, max_buffered=4)
+        consumer.max_poll_records = 2
+        await wait_for(lambda: consumer.paused())
+        assert engine.get_stats()["buffered"] >= 4
+
+        release.set()
+        await wait_for(lambda: engine.stats["processed"] == 10)
+        assert not consumer.paused()
+        assert engine.stats["pauses"] >= 1
+        await engine.stop()
+        await task
+
+    @pytest.mark.asyncio
+    async def test_deferred_record_holds_commit_until_completed(self):
+        """Test that a deferred record holds back the commit without pausing its partition."""
+        broker = InMemoryBroker(partitions=1)
+        await produce(broker, ["k"], per_key=6)
+        deferred = []
+
+        async def handler(record):
+            if record.offset == 0:
+                deferred.append(record)
+                return DEFERRED
+
+        consumer, engine, task = await start_engine(broker, handler, max_buffered=2)
+        consumer.max_poll_records = 1
+        await wait_for(lambda: engine.stats["processed"] == 6)
+        await asyncio.sleep(0.02)
+        assert consumer.commits == [] and not consumer.paused()
+
+        engine.complete(deferred[0])
+        await wait_for(lambda: consumer.commits)
+        await engine.stop()
+        await task
+        assert await consumer.committed(TopicPartition(TOPIC, 0)) == 6
+
+
+class TestFailedRecords:
+    """Test retries, dead-lettering and shutdown while fetching."""
+
+    @pytest.mark.asyncio
+    async def test_retry_then_dead_letter_or_hold_commit(self):
+        """Test that failures are retried, dead-lettered records are committed and others hold the commit."""
+        broker = InMemoryBroker(partitions=1)
+        await produce(broker, ["flaky", "bad"], per_key=1)
+        attempts = {"flaky": 0, "bad": 0}
+        dead = []
+
+        async def handler(record):
+            attempts[record.key] = attempts.get(record.key, 0) + 1
+            if record.key == "bad" or (record.key == "flaky" and attempts["flaky"] < 3):
+                raise RuntimeError(f"{record.key} failed")
+
+        async def on_failure(record, error):
+            dead.append((record.key, str(error)))
+
+        consumer, engine, task = await start_engine(
+            broker, handler, max_attempts=3, retry_backoff_ms=1, on_failure=on_failure
+        )
+        await wait_for(lambda: engine.stats["processed"] + engine.stats["dead_lettered"] == 2)
+        await engine.stop()
+        await task
+        assert attempts == {"flaky": 3, "bad": 3}
+        attempts.clear()
+        assert dead == [("bad", "bad failed")]
+        assert engine.stats["retries"] == 4
+        assert await consumer.committed(TopicPartition(TOPIC, 0)) == 2
+
+        held = InMemoryBroker(partitions=1)
+        await produce(held, ["bad", "ok"], per_key=1)
+        consumer, engine, task = await start_engine(held, handler, max_attempts=1)
+        await wait_for(lambda: engine.stats["processed"] == 1 and engine.stats["failed"] == 1)
+        await engine.stop()
+        await task
+        # Offset 0 failed without a dead-letter hook: nothing past it is committed
+        assert await consumer.committed(TopicPartition(TOPIC, 0)) in (None, 0)
+        assert engine.stats["uncommitted_failures"] == 1
+
+    @pytest.mark.asyncio
+    async def test_batch_fetched_during_stop_is_not_dispatched(self):
+        """Test that records returned by a fetch that outlived stop() are left for redelivery."""
+        broker = InMemoryBroker(partitions=1)
+        await produce(broker, ["k"], per_key=2)
+        handled = []
+
+        async def handler(record):
+            handled.append(record.offset)
+
+        consumer = InMemoryKafkaConsumer(broker=broker, group_id="test", key_deserializer=bytes.decode)
+        engine = ConcurrentConsumer(consumer, handler, poll_timeout_ms=5, commit_interval_ms=1)
+        consumer.subscribe([TOPIC], listener=engine.rebalance_listener)
+        await consumer.start()
+        fetch = consumer.getmany
+
+        async def getmany_then_stop(**kwargs):
+            batches = await fetch(**kwargs)
+            await engine.stop()
+            return batches
+
+        consumer.getmany = getmany_then_stop
+        await engine.run()
+        assert handled == [] and engine.get_stats()["buffered"] == 0
+
+
+class TestStreamServiceConsumer:
+    """Test the stream service on the consumer engine."""
+
+    @pytest.mark.asyncio
+    async def test_offsets_committed_after_results_published(self, monkeypatch):
+        """Test that consumed chunks are committed once their results are delivered."""
+        monkeypatch.setattr("config.settings.kafka_commit_interval_ms", 1)
+        broker = InMemoryBroker(partitions=2)
+        service = KafkaStreamService(
+            producer_factory=lambda **kwargs: InMemoryKafkaProducer(broker=broker, **kwargs),
+            consumer_factory=lambda **kwargs: InMemoryKafkaConsumer(broker=broker, **kwargs),
+        )
+        processed = []
+
+        async def process(chunk):
+            processed.append(chunk["chunk_index"])
+            await service._send_transcription_result(
+                {
+                    "session_id": chunk["session_id"],
+                    "user_id": chunk["user_id"],
+                    "chunk_id": chunk["chunk_id"],
+                    "text": "hello",
+                    "confidence": 1.0,
+                    "language": "en",
+                    "timestamp": 0,
+                    "processing_time": 0.0,
+                    "model_name": "whisper",
+                    "status": "success",
+                    "error_message": None,
+                }
+            )
+
+        monkeypatch.setattr(service, "_process_audio_chunk", process)
+        await service.start_producers()
+        await service.start_consumer()
+        for index in range(6):
+            await service.send_audio_chunk(f"session-{index % 3}", "u1", b"\x00" * 64, chunk_index=index)
+        await service.flush()
+        await wait_for(lambda: len(processed) == 6)
+        await service.stop()
+
+        assert len(broker.records(service.transcription_topic)) == 6
+        committed = [broker.committed("voicebridge-transcription-group", service.audio_topic, p) or 0 for p in (0, 1)]
+        assert sum(committed) == 6
+
+    @pytest.mark.asyncio
+    async def test_chunk_with_missing_blob_is_dead_lettered(self, monkeypatch):
+        """Test that a chunk failing every attempt reaches the dead-letter topic and is committed."""
+        monkeypatch.setattr("config.settings.kafka_commit_interval_ms", 1)
+        monkeypatch.setattr("config.settings.kafka_handler_retry_backoff_ms", 1)
+        broker = InMemoryBroker(partitions=1)
+        service = KafkaStreamService(
+            producer_factory=lambda **kwargs: InMemoryKafkaProducer(broker=broker, **kwargs),
+            consumer_factory=lambda **kwargs: InMemoryKafkaConsumer(broker=broker, **kwargs),
+        )
+
+        async def process(chunk):
+            raise FileNotFoundError(f"blob for {chunk['chunk_id']} is on another host")
+
+        monkeypatch.setattr(service, "_process_audio_chunk", process)
+        await service.start_producers()
+        await service.start_consumer()
+        await service.send_audio_chunk("s1", "u1", b"\x00" * 64, chunk_index=0)
+        await service.flush()
+        await wait_for(lambda: service.consumer_engine.stats["dead_lettered"] == 1)
+        await service.stop()
+
+        dead = broker.records("voicebridge-audio-dlq")
+        assert [service._deserialize_audio_chunk(record.value)["chunk_id"] for record in dead] == ["s1:0"]
+        assert broker.committed("voicebridge-transcription-group", service.audio_topic, 0) == 1
+
+    @pytest.mark.asyncio
+    async def test_chunks_in_open_segment_are_committed_once_transcribed(self, monkeypatch):
+        """Test that chunks whose audio sits in an open VAD segment hold the commit until it closes."""
+        monkeypatch.setattr("config.settings.kafka_commit_interval_ms", 1)
+        monkeypatch.setattr(stream_module, "vad_service", VADService(enabled=True))
+        broker = InMemoryBroker(partitions=1)
+        service = KafkaStreamService(
+            producer_factory=lambda **kwargs: InMemoryKafkaProducer(broker=broker, **kwargs),
+            consumer_factory=lambda **kwargs: InMemoryKafkaConsumer(broker=broker, **kwargs),
+        )
+        service.idempotency_store = IdempotencyStore()
+        transcribed = []
+
+        async def transcribe(audio_data, language=None):
+            transcribed.append(audio_data)
+            return {"text": "hello", "confidence": 1.0, "language": "en"}
+
+        monkeypatch.setattr(service.whisper_service, "transcribe_audio_bytes", transcribe)
+        await service.start_producers()
+        await service.start_consumer()
+        chunks = speech_chunks()
+        for index, chunk in enumerate(chunks[:4]):
+            await service.send_audio_chunk("s1", "u1", chunk, format="pcm_s16le", chunk_index=index)
+        await service.flush()
+        await wait_for(lambda: service.consumer_engine.stats["processed"] == 4)
+        await asyncio.sleep(0.02)
+        # Chunks 2 and 3 carry the speech, still an open segment that reaches back into chunk 1
+        assert transcribed == []
+        assert broker.committed("voicebridge-transcription-group", service.audio_topic, 0) == 1
+
+        await service.send_audio_chunk("s1", "u1", chunks[4], format="pcm_s16le", chunk_index=4)
+        await service.flush()
+        # The pause closed the segment; chunk 4 ends in a partial frame the gate still holds
+        await wait_for(lambda: broker.committed("voicebridge-transcription-group", service.audio_topic, 0) == 4)
+        await service.send_audio_chunk("s1", "u1", chunks[5], format="pcm_s16le", chunk_index=5, is_final=True)
+        await service.flush()
+        await wait_for(lambda: broker.committed("voicebridge-transcription-group", service.audio_topic, 0) == 6)
+        await service.stop()
+        results = broker.records(service.transcription_topic)
+        assert len(transcribed) == 1
+        assert [service._deserialize_transcription_result(r.value)["chunk_id"] for r in results] == ["s1:4"]
+
+    @pytest.mark.asyncio
+    async def test_held_chunks_are_transcribed_after_a_crash(self, monkeypatch):
+        """Test that chunks lost with an open segment are not marked processed and are redelivered."""
+        monkeypatch.setattr("config.settings.kafka_commit_interval_ms", 1)
+        broker = InMemoryBroker(partitions=1)
+        store = IdempotencyStore()
+        transcribed = []
+
+        async def transcribe(audio_data, language=None):
+            transcribed.append(audio_data)
+            return {"text": "hello", "confidence": 1.0, "language": "en"}
+
+        def start_service():
+            monkeypatch.setattr(stream_module, "vad_service", VADService(enabled=True))
+            service = KafkaStreamService(
+                producer_factory=lambda **kwargs: InMemoryKafkaProducer(broker=broker, **kwargs),
+                consumer_factory=lambda **kwargs: InMemoryKafkaConsumer(broker=broker, **kwargs),
+            )
+            service.idempotency_store = store
+            monkeypatch.setattr(service.whisper_service, "transcribe_audio_bytes", transcribe)
+            return service
+
+        chunks = speech_chunks()
+        service = start_service()
+        await service.start_producers()
+        await service.start_consumer()
+        for index, chunk in enumerate(chunks[:4]):
+            await service.send_audio_chunk("s1", "u1", chunk, format="pcm_s16le", chunk_index=index)
+        await service.flush()
+        await wait_for(lambda: service.consumer_engine.stats["processed"] == 4)
+        assert await store.seen("s1:0")
+        assert not any([await store.seen(f"s1:{index}") for index in (1, 2, 3)])
+        # The node goes down with the speech still in its gate
+        await service.stop()
+
+        service = start_service()
+        await service.start_producers()
+        await service.start_consumer()
+        for index, chunk in enumerate(chunks[4:], start=4):
+            await service.send_audio_chunk("s1", "u1", chunk, format="pcm_s16le", chunk_index=index, is_final=index == 5)
+        await service.flush()
+        await wait_for(lambda: broker.committed("voicebridge-transcription-group", service.audio_topic, 0) == 6)
+        await service.stop()
+        assert len(transcribed) == 1
+        assert all([await store.seen(f"s1:{index}") for index in range(6)])
@@ -0,0 +1,114 @@
+"""
+Kafka producer outbox test suite.
+"""
+import asyncio
+import base64
+import json
+import threading
+import time
+
+import pytest
+from kafka.errors import KafkaTimeoutError
+from kafka.future import Future
+from kafka.producer.future import RecordMetadata
+
+from src.services.kafka_producer import KafkaProducer
+
+
+class FakeClient:
+    """Synchronous client double that acknowledges from a timer thread like kafka-python's I/O thread."""
+
+    def __init__(self, ack_delay: float = 0.0, fail: bool = False, block: threading.Event = None, **config):
+        self.config = config
+        self.ack_delay = ack_delay
+        self.fail = fail
+        self.block = block
+        self.sent = []
+        self.closed = False
+        self._timers = []
+
+    def send(self, topic, value=None, key=None):
+        if self.block is not None:
+            self.block.wait()
+        self.sent.append((topic, self.config["key_serializer"](key), self.config["value_serializer"](value)))
+        future = Future()
+        if self.fail:
+            complete = lambda: future.failure(KafkaTimeoutError("no ack"))  # noqa: E731
+        else:
+            metadata = RecordMetadata(topic, 0, None, len(self.sent) - 1, 0, 0, None, 0, 0, 0)
+            complete = lambda: future.success(metadata)  # noqa: E731
+        timer = threading.Timer(self.ack_delay, complete)
+        timer.start()
+        self._timers.append(timer)
+        return future
+
+    def flush(self, timeout=None):
+        for timer in self._timers:
+            timer.join(timeout)
+
+    def close(self):
+        self.closed = True
+
+
+async def start_producer(**client_options) -> KafkaProducer:
+    outbox_options = {
+        name: client_options.pop(name) for name in ("outbox_size", "batch_size") if name in client_options
+    }
+    producer = KafkaProducer(client_factory=lambda **config: FakeClient(**client_options, **config), **outbox_options)
+    await producer.start()
+    return producer
+
+
+class TestKafkaProducerOutbox:
+    """Test non-blocking sends, acknowledgements and shutdown."""
+
+    @pytest.mark.asyncio
+    async def test_send_returns_before_ack_and_stop_flushes(self):
+        """Test that a send is queued without waiting and delivered by shutdown."""
+        producer = await start_producer(ack_delay=0.2)
+        assert producer.producer.config["acks"] == "all"
+
+        start = time.perf_counter()
+        assert await producer.send_audio({"filename": "a.wav", "content": b"\x00\xff"})
+        assert time.perf_counter() - start < 0.05
+        assert producer.stats["enqueued"] == 1 and producer.stats["delivered"] == 0
+
+        client = producer.producer
+        await producer.stop()
+        assert client.closed
+        assert producer.get_stats() == {"enqueued": 1, "delivered": 1, "failed": 0, "dropped": 0, "outbox": 0}
+        topic, key, value = client.sent[0]
+        assert key == b"a.wav"
+        assert base64.b64decode(json.loads(value)["data"]["content"]) == b"\x00\xff"
+
+    @pytest.mark.asyncio
+    async def test_wait_for_acknowledgement(self):
+        """Test that wait=True reports the broker outcome."""
+        producer = await start_producer(ack_delay=0.01)
+        assert await producer.send_transcription_result({"task_id": "t1", "text": "hi"}, wait=True)
+        assert producer.stats["delivered"] == 1
+        await producer.stop()
+
+        failing = await start_producer(fail=True)
+        assert not await failing.send_audio({"filename": "b.wav"}, wait=True)
+        assert failing.stats["failed"] == 1
+        await failing.stop()
+
+    @pytest.mark.asyncio
+    async def test_full_outbox_rejects_without_blocking(self):
+        """Test that a stalled client fills the bounded outbox and further sends are dropped."""
+        block = threading.Event()
+        producer = await start_producer(block=block, outbox_size=2, batch_size=1)
+        try:
+            assert await producer.send_audio_stream({"client_id": "c0"})
+            await asyncio.sleep(0.05)  # the first message is now stuck in the client
+            for index in (1, 2):
+                assert await producer.send_audio_stream({"client_id": f"c{index}"})
+            start = time.perf_counter()
+            assert not await producer.send_audio_stream({"client_id": "c3"})
+            assert time.perf_counter() - start < 0.05
+            assert producer.stats["dropped"] == 1
+        finally:
+            block.set()
+        await producer.stop()
+        assert producer.stats["delivered"] == 3
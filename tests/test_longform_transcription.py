@@ -0,0 +1,134 @@
+"""
+Long-form transcription test suite.
+"""
+import asyncio
+import io
+import time
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from src.services.audio_frame import as_audio_frame
+from src.services.longform_transcription_service import (
+    LongFormTranscriptionService,
+    plan_segments,
+    remove_overlap,
+    stitch_results,
+    transcribe_long_audio_sync,
+)
+
+SAMPLE_RATE = 16000
+
+
+def bursts(pattern, seed: int = 0) -> np.ndarray:
+    """Build audio from (seconds, loud) pairs."""
+    rng = np.random.default_rng(seed)
+    return np.concatenate(
+        [
+            rng.standard_normal(int(seconds * SAMPLE_RATE)).astype(np.float32) * (0.3 if loud else 0.005)
+            for seconds, loud in pattern
+        ]
+    )
+
+
+class RecordingBackend:
+    """Backend that sleeps and reports the segment length it was given."""
+
+    def __init__(self, delay: float = 0.05):
+        self.delay = delay
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.calls = 0
+
+    async def transcribe_audio_bytes(self, audio_bytes, language: str = "en"):
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+            frame = as_audio_frame(audio_bytes)
+            return {"text": f"segment of {frame.duration:.1f} seconds", "confidence": 0.9, "language": language}
+        finally:
+            self.in_flight -= 1
+
+
+class TestLongFormTranscription:
+    """Test planning, fan-out and stitching."""
+
+    def test_plan_splits_at_silence_and_caps_length(self):
+        """Test silence splits and overlapping windows for long speech."""
+        audio = bursts([(1.0, False), (2.0, True), (1.0, False), (7.0, True), (1.0, False)])
+        windows = plan_segments(audio, SAMPLE_RATE, max_segment_seconds=3.0, overlap_seconds=0.5, padding_seconds=0.0)
+
+        assert windows[0][2] is False
+        assert all((end - start) <= 3.0 * SAMPLE_RATE for start, end, _ in windows)
+        assert len(windows) == 1 + 3
+        assert [w[2] for w in windows[1:]] == [False, True, True]
+        assert windows[2][0] == windows[1][1] - int(0.5 * SAMPLE_RATE)
+
+    def test_remove_overlap(self):
+        """Test de-duplication of words repeated across a window boundary."""
+        assert remove_overlap("the quick brown fox", "Brown fox, jumps over") == "jumps over"
+        assert remove_overlap("hello world", "something else") == "something else"
+        assert remove_overlap("", "text") == "text"
+
+    def test_stitch_results(self):
+        """Test stitched text, timestamps, confidence and errors."""
+        windows = [(0, 16000, False), (32000, 64000, False), (56000, 80000, True)]
+        results = [
+            {"text": "hello there", "confidence": 1.0},
+            {"text": "how are you doing", "confidence": 0.5},
+            {"text": "you doing today", "confidence": 0.5},
+        ]
+        stitched = stitch_results(windows, results, SAMPLE_RATE)
+
+        assert stitched["text"] == "hello there how are you doing today"
+        assert stitched["segments"][1]["start_time"] == 2.0
+        assert stitched["confidence"] == pytest.approx((1.0 + 0.5 * 2 + 0.5 * 1.5) / 4.5)
+
+        failed = stitch_results(windows[:1], [{"text": "", "error": "boom"}], SAMPLE_RATE)
+        assert failed["error"] == "boom"
+
+    @pytest.mark.asyncio
+    async def test_segments_run_concurrently(self):
+        """Test bounded fan-out: latency follows the longest segment, not the total."""
+        audio = bursts([(0.5, False)] + [(1.0, True), (0.6, False)] * 8)
+        backend = RecordingBackend(delay=0.1)
+        service = LongFormTranscriptionService(backend, max_concurrency=4, min_duration_seconds=5.0)
+
+        start = time.perf_counter()
+        result = await service.transcribe_array(audio)
+        elapsed = time.perf_counter() - start
+
+        assert result["long_form"] is True
+        assert backend.calls == 8
+        assert backend.max_in_flight == 4
+        assert elapsed < 8 * 0.1
+        assert len(result["segments"]) == 8
+        assert result["segments"] == sorted(result["segments"], key=lambda s: s["start_time"])
+
+    @pytest.mark.asyncio
+    async def test_short_audio_goes_straight_to_backend(self):
+        """Test the pass-through for short and undecodable audio."""
+        backend = RecordingBackend(delay=0.0)
+        service = LongFormTranscriptionService(backend, min_duration_seconds=30.0)
+
+        buffer = io.BytesIO()
+        sf.write(buffer, bursts([(2.0, True)]), SAMPLE_RATE, format="WAV")
+        result = await service.transcribe_audio_bytes(buffer.getvalue())
+        assert "long_form" not in result
+        assert backend.calls == 1
+
+    def test_sync_variant(self):
+        """Test the thread-pool variant used by Celery."""
+        audio = bursts([(0.5, False), (1.0, True), (0.6, False), (1.0, True), (0.5, False)])
+        result = transcribe_long_audio_sync(
+            audio,
+            SAMPLE_RATE,
+            lambda segment, rate: {"text": f"{len(segment) / rate:.0f}s", "confidence": 0.8},
+            max_workers=2,
+            max_segment_seconds=30.0,
+        )
+        assert result["segment_count"] == 2
+        assert result["confidence"] == pytest.approx(0.8)
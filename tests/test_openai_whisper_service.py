@@ -0,0 +1,44 @@
+"""
+OpenAI Whisper backend test suite.
+"""
+import os
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from src.services.audio_frame import AudioFrame, as_audio_bytes
+from src.services.openai_whisper_service import OpenAIWhisperService
+
+
+class FakeTranscriptions:
+    def __init__(self):
+        self.filenames = []
+
+    async def create(self, model, file, language, response_format):
+        self.filenames.append(os.path.basename(file.name))
+        return SimpleNamespace(text="hello", duration=1.0, segments=[])
+
+
+def make_service() -> OpenAIWhisperService:
+    service = OpenAIWhisperService(api_key="test-key")
+    service.client = SimpleNamespace(audio=SimpleNamespace(transcriptions=FakeTranscriptions()))
+    return service
+
+
+class TestOpenAIWhisperUpload:
+    """Test the file sent to the Whisper API."""
+
+    @pytest.mark.asyncio
+    async def test_upload_is_named_after_its_container(self):
+        """Test that WAV payloads are uploaded as .wav and unrecognized ones as .webm."""
+        service = make_service()
+        wav_bytes = as_audio_bytes(AudioFrame.from_array(np.zeros(1600, dtype=np.float32), 16000))
+
+        result = await service.transcribe_audio_bytes(wav_bytes)
+        await service.transcribe_audio_bytes(b"headerless media recorder chunk")
+
+        assert result["text"] == "hello"
+        filenames = service.client.audio.transcriptions.filenames
+        assert filenames[0].endswith(".wav")
+        assert filenames[1].endswith(".webm")
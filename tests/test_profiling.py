@@ -0,0 +1,112 @@
+"""
+Profiling hooks test suite.
+"""
+import threading
+import time
+
+import pytest
+
+from src.services import profiling_service
+from src.services.profiling_service import (
+    SamplingProfiler,
+    set_profiling_enabled,
+    span,
+    timed,
+)
+from src.services.prometheus_service import prometheus_metrics
+
+
+def _stage_count(stage: str) -> float:
+    value = prometheus_metrics.registry.get_sample_value("voicebridge_stage_duration_seconds_count", {"stage": stage})
+    return value or 0.0
+
+
+class TestSpans:
+    """Test stage timing spans."""
+
+    def setup_method(self):
+        set_profiling_enabled(True)
+
+    def teardown_method(self):
+        set_profiling_enabled(profiling_service.settings.profiling_enabled)
+
+    def test_span_records_histogram(self):
+        """Test that a span observes one sample for its stage."""
+        before = _stage_count("test_span")
+        with span("test_span"):
+            time.sleep(0.001)
+        assert _stage_count("test_span") == before + 1
+
+    def test_span_records_on_exception(self):
+        """Test that failing blocks are still timed."""
+        before = _stage_count("test_span_error")
+        with pytest.raises(ValueError):
+            with span("test_span_error"):
+                raise ValueError("boom")
+        assert _stage_count("test_span_error") == before + 1
+
+    def test_disabled_span_is_noop(self):
+        """Test that nothing is recorded while profiling is disabled."""
+        set_profiling_enabled(False)
+        before = _stage_count("test_disabled")
+        with span("test_disabled"):
+            pass
+        assert span("a") is span("b")
+        assert _stage_count("test_disabled") == before
+
+    @pytest.mark.asyncio
+    async def test_timed_decorator(self):
+        """Test the decorator on sync and async functions."""
+
+        @timed("test_timed_sync")
+        def add(a, b):
+            return a + b
+
+        @timed("test_timed_async")
+        async def double(x):
+            return x * 2
+
+        before_sync = _stage_count("test_timed_sync")
+        before_async = _stage_count("test_timed_async")
+
+        assert add(1, 2) == 3
+        assert await double(4) == 8
+        assert add.__name__ == "add"
+        assert _stage_count("test_timed_sync") == before_sync + 1
+        assert _stage_count("test_timed_async") == before_async + 1
+
+
+class TestSamplingProfiler:
+    """Test the sampling profiler."""
+
+    def test_capture_folded_stacks(self):
+        """Test that a busy thread shows up in the folded output."""
+        stop = threading.Event()
+
+        def busy_loop():
+            while not stop.is_set():
+                sum(range(1000))
+
+        worker = threading.Thread(target=busy_loop, name="busy-worker")
+        worker.start()
+        try:
+            stacks = SamplingProfiler().capture(0.2, interval=0.005)
+        finally:
+            stop.set()
+            worker.join()
+
+        folded = SamplingProfiler.to_folded(stacks)
+        assert any(stack.startswith("busy-worker;") and "busy_loop" in stack for stack in stacks)
+        assert folded.splitlines()[0].rsplit(" ", 1)[1].isdigit()
+
+    def test_concurrent_capture_rejected(self):
+        """Test that only one capture runs at a time."""
+        profiler = SamplingProfiler()
+        worker = threading.Thread(target=profiler.capture, args=(0.3,))
+        worker.start()
+        time.sleep(0.05)
+        try:
+            with pytest.raises(profiling_service.ProfilerBusyError):
+                profiler.capture(0.1)
+        finally:
+            worker.join()
@@ -0,0 +1,95 @@
+"""
+Resampler test suite.
+"""
+import io
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from src.services.resampler import (
+    StreamingResampler,
+    get_kernel,
+    resample,
+    resample_polyphase,
+)
+from src.services.vad_service import VADConfig, VADService
+
+
+def sine(seconds: float, sample_rate: int, frequency: float = 440.0) -> np.ndarray:
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    return (0.5 * np.sin(2 * np.pi * frequency * t)).astype(np.float32)
+
+
+class TestResampler:
+    """Test cached-kernel and streaming resampling."""
+
+    @pytest.mark.parametrize("src_rate,dst_rate", [(48000, 16000), (44100, 16000), (8000, 16000), (16000, 8000)])
+    def test_polyphase_accuracy(self, src_rate, dst_rate):
+        """Test output length and accuracy against the analytic signal."""
+        audio = sine(1.0, src_rate)
+        output = resample_polyphase(audio, src_rate, dst_rate)
+
+        assert output.dtype == np.float32
+        assert len(output) == int(np.ceil(len(audio) * dst_rate / src_rate))
+        expected = sine(1.0, dst_rate)[: len(output)]
+        # Away from the abrupt start and end of the test tone
+        assert np.max(np.abs(output - expected)[100:-100]) < 1e-4
+
+    @pytest.mark.parametrize("src_rate,dst_rate", [(48000, 16000), (44100, 16000), (22050, 16000)])
+    def test_streaming_matches_one_shot(self, src_rate, dst_rate):
+        """Test that chunk boundaries leave no trace in the output."""
+        rng = np.random.default_rng(0)
+        audio = rng.standard_normal(src_rate * 2).astype(np.float32)
+
+        resampler = StreamingResampler(src_rate, dst_rate)
+        parts, position = [], 0
+        while position < len(audio):
+            size = int(rng.integers(1, 3000))
+            parts.append(resampler.process(audio[position : position + size]))
+            position += size
+        # The look-ahead still owed is exactly what flush emits
+        pending = resampler.pending
+        parts.append(resampler.flush())
+        assert parts[-1].size == pending and resampler.pending == 0
+
+        np.testing.assert_array_equal(np.concatenate(parts), resample_polyphase(audio, src_rate, dst_rate))
+
+    def test_kernels_are_cached(self):
+        """Test that kernels are designed once per rate pair and quality."""
+        assert get_kernel(48000, 16000, "medium") is get_kernel(48000, 16000, "medium")
+        assert get_kernel(48000, 16000, "high") is not get_kernel(48000, 16000, "medium")
+
+        kernel = get_kernel(48000, 16000, "medium")
+        assert (kernel.up, kernel.down) == (1, 3)
+        assert StreamingResampler(48000, 16000).kernel is kernel
+
+        with pytest.raises(ValueError):
+            get_kernel(48000, 16000, "ultra")
+
+    def test_same_rate_is_passthrough(self):
+        """Test that matching rates return the input unchanged."""
+        audio = sine(0.1, 16000)
+        assert resample(audio, 16000, 16000) is audio
+        assert len(resample(sine(1.0, 48000), 48000, 16000)) == 16000
+
+    def test_vad_resamples_streamed_chunks(self):
+        """Test that 48 kHz streamed chunks reach the VAD at its own rate."""
+        vad = VADService(VADConfig(), enabled=True)
+        rng = np.random.default_rng(0)
+        quiet = (rng.standard_normal(48000) * 0.001).astype(np.float32)
+        t = np.arange(48000) / 48000
+        voiced = (0.2 * sum(np.sin(2 * np.pi * 140 * k * t) / k for k in range(1, 8))).astype(np.float32)
+        audio = np.concatenate([quiet, voiced, quiet])
+
+        segments = []
+        for start in range(0, len(audio), 4800):
+            buffer = io.BytesIO()
+            sf.write(buffer, audio[start : start + 4800], 48000, format="WAV", subtype="FLOAT")
+            segments += vad.process_bytes("s", buffer.getvalue())
+        segments += vad.end_session("s")
+
+        assert len(segments) == 1
+        assert segments[0].sample_rate == 16000
+        assert 0.8 <= segments[0].start_time <= 1.0
+        assert 2.0 <= segments[0].end_time <= 2.4
@@ -0,0 +1,160 @@
+"""
+Streaming feature extraction test suite.
+"""
+import numpy as np
+import pytest
+
+from src.services.audio_preprocessing_service import AudioPreprocessingService
+from src.services.feature_engine import ALL_FEATURES, FeatureEngine
+from src.services.ingest_format import IngestFormat
+from src.services.streaming_features import (
+    RunningStatistics,
+    StreamingFeatureExtractor,
+    StreamingFeatureService,
+)
+from src.services.vad_service import VADConfig, VADService
+
+SAMPLE_RATE = 16000
+
+
+def signal(seconds: float = 3.0, seed: int = 0) -> np.ndarray:
+    """Modulated tone over a noise floor (keeps every frame within 80 dB of the peak)."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * SAMPLE_RATE) + 123) / SAMPLE_RATE
+    tone = 0.3 * np.sin(2 * np.pi * 220 * t) * (1 + np.sin(2 * np.pi * 0.7 * t))
+    return (tone + 0.01 * rng.standard_normal(t.size)).astype(np.float32)
+
+
+def stream(extractor: StreamingFeatureExtractor, audio: np.ndarray, seed: int = 1) -> dict:
+    """Feed audio in random chunk sizes and concatenate the emitted frames."""
+    rng = np.random.default_rng(seed)
+    outputs, position = [], 0
+    while position < audio.size:
+        size = int(rng.integers(1, 3000))
+        outputs.append(extractor.process(audio[position : position + size]))
+        position += size
+    outputs.append(extractor.flush())
+    return {name: np.concatenate([o[name] for o in outputs if name in o], axis=-1) for name in extractor.features}
+
+
+class TestStreamingFeatureExtractor:
+    """Test incremental extraction against the offline engine."""
+
+    def test_matches_offline_engine(self):
+        """Test that chunked extraction gives the whole-recording frames."""
+        audio = signal()
+        engine = FeatureEngine(SAMPLE_RATE, tuning=0.0)
+        streamed = stream(StreamingFeatureExtractor(engine), audio)
+        offline = engine.extract(audio)
+
+        for name in ALL_FEATURES:
+            assert streamed[name].shape == offline[name].shape, name
+        np.testing.assert_allclose(streamed["mfcc"], offline["mfcc"], atol=1e-3)
+        for name in ("spectral_centroid", "spectral_bandwidth", "spectral_rolloff"):
+            np.testing.assert_allclose(streamed[name], offline[name], rtol=1e-4)
+        np.testing.assert_array_equal(streamed["zero_crossing_rate"], offline["zero_crossing_rate"])
+        np.testing.assert_allclose(streamed["chroma"], offline["chroma"], atol=1e-5)
+        np.testing.assert_allclose(streamed["tonnetz"], offline["tonnetz"], atol=1e-5)
+
+    def test_summary_matches_feature_statistics(self):
+        """Test that running statistics match _calculate_feature_statistics."""
+        audio = signal(seconds=2.0)
+        engine = FeatureEngine(SAMPLE_RATE, tuning=0.0)
+        extractor = StreamingFeatureExtractor(engine)
+        stream(extractor, audio)
+
+        offline = engine.extract(audio)
+        service = AudioPreprocessingService.__new__(AudioPreprocessingService)
+        expected = service._calculate_feature_statistics(offline.pop("mfcc"), offline)
+        summary = extractor.summary()
+
+        assert set(summary) == set(expected)
+        for key, value in expected.items():
+            np.testing.assert_allclose(summary[key], value, rtol=1e-3, atol=1e-3, err_msg=key)
+
+    def test_subset_and_short_session(self):
+        """Test a feature subset on a session shorter than the delta window."""
+        extractor = StreamingFeatureExtractor(FeatureEngine(SAMPLE_RATE), features=["spectral_centroid", "mfcc"])
+        audio = signal(seconds=0.1)
+        held = extractor.process(audio)
+        assert held["mfcc"].shape == (39, 0)  # deltas wait for a full window or the end of the stream
+        frames = extractor.flush()
+
+        assert set(frames) == {"mfcc", "spectral_centroid"}
+        assert frames["mfcc"].shape == (39, 1 + audio.size // 512)
+        assert np.all(np.isfinite(frames["mfcc"]))
+        assert extractor.frame_count == frames["spectral_centroid"].shape[-1]
+
+        with pytest.raises(ValueError):
+            StreamingFeatureExtractor(features=["pitch"])
+
+    def test_running_statistics(self):
+        """Test block-merged Welford statistics against NumPy."""
+        data = np.random.default_rng(2).standard_normal((3, 500)) * 5 + 10
+        running = RunningStatistics()
+        for start in range(0, 500, 37):
+            running.update(data[:, start : start + 37])
+
+        np.testing.assert_allclose(running.mean, data.mean(axis=1))
+        np.testing.assert_allclose(running.std, data.std(axis=1))
+        np.testing.assert_array_equal(running.min, data.min(axis=1))
+        assert running.count == 500
+
+
+class TestStreamingFeatureService:
+    """Test per-session summaries."""
+
+    def test_end_session_summary(self):
+        """Test that ending a session flushes it and sends its summary to the sink."""
+        received = []
+        service = StreamingFeatureService(features=["mfcc", "zero_crossing_rate"], summary_sink=received.append)
+        audio = signal(seconds=1.0)
+        for start in range(0, audio.size, 1600):
+            service.process("s1", audio[start : start + 1600])
+
+        summary = service.end_session("s1")
+        assert received == [summary]
+        assert summary["frame_count"] == 1 + audio.size // 512
+        assert summary["audio_duration"] == pytest.approx(audio.size / SAMPLE_RATE)
+        assert len(summary["features"]["mfcc_mean"]) == 39
+        assert isinstance(summary["features"]["zero_crossing_rate_max"], float)
+        assert service.end_session("s1") is None
+        assert service.get_stats()["sessions_completed"] == 1
+
+    def test_vad_service_feeds_features(self):
+        """Test that the VAD gate feeds session audio to the feature service."""
+        received = []
+        features = StreamingFeatureService(features=["spectral_centroid"], summary_sink=received.append)
+        vad = VADService(VADConfig(sample_rate=SAMPLE_RATE), enabled=True, feature_service=features)
+
+        audio = signal(seconds=1.0)
+        for start in range(0, audio.size, 1600):
+            vad.process("client", audio[start : start + 1600])
+        assert "client" in features.sessions
+
+        vad.end_session("client")
+        assert received[0]["session_id"] == "client"
+        assert received[0]["frame_count"] == 1 + audio.size // 512
+        assert not features.sessions
+
+    def test_vad_service_skips_features_without_sink(self):
+        """Test that no features are extracted while nothing receives the summary."""
+        features = StreamingFeatureService(features=["spectral_centroid"])
+        vad = VADService(VADConfig(sample_rate=SAMPLE_RATE), enabled=True, feature_service=features)
+
+        vad.process("client", signal(seconds=0.5))
+        assert not features.sessions
+        vad.end_session("client")
+        assert features.get_stats()["sessions_completed"] == 0
+
+    def test_flush_feeds_raw_tail_to_features(self):
+        """Test that the ring-buffer tail flushed at session end reaches the feature service."""
+        received = []
+        features = StreamingFeatureService(features=["spectral_centroid"], summary_sink=received.append)
+        vad = VADService(VADConfig(sample_rate=SAMPLE_RATE), enabled=True, feature_service=features)
+
+        audio = signal(seconds=0.5)[:7001]
+        pcm = (audio * 32767).astype("<i2").tobytes()
+        vad.process_frames("client", pcm, IngestFormat("pcm_s16le", SAMPLE_RATE, 1))
+        vad.end_session("client")
+        assert received[0]["audio_duration"] == pytest.approx(audio.size / SAMPLE_RATE)
@@ -0,0 +1,66 @@
+"""
+Stub transcription backend test suite.
+"""
+import asyncio
+
+import pytest
+
+from src.services.stub_transcription_service import StubTranscriptionService
+
+
+class TestStubTranscriptionService:
+    """Test the deterministic stub backend."""
+
+    @pytest.mark.asyncio
+    async def test_output_is_deterministic(self):
+        """Test that text depends only on the audio bytes."""
+        first = StubTranscriptionService()
+        second = StubTranscriptionService(seed=123)
+
+        a = await first.transcribe_audio_bytes(b"audio-a")
+        b = await second.transcribe_audio_bytes(b"audio-a")
+        c = await first.transcribe_audio_bytes(b"audio-b")
+
+        assert a["text"] == b["text"]
+        assert a["confidence"] == b["confidence"]
+        assert a["text"] != c["text"]
+        assert a["provider"] == "stub"
+
+    def test_latency_distributions(self):
+        """Test fixed, zero and seeded random latencies."""
+        assert StubTranscriptionService(latency_ms=0).sample_latency() == 0.0
+        assert StubTranscriptionService(latency_ms=25).sample_latency() == pytest.approx(0.025)
+
+        for distribution in ("uniform", "normal", "lognormal"):
+            one = StubTranscriptionService(distribution, latency_ms=50, latency_jitter_ms=10, seed=7)
+            two = StubTranscriptionService(distribution, latency_ms=50, latency_jitter_ms=10, seed=7)
+            samples = [one.sample_latency() for _ in range(20)]
+            assert samples == [two.sample_latency() for _ in range(20)]
+            assert all(s >= 0 for s in samples)
+
+    def test_invalid_configuration(self):
+        """Test that unknown distributions and error rates are rejected."""
+        with pytest.raises(ValueError):
+            StubTranscriptionService("pareto")
+        with pytest.raises(ValueError):
+            StubTranscriptionService(error_rate=1.5)
+
+    @pytest.mark.asyncio
+    async def test_error_injection(self):
+        """Test that injected errors follow the configured rate."""
+        service = StubTranscriptionService(error_rate=0.3, seed=1)
+        results = [await service.transcribe_audio_bytes(b"x") for _ in range(1000)]
+        errors = sum("error" in r for r in results)
+
+        assert 200 < errors < 400
+        assert service.stats["errors"] == errors
+
+    @pytest.mark.asyncio
+    async def test_concurrency_cap(self):
+        """Test that in-flight requests never exceed max_concurrency."""
+        service = StubTranscriptionService(latency_ms=10, max_concurrency=3)
+        await asyncio.gather(*(service.transcribe_audio_bytes(bytes([i])) for i in range(12)))
+
+        assert service.stats["requests"] == 12
+        assert service.stats["max_in_flight"] == 3
+        assert service.stats["in_flight"] == 0
@@ -0,0 +1,105 @@
+"""
+Voice activity detection gate test suite.
+"""
+import io
+
+import numpy as np
+import soundfile as sf
+
+from src.services.vad_service import VADConfig, VADService
+
+SAMPLE_RATE = 16000
+
+
+def voiced(seconds: float, f0: float = 140.0) -> np.ndarray:
+    """Harmonic tone standing in for voiced speech."""
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return (0.2 * sum(np.sin(2 * np.pi * f0 * k * t) / k for k in range(1, 8))).astype(np.float32)
+
+
+def silence(seconds: float, level: float = 0.001, seed: int = 0) -> np.ndarray:
+    """Low-level background noise."""
+    rng = np.random.default_rng(seed)
+    return (rng.standard_normal(int(seconds * SAMPLE_RATE)) * level).astype(np.float32)
+
+
+def wav_bytes(audio: np.ndarray) -> bytes:
+    buffer = io.BytesIO()
+    sf.write(buffer, audio, SAMPLE_RATE, format="WAV", subtype="PCM_16")
+    return buffer.getvalue()
+
+
+class TestVADService:
+    """Test the VAD gate."""
+
+    def test_silence_and_noise_are_dropped(self):
+        """Test that silence and broadband noise produce no segments."""
+        vad = VADService(VADConfig(), enabled=True)
+        assert vad.detect(silence(2.0)) == []
+        assert vad.detect(silence(2.0, level=0.05, seed=1)) == []
+
+    def test_speech_is_split_at_pauses(self):
+        """Test segment boundaries with pre-roll and hangover."""
+        vad = VADService(VADConfig(), enabled=True)
+        audio = np.concatenate([silence(1.0), voiced(1.0), silence(1.0), voiced(0.5), silence(1.0)])
+
+        segments = vad.detect(audio)
+
+        assert len(segments) == 2
+        assert 0.8 <= segments[0].start_time <= 1.0
+        assert 2.0 <= segments[0].end_time <= 2.4
+        assert 3.0 <= segments[1].start_time + 0.2 <= 3.2
+
+    def test_short_pause_stays_in_segment(self):
+        """Test that pauses shorter than the hangover do not split."""
+        vad = VADService(VADConfig(hangover_ms=300), enabled=True)
+        audio = np.concatenate([silence(0.5), voiced(0.5), silence(0.15), voiced(0.5), silence(1.0)])
+        assert len(vad.detect(audio)) == 1
+
+    def test_streaming_matches_batch(self):
+        """Test that chunked session processing gives the batch result."""
+        vad = VADService(VADConfig(), enabled=True)
+        audio = np.concatenate([silence(1.0), voiced(1.0), silence(1.0), voiced(0.5), silence(0.2)])
+
+        batch = [(s.start_time, s.end_time) for s in vad.detect(audio)]
+        streamed = []
+        for start in range(0, len(audio), 2777):
+            streamed += vad.process("session", audio[start : start + 2777])
+        streamed += vad.end_session("session")
+
+        assert [(s.start_time, s.end_time) for s in streamed] == batch
+        assert "session" not in vad.sessions
+
+    def test_long_speech_is_force_split(self):
+        """Test the maximum segment length."""
+        vad = VADService(VADConfig(max_segment_seconds=1.0), enabled=True)
+        segments = vad.detect(voiced(3.5))
+        assert len(segments) >= 3
+        assert all(s.duration <= 1.1 for s in segments)
+
+    def test_gate_passes_through_undecodable_audio(self):
+        """Test fail-open behaviour and the disabled switch."""
+        vad = VADService(VADConfig(), enabled=True)
+        webm = b"\x1a\x45\xdf\xa3" + b"\x00" * 64
+        assert vad.gate("s", webm) == [webm]
+        assert vad.should_transcribe(webm) is True
+        assert vad.stats["undecodable_chunks"] == 2
+
+        disabled = VADService(VADConfig(), enabled=False)
+        quiet = wav_bytes(silence(1.0))
+        assert disabled.gate("s", quiet) == [quiet]
+        assert disabled.should_transcribe(quiet) is True
+
+    def test_gate_emits_wav_segments(self):
+        """Test the byte-level gate used by the streaming endpoints."""
+        vad = VADService(VADConfig(), enabled=True)
+        assert vad.gate("s", wav_bytes(silence(1.0))) == []
+        assert vad.gate("s", wav_bytes(voiced(1.0))) == []
+        assert vad.is_speaking("s")
+
+        payloads = vad.gate("s", wav_bytes(silence(0.2)), final=True)
+        assert len(payloads) == 1
+        audio, rate = sf.read(io.BytesIO(payloads[0]))
+        assert rate == SAMPLE_RATE
+        assert 1.0 <= len(audio) / rate <= 1.5
+        assert vad.should_transcribe(wav_bytes(silence(1.0))) is False